@@ -7,7 +7,11 @@ from django.utils import timezone
 
 from .models import (
     Booking, BookingItem, Payment, BookingStatusHistory,
-    WhatsAppMessage, BookingAvailability
+    WhatsAppMessage, BookingAvailability, PaymentWebhookEvent,
+    PaymentReconciliationRun, PaymentReconciliationMismatch,
+    BulkRefundJob, BulkRefundItem, BookingDailyRollup,
+    SettlementBatch, PartnerPayoutStatement, CommissionLedgerEntry, BookingLifecycleRun,
+    InventoryHold, BookingPackage, PricingRule, PromoCode
 )
 
 
@@ -182,7 +186,7 @@ class BookingAvailabilityAdmin(admin.ModelAdmin):
 
     list_display = [
         'content_type', 'object_id', 'date', 'available_slots',
-        'booked_slots', 'remaining_slots', 'is_blocked'
+        'booked_slots', 'held_slots', 'remaining_slots', 'is_blocked'
     ]
     list_filter = ['content_type', 'is_blocked', 'date']
     search_fields = ['content_type', 'object_id', 'block_reason']
@@ -215,7 +219,217 @@ class WhatsAppMessageAdmin(admin.ModelAdmin):
 class BookingStatusHistoryAdmin(admin.ModelAdmin):
     """Admin interface for booking status history."""
 
-    list_display = ['booking', 'old_status', 'new_status', 'changed_by', 'created_at']
-    list_filter = ['old_status', 'new_status', 'created_at']
+    list_display = ['booking', 'old_status', 'new_status', 'changed_by', 'source', 'created_at']
+    list_filter = ['old_status', 'new_status', 'source', 'created_at']
     search_fields = ['booking__booking_number', 'reason']
     readonly_fields = ['created_at']
+
+
+@admin.register(PaymentWebhookEvent)
+class PaymentWebhookEventAdmin(admin.ModelAdmin):
+    """Admin interface for payment webhook events."""
+
+    list_display = ['event_id', 'event_type', 'order_id', 'status', 'attempts', 'created_at', 'processed_at']
+    list_filter = ['event_type', 'status', 'payment_gateway', 'created_at']
+    search_fields = ['event_id', 'order_id', 'gateway_payment_id']
+    readonly_fields = ['event_id', 'payload', 'created_at', 'processed_at']
+
+
+class PaymentReconciliationMismatchInline(admin.TabularInline):
+    model = PaymentReconciliationMismatch
+    extra = 0
+    fields = ['mismatch_type', 'order_id', 'gateway_payment_id', 'local_status', 'gateway_status', 'local_amount', 'gateway_amount', 'resolved']
+    readonly_fields = fields
+    show_change_link = True
+
+
+@admin.register(PaymentReconciliationRun)
+class PaymentReconciliationRunAdmin(admin.ModelAdmin):
+    """Admin interface for payment reconciliation runs."""
+
+    list_display = ['id', 'payment_gateway', 'window_start', 'window_end', 'status', 'dry_run', 'payments_fixed', 'mismatches_found', 'created_at']
+    list_filter = ['status', 'dry_run', 'payment_gateway']
+    readonly_fields = ['created_at', 'finished_at']
+    inlines = [PaymentReconciliationMismatchInline]
+
+
+@admin.register(PaymentReconciliationMismatch)
+class PaymentReconciliationMismatchAdmin(admin.ModelAdmin):
+    """Admin interface for payment reconciliation mismatches."""
+
+    list_display = ['order_id', 'gateway_payment_id', 'mismatch_type', 'local_status', 'gateway_status', 'resolved', 'created_at']
+    list_filter = ['mismatch_type', 'resolved']
+    search_fields = ['order_id', 'gateway_payment_id']
+    raw_id_fields = ['run', 'payment']
+    readonly_fields = ['details', 'created_at']
+
+
+@admin.register(BulkRefundJob)
+class BulkRefundJobAdmin(admin.ModelAdmin):
+    """Admin interface for bulk refund jobs."""
+
+    list_display = ['id', 'reason', 'status', 'total_items', 'refunded_items', 'skipped_items', 'failed_items', 'refunded_total', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['reason']
+    raw_id_fields = ['created_by']
+    readonly_fields = ['filters', 'started_at', 'finished_at', 'created_at']
+
+
+@admin.register(BulkRefundItem)
+class BulkRefundItemAdmin(admin.ModelAdmin):
+    """Admin interface for bulk refund items."""
+
+    list_display = ['job', 'booking', 'refund_amount', 'refund_percentage', 'status', 'attempts', 'refund_id', 'notified_at']
+    list_filter = ['status']
+    search_fields = ['booking__booking_number', 'refund_id']
+    raw_id_fields = ['job', 'booking', 'payment']
+    readonly_fields = ['gateway_response', 'created_at']
+
+
+@admin.register(BookingDailyRollup)
+class BookingDailyRollupAdmin(admin.ModelAdmin):
+    """Read-only view of booking rollups (rebuild with rebuild_booking_rollups)."""
+
+    list_display = ['date', 'booking_type', 'status', 'content_type', 'object_id', 'booking_count', 'total_amount', 'commission_amount']
+    list_filter = ['booking_type', 'status']
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class PartnerPayoutStatementInline(admin.TabularInline):
+    model = PartnerPayoutStatement
+    extra = 0
+    fields = ['partner_type', 'partner_id', 'booking_count', 'gross_amount', 'commission_amount', 'payout_amount', 'status']
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(SettlementBatch)
+class SettlementBatchAdmin(admin.ModelAdmin):
+    """Admin interface for settlement batches (run with run_settlement)."""
+
+    list_display = ['id', 'cutoff_date', 'status', 'statement_count', 'booking_count', 'gross_amount', 'commission_amount', 'payout_amount', 'created_at']
+    list_filter = ['status']
+    raw_id_fields = ['created_by']
+    readonly_fields = [
+        'status', 'started_at', 'finished_at', 'last_error', 'booking_count', 'statement_count',
+        'gross_amount', 'commission_amount', 'payout_amount', 'created_at'
+    ]
+    inlines = [PartnerPayoutStatementInline]
+
+
+@admin.register(PartnerPayoutStatement)
+class PartnerPayoutStatementAdmin(admin.ModelAdmin):
+    """Admin interface for partner payout statements."""
+
+    list_display = ['batch', 'partner_type', 'partner_id', 'booking_count', 'commission_amount', 'payout_amount', 'status', 'paid_at']
+    list_filter = ['status', 'partner_type']
+    search_fields = ['payout_reference']
+    raw_id_fields = ['batch']
+    readonly_fields = ['batch', 'partner_type', 'partner_id', 'booking_count', 'gross_amount', 'commission_amount', 'payout_amount', 'created_at']
+    actions = ['mark_paid']
+
+    def mark_paid(self, request, queryset):
+        """Mark selected statements as paid."""
+        updated = queryset.exclude(status='paid').update(status='paid', paid_at=timezone.now())
+        self.message_user(request, f'{updated} statements marked as paid.')
+    mark_paid.short_description = 'Mark selected statements as paid'
+
+
+@admin.register(CommissionLedgerEntry)
+class CommissionLedgerEntryAdmin(admin.ModelAdmin):
+    """Read-only commission ledger."""
+
+    list_display = ['booking', 'batch', 'partner_type', 'partner_id', 'commission_rate', 'gross_amount', 'commission_amount', 'payout_amount']
+    list_filter = ['partner_type']
+    search_fields = ['booking__booking_number']
+    raw_id_fields = ['batch', 'statement', 'booking']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BookingLifecycleRun)
+class BookingLifecycleRunAdmin(admin.ModelAdmin):
+    """Read-only history of lifecycle job runs (run with run_lifecycle_jobs)."""
+
+    list_display = ['job', 'status', 'dry_run', 'bookings_matched', 'bookings_changed', 'payments_expired', 'holds_released', 'chunks', 'max_chunk_ms', 'duration_ms', 'created_at']
+    list_filter = ['job', 'status', 'dry_run']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InventoryHold)
+class InventoryHoldAdmin(admin.ModelAdmin):
+    """Read-only view of checkout holds and booked inventory."""
+
+    list_display = ['booking', 'content_type', 'object_id', 'start_date', 'end_date', 'quantity', 'status', 'expires_at', 'oversold']
+    list_filter = ['status', 'content_type', 'oversold']
+    search_fields = ['booking__booking_number']
+    raw_id_fields = ['booking']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class PackageBookingInline(admin.TabularInline):
+    """Read-only inline for a package's component bookings."""
+    model = Booking
+    extra = 0
+    fields = ['booking_number', 'booking_type', 'status', 'total_amount']
+    readonly_fields = fields
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BookingPackage)
+class BookingPackageAdmin(admin.ModelAdmin):
+    """Admin interface for itinerary packages."""
+
+    list_display = ['package_number', 'guest_name', 'status', 'total_amount', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['package_number', 'guest_name', 'guest_email', 'guest_phone']
+    readonly_fields = ['package_id', 'package_number', 'total_amount', 'confirmed_at', 'cancelled_at', 'created_at', 'updated_at']
+    raw_id_fields = ['user']
+    inlines = [PackageBookingInline]
+
+
+@admin.register(PricingRule)
+class PricingRuleAdmin(admin.ModelAdmin):
+    """Admin interface for dynamic pricing rules."""
+
+    list_display = ['name', 'rule_type', 'content_type', 'object_id', 'adjustment_percent', 'valid_from', 'valid_to', 'is_active']
+    list_filter = ['rule_type', 'content_type', 'is_active']
+    search_fields = ['name']
+    fieldsets = (
+        (None, {'fields': ('name', 'rule_type', 'adjustment_percent', 'is_active')}),
+        ('Applies to', {'fields': ('content_type', 'object_id', 'valid_from', 'valid_to')}),
+        ('Thresholds', {'fields': ('min_nights', 'min_days_ahead', 'max_days_ahead', 'min_occupancy')}),
+    )
+
+
+@admin.register(PromoCode)
+class PromoCodeAdmin(admin.ModelAdmin):
+    """Admin interface for promo codes."""
+
+    list_display = ['code', 'discount_percent', 'discount_amount', 'content_type', 'object_id', 'times_used', 'max_uses', 'valid_to', 'is_active']
+    list_filter = ['is_active', 'content_type']
+    search_fields = ['code', 'description']
+    readonly_fields = ['times_used', 'created_at', 'updated_at']
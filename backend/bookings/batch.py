@@ -0,0 +1,251 @@
+"""
+Batch booking creation for WayanTrails agents and group itineraries.
+
+create_booking_batch() takes many booking payloads (the same shape as the
+single create endpoint) and:
+
+1. validates each with BookingCreateSerializer
+2. prices them together: one listing lookup per content type for names and
+   commission rates (settlement.get_listing_terms)
+3. checks availability for all of them in one pass
+   (inventory.check_batch_availability)
+4. takes a use of each booking's promo code (pricing.reserve_promo_use) and
+   inserts bookings, items and WhatsApp inquiries with one bulk_create each
+5. sends one notification fan-out once the batch commits
+
+In 'all_or_nothing' mode any failing booking rejects the whole batch; in
+'per_item' mode the valid bookings are created and the rest reported.
+Itinerary packages (bookings.packages) create their components through the
+same pipeline.
+"""
+import logging
+from datetime import datetime
+
+from django.db import transaction
+
+from .models import Booking, BookingItem, WhatsAppMessage
+
+logger = logging.getLogger(__name__)
+
+BATCH_MODES = ['all_or_nothing', 'per_item']
+
+
+def _validate(entries, context):
+    """Return ([(index, validated_data)], {index: errors})."""
+    from .serializers import BookingCreateSerializer
+
+    valid, errors = [], {}
+    for index, entry in enumerate(entries):
+        serializer = BookingCreateSerializer(data=entry, context=context)
+        if serializer.is_valid():
+            valid.append((index, dict(serializer.validated_data)))
+        else:
+            errors[index] = serializer.errors
+    return valid, errors
+
+
+def _build(valid, user, package=None):
+    """Build unsaved bookings and items, priced at their partners' rates."""
+    from .settlement import commission_for, get_listing_terms
+
+    for _, data in valid:
+        if data.get('content_type') is None:
+            data['content_type'] = data.get('booking_type')
+    terms = get_listing_terms({(data['content_type'], data.get('object_id')) for _, data in valid})
+
+    built = []
+    for index, data in valid:
+        items_data = data.pop('items', [])
+        name, rate = terms[(data['content_type'], data.get('object_id'))]
+        data['commission_amount'] = commission_for(
+            data.get('base_amount', 0) - data.get('discount_amount', 0), rate
+        )
+        booking = Booking(user=user, package=package, **data)
+        if name and booking.booking_type == booking.content_type:
+            booking.listing_name = name
+        items = [BookingItem(**item_data) for item_data in items_data]
+        built.append((index, booking, items))
+    return built
+
+
+def _check_availability(built):
+    """Return {index: error} for bookings without capacity on some night."""
+    from .inventory import check_batch_availability, hold_span
+
+    spans = [
+        (booking.content_type, booking.object_id, *hold_span(booking, items), booking.booking_time)
+        for _, booking, items in built
+    ]
+    return {
+        index: ['Not enough availability for the requested dates.']
+        for (index, _, _), available in zip(built, check_batch_availability(spans))
+        if not available
+    }
+
+
+def _reserve_promos(built):
+    """
+    Take a promo code use for each booking that has one. Returns {index: error}
+    for bookings whose code ran out; each reservation is its own savepoint.
+    """
+    from .pricing import PromoCodeError, reserve_promo_use
+
+    errors = {}
+    for index, booking, _ in built:
+        if not booking.promo_code:
+            continue
+        try:
+            with transaction.atomic():
+                reserve_promo_use(booking.promo_code)
+        except PromoCodeError as e:
+            errors[index] = [str(e)]
+    return errors
+
+
+def _failed(entries, errors):
+    """Results for a batch that creates nothing."""
+    return [
+        {'index': index, 'status': 'failed', 'errors': errors[index]}
+        if index in errors else {'index': index, 'status': 'skipped'}
+        for index in range(len(entries))
+    ]
+
+
+def _number(bookings):
+    """Assign WT-YYYY-NNNN booking numbers following the year's last one."""
+    year = datetime.now().year
+    last_number = Booking.objects.filter(
+        booking_number__startswith=f'WT-{year}-'
+    ).order_by('-booking_number').values_list('booking_number', flat=True).first()
+    next_num = int(last_number.split('-')[-1]) + 1 if last_number else 1
+    for offset, booking in enumerate(bookings):
+        booking.booking_number = f'WT-{year}-{next_num + offset:04d}'
+
+
+def _insert(built, whatsapp_message=None):
+    """Insert bookings, items and WhatsApp inquiries; returns the bookings."""
+    from .occupancy import invalidate_occupancy_for_bookings
+    from .reporting import refresh_rollups_for_bookings
+    from .state_machine import bulk_transition
+
+    bookings = [booking for _, booking, _ in built]
+    _number(bookings)
+
+    hybrid = [booking for booking in bookings if booking.booking_method == 'hybrid']
+    if whatsapp_message:
+        for booking in hybrid:
+            booking.whatsapp_message_sent = True
+            booking.whatsapp_message_text = whatsapp_message(booking)
+
+    Booking.objects.bulk_create(bookings)
+
+    items = []
+    for _, booking, booking_items in built:
+        for item in booking_items:
+            item.booking = booking
+            items.append(item)
+    BookingItem.objects.bulk_create(items)
+
+    if whatsapp_message:
+        WhatsAppMessage.objects.bulk_create([
+            WhatsAppMessage(
+                booking=booking,
+                message_type='booking_inquiry',
+                phone_number=booking.guest_phone,
+                message_text=booking.whatsapp_message_text
+            )
+            for booking in hybrid
+        ])
+
+    # bulk_create skips model signals
+    booking_ids = [booking.pk for booking in bookings]
+    refresh_rollups_for_bookings(booking_ids)
+    invalidate_occupancy_for_bookings(booking_ids)
+
+    # Online bookings are confirmed straight away, as in the single create;
+    # package components are confirmed with their package
+    online_ids = [
+        booking.pk for booking in bookings if booking.booking_method == 'online' and not booking.package_id
+    ]
+    if online_ids:
+        confirmed = set(bulk_transition(
+            Booking.objects.filter(pk__in=online_ids), 'confirmed', source='batch', chunk_size=len(online_ids)
+        ))
+        for booking in bookings:
+            if booking.pk in confirmed:
+                booking.status = 'confirmed'
+
+    return bookings
+
+
+def _notify(bookings):
+    """One email per guest covering all of their pending bookings in the batch."""
+    from .emails import send_batch_pending_emails
+
+    pending = [booking for booking in bookings if booking.booking_method == 'hybrid']
+    if pending:
+        try:
+            send_batch_pending_emails(pending)
+        except Exception as e:
+            logger.error(f"Error sending batch booking emails: {e}")
+
+
+def create_booking_batch(entries, context=None, mode='all_or_nothing', whatsapp_message=None, package=None):
+    """
+    Create many bookings in one request.
+
+    Args:
+        entries: Booking payloads, as accepted by BookingCreateSerializer
+        context: Serializer context (the request, for the booking user)
+        mode: 'all_or_nothing' or 'per_item'
+        whatsapp_message: Callable building the inquiry text for hybrid bookings
+        package: BookingPackage the bookings are components of
+
+    Returns:
+        tuple: (created bookings, per-entry results in input order)
+    """
+    context = context or {}
+    request = context.get('request')
+    user = request.user if request and request.user.is_authenticated else None
+
+    valid, errors = _validate(entries, context)
+    built = _build(valid, user, package)
+    errors.update(_check_availability(built))
+
+    if errors and mode == 'all_or_nothing':
+        return [], _failed(entries, errors)
+
+    built = [entry for entry in built if entry[0] not in errors]
+    bookings = []
+    if built:
+        with transaction.atomic():
+            # Promo uses are taken with the bookings, and given back if they roll back
+            promo_errors = _reserve_promos(built)
+            errors.update(promo_errors)
+            if promo_errors and mode == 'all_or_nothing':
+                transaction.set_rollback(True)
+                return [], _failed(entries, errors)
+
+            built = [entry for entry in built if entry[0] not in errors]
+            if built:
+                bookings = _insert(built, whatsapp_message)
+                transaction.on_commit(lambda: _notify(bookings))
+
+    created = {index: booking for (index, _, _), booking in zip(built, bookings)}
+    results = []
+    for index in range(len(entries)):
+        if index in created:
+            booking = created[index]
+            results.append({
+                'index': index,
+                'status': 'created',
+                'id': booking.pk,
+                'booking_id': booking.booking_id,
+                'booking_number': booking.booking_number,
+                'booking_status': booking.status,
+            })
+        else:
+            results.append({'index': index, 'status': 'failed', 'errors': errors[index]})
+
+    logger.info(f"Batch created {len(bookings)} of {len(entries)} bookings ({mode})")
+    return bookings, results
@@ -0,0 +1,366 @@
+"""
+Bulk cancellation and refund engine for WayanTrails.
+
+Used when many bookings have to be cancelled at once (e.g. a monsoon
+closure). A job runs in two phases:
+
+1. plan_bulk_refund() cancels the bookings in batches and stores one
+   BulkRefundItem per booking, with the amount from calculate_refund().
+2. BulkRefundEngine.run() claims pending items in batches and submits
+   gateway refunds concurrently under a rate limit. Each batch's results
+   are recorded with a few bulk writes.
+
+Item status is the checkpoint, so a crashed or interrupted job resumes
+with another run(). Items left in `submitting` are first matched against
+the refunds the gateway already holds, so no payment is refunded twice.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .gateway_transport import GatewayUnavailableError, is_client_error
+from .models import Booking, BulkRefundItem, BulkRefundJob, Payment
+from .state_machine import bulk_transition
+from .utils import calculate_refund
+
+logger = logging.getLogger(__name__)
+
+CANCELLABLE_STATUSES = ['pending', 'confirmed']
+REFUNDABLE_PAYMENT_STATUSES = ['completed', 'captured', 'partially_refunded']
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls evenly at `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def plan_bulk_refund(bookings, reason, created_by=None, filters=None, notify_guests=True, batch_size=500):
+    """
+    Cancel bookings and create a bulk refund job for them.
+
+    Refund amounts are computed before cancelling (calculate_refund only
+    refunds confirmed bookings). Bookings without a settled payment, or
+    with nothing to refund under the policy, are recorded as `skipped`.
+
+    Args:
+        bookings: Booking queryset to cancel
+        reason: Cancellation reason (stored on bookings and refunds)
+        created_by: Staff user running the job
+        filters: Selection criteria, stored on the job for reference
+
+    Returns:
+        BulkRefundJob: The planned job
+    """
+    job = BulkRefundJob.objects.create(
+        reason=reason,
+        created_by=created_by,
+        filters=filters or {},
+        notify_guests=notify_guests
+    )
+
+    bookings = bookings.filter(status__in=CANCELLABLE_STATUSES).order_by('pk')
+    for chunk in _chunks(bookings.iterator(chunk_size=batch_size), batch_size):
+        booking_ids = [booking.pk for booking in chunk]
+
+        # Latest refundable payment per booking, in one query
+        payments = {}
+        for payment in Payment.objects.filter(
+            booking_id__in=booking_ids,
+            status__in=REFUNDABLE_PAYMENT_STATUSES
+        ).exclude(gateway_payment_id='').order_by('booking_id', '-created_at'):
+            payments.setdefault(payment.booking_id, payment)
+
+        items = []
+        for booking in chunk:
+            refund_amount, refund_percentage = calculate_refund(booking)
+            payment = payments.get(booking.pk)
+            if payment:
+                refund_amount = min(refund_amount, payment.amount - payment.refund_amount)
+
+            refundable = payment is not None and refund_amount > 0
+            items.append(BulkRefundItem(
+                job=job,
+                booking=booking,
+                payment=payment if refundable else None,
+                refund_percentage=refund_percentage if refundable else 0,
+                refund_amount=refund_amount.quantize(Decimal('0.01')) if refundable else Decimal('0.00'),
+                status='pending' if refundable else 'skipped'
+            ))
+
+        with transaction.atomic():
+            cancelled = set(bulk_transition(
+                Booking.objects.filter(pk__in=booking_ids, status__in=CANCELLABLE_STATUSES),
+                'cancelled',
+                changed_by=created_by,
+                reason=reason,
+                source='bulk_refund',
+                chunk_size=len(booking_ids)
+            ))
+            BulkRefundItem.objects.bulk_create([item for item in items if item.booking_id in cancelled])
+
+    update_job_counters(job)
+    return job
+
+
+def update_job_counters(job):
+    """Recompute a job's counters from its items."""
+    counts = {
+        row['status']: row
+        for row in job.items.values('status').annotate(count=Count('id'), amount=Sum('refund_amount'))
+    }
+    job.total_items = sum(row['count'] for row in counts.values())
+    job.refunded_items = counts.get('refunded', {}).get('count', 0)
+    job.skipped_items = counts.get('skipped', {}).get('count', 0)
+    job.failed_items = counts.get('failed', {}).get('count', 0)
+    job.refunded_total = counts.get('refunded', {}).get('amount') or Decimal('0.00')
+    job.save(update_fields=[
+        'total_items', 'refunded_items', 'skipped_items', 'failed_items',
+        'refunded_total', 'updated_at'
+    ])
+
+
+class BulkRefundEngine:
+    """Submit and record the refunds of a planned BulkRefundJob."""
+
+    def __init__(self, router=None, concurrency=None, rate_per_second=None, batch_size=None):
+        if router is None:
+            from .gateway_router import payment_router as router
+        self.router = router
+        self.concurrency = concurrency or settings.BULK_REFUND_CONCURRENCY
+        self.batch_size = batch_size or settings.BULK_REFUND_BATCH_SIZE
+        self.rate_limiter = RateLimiter(rate_per_second or settings.BULK_REFUND_RATE_PER_SECOND)
+
+    def run(self, job):
+        """
+        Process a job until every item is refunded, skipped or failed.
+
+        Safe to call again on a failed or interrupted job; it resumes from
+        the item checkpoints.
+
+        Returns:
+            BulkRefundJob: The job with updated counters
+        """
+        job.status = 'running'
+        job.started_at = job.started_at or timezone.now()
+        job.last_error = ''
+        job.save(update_fields=['status', 'started_at', 'last_error', 'updated_at'])
+
+        try:
+            self.recover_in_flight(job)
+
+            while True:
+                items = self._claim(job)
+                if not items:
+                    break
+                self._record(job, items, self._submit(job, items))
+                update_job_counters(job)
+
+            self._notify(job)
+            job.status = 'completed'
+        except GatewayUnavailableError as e:
+            # Checkpointed: unfinished items stay pending for the next run
+            logger.warning(f"Bulk refund job {job.pk} paused: {e}")
+            job.status = 'failed'
+            job.last_error = f"{e} (re-run to resume)"
+        except Exception as e:
+            logger.exception(f"Bulk refund job {job.pk} failed")
+            job.status = 'failed'
+            job.last_error = str(e)
+
+        update_job_counters(job)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'last_error', 'finished_at', 'updated_at'])
+        return job
+
+    def recover_in_flight(self, job):
+        """
+        Resolve items a crashed run left in `submitting`.
+
+        The refund may or may not have reached the gateway, so look for it
+        there (matched by the item ID in its notes) before resubmitting.
+        """
+        stale_claim = timezone.now() - timedelta(seconds=settings.BULK_REFUND_CLAIM_TIMEOUT_SECONDS)
+        items = list(
+            job.items.filter(status='submitting', claimed_at__lt=stale_claim)
+            .select_related('payment', 'booking')
+        )
+        if not items:
+            return
+
+        results = {}
+        for item in items:
+            gateway = self.router.for_payment(item.payment)
+            for refund in gateway.fetch_refunds(item.payment.gateway_payment_id):
+                if str((refund.get('notes') or {}).get('bulk_refund_item')) == str(item.pk):
+                    results[item.pk] = (refund, None)
+                    break
+
+        if results:
+            self._record(job, [item for item in items if item.pk in results], results)
+        job.items.filter(pk__in=[item.pk for item in items if item.pk not in results]).update(
+            status='pending', updated_at=timezone.now()
+        )
+
+    def _claim(self, job):
+        """Mark the next batch of pending items as submitting."""
+        now = timezone.now()
+        with transaction.atomic():
+            item_ids = list(
+                job.items.select_for_update(skip_locked=True).filter(status='pending')
+                .values_list('pk', flat=True)[:self.batch_size]
+            )
+            if not item_ids:
+                return []
+            BulkRefundItem.objects.filter(pk__in=item_ids).update(
+                status='submitting', claimed_at=now, updated_at=now
+            )
+
+        return list(
+            BulkRefundItem.objects.filter(pk__in=item_ids).select_related('payment', 'booking')
+        )
+
+    def _submit(self, job, items):
+        """
+        Submit a batch of refunds concurrently.
+
+        Returns:
+            dict: item pk -> (refund dict or None, error or None)
+        """
+        def submit(item):
+            self.rate_limiter.acquire()
+            try:
+                gateway = self.router.for_payment(item.payment)
+                refund = gateway.submit_refund(
+                    item.payment.gateway_payment_id,
+                    int(item.refund_amount * 100),
+                    notes={
+                        'reason': job.reason[:255],
+                        'booking_number': item.booking.booking_number,
+                        'bulk_refund_job': str(job.pk),
+                        'bulk_refund_item': str(item.pk),
+                    }
+                )
+                return item.pk, (refund, None)
+            except Exception as e:
+                return item.pk, (None, e)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return dict(executor.map(submit, items))
+
+    def _record(self, job, items, results):
+        """Write a batch of refund results with bulk updates."""
+        now = timezone.now()
+        refunded_items, retry_items, failed_items, payments = [], [], [], []
+        gateway_down = None
+
+        for item in items:
+            refund, error = results[item.pk]
+            if refund:
+                item.status = 'refunded'
+                item.refund_id = refund['id']
+                item.gateway_response = refund
+                item.error = ''
+                item.attempts += 1
+                refunded_items.append(item)
+
+                payment = item.payment
+                payment.refund_id = refund['id']
+                payment.refund_amount += item.refund_amount
+                payment.refund_reason = job.reason
+                payment.refunded_at = now
+                payment.status = 'refunded' if payment.refund_amount >= payment.amount else 'partially_refunded'
+                payment.updated_at = now
+                payments.append(payment)
+            elif isinstance(error, GatewayUnavailableError):
+                # Circuit is open; don't burn an attempt, pause the job instead
+                item.status = 'pending'
+                item.error = str(error)
+                retry_items.append(item)
+                gateway_down = error
+            else:
+                item.attempts += 1
+                item.error = str(error)
+                if is_client_error(error) or item.attempts >= settings.BULK_REFUND_MAX_ATTEMPTS:
+                    item.status = 'failed'
+                    failed_items.append(item)
+                else:
+                    item.status = 'pending'
+                    retry_items.append(item)
+
+        with transaction.atomic():
+            for item in refunded_items + retry_items + failed_items:
+                item.updated_at = now
+            BulkRefundItem.objects.bulk_update(
+                refunded_items + retry_items + failed_items,
+                ['status', 'refund_id', 'gateway_response', 'error', 'attempts', 'updated_at']
+            )
+            Payment.objects.bulk_update(
+                payments,
+                ['refund_id', 'refund_amount', 'refund_reason', 'refunded_at', 'status', 'updated_at']
+            )
+
+            refunded_booking_ids = [item.booking_id for item in refunded_items]
+            if refunded_booking_ids:
+                bulk_transition(
+                    Booking.objects.filter(pk__in=refunded_booking_ids, status='cancelled'),
+                    'refunded',
+                    changed_by=job.created_by,
+                    reason=job.reason,
+                    source='bulk_refund',
+                    chunk_size=len(refunded_booking_ids)
+                )
+
+        if gateway_down:
+            raise gateway_down
+
+    def _notify(self, job):
+        """Email guests whose bookings are finished (refunded or skipped)."""
+        if not job.notify_guests:
+            return
+
+        from .emails import send_cancellation_email
+
+        items = job.items.filter(
+            status__in=['refunded', 'skipped'], notified_at__isnull=True
+        ).select_related('booking')
+        for chunk in _chunks(items.iterator(chunk_size=self.batch_size), self.batch_size):
+            for item in chunk:
+                try:
+                    send_cancellation_email(item.booking, item.refund_amount, item.refund_percentage)
+                except Exception as e:
+                    # Log error but don't fail the job
+                    print(f"Error sending cancellation email: {e}")
+            BulkRefundItem.objects.filter(pk__in=[item.pk for item in chunk]).update(
+                notified_at=timezone.now()
+            )
@@ -1,7 +1,7 @@
 """
 Email utilities for booking notifications.
 """
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail, EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils.html import strip_tags
@@ -17,15 +17,7 @@ def send_booking_pending_email(booking):
     subject = f"Booking Request Received - WayanTrails #{booking.booking_number}"
 
     # Get service name
-    service_name = "Service"
-    if booking.booking_type == 'resort':
-        from resorts.models import Resort
-        service = Resort.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Resort"
-    elif booking.booking_type == 'homestay':
-        from homestays.models import Homestay
-        service = Homestay.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Homestay"
+    service_name = booking.listing_name
 
     context = {
         'booking': booking,
@@ -79,6 +71,65 @@ Need help? Contact us at support@wayantrails.com
     )
 
 
+def send_batch_pending_emails(bookings):
+    """
+    Send one booking-request email per guest for a batch of bookings,
+    over a single mail connection.
+
+    Args:
+        bookings: Booking instances created together
+    """
+    by_guest = {}
+    for booking in bookings:
+        by_guest.setdefault(booking.guest_email, []).append(booking)
+
+    messages = []
+    for guest_email, guest_bookings in by_guest.items():
+        first = guest_bookings[0]
+        if len(guest_bookings) == 1:
+            subject = f"Booking Request Received - WayanTrails #{first.booking_number}"
+        else:
+            subject = f"{len(guest_bookings)} Booking Requests Received - WayanTrails"
+
+        lines = []
+        for booking in guest_bookings:
+            if booking.is_accommodation_booking:
+                dates = f"{booking.check_in_date.strftime('%d %b %Y')} - {booking.check_out_date.strftime('%d %b %Y')}"
+            else:
+                dates = booking.booking_date.strftime('%d %b %Y')
+            lines.append(f"#{booking.booking_number}  {booking.listing_name}  {dates}  ₹{booking.total_amount}")
+        booking_lines = "\n".join(lines)
+
+        plain_message = f"""
+Dear {first.guest_name},
+
+Thank you for your booking requests!
+
+{booking_lines}
+
+We have received your booking requests and will confirm availability within 2 hours.
+You'll receive a WhatsApp message with payment links once they are confirmed.
+
+You can also contact us directly on WhatsApp:
+{first.get_whatsapp_link()}
+
+Best regards,
+WayanTrails Team
+
+---
+Need help? Contact us at support@wayantrails.com
+    """.strip()
+
+        messages.append(EmailMultiAlternatives(
+            subject=subject,
+            body=plain_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[guest_email],
+        ))
+
+    get_connection(fail_silently=True).send_messages(messages)
+
+
 def send_booking_confirmation_email(booking):
     """
     Send booking confirmation email to user.
@@ -87,15 +138,7 @@ def send_booking_confirmation_email(booking):
         booking: Booking instance
     """
     # Get service name
-    service_name = "Service"
-    if booking.booking_type == 'resort':
-        from resorts.models import Resort
-        service = Resort.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Resort"
-    elif booking.booking_type == 'homestay':
-        from homestays.models import Homestay
-        service = Homestay.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Homestay"
+    service_name = booking.listing_name
 
     subject = f"Booking Confirmed - {service_name}"
 
@@ -188,15 +231,7 @@ def send_payment_link_email(booking, payment_link):
         payment_link: Payment link URL
     """
     # Get service name
-    service_name = "Service"
-    if booking.booking_type == 'resort':
-        from resorts.models import Resort
-        service = Resort.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Resort"
-    elif booking.booking_type == 'homestay':
-        from homestays.models import Homestay
-        service = Homestay.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Homestay"
+    service_name = booking.listing_name
 
     subject = f"Payment Link - {service_name} Booking"
 
@@ -261,15 +296,7 @@ def send_cancellation_email(booking, refund_amount, refund_percentage):
         refund_percentage: Refund percentage (int)
     """
     # Get service name
-    service_name = "Service"
-    if booking.booking_type == 'resort':
-        from resorts.models import Resort
-        service = Resort.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Resort"
-    elif booking.booking_type == 'homestay':
-        from homestays.models import Homestay
-        service = Homestay.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Homestay"
+    service_name = booking.listing_name
 
     subject = f"Booking Cancelled - {service_name}"
 
@@ -343,15 +370,7 @@ def send_payment_success_email(booking):
         booking: Booking instance
     """
     # Get service name
-    service_name = "Service"
-    if booking.booking_type == 'resort':
-        from resorts.models import Resort
-        service = Resort.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Resort"
-    elif booking.booking_type == 'homestay':
-        from homestays.models import Homestay
-        service = Homestay.objects.filter(id=booking.object_id).first()
-        service_name = service.name if service else "Homestay"
+    service_name = booking.listing_name
 
     subject = f"Payment Successful - {service_name} Booking"
 
@@ -0,0 +1,180 @@
+"""
+Streaming finance exports for WayanTrails.
+
+Rows are read with values_list() projections through .iterator(), so no
+model instances or serializers are built, and they are encoded one by one
+as CSV or NDJSON. Memory use is flat whatever the export size, and the
+first bytes go out as soon as the first chunk is fetched.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Booking, Payment
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (column header, ORM lookup) per export
+EXPORT_COLUMNS = {
+    'bookings': [
+        ('booking_number', 'booking_number'),
+        ('booking_id', 'booking_id'),
+        ('created_at', 'created_at'),
+        ('booking_type', 'booking_type'),
+        ('content_type', 'content_type'),
+        ('object_id', 'object_id'),
+        ('status', 'status'),
+        ('guest_name', 'guest_name'),
+        ('guest_email', 'guest_email'),
+        ('guest_phone', 'guest_phone'),
+        ('check_in_date', 'check_in_date'),
+        ('check_out_date', 'check_out_date'),
+        ('booking_date', 'booking_date'),
+        ('total_guests', 'total_guests'),
+        ('base_amount', 'base_amount'),
+        ('tax_amount', 'tax_amount'),
+        ('discount_amount', 'discount_amount'),
+        ('commission_amount', 'commission_amount'),
+        ('total_amount', 'total_amount'),
+        ('confirmed_at', 'confirmed_at'),
+        ('cancelled_at', 'cancelled_at'),
+    ],
+    'payments': [
+        ('payment_id', 'payment_id'),
+        ('booking_number', 'booking__booking_number'),
+        ('created_at', 'created_at'),
+        ('payment_gateway', 'payment_gateway'),
+        ('payment_method_type', 'payment_method_type'),
+        ('status', 'status'),
+        ('amount', 'amount'),
+        ('currency', 'currency'),
+        ('order_id', 'order_id'),
+        ('gateway_payment_id', 'gateway_payment_id'),
+        ('paid_at', 'paid_at'),
+        ('refund_amount', 'refund_amount'),
+        ('refund_id', 'refund_id'),
+        ('refunded_at', 'refunded_at'),
+    ],
+}
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_queryset(export, start_date=None, end_date=None, status=None, record_type=None):
+    """
+    Build the filtered queryset for an export.
+
+    Bookings are filtered on booking_date and `record_type` is the booking
+    type; payments are filtered on creation time and `record_type` is the
+    payment method.
+    """
+    if export == 'bookings':
+        queryset = Booking.objects.all()
+        if start_date:
+            queryset = queryset.filter(booking_date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(booking_date__lte=end_date)
+        if record_type:
+            queryset = queryset.filter(booking_type=record_type)
+    elif export == 'payments':
+        queryset = Payment.objects.all()
+        if start_date:
+            queryset = queryset.filter(created_at__gte=_day_start(start_date))
+        if end_date:
+            queryset = queryset.filter(created_at__lt=_day_start(end_date + timedelta(days=1)))
+        if record_type:
+            queryset = queryset.filter(payment_method_type=record_type)
+    else:
+        raise ValueError(f"Unknown export: {export}")
+
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset.order_by('pk')
+
+
+def iter_export_rows(export, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export rows as tuples, in column order."""
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS[export]]
+    return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+class _LineBuffer:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(export, rows):
+    """Encode rows as CSV lines, header first."""
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow([header for header, _ in EXPORT_COLUMNS[export]])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class _ExportJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that falls back to str() (e.g. for phone numbers)."""
+
+    def default(self, obj):
+        try:
+            return super().default(obj)
+        except TypeError:
+            return str(obj)
+
+
+def iter_ndjson(export, rows):
+    """Encode rows as one JSON object per line."""
+    headers = [header for header, _ in EXPORT_COLUMNS[export]]
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=_ExportJSONEncoder) + '\n'
+
+
+def stream_export(export, output='csv', chunk_size=EXPORT_CHUNK_SIZE, **filters):
+    """
+    Return an iterator of encoded export lines.
+
+    Args:
+        export: 'bookings' or 'payments'
+        output: 'csv' or 'ndjson'
+        filters: start_date, end_date, status, record_type (see export_queryset)
+    """
+    rows = iter_export_rows(export, export_queryset(export, **filters), chunk_size)
+    encoder = iter_ndjson if output == 'ndjson' else iter_csv
+    return encoder(export, rows)
+
+
+def export_response(export, data):
+    """
+    Stream an export as a file download.
+
+    Args:
+        export: 'bookings' or 'payments'
+        data: Validated ExportSerializer data
+    """
+    output = data['output']
+    response = StreamingHttpResponse(
+        stream_export(
+            export,
+            output=output,
+            start_date=data.get('start_date'),
+            end_date=data.get('end_date'),
+            status=data.get('status'),
+            record_type=data.get('type')
+        ),
+        content_type=EXPORT_CONTENT_TYPES[output]
+    )
+    filename = f"{export}_{timezone.now():%Y%m%d_%H%M%S}.{output}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,227 @@
+"""
+Payment gateway routing for WayanTrails.
+
+The router has the same interface as a single gateway, so views, order
+reuse and reconciliation don't care how many gateways are configured.
+New orders go to the healthiest, cheapest gateway, chosen from its circuit
+breaker state, recent latency and error rate, and the fee configured in
+payments.PaymentGateway. If that gateway is down (open circuit, or the
+request provably never reached it) the order falls over to the next one; a
+call that may have reached the gateway, like a read timeout, is not retried
+elsewhere, so a booking never ends up with two live orders. Everything that
+follows an order (callbacks, refunds) goes to the gateway that created it.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from .gateway_transport import GatewayUnavailableError, never_sent
+
+logger = logging.getLogger(__name__)
+
+
+class NoGatewayAvailableError(GatewayUnavailableError):
+    """Raised when every registered gateway is down or disabled."""
+
+
+class GatewayRouter:
+    """Route payment operations across registered gateways."""
+
+    FEES_CACHE_KEY = 'payment_gateway_fees'
+    FEES_CACHE_TTL = 300
+
+    def __init__(self):
+        self._gateways = {}
+
+    def register(self, gateway):
+        """
+        Add a gateway. It needs `name`, `code` and a `transport`; gateways
+        sharing a code with another also need owns_payment(payment).
+        """
+        self._gateways[gateway.name] = gateway
+
+    def unregister(self, name):
+        self._gateways.pop(name, None)
+
+    def gateways(self):
+        return list(self._gateways.values())
+
+    def get(self, name):
+        return self._gateways[name]
+
+    def _gateway_settings(self):
+        """
+        Return {gateway code: (is_active, fee %)} from payments.PaymentGateway.
+        Gateways without a row are treated as active with no fee.
+        """
+        gateway_settings = cache.get(self.FEES_CACHE_KEY)
+        if gateway_settings is None:
+            from payments.models import PaymentGateway
+
+            gateway_settings = {}
+            for gateway_type, is_active, fee in PaymentGateway.objects.values_list(
+                'gateway_type', 'is_active', 'transaction_fee_percentage'
+            ):
+                # Any active row enables the gateway; use its lowest fee
+                was_active, was_fee = gateway_settings.get(gateway_type, (False, fee))
+                gateway_settings[gateway_type] = (was_active or is_active, min(was_fee, fee))
+            cache.set(self.FEES_CACHE_KEY, gateway_settings, timeout=self.FEES_CACHE_TTL)
+        return gateway_settings
+
+    def score(self, gateway, fee):
+        """Lower is better: recent latency, error rate and fee, weighted."""
+        health = gateway.transport.health()
+        latency = health['latency_seconds'] or 0.0
+        return (
+            latency * settings.PAYMENT_ROUTER_LATENCY_WEIGHT +
+            health['error_rate'] * settings.PAYMENT_ROUTER_ERROR_WEIGHT +
+            float(fee) * settings.PAYMENT_ROUTER_FEE_WEIGHT
+        )
+
+    def candidates(self):
+        """
+        Return usable gateways, best first.
+
+        Gateways disabled in payments.PaymentGateway are skipped; gateways with
+        an open circuit go last, so they're only tried when nothing else is up.
+        """
+        gateway_settings = self._gateway_settings()
+        ranked = []
+        for gateway in self._gateways.values():
+            is_active, fee = gateway_settings.get(gateway.code, (True, 0))
+            if not is_active:
+                continue
+            circuit_open = gateway.transport.breaker.state == 'open'
+            ranked.append((circuit_open, self.score(gateway, fee), gateway.name, gateway))
+        ranked.sort(key=lambda entry: entry[:3])
+        return [entry[-1] for entry in ranked]
+
+    def select(self):
+        """Return the gateway new orders should go to."""
+        candidates = self.candidates()
+        if not candidates:
+            raise NoGatewayAvailableError("No payment gateway is configured")
+        return candidates[0]
+
+    def _with_failover(self, operation, *args, **kwargs):
+        """
+        Run an order-creating operation on the best gateway, falling over
+        only when the gateway is unavailable or the request never left us.
+        """
+        last_error = None
+        for gateway in self.candidates():
+            try:
+                return getattr(gateway, operation)(*args, **kwargs)
+            except Exception as e:
+                if not (isinstance(e, GatewayUnavailableError) or never_sent(e)):
+                    # The gateway may have created the order; another one would duplicate it
+                    raise
+                logger.warning(f"Gateway {gateway.name} failed {operation}, failing over: {e}")
+                last_error = e
+
+        if last_error:
+            raise last_error
+        raise NoGatewayAvailableError("No payment gateway is configured")
+
+    def for_payment(self, payment):
+        """Return the gateway that owns a payment's order."""
+        matching = [gateway for gateway in self._gateways.values() if gateway.code == payment.payment_gateway]
+        # Gateways sharing a code (the mock stands in for Razorpay) tell their own orders apart
+        recognised = [gateway for gateway in matching if hasattr(gateway, 'owns_payment')]
+        for gateway in recognised:
+            if gateway.owns_payment(payment):
+                return gateway
+        for gateway in matching:
+            if gateway not in recognised:
+                return gateway
+        raise ValueError(f"Payment gateway '{payment.payment_gateway}' is not configured")
+
+    def _for_order(self, order_id):
+        from .payment_lookup import payment_lookup
+
+        payment = payment_lookup.get_by_order_id(order_id)
+        if not payment:
+            raise ValueError("Payment record not found")
+        return self.for_payment(payment)
+
+    # Gateway interface
+
+    def create_order(self, booking, notes=None, package=None):
+        return self._with_failover('create_order', booking, notes=notes, package=package)
+
+    def create_payment_link(self, booking, expire_by=None):
+        return self._with_failover('create_payment_link', booking, expire_by=expire_by)
+
+    def build_checkout_options(self, booking, payment):
+        return self.for_payment(payment).build_checkout_options(booking, payment)
+
+    def verify_payment(self, razorpay_order_id, razorpay_payment_id, razorpay_signature):
+        return self._for_order(razorpay_order_id).verify_payment(
+            razorpay_order_id, razorpay_payment_id, razorpay_signature
+        )
+
+    def process_payment_success(self, razorpay_payment_id, razorpay_order_id, razorpay_signature):
+        return self._for_order(razorpay_order_id).process_payment_success(
+            razorpay_payment_id=razorpay_payment_id,
+            razorpay_order_id=razorpay_order_id,
+            razorpay_signature=razorpay_signature
+        )
+
+    def create_refund(self, payment_id, amount=None, reason=None):
+        from .payment_lookup import payment_lookup
+
+        payment = payment_lookup.get_by_gateway_payment_id(payment_id)
+        if not payment:
+            raise ValueError("Payment not found")
+        return self.for_payment(payment).create_refund(payment_id, amount=amount, reason=reason)
+
+    def health(self):
+        """Return per-gateway health, as used for routing."""
+        return [gateway.transport.health() for gateway in self._gateways.values()]
+
+    def render_prometheus(self):
+        """Render gateway health gauges in the Prometheus text format."""
+        lines = [
+            '# HELP payment_gateway_up 1 unless the gateway circuit breaker is open.',
+            '# TYPE payment_gateway_up gauge',
+        ]
+        health = self.health()
+        for entry in health:
+            lines.append(f'payment_gateway_up{{gateway="{entry["gateway"]}"}} {0 if entry["state"] == "open" else 1}')
+        lines += [
+            '# HELP payment_gateway_error_rate Recent error rate (EWMA).',
+            '# TYPE payment_gateway_error_rate gauge',
+        ]
+        for entry in health:
+            lines.append(f'payment_gateway_error_rate{{gateway="{entry["gateway"]}"}} {entry["error_rate"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def build_payment_router(names=None):
+    """
+    Register the gateways named in PAYMENT_GATEWAYS ('razorpay', 'mock').
+
+    Raises:
+        ImproperlyConfigured: A gateway name is unknown
+    """
+    router = GatewayRouter()
+    for name in names or settings.PAYMENT_GATEWAYS:
+        name = name.strip()
+        if name == 'razorpay':
+            from .payment_gateway import razorpay_gateway
+            if razorpay_gateway is None:
+                logger.warning("PAYMENT_GATEWAYS lists razorpay but its client isn't installed; skipped")
+                continue
+            router.register(razorpay_gateway)
+        elif name == 'mock':
+            from .mock_payment_gateway import mock_payment_gateway
+            router.register(mock_payment_gateway)
+        else:
+            raise ImproperlyConfigured(f"Unknown payment gateway {name!r} in PAYMENT_GATEWAYS")
+    return router
+
+
+# Singleton instance
+payment_router = build_payment_router()
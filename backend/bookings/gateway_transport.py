@@ -0,0 +1,289 @@
+"""
+Gateway transport layer for WayanTrails payments.
+
+Every outbound gateway call goes through a GatewayTransport, which adds:
+
+* a pooled keep-alive HTTP session with strict connect/read timeouts
+* bounded retries with exponential backoff and full jitter (only for
+  idempotent calls, or failures where the request never left the process)
+* a circuit breaker that fails fast while a gateway is down
+* per-operation latency histograms, exported in Prometheus text format
+
+A slow or dead gateway therefore costs a request thread at most one timeout
+budget instead of hanging it indefinitely.
+"""
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+class GatewayUnavailableError(Exception):
+    """Raised when a gateway call is refused by an open circuit breaker."""
+
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def build_gateway_session():
+    """Create a pooled HTTP session that applies default timeouts."""
+    session = TimeoutSession(
+        timeout=(
+            settings.PAYMENT_GATEWAY_CONNECT_TIMEOUT_SECONDS,
+            settings.PAYMENT_GATEWAY_READ_TIMEOUT_SECONDS
+        )
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=settings.PAYMENT_GATEWAY_POOL_SIZE,
+        max_retries=0  # Retries are decided by GatewayTransport
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class TimeoutSession(requests.Session):
+    """requests.Session whose calls time out unless told otherwise."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed -> open after `failure_threshold` failures in a row; open ->
+    half-open after `reset_timeout` seconds, letting a single probe through;
+    the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.PAYMENT_GATEWAY_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or settings.PAYMENT_GATEWAY_BREAKER_RESET_SECONDS
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Return True if a call may proceed."""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[index] += 1
+
+
+class GatewayMetrics:
+    """Per-process registry of gateway call latencies and outcomes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, gateway, operation, outcome, seconds):
+        key = (gateway, operation, outcome)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def snapshot(self):
+        """Return histograms as plain dicts, keyed by gateway/operation/outcome."""
+        with self._lock:
+            return [
+                {
+                    'gateway': gateway,
+                    'operation': operation,
+                    'outcome': outcome,
+                    'count': histogram.count,
+                    'sum': round(histogram.sum, 6),
+                    'buckets': dict(zip(histogram.buckets, histogram.counts)),
+                }
+                for (gateway, operation, outcome), histogram in sorted(self._histograms.items())
+            ]
+
+    def render_prometheus(self):
+        """Render all histograms in the Prometheus text exposition format."""
+        name = 'payment_gateway_request_duration_seconds'
+        lines = [
+            f'# HELP {name} Payment gateway call latency by operation and outcome.',
+            f'# TYPE {name} histogram',
+        ]
+        for entry in self.snapshot():
+            labels = f'gateway="{entry["gateway"]}",operation="{entry["operation"]}",outcome="{entry["outcome"]}"'
+            for bound, count in entry['buckets'].items():
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {entry["count"]}')
+            lines.append(f'{name}_sum{{{labels}}} {entry["sum"]}')
+            lines.append(f'{name}_count{{{labels}}} {entry["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+gateway_metrics = GatewayMetrics()
+
+
+def is_client_error(error):
+    """Errors caused by our request (bad input, auth); retrying won't help."""
+    try:
+        from razorpay.errors import BadRequestError, SignatureVerificationError
+    except ImportError:
+        return False
+    return isinstance(error, (BadRequestError, SignatureVerificationError))
+
+
+def never_sent(error):
+    """Failures where the request provably never reached the gateway."""
+    return isinstance(error, requests.exceptions.ConnectTimeout) or (
+        isinstance(error, requests.exceptions.ConnectionError) and
+        not isinstance(error, requests.exceptions.ReadTimeout)
+        and 'RemoteDisconnected' not in str(error)
+    )
+
+
+class GatewayTransport:
+    """
+    Wrap gateway calls with retries, a circuit breaker and latency metrics.
+
+    Usage:
+        transport.call('order.create', client.order.create, data=order_data)
+        transport.call('payment.fetch', client.payment.fetch, payment_id, idempotent=True)
+    """
+
+    HEALTH_EWMA_ALPHA = 0.2
+
+    def __init__(self, gateway, breaker=None, metrics=None, max_retries=None, backoff=None):
+        self.gateway = gateway
+        self.breaker = breaker or CircuitBreaker(gateway)
+        self.metrics = metrics or gateway_metrics
+        self.max_retries = settings.PAYMENT_GATEWAY_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.PAYMENT_GATEWAY_RETRY_BACKOFF_SECONDS if backoff is None else backoff
+
+        # Exponentially weighted recent latency and error rate, for routing
+        self.latency_ewma = None
+        self.error_ewma = 0.0
+
+    def _track(self, seconds, failed):
+        alpha = self.HEALTH_EWMA_ALPHA
+        self.error_ewma += alpha * ((1.0 if failed else 0.0) - self.error_ewma)
+        if not failed:
+            if self.latency_ewma is None:
+                self.latency_ewma = seconds
+            else:
+                self.latency_ewma += alpha * (seconds - self.latency_ewma)
+
+    def health(self):
+        """Return the breaker state and recent latency/error rate."""
+        return {
+            'gateway': self.gateway,
+            'state': self.breaker.state,
+            'latency_seconds': self.latency_ewma,
+            'error_rate': round(self.error_ewma, 4),
+        }
+
+    def call(self, operation, func, *args, idempotent=False, **kwargs):
+        """
+        Invoke a gateway API function.
+
+        Args:
+            operation: Metric label, e.g. 'order.create'
+            func: Callable performing the HTTP request
+            idempotent: Safe to retry after the request may have been sent
+
+        Raises:
+            GatewayUnavailableError: The circuit is open
+            Exception: The last error from `func` once retries are exhausted
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.metrics.observe(self.gateway, operation, 'rejected', 0.0)
+                raise GatewayUnavailableError(
+                    f"{self.gateway} is unavailable (circuit open); try again shortly"
+                )
+
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                elapsed = time.monotonic() - started
+                if is_client_error(e):
+                    # The gateway answered; it is healthy
+                    self.breaker.record_success()
+                    self.metrics.observe(self.gateway, operation, 'client_error', elapsed)
+                    raise
+
+                self.breaker.record_failure()
+                self.metrics.observe(self.gateway, operation, 'error', elapsed)
+                self._track(elapsed, failed=True)
+                if attempt >= self.max_retries or not (idempotent or never_sent(e)):
+                    raise
+
+                # Full jitter: sleep a random amount up to the exponential cap
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+                attempt += 1
+                continue
+
+            elapsed = time.monotonic() - started
+            self.breaker.record_success()
+            self.metrics.observe(self.gateway, operation, 'success', elapsed)
+            self._track(elapsed, failed=False)
+            return result
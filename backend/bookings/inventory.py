@@ -0,0 +1,390 @@
+"""
+Per-night inventory holds for WayanTrails checkout.
+
+Capacity lives in BookingAvailability: one row per listing and night with
+available, booked and held slot counts. When checkout starts, place_hold()
+reserves the booking's units on every night with a single conditional
+UPDATE (available >= booked + held + quantity). If any night lacks room
+the update touches fewer rows than there are nights and is rolled back.
+Two guests can therefore never both hold the last room, and the check
+costs O(nights) whatever the number of bookings.
+
+Activity bookings (content_type 'activity') hold seats on the activity's
+time slot instead (destinations.slots), keyed by booking date and time.
+
+Holds expire after INVENTORY_HOLD_TTL_MINUTES. Payment converts the hold
+(held -> booked) in the same transaction that confirms the booking.
+Cancellations release held or booked units, and the expire_pending
+lifecycle job sweeps expired holds in bulk.
+"""
+import logging
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Booking, BookingAvailability, InventoryHold
+
+logger = logging.getLogger(__name__)
+
+ACCOMMODATION_TYPES = ['resort', 'homestay']
+
+# Listings whose capacity lives in ActivitySlot rows, and the matching seat fields
+SLOT_TYPES = ['activity']
+SLOT_FIELDS = {'held_slots': 'held_seats', 'booked_slots': 'booked_seats'}
+
+
+class InventoryUnavailableError(Exception):
+    """Raised when a listing has no free capacity for some requested night."""
+
+
+def default_capacity(content_type, object_id):
+    """Slots per night for a listing without an availability row yet."""
+    if content_type == 'resort':
+        from resorts.models import Resort
+        rooms = Resort.objects.filter(pk=object_id).values_list('total_rooms', flat=True).first()
+        return rooms or 10
+    if content_type == 'homestay':
+        from homestays.models import Homestay
+        rooms = Homestay.objects.filter(pk=object_id).values_list('total_rooms', flat=True).first()
+        return rooms or 10
+    if content_type == 'activity':
+        from destinations.models import Activity
+        return Activity.objects.filter(pk=object_id).values_list('max_participants', flat=True).first() or 20
+    if content_type == 'destination':
+        return 20  # Default activity capacity
+    return 5  # Default for services/rentals
+
+
+def hold_span(booking, items=None):
+    """
+    Return (start_date, end_date, quantity) a booking occupies.
+
+    Stays hold rooms (booking items tagged with a room_type_id, else one
+    room) for each night; activities, services and rentals hold one slot
+    per guest on the booking date. Pass `items` for a booking that isn't
+    saved yet.
+    """
+    if booking.content_type in ACCOMMODATION_TYPES and booking.check_in_date and booking.check_out_date:
+        items = booking.items.all() if items is None else items
+        rooms = sum(
+            item.quantity for item in items if (item.item_data or {}).get('room_type_id')
+        )
+        return booking.check_in_date, booking.check_out_date, rooms or 1
+    return booking.booking_date, booking.booking_date + timedelta(days=1), booking.total_guests or 1
+
+
+def default_capacities(listings):
+    """Like default_capacity() for many (content_type, object_id) pairs, one query per type."""
+    from resorts.models import Resort
+    from homestays.models import Homestay
+
+    rooms = {}
+    for content_type, model in [('resort', Resort), ('homestay', Homestay)]:
+        object_ids = {object_id for listing_type, object_id in listings if listing_type == content_type}
+        if object_ids:
+            rooms.update({
+                (content_type, pk): total_rooms
+                for pk, total_rooms in model.objects.filter(pk__in=object_ids).values_list('pk', 'total_rooms')
+            })
+
+    capacities = {}
+    for content_type, object_id in listings:
+        if content_type in ACCOMMODATION_TYPES:
+            capacities[(content_type, object_id)] = rooms.get((content_type, object_id)) or 10
+        else:
+            capacities[(content_type, object_id)] = default_capacity(content_type, object_id)
+    return capacities
+
+
+def check_batch_availability(spans):
+    """
+    Check many (content_type, object_id, start_date, end_date, quantity)
+    spans against current availability in one pass. Activity spans carry
+    their slot start time as a sixth element and are checked against the
+    slot's seats.
+
+    Spans are taken in order and each accepted span uses up its nights, so
+    two rooms of a group booking compete for the same capacity. Nothing is
+    reserved.
+
+    Returns:
+        list: True/False per span
+    """
+    from destinations.slots import parse_slot_time, remaining_seats
+
+    if not spans:
+        return []
+    slot_spans = [span for span in spans if span[0] in SLOT_TYPES]
+    seats = remaining_seats([
+        (object_id, start_date, span_time[0] if span_time else None)
+        for _, object_id, start_date, _, _, *span_time in slot_spans
+    ])
+
+    listings = {(content_type, object_id) for content_type, object_id, *_ in spans if content_type not in SLOT_TYPES}
+    remaining = {}
+    capacities = default_capacities(listings) if listings else {}
+
+    if listings:
+        query = Q()
+        for content_type, object_id in listings:
+            query |= Q(content_type=content_type, object_id=object_id)
+        remaining = {
+            (content_type, object_id, night): 0 if is_blocked else available - booked - held
+            for content_type, object_id, night, available, booked, held, is_blocked in BookingAvailability.objects.filter(
+                query,
+                date__gte=min(span[2] for span in spans),
+                date__lt=max(span[3] for span in spans)
+            ).values_list(
+                'content_type', 'object_id', 'date', 'available_slots', 'booked_slots', 'held_slots', 'is_blocked'
+            )
+        }
+
+    results = []
+    for content_type, object_id, start_date, end_date, quantity, *span_time in spans:
+        if content_type in SLOT_TYPES:
+            key = (
+                (int(object_id), start_date, parse_slot_time(span_time[0]))
+                if span_time and span_time[0] and str(object_id).isdigit() else None
+            )
+            fits = key is not None and seats.get(key, 0) >= quantity
+            if fits:
+                seats[key] -= quantity
+            results.append(fits)
+            continue
+
+        keys = [(content_type, object_id, night) for night in _nights(start_date, end_date)]
+        fits = all(remaining.get(key, capacities[(content_type, object_id)]) >= quantity for key in keys)
+        if fits:
+            for key in keys:
+                remaining[key] = remaining.get(key, capacities[(content_type, object_id)]) - quantity
+        results.append(fits)
+    return results
+
+
+def _nights(start_date, end_date):
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days)]
+
+
+def _ensure_nights(content_type, object_id, nights):
+    """Create missing availability rows at the listing's default capacity."""
+    existing = set(BookingAvailability.objects.filter(
+        content_type=content_type, object_id=object_id, date__in=nights
+    ).values_list('date', flat=True))
+    missing = [night for night in nights if night not in existing]
+    if missing:
+        capacity = default_capacity(content_type, object_id)
+        BookingAvailability.objects.bulk_create([
+            BookingAvailability(content_type=content_type, object_id=object_id, date=night, available_slots=capacity)
+            for night in missing
+        ], ignore_conflicts=True)
+
+
+def _reserve(content_type, object_id, nights, quantity, field):
+    """
+    Add `quantity` to `field` on every night that still has room.
+    Must run inside a transaction; raises (rolling back) if any night is full.
+    """
+    updated = BookingAvailability.objects.filter(
+        content_type=content_type,
+        object_id=object_id,
+        date__in=nights,
+        is_blocked=False,
+        available_slots__gte=F('booked_slots') + F('held_slots') + quantity
+    ).update(**{field: F(field) + quantity}, updated_at=timezone.now())
+    if updated != len(nights):
+        raise InventoryUnavailableError(
+            f"Not enough availability for {content_type}#{object_id} between {nights[0]} and {nights[-1]}"
+        )
+
+
+def _adjust(content_type, object_id, nights, **deltas):
+    """Apply signed slot deltas to nights without capacity checks (never below zero)."""
+    updates = {
+        field: Greatest(F(field) + delta, Value(0)) if delta < 0 else F(field) + delta
+        for field, delta in deltas.items()
+    }
+    BookingAvailability.objects.filter(
+        content_type=content_type, object_id=object_id, date__in=nights
+    ).update(**updates, updated_at=timezone.now())
+
+
+def _take(content_type, object_id, nights, start_time, quantity, field):
+    """Reserve units on every night (or the activity slot), or raise."""
+    if content_type in SLOT_TYPES:
+        from destinations.slots import SlotUnavailableError, reserve_seats
+        try:
+            reserve_seats(object_id, nights[0], start_time, quantity, SLOT_FIELDS[field])
+        except SlotUnavailableError as e:
+            raise InventoryUnavailableError(str(e))
+        return
+    _ensure_nights(content_type, object_id, nights)
+    _reserve(content_type, object_id, nights, quantity, field)
+
+
+def _give(content_type, object_id, nights, start_time, **deltas):
+    """Apply unchecked deltas to nights (or the activity slot)."""
+    if content_type in SLOT_TYPES:
+        from destinations.slots import adjust_seats
+        adjust_seats(object_id, nights[0], start_time, **{SLOT_FIELDS[field]: delta for field, delta in deltas.items()})
+        return
+    _adjust(content_type, object_id, nights, **deltas)
+
+
+def _slot_time(booking):
+    return booking.booking_time if booking.content_type in SLOT_TYPES else None
+
+
+def place_hold(booking, ttl_minutes=None):
+    """
+    Reserve inventory for a booking entering checkout.
+
+    Re-entering checkout extends the booking's active hold instead of taking
+    a second one; a booking whose inventory is already booked keeps it.
+
+    Returns:
+        InventoryHold
+
+    Raises:
+        InventoryUnavailableError: Some night has no free capacity
+    """
+    ttl_minutes = ttl_minutes or settings.INVENTORY_HOLD_TTL_MINUTES
+    expires_at = timezone.now() + timedelta(minutes=ttl_minutes)
+
+    with transaction.atomic():
+        # Serialise checkout per booking
+        booking = Booking.objects.select_for_update().get(pk=booking.pk)
+
+        hold = booking.inventory_holds.filter(status__in=['active', 'converted']).first()
+        if hold:
+            if hold.status == 'active':
+                hold.expires_at = expires_at
+                hold.save(update_fields=['expires_at', 'updated_at'])
+            return hold
+
+        start_date, end_date, quantity = hold_span(booking)
+        start_time = _slot_time(booking)
+        _take(booking.content_type, booking.object_id, _nights(start_date, end_date), start_time, quantity, 'held_slots')
+
+        return InventoryHold.objects.create(
+            booking=booking,
+            content_type=booking.content_type,
+            object_id=booking.object_id,
+            start_date=start_date,
+            end_date=end_date,
+            start_time=start_time,
+            quantity=quantity,
+            expires_at=expires_at
+        )
+
+
+def convert_hold(booking):
+    """
+    Turn a booking's hold into booked inventory as it is confirmed.
+
+    Without an active hold (staff confirmation, or payment after the hold
+    expired) the units are booked directly. If the nights have since filled
+    up they are booked anyway, since the guest is confirmed, and the hold
+    is flagged as oversold. Idempotent.
+
+    Returns:
+        InventoryHold
+    """
+    with transaction.atomic():
+        holds = InventoryHold.objects.select_for_update().filter(
+            booking_id=booking.pk, status__in=['active', 'converted']
+        )
+        hold = next((hold for hold in holds if hold.status == 'converted'), None) or next(iter(holds), None)
+        if hold and hold.status == 'converted':
+            return hold
+
+        if hold:
+            _give(
+                hold.content_type, hold.object_id, _nights(hold.start_date, hold.end_date), hold.start_time,
+                held_slots=-hold.quantity, booked_slots=hold.quantity
+            )
+            hold.status = 'converted'
+            hold.expires_at = None
+            hold.save(update_fields=['status', 'expires_at', 'updated_at'])
+            return hold
+
+        booking = Booking.objects.get(pk=booking.pk)
+        start_date, end_date, quantity = hold_span(booking)
+        start_time = _slot_time(booking)
+        nights = _nights(start_date, end_date)
+        oversold = False
+        try:
+            with transaction.atomic():
+                _take(booking.content_type, booking.object_id, nights, start_time, quantity, 'booked_slots')
+        except InventoryUnavailableError as e:
+            logger.warning(f"Booking {booking.booking_number} confirmed without free capacity: {e}")
+            _give(booking.content_type, booking.object_id, nights, start_time, booked_slots=quantity)
+            oversold = True
+
+        return InventoryHold.objects.create(
+            booking=booking,
+            content_type=booking.content_type,
+            object_id=booking.object_id,
+            start_date=start_date,
+            end_date=end_date,
+            start_time=start_time,
+            quantity=quantity,
+            status='converted',
+            oversold=oversold
+        )
+
+
+def _release(holds, new_status):
+    """
+    Give back the units of active/converted holds. Quantities are summed per
+    (listing, slot time, night, field), so overlapping holds are each given
+    back, and nights sharing a total need one UPDATE.
+    """
+    totals = Counter()
+    for hold in holds:
+        field = 'held_slots' if hold.status == 'active' else 'booked_slots'
+        for night in _nights(hold.start_date, hold.end_date):
+            totals[(hold.content_type, hold.object_id, hold.start_time, night, field)] += hold.quantity
+
+    groups = defaultdict(list)
+    for (content_type, object_id, start_time, night, field), quantity in totals.items():
+        groups[(content_type, object_id, start_time, field, quantity)].append(night)
+    for (content_type, object_id, start_time, field, quantity), nights in groups.items():
+        if content_type in SLOT_TYPES:
+            # One slot per date for activities
+            for night in sorted(nights):
+                _give(content_type, object_id, [night], start_time, **{field: -quantity})
+        else:
+            _adjust(content_type, object_id, sorted(nights), **{field: -quantity})
+
+    return InventoryHold.objects.filter(pk__in=[hold.pk for hold in holds]).update(
+        status=new_status, updated_at=timezone.now()
+    )
+
+
+def release_holds(booking_ids):
+    """Release inventory held or booked by cancelled bookings. Returns holds released."""
+    with transaction.atomic():
+        holds = list(InventoryHold.objects.select_for_update().filter(
+            booking_id__in=list(booking_ids), status__in=['active', 'converted']
+        ))
+        return _release(holds, 'released') if holds else 0
+
+
+def release_expired_holds(chunk_size=500, now=None):
+    """Expire active holds past their TTL, a chunk at a time. Returns holds expired."""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            holds = list(InventoryHold.objects.select_for_update().filter(
+                status='active', expires_at__lt=now
+            ).order_by('pk')[:chunk_size])
+            if not holds:
+                break
+            released += _release(holds, 'expired')
+    return released
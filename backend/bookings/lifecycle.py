@@ -0,0 +1,217 @@
+"""
+Scheduled booking lifecycle jobs for WayanTrails.
+
+Run from cron via `manage.py run_lifecycle_jobs` (e.g. every 15 minutes):
+
+* expire_pending: releases expired checkout holds (bookings.inventory) and
+  closes lapsed unpaid gateway orders, then cancels pending
+  bookings that are unpaid and either older than PENDING_BOOKING_TTL_HOURS
+  or already past their start date. Cancelling frees their inventory.
+* no_show: flags confirmed online bookings that were never paid once their
+  start date is NO_SHOW_GRACE_DAYS past.
+* complete: marks confirmed bookings completed once their end date (check-out,
+  or booking date for activities and services) has passed.
+
+Jobs work in primary-key chunks through bulk_transition(): one locked
+UPDATE per chunk, so row locks are held for one chunk at a time. Each run is
+recorded as a BookingLifecycleRun with its counts and timings.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Booking, BookingLifecycleRun, Payment
+from .state_machine import bulk_transition
+
+logger = logging.getLogger(__name__)
+
+# Payment states meaning the guest has paid (or the gateway is holding funds)
+PAID_PAYMENT_STATUSES = ['processing', 'authorized', 'captured', 'completed', 'refunded', 'partially_refunded']
+OPEN_PAYMENT_STATUSES = ['created', 'pending']
+
+
+def _has_paid_payment():
+    return Exists(Payment.objects.filter(booking=OuterRef('pk'), status__in=PAID_PAYMENT_STATUSES))
+
+
+def _starts_before(day):
+    return Q(check_in_date__lt=day) | Q(check_in_date__isnull=True, booking_date__lt=day)
+
+
+def _ends_before(day):
+    return Q(check_out_date__lt=day) | Q(check_out_date__isnull=True, booking_date__lt=day)
+
+
+class LifecycleJob:
+    """Base class: select candidates, then move them to `new_status` in chunks."""
+
+    job = None
+    new_status = None
+    reason = ''
+
+    def __init__(self, chunk_size=None, dry_run=False, now=None):
+        self.chunk_size = chunk_size or settings.LIFECYCLE_CHUNK_SIZE
+        self.dry_run = dry_run
+        self.now = now or timezone.now()
+        self.today = timezone.localdate(self.now)
+
+    def candidates(self):
+        raise NotImplementedError
+
+    def before_bookings(self, run):
+        """Hook for work that must happen before the bookings move."""
+
+    def run(self):
+        """Run the job and return its BookingLifecycleRun."""
+        run = BookingLifecycleRun.objects.create(job=self.job, dry_run=self.dry_run)
+        started = time.monotonic()
+
+        try:
+            run.bookings_matched = self.candidates().count()
+            if not self.dry_run:
+                self.before_bookings(run)
+                self._transition_chunks(run)
+            run.status = 'completed'
+        except Exception as e:
+            logger.error(f"Lifecycle job {self.job} failed: {e}")
+            run.status = 'failed'
+            run.error = str(e)
+
+        run.duration_ms = int((time.monotonic() - started) * 1000)
+        run.finished_at = timezone.now()
+        run.save()
+
+        logger.info(
+            f"Lifecycle job {self.job} {run.status}: {run.bookings_changed}/{run.bookings_matched} bookings, "
+            f"{run.payments_expired} payments expired, {run.holds_released} holds released, {run.chunks} chunks, "
+            f"max chunk {run.max_chunk_ms}ms, total {run.duration_ms}ms"
+        )
+        return run
+
+    def _transition_chunks(self, run):
+        candidates = self.candidates()
+        last_pk = 0
+        while True:
+            booking_ids = list(
+                candidates.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:self.chunk_size]
+            )
+            if not booking_ids:
+                break
+            last_pk = booking_ids[-1]
+
+            chunk_started = time.monotonic()
+            # Candidate conditions are re-checked under the row locks
+            changed = bulk_transition(
+                candidates.filter(pk__in=booking_ids),
+                self.new_status,
+                reason=self.reason,
+                source='lifecycle',
+                chunk_size=len(booking_ids)
+            )
+            run.max_chunk_ms = max(run.max_chunk_ms, int((time.monotonic() - chunk_started) * 1000))
+            run.chunks += 1
+            run.bookings_changed += len(changed)
+
+            if settings.LIFECYCLE_CHUNK_PAUSE_SECONDS:
+                time.sleep(settings.LIFECYCLE_CHUNK_PAUSE_SECONDS)
+
+
+class ExpirePendingJob(LifecycleJob):
+    """Cancel stale unpaid pending bookings and close their lapsed orders."""
+
+    job = 'expire_pending'
+    new_status = 'cancelled'
+    reason = 'Expired: not paid or confirmed in time'
+
+    def lapsed_payments(self):
+        grace = timedelta(minutes=settings.PAYMENT_EXPIRY_GRACE_MINUTES)
+        return Payment.objects.filter(status__in=OPEN_PAYMENT_STATUSES, expires_at__lt=self.now - grace)
+
+    def candidates(self):
+        stale = self.now - timedelta(hours=settings.PENDING_BOOKING_TTL_HOURS)
+        open_order = Payment.objects.filter(
+            booking=OuterRef('pk'), status__in=OPEN_PAYMENT_STATUSES, expires_at__gt=self.now
+        )
+        # A package order is attached to the lead booking but covers every component
+        open_package_order = Payment.objects.filter(
+            package=OuterRef('package'), status__in=OPEN_PAYMENT_STATUSES, expires_at__gt=self.now
+        )
+        return Booking.objects.filter(
+            Q(created_at__lt=stale) | _starts_before(self.today),
+            status='pending'
+        ).exclude(_has_paid_payment()).exclude(Exists(open_order)).exclude(Exists(open_package_order))
+
+    def before_bookings(self, run):
+        """Release expired holds and mark lapsed unpaid orders cancelled, a chunk at a time."""
+        from .inventory import release_expired_holds
+
+        run.holds_released = release_expired_holds(chunk_size=self.chunk_size, now=self.now)
+        while True:
+            payment_ids = list(self.lapsed_payments().order_by('pk').values_list('pk', flat=True)[:self.chunk_size])
+            if not payment_ids:
+                break
+            run.payments_expired += Payment.objects.filter(
+                pk__in=payment_ids, status__in=OPEN_PAYMENT_STATUSES
+            ).update(
+                status='cancelled',
+                error_description='Order expired unpaid',
+                updated_at=timezone.now()
+            )
+
+
+class NoShowJob(LifecycleJob):
+    """
+    Flag unpaid online bookings whose start date has passed. Hybrid bookings
+    are confirmed by staff and may be paid at the property, so they are
+    left to the complete job.
+    """
+
+    job = 'no_show'
+    new_status = 'no_show'
+    reason = 'No show: start date passed without payment'
+
+    def candidates(self):
+        cutoff = self.today - timedelta(days=settings.NO_SHOW_GRACE_DAYS)
+        return Booking.objects.filter(
+            _starts_before(cutoff),
+            status='confirmed',
+            booking_method='online'
+        ).exclude(_has_paid_payment())
+
+
+class CompleteStaysJob(LifecycleJob):
+    """Complete confirmed bookings whose end date has passed."""
+
+    job = 'complete'
+    new_status = 'completed'
+    reason = 'Stay/activity date passed'
+
+    def candidates(self):
+        return Booking.objects.filter(_ends_before(self.today), status='confirmed')
+
+
+# In run order: no-shows are flagged before the rest are completed
+LIFECYCLE_JOBS = {
+    'expire_pending': ExpirePendingJob,
+    'no_show': NoShowJob,
+    'complete': CompleteStaysJob,
+}
+
+
+def run_lifecycle_jobs(jobs=None, dry_run=False, chunk_size=None):
+    """
+    Run lifecycle jobs (default: all, in order).
+
+    Returns:
+        list: BookingLifecycleRun per job
+    """
+    now = timezone.now()
+    return [
+        LIFECYCLE_JOBS[job](chunk_size=chunk_size, dry_run=dry_run, now=now).run()
+        for job in LIFECYCLE_JOBS
+        if jobs is None or job in jobs
+    ]
@@ -0,0 +1,106 @@
+"""
+Management command to cancel and refund bookings in bulk.
+Examples:
+    # Monsoon closure of one homestay for July
+    python manage.py bulk_refund --content-type homestay --object-id 12 \
+        --from 2025-07-01 --to 2025-07-31 --reason "Monsoon closure"
+
+    # Resume a job after a crash or gateway outage
+    python manage.py bulk_refund --resume 7
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from bookings.bulk_refunds import BulkRefundEngine, plan_bulk_refund
+from bookings.models import Booking, BulkRefundJob
+
+
+class Command(BaseCommand):
+    help = 'Cancel matching bookings and refund them per the cancellation policy (resumable)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--content-type', help='Booking content type, e.g. homestay, resort')
+        parser.add_argument('--object-id', type=int, nargs='+', help='Listing IDs to cancel bookings for')
+        parser.add_argument('--from', dest='start', help='First check-in/booking date to cancel (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', help='Last check-in/booking date to cancel (YYYY-MM-DD)')
+        parser.add_argument('--booking-number', nargs='+', help='Cancel these bookings')
+        parser.add_argument('--reason', help='Cancellation reason (required for new jobs)')
+        parser.add_argument('--resume', type=int, help='Resume an existing job by ID')
+        parser.add_argument('--plan-only', action='store_true', help='Cancel and plan refunds without submitting them')
+        parser.add_argument('--no-email', action='store_true', help='Do not email guests')
+        parser.add_argument('--concurrency', type=int, help='Concurrent gateway refund calls')
+        parser.add_argument('--rate', type=float, help='Maximum refund calls per second')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                job = BulkRefundJob.objects.get(pk=options['resume'])
+            except BulkRefundJob.DoesNotExist:
+                raise CommandError(f"Bulk refund job {options['resume']} not found")
+        else:
+            job = self._plan(options)
+            self.stdout.write(
+                f'Planned job {job.pk}: {job.total_items} bookings cancelled, '
+                f'{job.skipped_items} with nothing to refund'
+            )
+            if options['plan_only']:
+                self.stdout.write(f'Run with --resume {job.pk} to submit the refunds')
+                return
+
+        engine = BulkRefundEngine(concurrency=options['concurrency'], rate_per_second=options['rate'])
+        job = engine.run(job)
+
+        summary = (
+            f'Job {job.pk} {job.status}: {job.refunded_items} refunded (₹{job.refunded_total}), '
+            f'{job.skipped_items} skipped, {job.failed_items} failed of {job.total_items}'
+        )
+        if job.status == 'completed':
+            self.stdout.write(self.style.SUCCESS(summary))
+        else:
+            raise CommandError(f'{summary}: {job.last_error}')
+
+    def _plan(self, options):
+        if not options['reason']:
+            raise CommandError('--reason is required for a new job')
+
+        bookings = Booking.objects.all()
+        filters = {}
+        if options['booking_number']:
+            bookings = bookings.filter(booking_number__in=options['booking_number'])
+            filters['booking_numbers'] = options['booking_number']
+        if options['content_type']:
+            bookings = bookings.filter(content_type=options['content_type'])
+            filters['content_type'] = options['content_type']
+        if options['object_id']:
+            bookings = bookings.filter(object_id__in=options['object_id'])
+            filters['object_ids'] = options['object_id']
+        if options['start']:
+            start = self._parse(options['start'])
+            bookings = bookings.filter(
+                Q(check_in_date__gte=start) | Q(check_in_date__isnull=True, booking_date__gte=start)
+            )
+            filters['from'] = options['start']
+        if options['end']:
+            end = self._parse(options['end'])
+            bookings = bookings.filter(
+                Q(check_in_date__lte=end) | Q(check_in_date__isnull=True, booking_date__lte=end)
+            )
+            filters['to'] = options['end']
+
+        if not filters:
+            raise CommandError('Refusing to cancel every booking; pass at least one filter')
+
+        return plan_bulk_refund(
+            bookings,
+            reason=options['reason'],
+            filters=filters,
+            notify_guests=not options['no_email']
+        )
+
+    def _parse(self, value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'Invalid date: {value}')
@@ -0,0 +1,54 @@
+"""
+Management command to drain stored payment webhook events.
+Run it from cron or as a long-lived worker (--loop) alongside the web
+processes; it claims events in batches, so several copies can run at once.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from bookings.webhooks import drain_webhook_events
+
+
+class Command(BaseCommand):
+    help = 'Process received, failed and stale payment webhook events in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.WEBHOOK_BATCH_SIZE, help='Events claimed per batch')
+        parser.add_argument('--workers', type=int, default=settings.WEBHOOK_WORKERS, help='Concurrent draining threads')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop each worker after this many batches')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the queue is empty')
+        parser.add_argument(
+            '--interval', type=float, default=settings.WEBHOOK_POLL_INTERVAL_SECONDS,
+            help='Seconds to sleep between polls with --loop'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            results = self._drain(options)
+            total = sum(results.values())
+            if total or not options['loop']:
+                summary = ', '.join(f"{count} {result}" for result, count in sorted(results.items())) or 'nothing to do'
+                self.stdout.write(self.style.SUCCESS(f'Processed {total} webhook events: {summary}'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def _drain(self, options):
+        def worker():
+            try:
+                return drain_webhook_events(options['batch_size'], options['max_batches'])
+            finally:
+                close_old_connections()
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = [executor.submit(worker) for _ in range(options['workers'])]
+            for future in futures:
+                for result, count in future.result().items():
+                    results[result] = results.get(result, 0) + count
+        return results
@@ -0,0 +1,58 @@
+"""
+Management command to reconcile local payments against the payment gateway.
+Run it from cron (e.g. hourly with --hours 2) to repair payments whose
+callback and webhook were both lost, and to report anything it cannot fix.
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.gateway_router import payment_router
+from bookings.reconciliation import PaymentReconciler
+
+
+class Command(BaseCommand):
+    help = 'Reconcile payments and orders for a time window against the payment gateway'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Reconcile the last N hours (ignored with --from)')
+        parser.add_argument('--from', dest='start', help='Window start, ISO 8601')
+        parser.add_argument('--to', dest='end', help='Window end, ISO 8601 (default: now)')
+        parser.add_argument('--page-size', type=int, default=100, help='Gateway items per page')
+        parser.add_argument('--dry-run', action='store_true', help='Report mismatches without fixing payments')
+
+    def handle(self, *args, **options):
+        end = self._parse(options['end']) if options['end'] else timezone.now()
+        start = self._parse(options['start']) if options['start'] else end - timedelta(hours=options['hours'])
+        if start >= end:
+            raise CommandError('--from must be before --to')
+
+        failed = []
+        for gateway in payment_router.gateways():
+            reconciler = PaymentReconciler(
+                gateway,
+                page_size=options['page_size'],
+                dry_run=options['dry_run']
+            )
+            run = reconciler.run(start, end)
+
+            summary = (
+                f'{gateway.name} run {run.pk} {run.status}: {run.gateway_payments_seen} payments and '
+                f'{run.gateway_orders_seen} orders checked, {run.payments_fixed} fixed, '
+                f'{run.mismatches_found} mismatches recorded'
+            )
+            if run.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(summary))
+            else:
+                failed.append(f'{summary} ({run.error})')
+
+        if failed:
+            raise CommandError('; '.join(failed))
+
+    def _parse(self, value):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'Invalid datetime: {value}')
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
@@ -0,0 +1,38 @@
+"""
+Management command to run the scheduled booking lifecycle jobs.
+Run it from cron, e.g. every 15 minutes:
+    */15 * * * * python manage.py run_lifecycle_jobs
+
+    # Only complete finished stays, previewing first
+    python manage.py run_lifecycle_jobs --job complete --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.lifecycle import LIFECYCLE_JOBS, run_lifecycle_jobs
+
+
+class Command(BaseCommand):
+    help = 'Expire stale pending bookings, flag no-shows and complete finished stays'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', nargs='+', choices=list(LIFECYCLE_JOBS), help='Jobs to run (default: all)')
+        parser.add_argument('--chunk-size', type=int, help='Bookings locked and updated per chunk')
+        parser.add_argument('--dry-run', action='store_true', help='Only count matching bookings')
+
+    def handle(self, *args, **options):
+        runs = run_lifecycle_jobs(jobs=options['job'], dry_run=options['dry_run'], chunk_size=options['chunk_size'])
+
+        failed = []
+        for run in runs:
+            summary = (
+                f'{run.job} {run.status}: {run.bookings_changed} of {run.bookings_matched} bookings changed, '
+                f'{run.payments_expired} payments expired, {run.holds_released} holds released, {run.chunks} chunks '
+                f'(max {run.max_chunk_ms}ms), {run.duration_ms}ms'
+            )
+            if run.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(summary))
+            else:
+                failed.append(f'{summary} ({run.error})')
+
+        if failed:
+            raise CommandError('\n'.join(failed))
@@ -0,0 +1,43 @@
+"""
+Management command to settle partner commission.
+Examples:
+    # Month-end run: settle everything completed up to 31 March
+    python manage.py run_settlement --cutoff 2025-03-31
+
+    # Preview what the next run would pick up
+    python manage.py run_settlement --cutoff 2025-03-31 --dry-run
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+
+from bookings.settlement import run_settlement, settleable_bookings
+
+
+class Command(BaseCommand):
+    help = 'Write commission ledger rows and partner payout statements for completed bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cutoff', help='Settle bookings dated up to this day (YYYY-MM-DD, default: yesterday)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be settled')
+
+    def handle(self, *args, **options):
+        try:
+            cutoff = date.fromisoformat(options['cutoff']) if options['cutoff'] else date.today() - timedelta(days=1)
+        except ValueError:
+            raise CommandError('--cutoff must be YYYY-MM-DD')
+
+        if options['dry_run']:
+            pending = settleable_bookings(cutoff).aggregate(count=Count('id'), total=Sum('total_amount'))
+            self.stdout.write(f"{pending['count']} bookings (₹{pending['total'] or 0}) would be settled up to {cutoff}")
+            return
+
+        batch = run_settlement(cutoff)
+        if batch.status != 'completed':
+            raise CommandError(f'Settlement batch {batch.pk} failed: {batch.last_error}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Settlement batch {batch.pk}: {batch.booking_count} bookings, {batch.statement_count} statements, '
+            f'commission ₹{batch.commission_amount}, payouts ₹{batch.payout_amount}'
+        ))
@@ -0,0 +1,85 @@
+# Generated by Django 5.0.2 on 2026-10-19 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0003_remove_payment_payments_payment_749428_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentWebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                ("event_id", models.CharField(max_length=100, unique=True)),
+                ("event_type", models.CharField(max_length=50)),
+                (
+                    "payment_gateway",
+                    models.CharField(
+                        choices=[
+                            ("razorpay", "Razorpay"),
+                            ("phonepe", "PhonePe"),
+                            ("paytm", "Paytm"),
+                            ("googlepay", "Google Pay"),
+                            ("stripe", "Stripe"),
+                            ("cash", "Cash"),
+                            ("bank_transfer", "Bank Transfer"),
+                        ],
+                        default="razorpay",
+                        max_length=20,
+                    ),
+                ),
+                ("order_id", models.CharField(blank=True, max_length=100)),
+                ("gateway_payment_id", models.CharField(blank=True, max_length=200)),
+                ("payload", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("received", "Received"),
+                            ("processing", "Processing"),
+                            ("processed", "Processed"),
+                            ("ignored", "Ignored"),
+                            ("failed", "Failed"),
+                        ],
+                        default="received",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Payment Webhook Event",
+                "verbose_name_plural": "Payment Webhook Events",
+                "db_table": "payment_webhook_events",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="payment_web_status_313b39_idx",
+                    )
+                ],
+            },
+        ),
+    ]
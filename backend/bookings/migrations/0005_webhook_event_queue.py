@@ -0,0 +1,44 @@
+# Generated by Django 5.0.2 on 2026-10-19 11:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0004_payment_webhook_event"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="paymentwebhookevent",
+            name="payment_web_status_313b39_idx",
+        ),
+        migrations.AddField(
+            model_name="paymentwebhookevent",
+            name="available_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="paymentwebhookevent",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="paymentwebhookevent",
+            name="raw_body",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name="paymentwebhookevent",
+            name="event_type",
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name="paymentwebhookevent",
+            index=models.Index(
+                fields=["status", "available_at"], name="payment_web_status_4528b6_idx"
+            ),
+        ),
+    ]
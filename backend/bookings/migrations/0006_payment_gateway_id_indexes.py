@@ -0,0 +1,29 @@
+# Generated by Django 5.0.2 on 2026-10-19 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0005_webhook_event_queue"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["order_id"], name="payments_order_i_b32b33_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["gateway_payment_id"], name="payments_gateway_e04247_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["payment_link_id"], name="payments_payment_6a5fac_idx"
+            ),
+        ),
+    ]
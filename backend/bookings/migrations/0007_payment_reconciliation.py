@@ -0,0 +1,161 @@
+# Generated by Django 5.0.2 on 2026-10-19 11:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0006_payment_gateway_id_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentReconciliationRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                (
+                    "payment_gateway",
+                    models.CharField(
+                        choices=[
+                            ("razorpay", "Razorpay"),
+                            ("phonepe", "PhonePe"),
+                            ("paytm", "Paytm"),
+                            ("googlepay", "Google Pay"),
+                            ("stripe", "Stripe"),
+                            ("cash", "Cash"),
+                            ("bank_transfer", "Bank Transfer"),
+                        ],
+                        default="razorpay",
+                        max_length=20,
+                    ),
+                ),
+                ("window_start", models.DateTimeField()),
+                ("window_end", models.DateTimeField()),
+                ("dry_run", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("error", models.TextField(blank=True)),
+                ("gateway_payments_seen", models.PositiveIntegerField(default=0)),
+                ("gateway_orders_seen", models.PositiveIntegerField(default=0)),
+                ("payments_fixed", models.PositiveIntegerField(default=0)),
+                ("mismatches_found", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Payment Reconciliation Run",
+                "verbose_name_plural": "Payment Reconciliation Runs",
+                "db_table": "payment_reconciliation_runs",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="PaymentReconciliationMismatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                (
+                    "mismatch_type",
+                    models.CharField(
+                        choices=[
+                            ("status_fixed", "Stuck Payment Fixed"),
+                            ("status_mismatch", "Status Mismatch"),
+                            ("amount_mismatch", "Amount Mismatch"),
+                            ("missing_locally", "Missing Locally"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("order_id", models.CharField(blank=True, max_length=100)),
+                ("gateway_payment_id", models.CharField(blank=True, max_length=200)),
+                ("local_status", models.CharField(blank=True, max_length=20)),
+                ("gateway_status", models.CharField(blank=True, max_length=20)),
+                (
+                    "local_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                (
+                    "gateway_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                ("details", models.JSONField(blank=True, default=dict)),
+                ("resolved", models.BooleanField(default=False)),
+                (
+                    "payment",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="reconciliation_mismatches",
+                        to="bookings.payment",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="mismatches",
+                        to="bookings.paymentreconciliationrun",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Payment Reconciliation Mismatch",
+                "verbose_name_plural": "Payment Reconciliation Mismatches",
+                "db_table": "payment_reconciliation_mismatches",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["mismatch_type", "resolved"],
+                        name="payment_rec_mismatc_aedadf_idx",
+                    )
+                ],
+            },
+        ),
+    ]
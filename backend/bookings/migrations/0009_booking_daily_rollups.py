@@ -0,0 +1,97 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0008_bulk_refunds"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookingDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "booking_type",
+                    models.CharField(
+                        choices=[
+                            ("resort", "Resort"),
+                            ("homestay", "Homestay"),
+                            ("rental", "Rental"),
+                            ("destination", "Destination/Activity"),
+                            ("service", "Local Service"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending Confirmation"),
+                            ("confirmed", "Confirmed"),
+                            ("cancelled", "Cancelled"),
+                            ("completed", "Completed"),
+                            ("refunded", "Refunded"),
+                            ("no_show", "No Show"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("content_type", models.CharField(max_length=20)),
+                ("object_id", models.PositiveIntegerField()),
+                ("booking_count", models.PositiveIntegerField(default=0)),
+                ("total_guests", models.PositiveIntegerField(default=0)),
+                (
+                    "base_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "tax_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "discount_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "commission_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "verbose_name": "Booking Daily Rollup",
+                "verbose_name_plural": "Booking Daily Rollups",
+                "db_table": "booking_daily_rollups",
+                "ordering": ["date"],
+                "indexes": [
+                    models.Index(
+                        fields=["booking_type", "date"],
+                        name="booking_dai_booking_7bebcd_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "date"], name="booking_dai_status_aac5d2_idx"
+                    ),
+                ],
+                "unique_together": {
+                    ("date", "booking_type", "status", "content_type", "object_id")
+                },
+            },
+        ),
+    ]
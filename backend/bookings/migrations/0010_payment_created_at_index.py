@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0009_booking_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["created_at"], name="payments_created_e3a130_idx"
+            ),
+        ),
+    ]
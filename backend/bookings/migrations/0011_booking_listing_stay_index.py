@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0010_payment_created_at_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["content_type", "object_id", "check_in_date"],
+                name="bookings_content_b55dbb_idx",
+            ),
+        ),
+    ]
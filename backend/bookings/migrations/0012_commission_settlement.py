@@ -0,0 +1,257 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0011_booking_listing_stay_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SettlementBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                ("cutoff_date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("booking_count", models.PositiveIntegerField(default=0)),
+                ("statement_count", models.PositiveIntegerField(default=0)),
+                (
+                    "gross_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "commission_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "payout_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="settlement_batches",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Settlement Batch",
+                "verbose_name_plural": "Settlement Batches",
+                "db_table": "settlement_batches",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="PartnerPayoutStatement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                (
+                    "partner_type",
+                    models.CharField(
+                        choices=[
+                            ("resort", "Resort"),
+                            ("homestay", "Homestay"),
+                            ("rental_provider", "Rental Provider"),
+                            ("destination", "Destination/Activity"),
+                            ("service", "Local Service"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("partner_id", models.PositiveIntegerField()),
+                ("booking_count", models.PositiveIntegerField(default=0)),
+                (
+                    "gross_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "commission_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "payout_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending Payout"),
+                            ("paid", "Paid"),
+                            ("on_hold", "On Hold"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("paid_at", models.DateTimeField(blank=True, null=True)),
+                ("payout_reference", models.CharField(blank=True, max_length=100)),
+                (
+                    "batch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statements",
+                        to="bookings.settlementbatch",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Partner Payout Statement",
+                "verbose_name_plural": "Partner Payout Statements",
+                "db_table": "partner_payout_statements",
+                "ordering": ["batch", "partner_type", "partner_id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CommissionLedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                (
+                    "partner_type",
+                    models.CharField(
+                        choices=[
+                            ("resort", "Resort"),
+                            ("homestay", "Homestay"),
+                            ("rental_provider", "Rental Provider"),
+                            ("destination", "Destination/Activity"),
+                            ("service", "Local Service"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("partner_id", models.PositiveIntegerField()),
+                (
+                    "commission_rate",
+                    models.DecimalField(decimal_places=2, max_digits=5),
+                ),
+                ("gross_amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                (
+                    "commission_amount",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                ("payout_amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                (
+                    "booking",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="commission_ledger_entry",
+                        to="bookings.booking",
+                    ),
+                ),
+                (
+                    "statement",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to="bookings.partnerpayoutstatement",
+                    ),
+                ),
+                (
+                    "batch",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to="bookings.settlementbatch",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Commission Ledger Entry",
+                "verbose_name_plural": "Commission Ledger",
+                "db_table": "commission_ledger",
+                "ordering": ["id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="partnerpayoutstatement",
+            index=models.Index(
+                fields=["partner_type", "partner_id", "status"],
+                name="partner_pay_partner_5bf85d_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="partnerpayoutstatement",
+            unique_together={("batch", "partner_type", "partner_id")},
+        ),
+        migrations.AddIndex(
+            model_name="commissionledgerentry",
+            index=models.Index(
+                fields=["batch", "partner_type", "partner_id"],
+                name="commission__batch_i_677ba5_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0012_commission_settlement"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookingstatushistory",
+            name="source",
+            field=models.CharField(blank=True, max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name="bookingstatushistory",
+            index=models.Index(
+                fields=["booking", "created_at"], name="booking_sta_booking_96150c_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0013_status_history_source"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookingLifecycleRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                (
+                    "job",
+                    models.CharField(
+                        choices=[
+                            ("expire_pending", "Expire unpaid pending bookings"),
+                            ("no_show", "Flag no-shows"),
+                            ("complete", "Complete finished stays"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("dry_run", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="running",
+                        max_length=20,
+                    ),
+                ),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("error", models.TextField(blank=True)),
+                ("bookings_matched", models.PositiveIntegerField(default=0)),
+                ("bookings_changed", models.PositiveIntegerField(default=0)),
+                ("payments_expired", models.PositiveIntegerField(default=0)),
+                ("chunks", models.PositiveIntegerField(default=0)),
+                ("duration_ms", models.PositiveIntegerField(default=0)),
+                ("max_chunk_ms", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Booking Lifecycle Run",
+                "verbose_name_plural": "Booking Lifecycle Runs",
+                "db_table": "booking_lifecycle_runs",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["status", "created_at"], name="bookings_status_8f492c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["status", "check_out_date"], name="bookings_status_73c84c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["status", "expires_at"], name="payments_status_b79f19_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="bookinglifecyclerun",
+            index=models.Index(
+                fields=["job", "created_at"], name="booking_lif_job_a59ed3_idx"
+            ),
+        ),
+    ]
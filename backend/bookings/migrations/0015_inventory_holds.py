@@ -0,0 +1,90 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0014_booking_lifecycle_runs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookingavailability",
+            name="held_slots",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="bookinglifecyclerun",
+            name="holds_released",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="InventoryHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                ("content_type", models.CharField(max_length=20)),
+                ("object_id", models.PositiveIntegerField()),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("quantity", models.PositiveIntegerField(default=1)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("active", "Active"),
+                            ("converted", "Converted"),
+                            ("released", "Released"),
+                            ("expired", "Expired"),
+                        ],
+                        default="active",
+                        max_length=20,
+                    ),
+                ),
+                ("expires_at", models.DateTimeField(blank=True, null=True)),
+                ("oversold", models.BooleanField(default=False)),
+                (
+                    "booking",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory_holds",
+                        to="bookings.booking",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Inventory Hold",
+                "verbose_name_plural": "Inventory Holds",
+                "db_table": "inventory_holds",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "expires_at"],
+                        name="inventory_h_status_882892_idx",
+                    ),
+                    models.Index(
+                        fields=["booking", "status"],
+                        name="inventory_h_booking_47b542_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0016_booking_packages"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inventoryhold",
+            name="start_time",
+            field=models.TimeField(blank=True, null=True),
+        ),
+    ]
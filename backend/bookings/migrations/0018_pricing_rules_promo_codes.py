@@ -0,0 +1,139 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0017_inventory_hold_start_time"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PromoCode",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                ("code", models.CharField(max_length=30, unique=True)),
+                ("description", models.CharField(blank=True, max_length=200)),
+                (
+                    "discount_percent",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=5, null=True
+                    ),
+                ),
+                (
+                    "discount_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                (
+                    "max_discount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                ("content_type", models.CharField(blank=True, max_length=20)),
+                ("object_id", models.PositiveIntegerField(blank=True, null=True)),
+                ("min_nights", models.PositiveIntegerField(default=1)),
+                ("valid_from", models.DateTimeField(blank=True, null=True)),
+                ("valid_to", models.DateTimeField(blank=True, null=True)),
+                ("max_uses", models.PositiveIntegerField(blank=True, null=True)),
+                ("times_used", models.PositiveIntegerField(default=0)),
+                ("is_active", models.BooleanField(default=True)),
+            ],
+            options={
+                "verbose_name": "Promo Code",
+                "verbose_name_plural": "Promo Codes",
+                "db_table": "promo_codes",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="booking",
+            name="promo_code",
+            field=models.CharField(blank=True, max_length=30),
+        ),
+        migrations.CreateModel(
+            name="PricingRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "rule_type",
+                    models.CharField(
+                        choices=[
+                            ("length_of_stay", "Length of Stay"),
+                            ("early_bird", "Early Bird"),
+                            ("last_minute", "Last Minute"),
+                            ("occupancy", "Occupancy Surge"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("content_type", models.CharField(blank=True, max_length=20)),
+                ("object_id", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "adjustment_percent",
+                    models.DecimalField(decimal_places=2, max_digits=5),
+                ),
+                ("min_nights", models.PositiveIntegerField(blank=True, null=True)),
+                ("min_days_ahead", models.PositiveIntegerField(blank=True, null=True)),
+                ("max_days_ahead", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "min_occupancy",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=5, null=True
+                    ),
+                ),
+                ("valid_from", models.DateField(blank=True, null=True)),
+                ("valid_to", models.DateField(blank=True, null=True)),
+                ("is_active", models.BooleanField(default=True)),
+            ],
+            options={
+                "verbose_name": "Pricing Rule",
+                "verbose_name_plural": "Pricing Rules",
+                "db_table": "pricing_rules",
+                "ordering": ["content_type", "object_id", "rule_type"],
+                "indexes": [
+                    models.Index(
+                        fields=["content_type", "object_id", "is_active"],
+                        name="pricing_rul_content_e16bc9_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -6,10 +6,83 @@ Use this for development and testing!
 import uuid
 import hmac
 import hashlib
+import json
+import random
+import threading
+import time
 from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 
+from .gateway_transport import GatewayTransport
+
+
+class MockGatewayError(Exception):
+    """Simulated gateway-side failure (HTTP 5xx)."""
+
+
+class MockGatewayProfile:
+    """
+    Behaviour knobs for load-testing against the mock gateway.
+
+    Defaults (from settings) answer instantly and always succeed. Latency is
+    sampled per API call from a `fixed`, `uniform` or `lognormal`
+    distribution; `uniform` spans 0..2x the mean, `lognormal` uses the mean
+    as its median with `latency_sigma` spread.
+    """
+
+    FIELDS = [
+        'latency_distribution', 'latency_ms', 'latency_sigma', 'failure_rate',
+        'timeout_rate', 'timeout_seconds', 'authorized_rate', 'emit_webhooks',
+        'webhook_delay_ms', 'webhook_duplicate_rate', 'seed'
+    ]
+
+    def __init__(self, **options):
+        self.latency_distribution = 'fixed'
+        self.latency_ms = 0
+        self.latency_sigma = 0.5
+        self.failure_rate = 0.0
+        self.timeout_rate = 0.0
+        self.timeout_seconds = settings.PAYMENT_GATEWAY_READ_TIMEOUT_SECONDS
+        self.authorized_rate = 0.0
+        self.emit_webhooks = False
+        self.webhook_delay_ms = 0
+        self.webhook_duplicate_rate = 0.0
+        self.seed = None
+        self.update(**options)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(**{
+            field: getattr(settings, f'MOCK_GATEWAY_{field.upper()}')
+            for field in cls.FIELDS
+            if hasattr(settings, f'MOCK_GATEWAY_{field.upper()}')
+        })
+
+    def update(self, **options):
+        for field, value in options.items():
+            if field not in self.FIELDS:
+                raise ValueError(f"Unknown mock gateway option: {field}")
+            setattr(self, field, value)
+        if self.latency_distribution not in ['fixed', 'uniform', 'lognormal']:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+        self.random = random.Random(self.seed)
+
+    def chance(self, rate):
+        return rate > 0 and self.random.random() < rate
+
+    def sample_latency(self):
+        """Return one simulated round-trip time, in seconds."""
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_distribution == 'uniform':
+            return self.random.uniform(0, 2 * self.latency_ms) / 1000
+        if self.latency_distribution == 'lognormal':
+            return self.random.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000
+        return self.latency_ms / 1000
+
 
 class MockPaymentGateway:
     """
@@ -17,29 +90,61 @@ class MockPaymentGateway:
     Perfect for testing without real API keys!
     """
 
-    def __init__(self):
+    def __init__(self, name='mock', code='razorpay'):
+        # Router name, and the Payment.payment_gateway value this mock stands in for
+        self.name = name
+        self.code = code
+
         # Mock credentials
         self.key_id = "rzp_test_mock123456789"
         self.key_secret = "mock_secret_key_12345678"
+        # Same transport as the real gateway, so retries, the circuit breaker
+        # and latency metrics can be exercised without Razorpay
+        self.transport = GatewayTransport(name)
+        self.profile = MockGatewayProfile.from_settings()
+
+        # Refunds submitted through submit_refund, by payment ID (in-memory)
+        self._refunds = {}
+        # Payments made through the mock (checkout callbacks and built webhooks), by order ID (in-memory)
+        self._payments = {}
+
+    def configure(self, **options):
+        """
+        Change simulated gateway behaviour at runtime, e.g. from a load test:
 
-    def create_order(self, booking, notes=None):
+            mock_payment_gateway.configure(latency_distribution='lognormal',
+                                           latency_ms=400, failure_rate=0.02)
+        """
+        self.profile.update(**options)
+
+    def owns_payment(self, payment):
+        """Whether a payment's order was made by the mock rather than live Razorpay."""
+        return payment.order_id.startswith('order_mock_') or payment.payment_id.startswith('PAY_MOCK_')
+
+    def create_order(self, booking, notes=None, package=None):
         """
         Create a mock Razorpay order.
         Simulates Razorpay order creation without API calls.
         """
         from .models import Payment
+        from .payment_lookup import payment_lookup
+
+        amount = package.total_amount if package else booking.total_amount
+        reference = package.package_number if package else booking.booking_number
+        if package:
+            notes = {'package_number': package.package_number, **(notes or {})}
 
         # Generate mock order ID
         order_id = f"order_mock_{uuid.uuid4().hex[:16]}"
-        receipt = f"booking_{booking.booking_number}_{uuid.uuid4().hex[:8]}"
+        receipt = f"booking_{reference}_{uuid.uuid4().hex[:8]}"
 
         # Mock order response
         mock_order = {
             'id': order_id,
             'entity': 'order',
-            'amount': int(float(booking.total_amount) * 100),
+            'amount': int(float(amount) * 100),
             'amount_paid': 0,
-            'amount_due': int(float(booking.total_amount) * 100),
+            'amount_due': int(float(amount) * 100),
             'currency': 'INR',
             'receipt': receipt,
             'status': 'created',
@@ -53,24 +158,34 @@ class MockPaymentGateway:
             'created_at': int(timezone.now().timestamp())
         }
 
+        mock_order = self.transport.call('order.create', self._respond, 'order.create', mock_order)
+
         # Create payment record
         payment = Payment.objects.create(
             booking=booking,
+            package=package,
             payment_id=f"PAY_MOCK_{uuid.uuid4().hex[:12].upper()}",
             order_id=order_id,
-            amount=booking.total_amount,
+            amount=amount,
             currency='INR',
-            payment_gateway='razorpay',
+            payment_gateway=self.code,
             status='created',
             gateway_response=mock_order,
             expires_at=timezone.now() + timedelta(hours=24)
         )
+        payment_lookup.remember_order(payment)
 
+        return self.build_checkout_options(booking, payment)
+
+    def build_checkout_options(self, booking, payment):
+        """
+        Build mock checkout options for an existing order.
+        """
         return {
-            'order_id': order_id,
+            'order_id': payment.order_id,
             'payment_id': payment.payment_id,
-            'amount': booking.total_amount,
-            'currency': 'INR',
+            'amount': payment.amount,
+            'currency': payment.currency,
             'key': self.key_id,
             'name': 'WayanTrails',
             'description': f'Booking for {booking.booking_type}',
@@ -79,7 +194,7 @@ class MockPaymentGateway:
                 'email': booking.guest_email,
                 'contact': str(booking.guest_phone)
             },
-            'notes': mock_order['notes'],
+            'notes': (payment.gateway_response or {}).get('notes', {}),
             'theme': {
                 'color': '#059669'
             },
@@ -92,6 +207,7 @@ class MockPaymentGateway:
         Returns a fake link that can be used for testing.
         """
         from .models import Payment
+        from .payment_lookup import payment_lookup
 
         # Generate mock payment link ID
         link_id = f"plink_mock_{uuid.uuid4().hex[:16]}"
@@ -128,6 +244,8 @@ class MockPaymentGateway:
             'created_at': int(timezone.now().timestamp())
         }
 
+        mock_link = self.transport.call('payment_link.create', self._respond, 'payment_link.create', mock_link)
+
         # Create or update payment record
         payment, created = Payment.objects.get_or_create(
             booking=booking,
@@ -136,7 +254,7 @@ class MockPaymentGateway:
                 'payment_id': f"PAY_MOCK_{uuid.uuid4().hex[:12].upper()}",
                 'amount': booking.total_amount,
                 'currency': 'INR',
-                'payment_gateway': 'razorpay',
+                'payment_gateway': self.code,
             }
         )
 
@@ -148,6 +266,7 @@ class MockPaymentGateway:
         from datetime import datetime, timezone as dt_timezone
         payment.expires_at = datetime.fromtimestamp(expire_by, tz=dt_timezone.utc)
         payment.save()
+        payment_lookup.remember_order(payment)
 
         return {
             'payment_link': mock_link['short_url'],
@@ -210,77 +329,194 @@ class MockPaymentGateway:
                 'provider': 'paytm'
             }
 
+        # Some methods authorise first and capture later
+        captured = not self.profile.chance(self.profile.authorized_rate)
+
         mock_payment = {
             'id': payment_id,
             'entity': 'payment',
             'amount': 1000000,  # ₹10,000
             'currency': 'INR',
-            'status': 'captured',
+            'status': 'captured' if captured else 'authorized',
             'method': method,
             'description': 'Mock payment for testing',
-            'captured': True,
+            'captured': captured,
             'email': 'test@wayantrails.com',
             'contact': '+919876543210',
             'created_at': int(timezone.now().timestamp()),
             **method_details
         }
 
-        return mock_payment
+        return self.transport.call('payment.fetch', self._respond, 'payment.fetch', mock_payment, idempotent=True)
+
+    def iter_payments(self, start, end, page_size=100):
+        """
+        Page through mock gateway payments created in a time window.
+
+        Only payments the mock actually made are reported: those recorded by
+        its checkout callback or webhooks in this process, and local payments
+        already carrying a gateway payment ID. Orders nobody paid have no
+        payment entity, as on Razorpay.
+
+        Yields:
+            list: Payment entities, one page at a time
+        """
+        for page in self._iter_local_orders(start, end, page_size):
+            entities = [entity for row in page for entity in self._order_payments(row)]
+            if entities:
+                yield entities
+
+    def iter_orders(self, start, end, page_size=100):
+        """
+        Page through mock gateway orders created in a time window. An order
+        is 'paid' only once one of its payments was captured.
+
+        Yields:
+            list: Order entities, one page at a time
+        """
+        for page in self._iter_local_orders(start, end, page_size):
+            orders = []
+            for row in page:
+                payments = self._order_payments(row)
+                amount = int(float(row['amount']) * 100)
+                paid = any(entity['status'] in ['captured', 'refunded'] for entity in payments)
+                orders.append({
+                    'id': row['order_id'],
+                    'entity': 'order',
+                    'amount': amount,
+                    'amount_paid': amount if paid else 0,
+                    'currency': row['currency'],
+                    'status': 'paid' if paid else ('attempted' if payments else 'created'),
+                    'created_at': int(row['created_at'].timestamp())
+                })
+            yield orders
+
+    def _order_payments(self, row):
+        """Payment entities the mock holds for a local order row."""
+        recorded = self._payments.get(row['order_id'])
+        if recorded:
+            return list(recorded.values())
+        if not row['gateway_payment_id']:
+            return []
+
+        # Paid before this process started: rebuild the entity from the local row
+        status = {
+            'completed': 'captured',
+            'refunded': 'refunded',
+            'partially_refunded': 'captured',
+            'authorized': 'authorized',
+            'failed': 'failed',
+        }.get(row['status'])
+        if not status:
+            return []
+        return [{
+            'id': row['gateway_payment_id'],
+            'entity': 'payment',
+            'amount': int(float(row['amount']) * 100),
+            'currency': row['currency'],
+            'status': status,
+            'order_id': row['order_id'],
+            'method': 'upi',
+            'vpa': 'user@paytm',
+            'captured': status in ['captured', 'refunded'],
+            'created_at': int(row['created_at'].timestamp())
+        }]
+
+    def _record_payment(self, order_id, entity):
+        """Remember a payment the mock made so the list APIs can report it."""
+        self._payments.setdefault(order_id, {})[entity['id']] = dict(entity, order_id=order_id)
+
+    def _iter_local_orders(self, start, end, page_size):
+        """Stand in for the gateway's list APIs using local payment rows."""
+        from .models import Payment
+
+        rows = Payment.objects.filter(
+            created_at__gte=start,
+            created_at__lt=end,
+            order_id__startswith='order_mock_'
+        ).order_by('created_at').values(
+            'order_id', 'gateway_payment_id', 'amount', 'currency', 'status', 'created_at'
+        ).iterator(chunk_size=page_size)
+
+        page = []
+        for row in rows:
+            page.append(row)
+            if len(page) == page_size:
+                yield page
+                page = []
+        if page:
+            yield page
 
     def process_payment_success(self, razorpay_payment_id, razorpay_order_id, razorpay_signature):
         """
         Process mock payment success.
         Simulates complete payment flow.
         """
-        from .models import Payment, Booking
-        from .emails import send_payment_success_email
+        from .payment_lookup import payment_lookup
+        from .webhooks import SETTLED_PAYMENT_STATUSES, confirm_paid_booking
 
         # Verify signature
         if not self.verify_payment(razorpay_order_id, razorpay_payment_id, razorpay_signature):
             raise ValueError("Invalid payment signature")
 
-        # Find payment record
-        payment = Payment.objects.filter(order_id=razorpay_order_id).first()
-
-        if not payment:
-            raise ValueError("Payment record not found")
-
-        # Fetch mock payment details
+        # Fetch mock payment details (outside the lock; it may be slow)
         payment_details = self.fetch_payment(razorpay_payment_id)
 
-        # Extract payment method details
-        payment_method = payment_details.get('method', 'upi')
-        payment.payment_method_type = self._map_payment_method(payment_method)
-        payment.gateway_payment_id = razorpay_payment_id
-        payment.signature = razorpay_signature
-        payment.is_verified = True
-
-        # Extract specific payment details
-        if payment_method == 'upi':
-            payment.upi_id = payment_details.get('vpa', '')
-        elif payment_method == 'card':
-            payment.card_last_4 = payment_details.get('last4', '')
-            payment.card_network = payment_details.get('network', '')
-        elif payment_method == 'wallet':
-            payment.wallet_name = payment_details.get('wallet', '')
-
-        # Update payment status
-        payment.status = 'completed'
-        payment.paid_at = timezone.now()
-        payment.gateway_response = payment_details
-        payment.save()
-
-        # Update booking status
-        booking = payment.booking
-        booking.status = 'confirmed'
-        booking.confirmed_at = timezone.now()
-        booking.save()
-
-        # Send success email
-        try:
-            send_payment_success_email(booking)
-        except Exception as e:
-            print(f"Error sending payment success email: {e}")
+        with transaction.atomic():
+            # Lock the payment row so concurrent verify calls and webhooks serialise
+            payment = payment_lookup.get_by_order_id(razorpay_order_id, lock=True)
+
+            if not payment:
+                raise ValueError("Payment record not found")
+            self._record_payment(
+                razorpay_order_id, dict(payment_details, amount=int(float(payment.amount) * 100))
+            )
+
+            # Already settled by an earlier callback or webhook
+            if payment.status in SETTLED_PAYMENT_STATUSES:
+                return {
+                    'payment': payment,
+                    'booking': payment.booking,
+                    'status': 'success',
+                    'mock': True
+                }
+
+            # Extract payment method details
+            payment_method = payment_details.get('method', 'upi')
+            payment.payment_method_type = self._map_payment_method(payment_method)
+            payment.gateway_payment_id = razorpay_payment_id
+            payment.signature = razorpay_signature
+            payment.is_verified = True
+
+            # Extract specific payment details
+            if payment_method == 'upi':
+                payment.upi_id = payment_details.get('vpa', '')
+            elif payment_method == 'card':
+                payment.card_last_4 = payment_details.get('last4', '')
+                payment.card_network = payment_details.get('network', '')
+            elif payment_method == 'wallet':
+                payment.wallet_name = payment_details.get('wallet', '')
+
+            # Update payment status
+            if payment_details['status'] == 'captured':
+                payment.status = 'completed'
+                payment.paid_at = timezone.now()
+            else:
+                payment.status = 'authorized'
+                payment.authorized_at = timezone.now()
+            payment.gateway_response = payment_details
+            payment.save()
+
+            # Update booking status
+            booking = payment.booking
+            if payment.status == 'completed':
+                booking, _ = confirm_paid_booking(payment.booking_id, package_id=payment.package_id)
+
+                # Send success email once the payment is committed
+                transaction.on_commit(lambda: self._send_success_email(booking))
+
+                # Razorpay also reports the capture by webhook
+                transaction.on_commit(lambda: self.emit_webhook(payment))
 
         return {
             'payment': payment,
@@ -289,14 +525,23 @@ class MockPaymentGateway:
             'mock': True
         }
 
+    def _send_success_email(self, booking):
+        """Send payment success email without failing the payment flow."""
+        from .emails import send_payment_success_email
+
+        try:
+            send_payment_success_email(booking)
+        except Exception as e:
+            print(f"Error sending payment success email: {e}")
+
     def create_refund(self, payment_id, amount=None, reason=None):
         """
         Create mock refund.
         Simulates refund without API calls.
         """
-        from .models import Payment
+        from .payment_lookup import payment_lookup
 
-        payment = Payment.objects.filter(gateway_payment_id=payment_id).first()
+        payment = payment_lookup.get_by_gateway_payment_id(payment_id)
 
         if not payment:
             raise ValueError("Payment not found")
@@ -318,6 +563,7 @@ class MockPaymentGateway:
             'speed_processed': 'normal',
             'created_at': int(timezone.now().timestamp())
         }
+        mock_refund = self.transport.call('payment.refund', self._respond, 'payment.refund', mock_refund)
 
         # Update payment record
         payment.refund_id = refund_id
@@ -328,11 +574,164 @@ class MockPaymentGateway:
         payment.save()
 
         # Update booking status
-        payment.booking.status = 'refunded'
-        payment.booking.save()
+        from .state_machine import InvalidTransitionError, transition
+        try:
+            transition(payment.booking_id, 'refunded', reason=payment.refund_reason, source='refund')
+        except InvalidTransitionError as e:
+            # The gateway refund went through; keep the booking status and flag it
+            print(f"Refund {payment.refund_id} recorded without a booking status change: {e}")
 
         return mock_refund
 
+    def submit_refund(self, payment_id, amount, notes=None):
+        """
+        Submit a mock refund without updating local records.
+        """
+        mock_refund = {
+            'id': f"rfnd_mock_{uuid.uuid4().hex[:16]}",
+            'entity': 'refund',
+            'amount': amount,
+            'currency': 'INR',
+            'payment_id': payment_id,
+            'notes': notes or {},
+            'status': 'processed',
+            'speed_processed': 'normal',
+            'created_at': int(timezone.now().timestamp())
+        }
+        mock_refund = self.transport.call('payment.refund', self._respond, 'payment.refund', mock_refund)
+        self._refunds.setdefault(payment_id, []).append(mock_refund)
+        return mock_refund
+
+    def fetch_refunds(self, payment_id):
+        """Return mock refunds submitted for a payment in this process."""
+        return self.transport.call(
+            'payment.refunds', self._respond, 'payment.refunds',
+            list(self._refunds.get(payment_id, [])), idempotent=True
+        )
+
+    def build_webhook(self, payment, event='payment.captured', event_id=None, method='upi'):
+        """
+        Build a signed Razorpay-style webhook delivery for a payment.
+
+        Returns:
+            tuple: (body bytes, headers dict) as the webhook endpoint receives them
+        """
+        payment_entity = {
+            'id': payment.gateway_payment_id or f"pay_mock_{uuid.uuid4().hex[:14]}",
+            'entity': 'payment',
+            'amount': int(float(payment.amount) * 100),
+            'currency': payment.currency,
+            'status': 'captured' if event == 'payment.captured' else 'failed',
+            'order_id': payment.order_id,
+            'method': method,
+            'captured': event == 'payment.captured',
+            'vpa': 'success@mockupi' if method == 'upi' else None,
+            'created_at': int(timezone.now().timestamp())
+        }
+        if event == 'payment.failed':
+            payment_entity['error_code'] = 'BAD_REQUEST_ERROR'
+            payment_entity['error_description'] = 'Mock payment failure'
+        self._record_payment(payment.order_id, payment_entity)
+
+        webhook_data = {
+            'entity': 'event',
+            'account_id': 'acc_mock',
+            'event': event,
+            'contains': ['payment'],
+            'payload': {'payment': {'entity': payment_entity}},
+            'created_at': int(timezone.now().timestamp())
+        }
+        body = json.dumps(webhook_data).encode('utf-8')
+        return body, self._webhook_headers(body, event_id or f"evt_mock_{uuid.uuid4().hex[:14]}")
+
+    def deliver_webhook(self, body, headers):
+        """
+        Feed a webhook through the same ingestion path as the HTTP endpoint.
+        Processing runs inline so tests can assert on the outcome.
+
+        Returns:
+            tuple: (PaymentWebhookEvent, created: bool)
+        """
+        from .webhooks import verify_webhook_signature, record_webhook_event, process_webhook_event
+
+        if not verify_webhook_signature(body, headers.get('X-Razorpay-Signature')):
+            raise ValueError("Invalid webhook signature")
+
+        event, created = record_webhook_event(body, event_id=headers.get('X-Razorpay-Event-Id'))
+        if created:
+            process_webhook_event(event.pk)
+            event.refresh_from_db()
+        return event, created
+
+    def replay_webhook_event(self, event_id):
+        """Re-deliver a stored event, as Razorpay does when it retries."""
+        from .models import PaymentWebhookEvent
+
+        stored = PaymentWebhookEvent.objects.get(event_id=event_id)
+        body = stored.raw_body.encode('utf-8')
+        return self.deliver_webhook(body, self._webhook_headers(body, event_id))
+
+    def _webhook_headers(self, body, event_id):
+        """Sign a webhook body with the configured webhook secret."""
+        headers = {'X-Razorpay-Event-Id': event_id}
+        webhook_secret = settings.RAZORPAY_WEBHOOK_SECRET
+        if webhook_secret:
+            headers['X-Razorpay-Signature'] = hmac.new(
+                webhook_secret.encode('utf-8'),
+                body,
+                hashlib.sha256
+            ).hexdigest()
+        return headers
+
+    def emit_webhook(self, payment, event='payment.captured'):
+        """
+        Send a webhook to our ingestion path the way Razorpay would: after
+        the configured delay, from another thread, and sometimes twice with
+        the same event ID. No-op unless `emit_webhooks` is enabled.
+        """
+        if not self.profile.emit_webhooks:
+            return
+
+        body, headers = self.build_webhook(payment, event=event)
+        deliveries = 2 if self.profile.chance(self.profile.webhook_duplicate_rate) else 1
+        for _ in range(deliveries):
+            timer = threading.Timer(
+                self.profile.webhook_delay_ms / 1000, self._post_webhook, args=(body, headers)
+            )
+            timer.daemon = True
+            timer.start()
+
+    def _post_webhook(self, body, headers):
+        """Ingest a webhook like the HTTP endpoint does: store, ack, notify."""
+        from django.db import close_old_connections
+        from .webhooks import record_webhook_event, webhook_worker_pool
+
+        try:
+            record_webhook_event(body, event_id=headers.get('X-Razorpay-Event-Id'))
+            webhook_worker_pool.notify()
+        except Exception as e:
+            print(f"Mock webhook delivery error: {e}")
+        finally:
+            close_old_connections()
+
+    def _respond(self, operation, response):
+        """
+        Stand-in for the HTTP round trip of a gateway API call, with the
+        latency, failures and timeouts configured on the profile.
+        """
+        import requests
+
+        profile = self.profile
+        if profile.chance(profile.timeout_rate):
+            time.sleep(profile.timeout_seconds)
+            raise requests.exceptions.ReadTimeout(f"Mock {operation} timed out")
+
+        time.sleep(profile.sample_latency())
+
+        if profile.chance(profile.failure_rate):
+            raise MockGatewayError(f"Mock {operation} failed with a simulated server error")
+        return response
+
     def _map_payment_method(self, razorpay_method):
         """Map payment method to our types."""
         mapping = {
@@ -3,6 +3,8 @@ Booking models for WayanTrails platform.
 Handles both hybrid (manual) and online (automated) booking systems.
 """
 from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 from phonenumber_field.modelfields import PhoneNumberField
@@ -71,6 +73,7 @@ class Booking(TimeStampedModel):
     discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     commission_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    promo_code = models.CharField(max_length=30, blank=True)  # PromoCode applied to discount_amount
     
     # Status and tracking
     status = models.CharField(max_length=20, choices=BOOKING_STATUS, default='pending')
@@ -91,6 +94,11 @@ class Booking(TimeStampedModel):
     cancelled_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='cancelled_bookings')
     cancelled_at = models.DateTimeField(blank=True, null=True)
     cancellation_reason = models.TextField(blank=True)
+
+    # Itinerary package this booking is a component of
+    package = models.ForeignKey(
+        'BookingPackage', on_delete=models.SET_NULL, null=True, blank=True, related_name='bookings'
+    )
     
     class Meta:
         db_table = 'bookings'
@@ -102,6 +110,10 @@ class Booking(TimeStampedModel):
             models.Index(fields=['user', 'status']),
             models.Index(fields=['booking_type', 'status']),
             models.Index(fields=['booking_date', 'status']),
+            models.Index(fields=['content_type', 'object_id', 'check_in_date']),
+            # Lifecycle jobs: stale pending bookings, finished stays
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'check_out_date']),
         ]
     
     def __str__(self):
@@ -136,6 +148,19 @@ class Booking(TimeStampedModel):
         """Check if this is an activity booking."""
         return self.booking_type == 'destination'
 
+    @cached_property
+    def listing_name(self):
+        """Name of the booked resort/homestay, looked up once per instance."""
+        if self.booking_type == 'resort':
+            from resorts.models import Resort
+            name = Resort.objects.filter(id=self.object_id).values_list('name', flat=True).first()
+            return name or "Resort"
+        elif self.booking_type == 'homestay':
+            from homestays.models import Homestay
+            name = Homestay.objects.filter(id=self.object_id).values_list('name', flat=True).first()
+            return name or "Homestay"
+        return "Service"
+
     def get_whatsapp_link(self):
         """Generate WhatsApp link with pre-filled booking details."""
         from urllib.parse import quote
@@ -143,15 +168,7 @@ class Booking(TimeStampedModel):
         phone = "919876543210"  # WayanTrails support number
 
         # Get resort/homestay name
-        service_name = "Service"
-        if self.booking_type == 'resort':
-            from resorts.models import Resort
-            service = Resort.objects.filter(id=self.object_id).first()
-            service_name = service.name if service else "Resort"
-        elif self.booking_type == 'homestay':
-            from homestays.models import Homestay
-            service = Homestay.objects.filter(id=self.object_id).first()
-            service_name = service.name if service else "Homestay"
+        service_name = self.listing_name
 
         # Build message
         message_parts = [
@@ -274,6 +291,11 @@ class Payment(TimeStampedModel):
     ]
 
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='payments')
+    # Set for a package order: `booking` is the package's lead booking and
+    # `amount` covers every component
+    package = models.ForeignKey(
+        'BookingPackage', on_delete=models.SET_NULL, null=True, blank=True, related_name='payments'
+    )
 
     # Payment identification
     payment_id = models.CharField(max_length=100, unique=True)  # Our internal payment ID
@@ -333,6 +355,14 @@ class Payment(TimeStampedModel):
         indexes = [
             models.Index(fields=['booking', 'status']),
             models.Index(fields=['payment_method_type', 'status']),
+            # Gateway callbacks and webhooks look payments up by these IDs
+            models.Index(fields=['order_id']),
+            models.Index(fields=['gateway_payment_id']),
+            models.Index(fields=['payment_link_id']),
+            # Date-range exports and reconciliation windows
+            models.Index(fields=['created_at']),
+            # Lifecycle job: lapsed orders
+            models.Index(fields=['status', 'expires_at']),
         ]
     
     def __str__(self):
@@ -349,12 +379,16 @@ class BookingStatusHistory(TimeStampedModel):
     
     changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     reason = models.TextField(blank=True)
+    source = models.CharField(max_length=30, blank=True)  # 'admin', 'payment', 'bulk_refund', ...
     
     class Meta:
         db_table = 'booking_status_history'
         verbose_name = _('Booking Status History')
         verbose_name_plural = _('Booking Status Histories')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['booking', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.booking.booking_number}: {self.old_status} → {self.new_status}"
@@ -406,6 +440,7 @@ class BookingAvailability(TimeStampedModel):
     date = models.DateField()
     available_slots = models.PositiveIntegerField(default=1)
     booked_slots = models.PositiveIntegerField(default=0)
+    held_slots = models.PositiveIntegerField(default=0)  # Active checkout holds (see bookings.inventory)
     
     # Pricing override for specific dates
     price_override = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
@@ -430,4 +465,559 @@ class BookingAvailability(TimeStampedModel):
     @property
     def remaining_slots(self):
         """Calculate remaining available slots."""
-        return max(0, self.available_slots - self.booked_slots)
\ No newline at end of file
+        return max(0, self.available_slots - self.booked_slots - self.held_slots)
+
+class PaymentWebhookEvent(TimeStampedModel):
+    """Gateway webhook deliveries, stored once per event ID for idempotent processing."""
+
+    EVENT_STATUS = [
+        ('received', 'Received'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+
+    # Razorpay's X-Razorpay-Event-Id (or a body hash when the header is absent)
+    event_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=50, blank=True)
+    payment_gateway = models.CharField(max_length=20, choices=Payment.PAYMENT_GATEWAY, default='razorpay')
+
+    # Request body exactly as received; parsed by the worker, not the endpoint
+    raw_body = models.TextField(blank=True)
+
+    # Gateway identifiers extracted from the payload
+    order_id = models.CharField(max_length=100, blank=True)
+    gateway_payment_id = models.CharField(max_length=200, blank=True)
+
+    payload = models.JSONField(default=dict, blank=True)
+
+    # Processing state
+    status = models.CharField(max_length=20, choices=EVENT_STATUS, default='received')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)  # Retry backoff
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'payment_webhook_events'
+        verbose_name = _('Payment Webhook Event')
+        verbose_name_plural = _('Payment Webhook Events')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"Webhook {self.event_type} ({self.event_id})"
+
+
+class PaymentReconciliationRun(TimeStampedModel):
+    """A reconciliation pass of local payments against the gateway for a time window."""
+
+    RUN_STATUS = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    payment_gateway = models.CharField(max_length=20, choices=Payment.PAYMENT_GATEWAY, default='razorpay')
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+    dry_run = models.BooleanField(default=False)
+
+    status = models.CharField(max_length=20, choices=RUN_STATUS, default='running')
+    finished_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    # Counters
+    gateway_payments_seen = models.PositiveIntegerField(default=0)
+    gateway_orders_seen = models.PositiveIntegerField(default=0)
+    payments_fixed = models.PositiveIntegerField(default=0)
+    mismatches_found = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'payment_reconciliation_runs'
+        verbose_name = _('Payment Reconciliation Run')
+        verbose_name_plural = _('Payment Reconciliation Runs')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Reconciliation {self.window_start:%Y-%m-%d %H:%M} → {self.window_end:%Y-%m-%d %H:%M} ({self.status})"
+
+
+class PaymentReconciliationMismatch(TimeStampedModel):
+    """A difference between a local payment and the gateway's record of it."""
+
+    MISMATCH_TYPES = [
+        ('status_fixed', 'Stuck Payment Fixed'),
+        ('status_mismatch', 'Status Mismatch'),
+        ('amount_mismatch', 'Amount Mismatch'),
+        ('missing_locally', 'Missing Locally'),
+    ]
+
+    run = models.ForeignKey(PaymentReconciliationRun, on_delete=models.CASCADE, related_name='mismatches')
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='reconciliation_mismatches')
+
+    mismatch_type = models.CharField(max_length=20, choices=MISMATCH_TYPES)
+    order_id = models.CharField(max_length=100, blank=True)
+    gateway_payment_id = models.CharField(max_length=200, blank=True)
+
+    local_status = models.CharField(max_length=20, blank=True)
+    gateway_status = models.CharField(max_length=20, blank=True)
+    local_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    gateway_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+
+    details = models.JSONField(default=dict, blank=True)
+    resolved = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = 'payment_reconciliation_mismatches'
+        verbose_name = _('Payment Reconciliation Mismatch')
+        verbose_name_plural = _('Payment Reconciliation Mismatches')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['mismatch_type', 'resolved']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_mismatch_type_display()} - {self.order_id or self.gateway_payment_id}"
+
+
+class BulkRefundJob(TimeStampedModel):
+    """A mass cancellation with refunds (e.g. a monsoon closure)."""
+
+    JOB_STATUS = [
+        ('planned', 'Planned'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    reason = models.TextField()
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='bulk_refund_jobs')
+    filters = models.JSONField(default=dict, blank=True)
+    notify_guests = models.BooleanField(default=True)
+
+    status = models.CharField(max_length=20, choices=JOB_STATUS, default='planned')
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    # Counters (recomputed from items after each batch)
+    total_items = models.PositiveIntegerField(default=0)
+    refunded_items = models.PositiveIntegerField(default=0)
+    skipped_items = models.PositiveIntegerField(default=0)
+    failed_items = models.PositiveIntegerField(default=0)
+    refunded_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'bulk_refund_jobs'
+        verbose_name = _('Bulk Refund Job')
+        verbose_name_plural = _('Bulk Refund Jobs')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Bulk refund #{self.pk} ({self.status}) - {self.total_items} bookings"
+
+
+class BulkRefundItem(TimeStampedModel):
+    """
+    One booking in a bulk refund job. The item status is the job's
+    checkpoint: a restarted job only picks up items that aren't finished.
+    """
+
+    ITEM_STATUS = [
+        ('pending', 'Pending'),
+        ('submitting', 'Submitting'),
+        ('refunded', 'Refunded'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+
+    job = models.ForeignKey(BulkRefundJob, on_delete=models.CASCADE, related_name='items')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='bulk_refund_items')
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='bulk_refund_items')
+
+    refund_percentage = models.PositiveIntegerField(default=0)
+    refund_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    status = models.CharField(max_length=20, choices=ITEM_STATUS, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    refund_id = models.CharField(max_length=100, blank=True)
+    gateway_response = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    notified_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'bulk_refund_items'
+        verbose_name = _('Bulk Refund Item')
+        verbose_name_plural = _('Bulk Refund Items')
+        ordering = ['id']
+        unique_together = ['job', 'booking']
+        indexes = [
+            models.Index(fields=['job', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Bulk refund #{self.job_id} - Booking {self.booking_id} ({self.status})"
+
+
+class BookingDailyRollup(models.Model):
+    """
+    Pre-aggregated bookings per (booking date, type, status, listing).
+    Maintained by bookings.reporting; never edit by hand.
+    """
+
+    date = models.DateField()
+    booking_type = models.CharField(max_length=20, choices=Booking.BOOKING_TYPES)
+    status = models.CharField(max_length=20, choices=Booking.BOOKING_STATUS)
+    content_type = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+
+    booking_count = models.PositiveIntegerField(default=0)
+    total_guests = models.PositiveIntegerField(default=0)
+    base_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tax_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    commission_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'booking_daily_rollups'
+        verbose_name = _('Booking Daily Rollup')
+        verbose_name_plural = _('Booking Daily Rollups')
+        ordering = ['date']
+        unique_together = ['date', 'booking_type', 'status', 'content_type', 'object_id']
+        indexes = [
+            models.Index(fields=['booking_type', 'date']),
+            models.Index(fields=['status', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.booking_type}/{self.status}: {self.booking_count} bookings"
+
+
+class SettlementBatch(TimeStampedModel):
+    """
+    A commission settlement run: every completed, not yet settled booking
+    up to the cutoff date is written to the ledger and grouped into one
+    payout statement per partner.
+    """
+
+    BATCH_STATUS = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    cutoff_date = models.DateField()
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='settlement_batches')
+
+    status = models.CharField(max_length=20, choices=BATCH_STATUS, default='running')
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    # Totals (aggregated from statements when the batch completes)
+    booking_count = models.PositiveIntegerField(default=0)
+    statement_count = models.PositiveIntegerField(default=0)
+    gross_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    commission_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payout_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'settlement_batches'
+        verbose_name = _('Settlement Batch')
+        verbose_name_plural = _('Settlement Batches')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Settlement #{self.pk} up to {self.cutoff_date} ({self.status})"
+
+
+class PartnerPayoutStatement(TimeStampedModel):
+    """What a partner is owed for one settlement batch."""
+
+    PARTNER_TYPES = [
+        ('resort', 'Resort'),
+        ('homestay', 'Homestay'),
+        ('rental_provider', 'Rental Provider'),
+        ('destination', 'Destination/Activity'),
+        ('service', 'Local Service'),
+    ]
+
+    STATEMENT_STATUS = [
+        ('pending', 'Pending Payout'),
+        ('paid', 'Paid'),
+        ('on_hold', 'On Hold'),
+    ]
+
+    batch = models.ForeignKey(SettlementBatch, on_delete=models.CASCADE, related_name='statements')
+    partner_type = models.CharField(max_length=20, choices=PARTNER_TYPES)
+    partner_id = models.PositiveIntegerField()
+
+    booking_count = models.PositiveIntegerField(default=0)
+    gross_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    commission_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payout_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    status = models.CharField(max_length=20, choices=STATEMENT_STATUS, default='pending')
+    paid_at = models.DateTimeField(blank=True, null=True)
+    payout_reference = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        db_table = 'partner_payout_statements'
+        verbose_name = _('Partner Payout Statement')
+        verbose_name_plural = _('Partner Payout Statements')
+        ordering = ['batch', 'partner_type', 'partner_id']
+        unique_together = ['batch', 'partner_type', 'partner_id']
+        indexes = [
+            models.Index(fields=['partner_type', 'partner_id', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Settlement #{self.batch_id} - {self.partner_type}#{self.partner_id}: ₹{self.payout_amount}"
+
+
+class CommissionLedgerEntry(TimeStampedModel):
+    """
+    Commission charged on one completed booking. A booking is settled at
+    most once (unique booking), so overlapping batches can't double-pay.
+
+    gross_amount is base minus discount (what commission applies to);
+    payout_amount is the booking total less commission.
+    """
+
+    batch = models.ForeignKey(SettlementBatch, on_delete=models.CASCADE, related_name='ledger_entries')
+    statement = models.ForeignKey(
+        PartnerPayoutStatement, on_delete=models.CASCADE, null=True, blank=True, related_name='ledger_entries'
+    )
+    booking = models.OneToOneField(Booking, on_delete=models.PROTECT, related_name='commission_ledger_entry')
+
+    partner_type = models.CharField(max_length=20, choices=PartnerPayoutStatement.PARTNER_TYPES)
+    partner_id = models.PositiveIntegerField()
+
+    commission_rate = models.DecimalField(max_digits=5, decimal_places=2)  # Percent, as on the listing
+    gross_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    commission_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payout_amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'commission_ledger'
+        verbose_name = _('Commission Ledger Entry')
+        verbose_name_plural = _('Commission Ledger')
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['batch', 'partner_type', 'partner_id']),
+        ]
+
+    def __str__(self):
+        return f"Booking {self.booking_id}: {self.commission_rate}% = ₹{self.commission_amount}"
+
+
+class BookingLifecycleRun(TimeStampedModel):
+    """One run of a scheduled booking lifecycle job, with its metrics."""
+
+    JOB_TYPES = [
+        ('expire_pending', 'Expire unpaid pending bookings'),
+        ('no_show', 'Flag no-shows'),
+        ('complete', 'Complete finished stays'),
+    ]
+
+    RUN_STATUS = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    job = models.CharField(max_length=20, choices=JOB_TYPES)
+    dry_run = models.BooleanField(default=False)
+
+    status = models.CharField(max_length=20, choices=RUN_STATUS, default='running')
+    finished_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    # Metrics
+    bookings_matched = models.PositiveIntegerField(default=0)
+    bookings_changed = models.PositiveIntegerField(default=0)
+    payments_expired = models.PositiveIntegerField(default=0)
+    holds_released = models.PositiveIntegerField(default=0)
+    chunks = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+    max_chunk_ms = models.PositiveIntegerField(default=0)  # Longest lock hold
+
+    class Meta:
+        db_table = 'booking_lifecycle_runs'
+        verbose_name = _('Booking Lifecycle Run')
+        verbose_name_plural = _('Booking Lifecycle Runs')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['job', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_job_display()} ({self.status}) - {self.bookings_changed} bookings"
+
+
+class InventoryHold(TimeStampedModel):
+    """
+    Units of per-night inventory (BookingAvailability) reserved for a booking.
+
+    An active hold counts in held_slots until it expires or the booking is
+    paid; a converted hold counts in booked_slots for as long as the
+    booking stands. Nights run from start_date up to (not including)
+    end_date.
+    """
+
+    HOLD_STATUS = [
+        ('active', 'Active'),
+        ('converted', 'Converted'),
+        ('released', 'Released'),
+        ('expired', 'Expired'),
+    ]
+
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='inventory_holds')
+    content_type = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    start_date = models.DateField()
+    end_date = models.DateField()
+    start_time = models.TimeField(blank=True, null=True)  # Activity slot, for slot-managed listings
+    quantity = models.PositiveIntegerField(default=1)
+
+    status = models.CharField(max_length=20, choices=HOLD_STATUS, default='active')
+    expires_at = models.DateTimeField(blank=True, null=True)
+    oversold = models.BooleanField(default=False)  # Converted without free capacity (paid after expiry)
+
+    class Meta:
+        db_table = 'inventory_holds'
+        verbose_name = _('Inventory Hold')
+        verbose_name_plural = _('Inventory Holds')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(fields=['booking', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Hold {self.quantity} x {self.content_type}#{self.object_id} {self.start_date}→{self.end_date} ({self.status})"
+
+
+class BookingPackage(TimeStampedModel):
+    """
+    Itinerary grouping component bookings (stays, activities, rentals)
+    under one order: one availability check, one gateway order, and
+    confirmation or cancellation of all components together.
+    """
+
+    PACKAGE_STATUS = [
+        ('pending', 'Pending'),
+        ('confirmed', 'Confirmed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    package_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    package_number = models.CharField(max_length=20, unique=True)  # Human-friendly: WP-2024-0001
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='booking_packages', null=True, blank=True)
+    guest_name = models.CharField(max_length=100)
+    guest_email = models.EmailField()
+    guest_phone = PhoneNumberField()
+
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    status = models.CharField(max_length=20, choices=PACKAGE_STATUS, default='pending')
+
+    confirmed_at = models.DateTimeField(blank=True, null=True)
+    cancelled_at = models.DateTimeField(blank=True, null=True)
+    cancellation_reason = models.TextField(blank=True)
+
+    class Meta:
+        db_table = 'booking_packages'
+        verbose_name = _('Booking Package')
+        verbose_name_plural = _('Booking Packages')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Package {self.package_number} - {self.guest_name}"
+
+
+class PricingRule(TimeStampedModel):
+    """
+    Dynamic price adjustment for listings (see bookings.pricing).
+
+    A rule applies to one listing (content_type + object_id), every listing
+    of a type (no object_id) or every listing (no content_type).
+    adjustment_percent is signed: -10 is a 10% discount, 25 a 25% surge.
+    """
+
+    RULE_TYPES = [
+        ('length_of_stay', 'Length of Stay'),   # stays of min_nights or more
+        ('early_bird', 'Early Bird'),           # booked min_days_ahead or more before arrival
+        ('last_minute', 'Last Minute'),         # booked max_days_ahead or fewer before arrival
+        ('occupancy', 'Occupancy Surge'),       # nights at min_occupancy % or more of inventory
+    ]
+
+    name = models.CharField(max_length=100)
+    rule_type = models.CharField(max_length=20, choices=RULE_TYPES)
+
+    content_type = models.CharField(max_length=20, blank=True)  # '' = all listing types
+    object_id = models.PositiveIntegerField(blank=True, null=True)  # None = all listings of the type
+
+    adjustment_percent = models.DecimalField(max_digits=5, decimal_places=2)
+    min_nights = models.PositiveIntegerField(blank=True, null=True)
+    min_days_ahead = models.PositiveIntegerField(blank=True, null=True)
+    max_days_ahead = models.PositiveIntegerField(blank=True, null=True)
+    min_occupancy = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+
+    # Stay dates the rule covers (open-ended when blank)
+    valid_from = models.DateField(blank=True, null=True)
+    valid_to = models.DateField(blank=True, null=True)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        db_table = 'pricing_rules'
+        verbose_name = _('Pricing Rule')
+        verbose_name_plural = _('Pricing Rules')
+        ordering = ['content_type', 'object_id', 'rule_type']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'is_active']),
+        ]
+
+    def __str__(self):
+        scope = f"{self.content_type or 'all'}#{self.object_id}" if self.object_id else (self.content_type or 'all')
+        return f"{self.name} ({self.get_rule_type_display()}, {scope}, {self.adjustment_percent:+}%)"
+
+
+class PromoCode(TimeStampedModel):
+    """Promo code discounting a stay, optionally limited to a listing type or listing."""
+
+    code = models.CharField(max_length=30, unique=True)
+    description = models.CharField(max_length=200, blank=True)
+
+    discount_percent = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    max_discount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+
+    content_type = models.CharField(max_length=20, blank=True)
+    object_id = models.PositiveIntegerField(blank=True, null=True)
+    min_nights = models.PositiveIntegerField(default=1)
+
+    valid_from = models.DateTimeField(blank=True, null=True)
+    valid_to = models.DateTimeField(blank=True, null=True)
+    max_uses = models.PositiveIntegerField(blank=True, null=True)
+    times_used = models.PositiveIntegerField(default=0)  # Uses taken by live bookings (see pricing.reserve_promo_use)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        db_table = 'promo_codes'
+        verbose_name = _('Promo Code')
+        verbose_name_plural = _('Promo Codes')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.code
@@ -0,0 +1,319 @@
+"""
+Occupancy and utilisation metrics for WayanTrails accommodation listings.
+
+Each confirmed stay is expanded into room-nights with a difference array:
+the stay adds its rooms (and nightly room revenue) at check-in and removes
+them at check-out, and one prefix-sum pass over the date span yields rooms
+sold and revenue for every night. The cost is O(stays + nights), not
+O(stays x nights).
+
+Nightly series are cached per listing and calendar month. A booking change
+only drops the months its old and new stay dates touch (see
+bookings.signals), so the rest of a listing's history stays cached.
+Capacity (total rooms) is read on every request and never cached, so
+changes to a listing's rooms show up immediately.
+
+Metrics per period:
+    occupancy  rooms sold / rooms available
+    adr        room revenue / rooms sold (average daily rate)
+    revpar     room revenue / rooms available
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import Booking, BookingItem
+from .reporting import REVENUE_STATUSES
+
+OCCUPANCY_CACHE_PREFIX = 'occupancy'
+LISTING_TYPES = ['resort', 'homestay']
+
+TWO_PLACES = Decimal('0.01')
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _months(start, end):
+    """Return the first day of every month overlapping [start, end]."""
+    months = []
+    month = _month_start(start)
+    while month <= end:
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+def _cache_key(listing_type, listing_id, month):
+    return f"{OCCUPANCY_CACHE_PREFIX}:{listing_type}:{listing_id}:{month:%Y-%m}"
+
+
+def get_listing_capacity(listing_type, listing_id):
+    """
+    Return (listing, total rooms, {room type id: (name, rooms)}).
+
+    Resorts use RoomType.total_rooms; homestay rooms are individual rooms,
+    so each active HomestayRoom counts as one.
+    """
+    if listing_type == 'resort':
+        from resorts.models import Resort
+
+        listing = Resort.objects.get(pk=listing_id)
+        room_types = {
+            room_type.id: (room_type.name, room_type.total_rooms)
+            for room_type in listing.room_types.filter(is_active=True)
+        }
+    elif listing_type == 'homestay':
+        from homestays.models import Homestay
+
+        listing = Homestay.objects.get(pk=listing_id)
+        room_types = {
+            room.id: (room.room_name, 1)
+            for room in listing.rooms.filter(is_active=True)
+        }
+    else:
+        raise ValueError(f"Occupancy is not tracked for '{listing_type}' listings")
+
+    return listing, listing.total_rooms, room_types
+
+
+def _stays(listing_type, listing_id, start, end):
+    """
+    Yield (room type id or None, check-in, check-out, rooms, room revenue)
+    for revenue bookings of the listing that overlap [start, end].
+
+    Booking items carrying item_data['room_type_id'] are attributed to that
+    room type; a booking without such items counts as one unattributed room.
+    Room revenue excludes tax: item totals, or base minus discount.
+    """
+    bookings = Booking.objects.filter(
+        content_type=listing_type,
+        object_id=listing_id,
+        status__in=REVENUE_STATUSES,
+        check_in_date__lte=end,
+        check_out_date__gt=start,
+    ).only(
+        'check_in_date', 'check_out_date', 'base_amount', 'discount_amount'
+    ).prefetch_related(
+        Prefetch('items', queryset=BookingItem.objects.only('booking_id', 'quantity', 'total_price', 'item_data'))
+    )
+
+    for booking in bookings.iterator(chunk_size=500):
+        room_items = [item for item in booking.items.all() if item.item_data.get('room_type_id')]
+        if room_items:
+            for item in room_items:
+                yield (
+                    item.item_data['room_type_id'], booking.check_in_date, booking.check_out_date,
+                    item.quantity, item.total_price
+                )
+        else:
+            yield (
+                None, booking.check_in_date, booking.check_out_date,
+                1, booking.base_amount - booking.discount_amount
+            )
+
+
+def _night_series(stays, start, end):
+    """
+    Expand stays into nightly series over [start, end].
+
+    Returns:
+        dict: {'total': (sold, revenue), room type id: (sold, revenue)}, where
+        sold[i] and revenue[i] are for night start + i
+    """
+    span = (end - start).days + 1
+    deltas = {}
+
+    def add(key, first, last, rooms, nightly):
+        sold, revenue = deltas.setdefault(key, ([0] * (span + 1), [Decimal('0')] * (span + 1)))
+        sold[first] += rooms
+        sold[last] -= rooms
+        revenue[first] += nightly
+        revenue[last] -= nightly
+
+    for room_type_id, check_in, check_out, rooms, amount in stays:
+        nights = (check_out - check_in).days
+        if nights <= 0:
+            continue
+        first = (max(check_in, start) - start).days
+        last = (min(check_out, end + timedelta(days=1)) - start).days
+        if first >= last:
+            continue
+        nightly = amount / nights
+        add('total', first, last, rooms, nightly)
+        if room_type_id is not None:
+            add(int(room_type_id), first, last, rooms, nightly)
+
+    series = {}
+    for key, (sold_deltas, revenue_deltas) in deltas.items():
+        sold, revenue = [], []
+        running_sold, running_revenue = 0, Decimal('0')
+        for index in range(span):
+            running_sold += sold_deltas[index]
+            running_revenue += revenue_deltas[index]
+            sold.append(running_sold)
+            revenue.append(running_revenue)
+        series[key] = (sold, revenue)
+    return series
+
+
+def _monthly_series(listing_type, listing_id, months):
+    """
+    Return {month: nightly series} for the given months, from cache where
+    possible. Missing months are computed with one query and cached.
+    """
+    keys = {month: _cache_key(listing_type, listing_id, month) for month in months}
+    cached = cache.get_many(list(keys.values()))
+    result = {month: cached[key] for month, key in keys.items() if key in cached}
+
+    missing = [month for month in months if month not in result]
+    if missing:
+        span_start = missing[0]
+        span_end = _next_month(missing[-1]) - timedelta(days=1)
+        series = _night_series(_stays(listing_type, listing_id, span_start, span_end), span_start, span_end)
+
+        to_cache = {}
+        for month in missing:
+            offset = (month - span_start).days
+            length = (_next_month(month) - month).days
+            result[month] = to_cache[keys[month]] = {
+                key: (sold[offset:offset + length], revenue[offset:offset + length])
+                for key, (sold, revenue) in series.items()
+                if any(sold[offset:offset + length])
+            }
+        cache.set_many(to_cache, timeout=settings.OCCUPANCY_CACHE_TTL_SECONDS)
+
+    return result
+
+
+def invalidate_occupancy(listing_type, listing_id, *stays):
+    """
+    Drop cached months touched by the given (check-in, check-out) ranges.
+    Called from booking signals with the stay before and after a change.
+    """
+    if listing_type not in LISTING_TYPES:
+        return
+    keys = set()
+    for check_in, check_out in stays:
+        if check_in and check_out:
+            last_night = max(check_in, check_out - timedelta(days=1))
+            keys.update(_cache_key(listing_type, listing_id, month) for month in _months(check_in, last_night))
+    if keys:
+        cache.delete_many(list(keys))
+
+
+def invalidate_occupancy_for_bookings(booking_ids):
+    """
+    Drop cached months for bookings changed by a queryset.update() that
+    bypassed signals. Deferred until the current transaction commits.
+    """
+    booking_ids = list(booking_ids)
+
+    def invalidate():
+        for listing_type, listing_id, check_in, check_out in Booking.objects.filter(
+            pk__in=booking_ids, content_type__in=LISTING_TYPES
+        ).values_list('content_type', 'object_id', 'check_in_date', 'check_out_date'):
+            invalidate_occupancy(listing_type, listing_id, (check_in, check_out))
+
+    if booking_ids:
+        transaction.on_commit(invalidate)
+
+
+def _period_start(day, group_by):
+    if group_by == 'week':
+        return day - timedelta(days=day.weekday())
+    if group_by == 'month':
+        return _month_start(day)
+    return day
+
+
+def _metrics(period, sold, available, revenue):
+    return {
+        'period': period,
+        'rooms_available': available,
+        'rooms_sold': sold,
+        'room_revenue': revenue.quantize(TWO_PLACES),
+        'occupancy': round(sold / available, 4) if available else None,
+        'adr': (revenue / sold).quantize(TWO_PLACES) if sold else None,
+        'revpar': (revenue / available).quantize(TWO_PLACES) if available else None,
+    }
+
+
+def _summarise(nights, capacity, group_by):
+    """Roll nightly (date, sold, revenue) tuples up into periods plus a total."""
+    periods = {}
+    for day, sold, revenue in nights:
+        period = periods.setdefault(_period_start(day, group_by), [0, 0, Decimal('0')])
+        period[0] += sold
+        period[1] += capacity
+        period[2] += revenue
+
+    series = [_metrics(period, *values) for period, values in sorted(periods.items())]
+    total = _metrics(
+        None,
+        sum(values[0] for values in periods.values()),
+        sum(values[1] for values in periods.values()),
+        sum((values[2] for values in periods.values()), Decimal('0'))
+    )
+    total.pop('period')
+    return total, series
+
+
+def occupancy_report(listing_type, listing_id, start_date, end_date, group_by='day'):
+    """
+    Build occupancy, ADR and RevPAR for a listing and each of its room types.
+
+    Args:
+        listing_type: 'resort' or 'homestay'
+        listing_id: Listing primary key
+        start_date, end_date: Inclusive range of nights
+        group_by: 'day', 'week' (ISO weeks, starting Monday) or 'month'
+
+    Returns:
+        dict: Listing totals and series, plus the same per room type
+    """
+    listing, total_rooms, room_types = get_listing_capacity(listing_type, listing_id)
+    monthly = _monthly_series(listing_type, listing_id, _months(start_date, end_date))
+
+    def nights(key):
+        for month, series in sorted(monthly.items()):
+            sold, revenue = series.get(key, (None, None))
+            day = month
+            for index in range((_next_month(month) - month).days):
+                if start_date <= day <= end_date:
+                    yield day, sold[index] if sold else 0, revenue[index] if revenue else Decimal('0')
+                day += timedelta(days=1)
+
+    totals, series = _summarise(nights('total'), total_rooms, group_by)
+    report_room_types = []
+    for room_type_id, (name, rooms) in sorted(room_types.items()):
+        room_type_totals, room_type_series = _summarise(nights(room_type_id), rooms, group_by)
+        report_room_types.append({
+            'room_type_id': room_type_id,
+            'name': name,
+            'total_rooms': rooms,
+            'totals': room_type_totals,
+            'series': room_type_series,
+        })
+
+    return {
+        'listing_type': listing_type,
+        'listing_id': listing.pk,
+        'listing_name': listing.name,
+        'total_rooms': total_rooms,
+        'start_date': start_date,
+        'end_date': end_date,
+        'group_by': group_by,
+        'totals': totals,
+        'series': series,
+        'room_types': report_room_types,
+    }
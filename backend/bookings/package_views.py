@@ -0,0 +1,127 @@
+"""
+Itinerary package API views for WayanTrails platform.
+"""
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.db.models import Prefetch, Q
+
+from .models import Booking, BookingPackage
+from .serializers import BookingPackageSerializer, BookingPackageCreateSerializer
+from .inventory import InventoryUnavailableError
+from .packages import (
+    PackageStateError, cancel_package, checkout_package, confirm_package, create_package
+)
+from .gateway_transport import GatewayUnavailableError
+from .payment_views import payment_gateway
+
+
+class BookingPackageViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Itinerary packages: several bookings (stays, activities, rentals) paid,
+    confirmed and cancelled together.
+    """
+
+    serializer_class = BookingPackageSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """Staff see every package; guests see their own."""
+        queryset = BookingPackage.objects.prefetch_related(
+            Prefetch('bookings', queryset=Booking.objects.order_by('pk'))
+        )
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(Q(user=self.request.user) | Q(guest_email=self.request.user.email))
+
+    def create(self, request, *args, **kwargs):
+        """
+        Create a package and all of its component bookings, or none of them.
+
+        POST /api/bookings/packages/
+        {"guest_name": "...", "guest_email": "...", "guest_phone": "...",
+         "bookings": [<booking payload>, ...]}
+        """
+        serializer = BookingPackageCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        data = dict(serializer.validated_data)
+        entries = data.pop('bookings')
+        data['guest_phone'] = str(data['guest_phone'])
+        package, results = create_package(data, entries, context={'request': request})
+        if not package:
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+
+        package = self.get_queryset().get(pk=package.pk)
+        return Response(
+            {**BookingPackageSerializer(package, context={'request': request}).data, 'results': results},
+            status=status.HTTP_201_CREATED
+        )
+
+    def _check_owner(self, request, package):
+        if request.user.is_staff or package.user_id == request.user.id:
+            return None
+        return Response(
+            {'detail': 'You can only manage your own packages'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    @action(detail=True, methods=['post'])
+    def checkout(self, request, pk=None):
+        """
+        Hold inventory for every component and open one gateway order for
+        the package total.
+
+        POST /api/bookings/packages/{id}/checkout/
+        """
+        package = self.get_object()
+        denied = self._check_owner(request, package)
+        if denied:
+            return denied
+
+        try:
+            order_data, created, hold_expires_at = checkout_package(payment_gateway, package)
+        except InventoryUnavailableError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except PackageStateError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except GatewayUnavailableError as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return Response({
+            'type': 'order',
+            'data': order_data,
+            'reused': not created,
+            'package_number': package.package_number,
+            'hold_expires_at': hold_expires_at
+        })
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def confirm(self, request, pk=None):
+        """Confirm every component of a pending package (staff only)."""
+        package = self.get_object()
+        if not confirm_package(package, changed_by=request.user, source='admin'):
+            return Response(
+                {'detail': 'Only pending packages can be confirmed'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(self.get_serializer(self.get_queryset().get(pk=package.pk)).data)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel every component of a package."""
+        package = self.get_object()
+        denied = self._check_owner(request, package)
+        if denied:
+            return denied
+
+        try:
+            cancel_package(
+                package,
+                changed_by=request.user,
+                reason=request.data.get('reason', ''),
+                source='admin' if request.user.is_staff else 'guest'
+            )
+        except PackageStateError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(self.get_queryset().get(pk=package.pk)).data)
@@ -0,0 +1,190 @@
+"""
+Itinerary packages for WayanTrails.
+
+A package groups component bookings (e.g. a homestay, a safari and a
+scooter rental) under one order:
+
+* create_package() validates, prices and availability-checks every
+  component in one pass and inserts them together (bookings.batch).
+* checkout_package() holds inventory for all components and opens a single
+  gateway order for the package total, in one transaction: if any
+  component can't be held, nothing is held.
+* confirm_package() / cancel_package() move every component in one locked
+  bulk transition. Payment of the package order confirms the package
+  (webhooks.confirm_paid_booking).
+"""
+import logging
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Booking, BookingPackage
+
+logger = logging.getLogger(__name__)
+
+# Component statuses that keep a package alive
+LIVE_STATUSES = ['pending', 'confirmed']
+
+
+class PackageStateError(ValueError):
+    """Raised when a package can't be paid, confirmed or cancelled in its current state."""
+
+
+def _package_number():
+    """Next WP-YYYY-NNNN package number."""
+    year = datetime.now().year
+    last_number = BookingPackage.objects.filter(
+        package_number__startswith=f'WP-{year}-'
+    ).order_by('-package_number').values_list('package_number', flat=True).first()
+    next_num = int(last_number.split('-')[-1]) + 1 if last_number else 1
+    return f'WP-{year}-{next_num:04d}'
+
+
+def create_package(guest, entries, context=None):
+    """
+    Create a package and its component bookings, all or nothing.
+
+    Args:
+        guest: dict with guest_name, guest_email and guest_phone; components
+            without their own guest details inherit them
+        entries: Component booking payloads (as for BookingCreateSerializer)
+        context: Serializer context (the request, for the booking user)
+
+    Returns:
+        tuple: (BookingPackage or None, per-component results)
+    """
+    from .batch import create_booking_batch
+
+    request = (context or {}).get('request')
+    user = request.user if request and request.user.is_authenticated else None
+    entries = [{**guest, **entry} for entry in entries]
+
+    with transaction.atomic():
+        package = BookingPackage.objects.create(package_number=_package_number(), user=user, **guest)
+        bookings, results = create_booking_batch(
+            entries, context=context, mode='all_or_nothing', package=package
+        )
+        if not bookings:
+            transaction.set_rollback(True)
+            return None, results
+
+        package.total_amount = sum(booking.total_amount for booking in bookings)
+        package.save(update_fields=['total_amount', 'updated_at'])
+
+    logger.info(f"Created package {package.package_number} with {len(bookings)} components")
+    return package, results
+
+
+def checkout_package(gateway, package):
+    """
+    Hold inventory for every pending component and open one gateway order
+    for the package total.
+
+    Returns:
+        tuple: (checkout options dict, order created: bool, hold expiry)
+
+    Raises:
+        PackageStateError: The package isn't pending or has nothing left to pay for
+        InventoryUnavailableError: Some component can't be held (nothing is held)
+    """
+    from .inventory import place_hold
+    from .payment_orders import get_or_create_order
+
+    with transaction.atomic():
+        package = BookingPackage.objects.select_for_update().get(pk=package.pk)
+        if package.status != 'pending':
+            raise PackageStateError(f"Package {package.package_number} is {package.status}")
+
+        bookings = list(package.bookings.filter(status='pending').prefetch_related('items').order_by('pk'))
+        if not bookings:
+            raise PackageStateError(f"Package {package.package_number} has no pending components")
+
+        # Components cancelled on their own no longer count towards the order
+        total_amount = sum(booking.total_amount for booking in bookings)
+        if total_amount != package.total_amount:
+            package.total_amount = total_amount
+            package.save(update_fields=['total_amount', 'updated_at'])
+
+        holds = [place_hold(booking) for booking in bookings]
+        order_data, created = get_or_create_order(gateway, bookings[0], package=package)
+
+    expiries = [hold.expires_at for hold in holds if hold.expires_at]
+    return order_data, created, min(expiries) if expiries else None
+
+
+def _lock(package):
+    package_id = package.pk if isinstance(package, BookingPackage) else package
+    return BookingPackage.objects.select_for_update().get(pk=package_id)
+
+
+def confirm_package(package, changed_by=None, reason='', source=''):
+    """
+    Confirm every pending component and book its inventory, atomically.
+
+    Returns:
+        bool: Whether the package changed (False if it was no longer pending)
+    """
+    from .inventory import convert_hold
+    from .state_machine import bulk_transition
+
+    with transaction.atomic():
+        package = _lock(package)
+        if package.status != 'pending':
+            return False
+
+        confirmed = bulk_transition(
+            package.bookings.all(), 'confirmed', changed_by=changed_by, reason=reason, source=source
+        )
+        # Held inventory becomes booked in the same transaction
+        for booking in Booking.objects.filter(pk__in=confirmed).prefetch_related('items'):
+            convert_hold(booking)
+
+        package.status = 'confirmed'
+        package.confirmed_at = timezone.now()
+        package.save(update_fields=['status', 'confirmed_at', 'updated_at'])
+
+    logger.info(f"Confirmed package {package.package_number} ({len(confirmed)} components, {source or 'unspecified'})")
+    return True
+
+
+def cancel_package(package, changed_by=None, reason='', source=''):
+    """
+    Cancel every live component, atomically. Their inventory is released
+    once the cancellation commits (bookings.signals).
+
+    Returns:
+        list: IDs of components cancelled
+
+    Raises:
+        PackageStateError: The package is already cancelled
+    """
+    from .state_machine import bulk_transition
+
+    with transaction.atomic():
+        package = _lock(package)
+        if package.status == 'cancelled':
+            raise PackageStateError(f"Package {package.package_number} is already cancelled")
+
+        cancelled = bulk_transition(
+            package.bookings.all(), 'cancelled', changed_by=changed_by, reason=reason, source=source
+        )
+        package.status = 'cancelled'
+        package.cancelled_at = timezone.now()
+        package.cancellation_reason = reason
+        package.save(update_fields=['status', 'cancelled_at', 'cancellation_reason', 'updated_at'])
+
+    return cancelled
+
+
+def close_dead_packages(booking_ids):
+    """
+    Mark pending packages cancelled once none of their components are live,
+    e.g. after the lifecycle job expired them one by one.
+    """
+    return BookingPackage.objects.filter(
+        status='pending', bookings__pk__in=list(booking_ids)
+    ).exclude(
+        Exists(Booking.objects.filter(package=OuterRef('pk'), status__in=LIVE_STATUSES))
+    ).update(status='cancelled', cancelled_at=timezone.now(), updated_at=timezone.now())
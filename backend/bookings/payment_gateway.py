@@ -13,10 +13,13 @@ import hmac
 import hashlib
 from decimal import Decimal
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 import uuid
 
+from .gateway_transport import GatewayTransport, build_gateway_session
+
 
 class RazorpayGateway:
     """
@@ -24,40 +27,54 @@ class RazorpayGateway:
     Supports: UPI, Cards, Net Banking, Wallets (PhonePe, Paytm, Google Pay)
     """
 
+    name = 'razorpay'
+    code = 'razorpay'  # Payment.payment_gateway value
+
     def __init__(self):
         if not RAZORPAY_AVAILABLE:
             raise ImportError("razorpay module is not installed. Install it with: pip install razorpay")
 
+        # Pooled keep-alive session with strict timeouts; retries, circuit
+        # breaking and latency metrics are applied per call by the transport
         self.client = razorpay.Client(
+            session=build_gateway_session(),
             auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
         )
         self.client.set_app_details({
             "title": "WayanTrails",
             "version": "1.0.0"
         })
+        self.transport = GatewayTransport(self.name)
 
-    def create_order(self, booking, notes=None):
+    def create_order(self, booking, notes=None, package=None):
         """
         Create a Razorpay order for a booking.
         This enables UPI, Cards, Net Banking, and all Wallets.
 
         Args:
-            booking: Booking instance
+            booking: Booking instance (the lead booking for a package)
             notes: Optional dict of additional notes
+            package: BookingPackage to charge in full, if any
 
         Returns:
             dict: Order details including order_id
         """
         from .models import Payment
+        from .payment_lookup import payment_lookup
+
+        amount = package.total_amount if package else booking.total_amount
+        reference = package.package_number if package else booking.booking_number
+        if package:
+            notes = {'package_number': package.package_number, **(notes or {})}
 
         # Calculate amount in paise (Razorpay requires smallest currency unit)
-        amount_paise = int(float(booking.total_amount) * 100)
+        amount_paise = int(float(amount) * 100)
 
         # Prepare order data
         order_data = {
             "amount": amount_paise,
             "currency": "INR",
-            "receipt": f"booking_{booking.booking_number}_{uuid.uuid4().hex[:8]}",
+            "receipt": f"booking_{reference}_{uuid.uuid4().hex[:8]}",
             "notes": {
                 "booking_id": str(booking.booking_id),
                 "booking_number": booking.booking_number,
@@ -69,26 +86,41 @@ class RazorpayGateway:
         }
 
         # Create order on Razorpay
-        razorpay_order = self.client.order.create(data=order_data)
+        razorpay_order = self.transport.call('order.create', self.client.order.create, data=order_data)
 
         # Create payment record
         payment = Payment.objects.create(
             booking=booking,
+            package=package,
             payment_id=f"PAY_{uuid.uuid4().hex[:12].upper()}",
             order_id=razorpay_order['id'],
-            amount=booking.total_amount,
+            amount=amount,
             currency='INR',
             payment_gateway='razorpay',
             status='created',
             gateway_response=razorpay_order,
             expires_at=timezone.now() + timedelta(hours=24)
         )
+        payment_lookup.remember_order(payment)
+
+        return self.build_checkout_options(booking, payment)
+
+    def build_checkout_options(self, booking, payment):
+        """
+        Build Razorpay checkout options for an existing order.
+
+        Args:
+            booking: Booking instance
+            payment: Payment holding the gateway order
 
+        Returns:
+            dict: Order details including order_id
+        """
         return {
-            'order_id': razorpay_order['id'],
+            'order_id': payment.order_id,
             'payment_id': payment.payment_id,
-            'amount': booking.total_amount,
-            'currency': 'INR',
+            'amount': payment.amount,
+            'currency': payment.currency,
             'key': settings.RAZORPAY_KEY_ID,
             'name': 'WayanTrails',
             'description': f'Booking for {booking.booking_type}',
@@ -97,7 +129,7 @@ class RazorpayGateway:
                 'email': booking.guest_email,
                 'contact': str(booking.guest_phone)
             },
-            'notes': order_data['notes'],
+            'notes': (payment.gateway_response or {}).get('notes', {}),
             'theme': {
                 'color': '#059669'  # WayanTrails green
             }
@@ -116,6 +148,7 @@ class RazorpayGateway:
             dict: Payment link details
         """
         from .models import Payment
+        from .payment_lookup import payment_lookup
 
         # Calculate amount in paise
         amount_paise = int(float(booking.total_amount) * 100)
@@ -155,7 +188,7 @@ class RazorpayGateway:
         }
 
         # Create payment link
-        payment_link = self.client.payment_link.create(payment_link_data)
+        payment_link = self.transport.call('payment_link.create', self.client.payment_link.create, payment_link_data)
 
         # Create or update payment record
         payment, created = Payment.objects.get_or_create(
@@ -176,6 +209,7 @@ class RazorpayGateway:
         payment.status = 'pending'
         payment.expires_at = timezone.datetime.fromtimestamp(expire_by, tz=timezone.utc)
         payment.save()
+        payment_lookup.remember_order(payment)
 
         return {
             'payment_link': payment_link['short_url'],
@@ -221,23 +255,21 @@ class RazorpayGateway:
         Returns:
             dict: Captured payment details
         """
-        from .models import Payment
+        from .payment_lookup import payment_lookup
 
         try:
             # Fetch payment from Razorpay
-            razorpay_payment = self.client.payment.fetch(payment_id)
+            razorpay_payment = self.transport.call('payment.fetch', self.client.payment.fetch, payment_id, idempotent=True)
 
             # If amount not specified, capture full amount
             if not amount:
                 amount = razorpay_payment['amount']
 
             # Capture payment
-            captured_payment = self.client.payment.capture(payment_id, amount)
+            captured_payment = self.transport.call('payment.capture', self.client.payment.capture, payment_id, amount)
 
             # Update our payment record
-            payment = Payment.objects.filter(
-                gateway_payment_id=payment_id
-            ).first()
+            payment = payment_lookup.get_by_gateway_payment_id(payment_id)
 
             if payment:
                 payment.status = 'captured'
@@ -263,12 +295,52 @@ class RazorpayGateway:
             dict: Payment details
         """
         try:
-            payment_details = self.client.payment.fetch(payment_id)
+            payment_details = self.transport.call('payment.fetch', self.client.payment.fetch, payment_id, idempotent=True)
             return payment_details
         except Exception as e:
             print(f"Fetch payment error: {e}")
             return None
 
+    def iter_payments(self, start, end, page_size=100):
+        """
+        Page through Razorpay payments created in a time window.
+
+        Args:
+            start: Window start (aware datetime)
+            end: Window end (aware datetime)
+            page_size: Items per API call (Razorpay allows up to 100)
+
+        Yields:
+            list: Payment entities, one page at a time
+        """
+        yield from self._iter_collection('payment', self.client.payment, start, end, page_size)
+
+    def iter_orders(self, start, end, page_size=100):
+        """
+        Page through Razorpay orders created in a time window.
+
+        Yields:
+            list: Order entities, one page at a time
+        """
+        yield from self._iter_collection('order', self.client.order, start, end, page_size)
+
+    def _iter_collection(self, name, resource, start, end, page_size):
+        """Walk a Razorpay list API with from/to/count/skip paging."""
+        skip = 0
+        while True:
+            page = self.transport.call(f'{name}.all', resource.all, {
+                'from': int(start.timestamp()),
+                'to': int(end.timestamp()),
+                'count': page_size,
+                'skip': skip
+            }, idempotent=True)
+            items = page.get('items', [])
+            if items:
+                yield items
+            if len(items) < page_size:
+                break
+            skip += page_size
+
     def process_payment_success(self, razorpay_payment_id, razorpay_order_id, razorpay_signature):
         """
         Process successful payment and update booking.
@@ -281,8 +353,8 @@ class RazorpayGateway:
         Returns:
             dict: Updated payment and booking details
         """
-        from .models import Payment, Booking
-        from .emails import send_payment_success_email
+        from .payment_lookup import payment_lookup
+        from .webhooks import SETTLED_PAYMENT_STATUSES, confirm_paid_booking
 
         # Verify signature
         if not self.verify_payment(razorpay_order_id, razorpay_payment_id, razorpay_signature):
@@ -294,52 +366,56 @@ class RazorpayGateway:
         if not payment_details:
             raise ValueError("Payment not found")
 
-        # Find payment record
-        payment = Payment.objects.filter(order_id=razorpay_order_id).first()
-
-        if not payment:
-            raise ValueError("Payment record not found")
-
-        # Extract payment method details
-        payment_method = payment_details.get('method', '')
-        payment.payment_method_type = self._map_payment_method(payment_method)
-        payment.gateway_payment_id = razorpay_payment_id
-        payment.signature = razorpay_signature
-        payment.is_verified = True
-
-        # Extract specific payment details
-        if payment_method == 'upi':
-            payment.upi_id = payment_details.get('vpa', '')
-        elif payment_method == 'card':
-            card_details = payment_details.get('card', {})
-            payment.card_last_4 = card_details.get('last4', '')
-            payment.card_network = card_details.get('network', '')
-        elif payment_method == 'wallet':
-            payment.wallet_name = payment_details.get('wallet', '')
-
-        # Update payment status
-        if payment_details['status'] == 'captured':
-            payment.status = 'completed'
-            payment.paid_at = timezone.now()
-        elif payment_details['status'] == 'authorized':
-            payment.status = 'authorized'
-            payment.authorized_at = timezone.now()
-
-        payment.gateway_response = payment_details
-        payment.save()
+        with transaction.atomic():
+            # Lock the payment row so concurrent verify calls and webhooks serialise
+            payment = payment_lookup.get_by_order_id(razorpay_order_id, lock=True)
 
-        # Update booking status
-        booking = payment.booking
-        if payment.status == 'completed':
-            booking.status = 'confirmed'
-            booking.confirmed_at = timezone.now()
-            booking.save()
+            if not payment:
+                raise ValueError("Payment record not found")
+
+            # Already settled by an earlier callback or webhook
+            if payment.status in SETTLED_PAYMENT_STATUSES:
+                return {
+                    'payment': payment,
+                    'booking': payment.booking,
+                    'status': 'success'
+                }
 
-            # Send success email
-            try:
-                send_payment_success_email(booking)
-            except Exception as e:
-                print(f"Error sending payment success email: {e}")
+            # Extract payment method details
+            payment_method = payment_details.get('method', '')
+            payment.payment_method_type = self._map_payment_method(payment_method)
+            payment.gateway_payment_id = razorpay_payment_id
+            payment.signature = razorpay_signature
+            payment.is_verified = True
+
+            # Extract specific payment details
+            if payment_method == 'upi':
+                payment.upi_id = payment_details.get('vpa', '')
+            elif payment_method == 'card':
+                card_details = payment_details.get('card', {})
+                payment.card_last_4 = card_details.get('last4', '')
+                payment.card_network = card_details.get('network', '')
+            elif payment_method == 'wallet':
+                payment.wallet_name = payment_details.get('wallet', '')
+
+            # Update payment status
+            if payment_details['status'] == 'captured':
+                payment.status = 'completed'
+                payment.paid_at = timezone.now()
+            elif payment_details['status'] == 'authorized':
+                payment.status = 'authorized'
+                payment.authorized_at = timezone.now()
+
+            payment.gateway_response = payment_details
+            payment.save()
+
+            # Update booking status
+            booking = payment.booking
+            if payment.status == 'completed':
+                booking, _ = confirm_paid_booking(payment.booking_id, package_id=payment.package_id)
+
+                # Send success email once the payment is committed
+                transaction.on_commit(lambda: self._send_success_email(booking))
 
         return {
             'payment': payment,
@@ -347,6 +423,15 @@ class RazorpayGateway:
             'status': 'success'
         }
 
+    def _send_success_email(self, booking):
+        """Send payment success email without failing the payment flow."""
+        from .emails import send_payment_success_email
+
+        try:
+            send_payment_success_email(booking)
+        except Exception as e:
+            print(f"Error sending payment success email: {e}")
+
     def create_refund(self, payment_id, amount=None, reason=None):
         """
         Create a refund for a payment.
@@ -359,11 +444,11 @@ class RazorpayGateway:
         Returns:
             dict: Refund details
         """
-        from .models import Payment
+        from .payment_lookup import payment_lookup
 
         try:
             # Get payment record
-            payment = Payment.objects.filter(gateway_payment_id=payment_id).first()
+            payment = payment_lookup.get_by_gateway_payment_id(payment_id)
 
             if not payment:
                 raise ValueError("Payment not found")
@@ -382,7 +467,7 @@ class RazorpayGateway:
                 }
             }
 
-            refund = self.client.payment.refund(payment_id, refund_data)
+            refund = self.transport.call('payment.refund', self.client.payment.refund, payment_id, refund_data)
 
             # Update payment record
             payment.refund_id = refund['id']
@@ -393,8 +478,12 @@ class RazorpayGateway:
             payment.save()
 
             # Update booking status
-            payment.booking.status = 'refunded'
-            payment.booking.save()
+            from .state_machine import InvalidTransitionError, transition
+            try:
+                transition(payment.booking_id, 'refunded', reason=payment.refund_reason, source='refund')
+            except InvalidTransitionError as e:
+                # The gateway refund went through; keep the booking status and flag it
+                print(f"Refund {payment.refund_id} recorded without a booking status change: {e}")
 
             return refund
 
@@ -402,6 +491,33 @@ class RazorpayGateway:
             print(f"Refund creation error: {e}")
             raise
 
+    def submit_refund(self, payment_id, amount, notes=None):
+        """
+        Submit a refund without updating local records (batch jobs record
+        results themselves).
+
+        Args:
+            payment_id: Razorpay payment ID
+            amount: Amount to refund in paise
+            notes: Notes stored on the refund (used to match it up later)
+
+        Returns:
+            dict: Refund details
+        """
+        refund_data = {
+            "amount": amount,
+            "speed": "normal",
+            "notes": notes or {}
+        }
+        return self.transport.call('payment.refund', self.client.payment.refund, payment_id, refund_data)
+
+    def fetch_refunds(self, payment_id):
+        """Return all refunds the gateway holds for a payment."""
+        response = self.transport.call(
+            'payment.refunds', self.client.payment.fetch_multiple_refund, payment_id, idempotent=True
+        )
+        return response.get('items', [])
+
     def _map_payment_method(self, razorpay_method):
         """Map Razorpay payment method to our payment method types."""
         mapping = {
@@ -0,0 +1,74 @@
+"""
+Gateway ID lookups for WayanTrails payments.
+
+Callbacks, webhooks and refunds identify a payment by the gateway's order,
+payment or payment-link ID. All three columns are indexed; recently created
+orders are additionally cached as order_id -> primary key, so the first
+callback for a fresh order is a primary-key fetch.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Payment
+
+
+class PaymentLookupService:
+    """Find Payment rows by gateway identifiers."""
+
+    CACHE_PREFIX = 'payment_order'
+
+    def _cache_key(self, order_id):
+        return f"{self.CACHE_PREFIX}:{order_id}"
+
+    def remember_order(self, payment):
+        """Cache a newly created order so its callbacks skip the index scan."""
+        if payment.order_id:
+            cache.set(
+                self._cache_key(payment.order_id),
+                payment.pk,
+                timeout=settings.PAYMENT_ORDER_CACHE_TTL_SECONDS
+            )
+
+    def forget_order(self, order_id):
+        """Drop a cached order (e.g. once it has been replaced)."""
+        cache.delete(self._cache_key(order_id))
+
+    def _queryset(self, lock):
+        return Payment.objects.select_for_update() if lock else Payment.objects.all()
+
+    def get_by_order_id(self, order_id, lock=False):
+        """
+        Return the payment for a gateway order ID, or None.
+
+        Args:
+            order_id: Gateway order ID
+            lock: Lock the row with SELECT ... FOR UPDATE (inside a transaction)
+        """
+        if not order_id:
+            return None
+
+        queryset = self._queryset(lock)
+        payment_pk = cache.get(self._cache_key(order_id))
+        if payment_pk is not None:
+            # Re-check order_id so a stale cache entry can never return the wrong row
+            payment = queryset.filter(pk=payment_pk, order_id=order_id).first()
+            if payment:
+                return payment
+
+        return queryset.filter(order_id=order_id).order_by('-created_at').first()
+
+    def get_by_gateway_payment_id(self, gateway_payment_id, lock=False):
+        """Return the payment for a gateway payment ID, or None."""
+        if not gateway_payment_id:
+            return None
+        return self._queryset(lock).filter(gateway_payment_id=gateway_payment_id).first()
+
+    def get_by_payment_link_id(self, payment_link_id, lock=False):
+        """Return the payment for a gateway payment link ID, or None."""
+        if not payment_link_id:
+            return None
+        return self._queryset(lock).filter(payment_link_id=payment_link_id).first()
+
+
+# Singleton instance
+payment_lookup = PaymentLookupService()
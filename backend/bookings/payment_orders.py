@@ -0,0 +1,57 @@
+"""
+Checkout order reuse for WayanTrails payments.
+
+Opening checkout used to create a fresh gateway order (and Payment row) on
+every click. Orders are now created at most once per booking and amount:
+callers take a row lock on the booking, so concurrent requests queue behind
+the first one and then reuse the order it created.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, Payment
+
+
+def get_reusable_order(booking, package=None):
+    """
+    Return the booking's (or package's) newest unexpired checkout order, or None.
+
+    Only plain orders in `created` state for the current amount qualify;
+    payment links and orders about to expire are never reused.
+    """
+    min_expiry = timezone.now() + timedelta(minutes=settings.PAYMENT_ORDER_REUSE_MIN_TTL_MINUTES)
+    owner = {'package': package} if package else {'booking': booking, 'package__isnull': True}
+    return Payment.objects.filter(
+        **owner,
+        status='created',
+        payment_link_id='',
+        amount=package.total_amount if package else booking.total_amount,
+        expires_at__gt=min_expiry
+    ).exclude(order_id='').order_by('-created_at').first()
+
+
+def get_or_create_order(gateway, booking, package=None):
+    """
+    Return checkout options for a booking, creating a gateway order only
+    when no reusable one exists.
+
+    Args:
+        gateway: Payment gateway (RazorpayGateway or MockPaymentGateway)
+        booking: Booking instance (the lead booking for a package)
+        package: BookingPackage (already locked by the caller) to charge in full
+
+    Returns:
+        tuple: (checkout options dict, created: bool)
+    """
+    with transaction.atomic():
+        # Serialise order creation per booking; re-read so the amount is current
+        booking = Booking.objects.select_for_update().get(pk=booking.pk)
+
+        payment = get_reusable_order(booking, package)
+        if payment:
+            return gateway.build_checkout_options(booking, payment), False
+
+        return gateway.create_order(booking, package=package), True
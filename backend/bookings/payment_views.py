@@ -5,15 +5,12 @@ Handles payment creation, verification, and webhooks.
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
 from django.conf import settings
-from django.utils import timezone
-import json
-import hmac
-import hashlib
 
 from .models import Payment, Booking
 from .payment_serializers import (
@@ -26,16 +23,17 @@ from .payment_serializers import (
     PaymentOrderSerializer,
     PaymentMethodInfoSerializer,
 )
+from .webhooks import verify_webhook_signature, record_webhook_event, dispatch_webhook_event
+from .inventory import InventoryUnavailableError, place_hold
+from .payment_orders import get_or_create_order
+from .gateway_transport import GatewayUnavailableError, gateway_metrics
 
-# Import both real and mock gateways
-from .payment_gateway import razorpay_gateway
-from .mock_payment_gateway import mock_payment_gateway
+# Gateways are registered on the router from PAYMENT_GATEWAYS (only the mock if USE_MOCK_PAYMENT is True)
+from .gateway_router import payment_router
 
-# Use mock gateway if USE_MOCK_PAYMENT is True
 def get_payment_gateway():
-    """Get appropriate payment gateway based on settings."""
-    use_mock = getattr(settings, 'USE_MOCK_PAYMENT', True)  # Default to mock for testing
-    return mock_payment_gateway if use_mock else razorpay_gateway
+    """Get the payment gateway router; it picks a gateway per order."""
+    return payment_router
 
 # Use this throughout the file
 payment_gateway = get_payment_gateway()
@@ -56,6 +54,20 @@ class PaymentViewSet(viewsets.ReadOnlyModelViewSet):
             booking__user=self.request.user
         ).select_related('booking')
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Stream payments as CSV or NDJSON (staff only).
+
+        GET /api/bookings/payments/export/?start_date=2024-01-01&end_date=2024-12-31&status=completed&type=upi&output=ndjson
+        """
+        from .exports import export_response
+        from .serializers import ExportSerializer
+
+        serializer = ExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return export_response('payments', serializer.validated_data)
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -88,21 +100,27 @@ def create_payment_order(request):
                 status=status.HTTP_403_FORBIDDEN
             )
 
+        # Hold the booking's inventory while the guest pays
+        hold = place_hold(booking)
+
         if payment_type == 'payment_link':
             # Create payment link
             result = payment_gateway.create_payment_link(booking)
             return Response({
                 'type': 'payment_link',
                 'data': result,
-                'booking_number': booking.booking_number
+                'booking_number': booking.booking_number,
+                'hold_expires_at': hold.expires_at
             })
         else:
-            # Create order for Razorpay checkout
-            order_data = payment_gateway.create_order(booking)
+            # Reuse the booking's open order, or create one for Razorpay checkout
+            order_data, created = get_or_create_order(payment_gateway, booking)
             return Response({
                 'type': 'order',
                 'data': order_data,
-                'booking_number': booking.booking_number
+                'reused': not created,
+                'booking_number': booking.booking_number,
+                'hold_expires_at': hold.expires_at
             })
 
     except Booking.DoesNotExist:
@@ -110,6 +128,16 @@ def create_payment_order(request):
             {'error': 'Booking not found'},
             status=status.HTTP_404_NOT_FOUND
         )
+    except InventoryUnavailableError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_409_CONFLICT
+        )
+    except GatewayUnavailableError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -174,91 +202,35 @@ def verify_payment(request):
 def payment_webhook(request):
     """
     Razorpay webhook endpoint for payment notifications.
-    This receives real-time updates about payment status.
+    Only the HMAC check and a single INSERT of the raw event happen here, so
+    the response returns in milliseconds; the webhook worker pool parses the
+    event and applies payment and booking updates.
 
     POST /api/payments/webhook/
     """
-    try:
-        # Verify webhook signature
-        webhook_signature = request.headers.get('X-Razorpay-Signature')
-        webhook_secret = settings.RAZORPAY_WEBHOOK_SECRET
-
-        if webhook_secret:
-            # Verify signature
-            expected_signature = hmac.new(
-                webhook_secret.encode('utf-8'),
-                request.body,
-                hashlib.sha256
-            ).hexdigest()
-
-            if not hmac.compare_digest(webhook_signature, expected_signature):
-                return Response(
-                    {'error': 'Invalid signature'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-        # Parse webhook data
-        webhook_data = json.loads(request.body)
-        event = webhook_data.get('event')
-        payload = webhook_data.get('payload', {})
-
-        # Handle different events
-        if event == 'payment.captured':
-            payment_entity = payload.get('payment', {}).get('entity', {})
-            payment_id = payment_entity.get('id')
-            order_id = payment_entity.get('order_id')
-
-            # Find payment record
-            payment = Payment.objects.filter(order_id=order_id).first()
-
-            if payment:
-                payment.gateway_payment_id = payment_id
-                payment.status = 'completed'
-                payment.paid_at = timezone.now()
-                payment.gateway_response = payment_entity
-                payment.is_verified = True
-
-                # Extract payment method details
-                method = payment_entity.get('method', '')
-                payment.payment_method_type = payment_gateway._map_payment_method(method)
-
-                if method == 'upi':
-                    payment.upi_id = payment_entity.get('vpa', '')
-                elif method == 'card':
-                    card = payment_entity.get('card', {})
-                    payment.card_last_4 = card.get('last4', '')
-                    payment.card_network = card.get('network', '')
-                elif method == 'wallet':
-                    payment.wallet_name = payment_entity.get('wallet', '')
-
-                payment.save()
-
-                # Update booking
-                booking = payment.booking
-                booking.status = 'confirmed'
-                booking.confirmed_at = timezone.now()
-                booking.save()
-
-        elif event == 'payment.failed':
-            payment_entity = payload.get('payment', {}).get('entity', {})
-            order_id = payment_entity.get('order_id')
-
-            payment = Payment.objects.filter(order_id=order_id).first()
-            if payment:
-                payment.status = 'failed'
-                payment.error_code = payment_entity.get('error_code', '')
-                payment.error_description = payment_entity.get('error_description', '')
-                payment.gateway_response = payment_entity
-                payment.save()
-
-        return Response({'status': 'ok'})
+    if not verify_webhook_signature(request.body, request.headers.get('X-Razorpay-Signature')):
+        return Response(
+            {'error': 'Invalid signature'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-    except Exception as e:
+    try:
+        event, created = record_webhook_event(
+            request.body,
+            event_id=request.headers.get('X-Razorpay-Event-Id')
+        )
+    except ValueError as e:
         return Response(
             {'error': str(e)},
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    # Duplicate deliveries are acknowledged without being processed again
+    if created:
+        dispatch_webhook_event()
+
+    return Response({'status': 'ok', 'duplicate': not created})
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -414,3 +386,18 @@ def get_payment_status(request, booking_number):
             {'error': 'Booking not found'},
             status=status.HTTP_404_NOT_FOUND
         )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_gateway_metrics(request):
+    """
+    Export payment gateway latency histograms and health (Prometheus text format).
+    Metrics are per process; scrape every worker or aggregate upstream.
+
+    GET /api/bookings/payments/gateway-metrics/
+    """
+    return HttpResponse(
+        gateway_metrics.render_prometheus() + payment_router.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
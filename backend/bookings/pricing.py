@@ -0,0 +1,457 @@
+"""
+Dynamic pricing rules engine for WayanTrails listings.
+
+A quote for (listing, check-in, check-out) is built in three layers:
+
+1. Nightly price: BookingAvailability.price_override if set, else the
+   listing's base price (homestay price_per_night, resort price_range_min)
+   under any active resort SeasonalPricing (fixed price or multiplier),
+   then surged by the best matching 'occupancy' rule
+   for that night's booked + held share of inventory.
+2. Stay adjustments on the nightly subtotal: the best 'length_of_stay',
+   'early_bird' and 'last_minute' rule each apply once (the one with the
+   highest threshold met).
+3. Promo code, last. Each booking takes one of the code's max_uses when it
+   is created (reserve_promo_use) and gives it back if cancelled.
+
+Rules, seasons and base prices are compiled per listing into a
+CompiledPricing kept in process memory, so quoting doesn't touch the rules
+tables. Each compiled entry carries the version it was built from. Versions
+live in the shared cache (per listing, per listing type and global) and are
+bumped by bookings.signals whenever a rule, season or listing price changes.
+quote_many() checks every listing's version with one cache round trip,
+recompiles only stale listings (one query per table for all of them), and
+reads nightly inventory for every pair in one query. Quoting thousands of
+(listing, dates) pairs for search therefore costs a handful of queries.
+
+Vehicle rentals are priced by the hour and day in
+rentals.availability.quote_rental, not here.
+"""
+import logging
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Booking, BookingAvailability, PricingRule, PromoCode
+
+logger = logging.getLogger(__name__)
+
+TWO_PLACES = Decimal('0.01')
+PRICING_VERSION_PREFIX = 'pricing_rules'
+
+# Compiled listings kept per process before the table is cleared
+MAX_COMPILED_LISTINGS = 20000
+
+STAY_RULE_TYPES = ['length_of_stay', 'early_bird', 'last_minute']
+
+# Listing types with a nightly base price, whose booking amounts come from a quote
+PRICED_TYPES = ['homestay', 'resort']
+
+# The threshold each rule type is matched on
+RULE_THRESHOLDS = {
+    'length_of_stay': 'min_nights',
+    'early_bird': 'min_days_ahead',
+    'last_minute': 'max_days_ahead',
+    'occupancy': 'min_occupancy',
+}
+
+_compiled = {}
+
+
+class PromoCodeError(ValueError):
+    """Raised when a promo code can't be used for a stay."""
+
+
+def _money(amount):
+    return Decimal(amount).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def _version_keys(content_type, object_id):
+    return (
+        PRICING_VERSION_PREFIX,
+        f"{PRICING_VERSION_PREFIX}:{content_type}",
+        f"{PRICING_VERSION_PREFIX}:{content_type}:{object_id}",
+    )
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def invalidate_pricing(content_type='', object_id=None):
+    """
+    Mark compiled pricing stale for one listing, every listing of a type
+    (no object_id) or every listing (no content_type).
+    """
+    if not content_type:
+        _bump(PRICING_VERSION_PREFIX)
+    elif object_id is None:
+        _bump(f"{PRICING_VERSION_PREFIX}:{content_type}")
+    else:
+        _bump(f"{PRICING_VERSION_PREFIX}:{content_type}:{object_id}")
+
+
+class CompiledPricing:
+    """Everything needed to price one listing, sorted for quick lookups."""
+
+    __slots__ = ['base_price', 'season_starts', 'seasons', 'occupancy', 'stay_rules']
+
+    def __init__(self, base_price, seasons, rules):
+        self.base_price = base_price
+
+        # Seasons sorted by start: (start, end, multiplier, fixed_price)
+        self.seasons = sorted(seasons)
+        self.season_starts = [season[0] for season in self.seasons]
+
+        # Highest threshold first, so the first match is the best one
+        self.occupancy = sorted(
+            (rule for rule in rules if rule['rule_type'] == 'occupancy'),
+            key=lambda rule: rule['min_occupancy'], reverse=True
+        )
+        self.stay_rules = {
+            'length_of_stay': sorted(
+                (rule for rule in rules if rule['rule_type'] == 'length_of_stay'),
+                key=lambda rule: rule['min_nights'], reverse=True
+            ),
+            'early_bird': sorted(
+                (rule for rule in rules if rule['rule_type'] == 'early_bird'),
+                key=lambda rule: rule['min_days_ahead'], reverse=True
+            ),
+            'last_minute': sorted(
+                (rule for rule in rules if rule['rule_type'] == 'last_minute'),
+                key=lambda rule: rule['max_days_ahead']
+            ),
+        }
+
+    def night_base(self, night):
+        """Base price of a night under the latest-starting season covering it."""
+        index = bisect_right(self.season_starts, night)
+        while index > 0:
+            index -= 1
+            start, end, multiplier, fixed_price = self.seasons[index]
+            if end >= night:
+                return fixed_price if fixed_price is not None else self.base_price * multiplier
+        return self.base_price
+
+    def evaluate(self, check_in, check_out, today, inventory, nightly=False):
+        """
+        Price a stay.
+
+        Args:
+            inventory: {night: (occupancy %, price override or None)}
+
+        Returns:
+            dict: nights, subtotal, adjustments, total_amount (and nightly prices)
+        """
+        nights = max(1, (check_out - check_in).days)
+        subtotal = Decimal('0')
+        surges = defaultdict(Decimal)
+        night_prices = []
+
+        for offset in range(nights):
+            night = check_in + timedelta(days=offset)
+            occupancy, override = inventory.get(night, (Decimal('0'), None))
+            price = override if override is not None else self.night_base(night)
+            for rule in self.occupancy:
+                if occupancy >= rule['min_occupancy'] and _covers(rule, night):
+                    surge = price * rule['adjustment_percent'] / 100
+                    surges[rule['name']] += surge
+                    price += surge
+                    break
+            subtotal += price
+            if nightly:
+                night_prices.append({'date': night, 'price': _money(price)})
+
+        adjustments = [
+            {'rule': name, 'rule_type': 'occupancy', 'amount': _money(amount)} for name, amount in surges.items()
+        ]
+        base_amount = subtotal - sum(surges.values(), Decimal('0'))
+
+        lead_days = (check_in - today).days
+        thresholds = {
+            'length_of_stay': lambda rule: nights >= rule['min_nights'],
+            'early_bird': lambda rule: lead_days >= rule['min_days_ahead'],
+            'last_minute': lambda rule: 0 <= lead_days <= rule['max_days_ahead'],
+        }
+        stay_total = subtotal
+        for rule_type in STAY_RULE_TYPES:
+            for rule in self.stay_rules[rule_type]:
+                if thresholds[rule_type](rule) and _covers(rule, check_in):
+                    amount = _money(subtotal * rule['adjustment_percent'] / 100)
+                    adjustments.append({'rule': rule['name'], 'rule_type': rule_type, 'amount': amount})
+                    stay_total += amount
+                    break
+
+        quote = {
+            'nights': nights,
+            'base_amount': _money(base_amount),
+            'subtotal': _money(subtotal),
+            'adjustments': adjustments,
+            'total_amount': max(_money(stay_total), Decimal('0.00')),
+        }
+        if nightly:
+            quote['nightly'] = night_prices
+        return quote
+
+
+def _covers(rule, day):
+    return (rule['valid_from'] is None or rule['valid_from'] <= day) and (
+        rule['valid_to'] is None or day <= rule['valid_to']
+    )
+
+
+def _base_prices(listings):
+    """{(content_type, object_id): base price} for listings with one, one query per type."""
+    from homestays.models import Homestay
+    from resorts.models import Resort
+
+    fields = {
+        'homestay': (Homestay, 'price_per_night'),
+        'resort': (Resort, 'price_range_min'),
+    }
+    prices = {}
+    for content_type, (model, column) in fields.items():
+        object_ids = {object_id for listing_type, object_id in listings if listing_type == content_type}
+        if not object_ids:
+            continue
+        for pk, price in model.objects.filter(pk__in=object_ids).values_list('pk', column):
+            prices[(content_type, pk)] = price
+    return prices
+
+
+def _compile(listings):
+    """Compile pricing for many listings: one query for rules, seasons and each listing type."""
+    from resorts.models import SeasonalPricing
+
+    prices = _base_prices(listings)
+
+    by_type = defaultdict(set)
+    for content_type, object_id in listings:
+        by_type[content_type].add(object_id)
+    scope = Q(content_type='')
+    for content_type, object_ids in by_type.items():
+        scope |= Q(content_type=content_type, object_id__isnull=True) | Q(
+            content_type=content_type, object_id__in=object_ids
+        )
+
+    rules = defaultdict(list)
+    type_rules = defaultdict(list)
+    global_rules = []
+    for rule in PricingRule.objects.filter(scope, is_active=True).values(
+        'name', 'rule_type', 'content_type', 'object_id', 'adjustment_percent', 'min_nights',
+        'min_days_ahead', 'max_days_ahead', 'min_occupancy', 'valid_from', 'valid_to'
+    ):
+        if rule[RULE_THRESHOLDS[rule['rule_type']]] is None:
+            logger.warning(f"Pricing rule {rule['name']} has no {RULE_THRESHOLDS[rule['rule_type']]}; skipped")
+            continue
+        if not rule['content_type']:
+            global_rules.append(rule)
+        elif rule['object_id'] is None:
+            type_rules[rule['content_type']].append(rule)
+        else:
+            rules[(rule['content_type'], rule['object_id'])].append(rule)
+
+    seasons = defaultdict(list)
+    if by_type.get('resort'):
+        for resort_id, start, end, multiplier, fixed_price in SeasonalPricing.objects.filter(
+            resort_id__in=by_type['resort'], room_type__isnull=True, is_active=True
+        ).values_list('resort_id', 'start_date', 'end_date', 'price_multiplier', 'fixed_price'):
+            seasons[resort_id].append((start, end, multiplier, fixed_price))
+
+    compiled = {}
+    for content_type, object_id in listings:
+        base_price = prices.get((content_type, object_id))
+        if base_price is None:
+            compiled[(content_type, object_id)] = None
+            continue
+
+        compiled[(content_type, object_id)] = CompiledPricing(
+            base_price,
+            seasons[object_id] if content_type == 'resort' else [],
+            global_rules + type_rules[content_type] + rules[(content_type, object_id)]
+        )
+    return compiled
+
+
+def compiled_pricing(listings):
+    """
+    Current CompiledPricing for many (content_type, object_id) listings,
+    recompiling only those changed since they were compiled.
+
+    Returns:
+        dict: {listing: CompiledPricing, or None for listings without a base price}
+    """
+    listings = set(listings)
+    keys = {listing: _version_keys(*listing) for listing in listings}
+    versions = cache.get_many({key for listing_keys in keys.values() for key in listing_keys})
+
+    result, stale = {}, {}
+    for listing, listing_keys in keys.items():
+        token = tuple(versions.get(key, 0) for key in listing_keys)
+        entry = _compiled.get(listing)
+        if entry and entry[0] == token:
+            result[listing] = entry[1]
+        else:
+            stale[listing] = token
+
+    if stale:
+        if len(_compiled) + len(stale) > MAX_COMPILED_LISTINGS:
+            _compiled.clear()
+        for listing, pricing in _compile(stale).items():
+            _compiled[listing] = (stale[listing], pricing)
+            result[listing] = pricing
+    return result
+
+
+def _inventory(stays):
+    """{(content_type, object_id): {night: (occupancy %, price override)}} for every stay, in one query."""
+    by_type = defaultdict(set)
+    for content_type, object_id, check_in, check_out in stays:
+        by_type[content_type].add(object_id)
+    query = Q()
+    for content_type, object_ids in by_type.items():
+        query |= Q(content_type=content_type, object_id__in=object_ids)
+
+    inventory = defaultdict(dict)
+    rows = BookingAvailability.objects.filter(
+        query,
+        date__gte=min(stay[2] for stay in stays),
+        date__lt=max(stay[3] for stay in stays)
+    ).values_list('content_type', 'object_id', 'date', 'available_slots', 'booked_slots', 'held_slots', 'price_override')
+    for content_type, object_id, night, available, booked, held, override in rows:
+        occupancy = Decimal(100) if not available else Decimal(100 * (booked + held)) / available
+        inventory[(content_type, object_id)][night] = (occupancy, override)
+    return inventory
+
+
+def get_promo(code, content_type, object_id, nights=1, now=None):
+    """
+    Look up a promo code usable for a stay.
+
+    Raises:
+        PromoCodeError: Unknown, expired, used up, or not valid for this stay
+    """
+    now = now or timezone.now()
+    promo = PromoCode.objects.filter(code__iexact=code.strip(), is_active=True).first()
+    check_promo(promo, content_type, object_id, nights, now)
+    return promo
+
+
+def check_promo(promo, content_type, object_id, nights, now):
+    if promo is None:
+        raise PromoCodeError("Promo code not found.")
+    if (promo.valid_from and now < promo.valid_from) or (promo.valid_to and now > promo.valid_to):
+        raise PromoCodeError(f"Promo code {promo.code} is not valid now.")
+    if promo.max_uses is not None and promo.times_used >= promo.max_uses:
+        raise PromoCodeError(f"Promo code {promo.code} has been used up.")
+    if promo.content_type and promo.content_type != content_type:
+        raise PromoCodeError(f"Promo code {promo.code} is not valid for this booking.")
+    if promo.object_id is not None and str(promo.object_id) != str(object_id):
+        raise PromoCodeError(f"Promo code {promo.code} is not valid for this listing.")
+    if nights < promo.min_nights:
+        raise PromoCodeError(f"Promo code {promo.code} needs a stay of at least {promo.min_nights} nights.")
+
+
+def promo_discount(promo, amount):
+    """Discount a promo code gives on `amount` (never more than the amount)."""
+    amount = Decimal(str(amount))
+    if promo.discount_percent:
+        discount = amount * promo.discount_percent / 100
+        if promo.max_discount is not None:
+            discount = min(discount, promo.max_discount)
+    else:
+        discount = promo.discount_amount or Decimal('0')
+    return min(_money(discount), amount)
+
+
+def quote_many(stays, promo_code=None, today=None, nightly=False):
+    """
+    Quote many stays at once.
+
+    Args:
+        stays: (content_type, object_id, check_in, check_out) tuples
+        promo_code: Code to apply to every stay it is valid for
+        today: Booking date for lead-time rules (default today)
+        nightly: Include per-night prices
+
+    Returns:
+        list: quote dicts in input order; listings without a base price
+        get {'error': ...}
+    """
+    if not stays:
+        return []
+    stays = [(content_type, int(object_id), check_in, check_out) for content_type, object_id, check_in, check_out in stays]
+    today = today or timezone.localdate()
+    now = timezone.now()
+
+    pricing = compiled_pricing((content_type, object_id) for content_type, object_id, _, _ in stays)
+    inventory = _inventory(stays)
+    promo = PromoCode.objects.filter(code__iexact=promo_code.strip(), is_active=True).first() if promo_code else None
+
+    quotes = []
+    for content_type, object_id, check_in, check_out in stays:
+        listing_pricing = pricing[(content_type, object_id)]
+        if listing_pricing is None:
+            quotes.append({'content_type': content_type, 'object_id': object_id, 'error': 'No price for this listing.'})
+            continue
+
+        quote = listing_pricing.evaluate(
+            check_in, check_out, today, inventory.get((content_type, object_id), {}), nightly=nightly
+        )
+        if promo_code:
+            try:
+                check_promo(promo, content_type, object_id, quote['nights'], now)
+                quote['promo_code'] = promo.code
+                quote['discount_amount'] = promo_discount(promo, quote['total_amount'])
+                quote['total_amount'] -= quote['discount_amount']
+            except PromoCodeError as e:
+                quote['promo_error'] = str(e)
+
+        quotes.append({
+            'content_type': content_type,
+            'object_id': object_id,
+            'check_in_date': check_in,
+            'check_out_date': check_out,
+            **quote
+        })
+    return quotes
+
+
+def quote_stay(content_type, object_id, check_in, check_out, promo_code=None, nightly=True):
+    """Quote a single stay (see quote_many)."""
+    return quote_many([(content_type, object_id, check_in, check_out)], promo_code=promo_code, nightly=nightly)[0]
+
+
+def reserve_promo_use(code, uses=1):
+    """
+    Take `uses` of a promo code's max_uses with one conditional UPDATE, so
+    concurrent bookings can't share the last use. Run it in the transaction
+    that creates the booking: if the booking rolls back, so does the use.
+
+    Raises:
+        PromoCodeError: The code has no uses left
+    """
+    updated = PromoCode.objects.filter(code=code).filter(
+        Q(max_uses__isnull=True) | Q(times_used__lte=F('max_uses') - uses)
+    ).update(times_used=F('times_used') + uses, updated_at=timezone.now())
+    if not updated:
+        raise PromoCodeError(f"Promo code {code} has been used up.")
+
+
+def release_promo_uses(booking_ids):
+    """Give back the promo code uses of bookings that were cancelled."""
+    for code, uses in Booking.objects.filter(pk__in=list(booking_ids)).exclude(promo_code='').order_by().values(
+        'promo_code'
+    ).annotate(uses=Count('pk')).values_list('promo_code', 'uses'):
+        PromoCode.objects.filter(code=code).update(
+            times_used=Greatest(F('times_used') - uses, Value(0)), updated_at=timezone.now()
+        )
@@ -0,0 +1,35 @@
+"""
+Dynamic pricing API views for WayanTrails platform.
+"""
+from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .pricing import quote_many
+from .serializers import PricingQuoteSerializer
+
+
+class PricingViewSet(viewsets.ViewSet):
+    """Price quotes from the pricing rules engine."""
+
+    permission_classes = [permissions.AllowAny]
+
+    @action(detail=False, methods=['post'])
+    def quote(self, request):
+        """
+        Quote many stays in one request, e.g. for search results.
+        POST /api/bookings/pricing/quote/
+        """
+        serializer = PricingQuoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        quotes = quote_many(
+            [
+                (stay['content_type'], stay['object_id'], stay['check_in_date'], stay['check_out_date'])
+                for stay in data['stays']
+            ],
+            promo_code=data.get('promo_code') or None,
+            nightly=data['nightly']
+        )
+        return Response({'quotes': quotes})
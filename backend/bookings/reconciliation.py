@@ -0,0 +1,257 @@
+"""
+Payment reconciliation for WayanTrails.
+
+Pages through the gateway's payments and orders for a time window and diffs
+each page against local Payment rows with a single query. Stuck
+`created`/`pending` payments that the gateway reports as captured or failed
+are fixed in bulk; every other difference is written to the mismatch report.
+Only one page is held in memory at a time.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Payment, PaymentReconciliationRun, PaymentReconciliationMismatch
+from .webhooks import SETTLED_PAYMENT_STATUSES, PAYMENT_METHOD_MAPPING, confirm_paid_booking
+
+logger = logging.getLogger(__name__)
+
+# Local states reconciliation is allowed to move forward
+OPEN_PAYMENT_STATUSES = ['created', 'pending']
+
+# Gateway payment status -> local payment status
+GATEWAY_PAYMENT_STATUS_MAPPING = {
+    'created': 'created',
+    'authorized': 'authorized',
+    'captured': 'completed',
+    'refunded': 'refunded',
+    'failed': 'failed',
+}
+
+PAYMENT_FIELDS = [
+    'id', 'booking_id', 'package_id', 'order_id', 'gateway_payment_id', 'amount', 'status'
+]
+
+FIXED_PAYMENT_FIELDS = [
+    'status', 'gateway_payment_id', 'payment_method_type', 'paid_at',
+    'authorized_at', 'is_verified', 'error_code', 'error_description',
+    'gateway_response', 'updated_at'
+]
+
+
+def _paise_to_rupees(amount):
+    return (Decimal(amount or 0) / 100).quantize(Decimal('0.01'))
+
+
+class PaymentReconciler:
+    """
+    Reconcile local payments against a payment gateway.
+
+    The gateway must provide a `code` and iter_payments(start, end, page_size)
+    and iter_orders(start, end, page_size) generators (RazorpayGateway and
+    MockPaymentGateway both do). Run it once per registered gateway.
+    """
+
+    def __init__(self, gateway, page_size=100, dry_run=False):
+        self.gateway = gateway
+        self.page_size = page_size
+        self.dry_run = dry_run
+
+    def run(self, start, end):
+        """
+        Reconcile all gateway payments and orders created in [start, end).
+
+        Returns:
+            PaymentReconciliationRun: The completed run with its counters
+        """
+        run = PaymentReconciliationRun.objects.create(
+            payment_gateway=self.gateway.code,
+            window_start=start,
+            window_end=end,
+            dry_run=self.dry_run
+        )
+
+        try:
+            for page in self.gateway.iter_payments(start, end, self.page_size):
+                run.gateway_payments_seen += len(page)
+                self._reconcile_payment_page(run, page)
+
+            for page in self.gateway.iter_orders(start, end, self.page_size):
+                run.gateway_orders_seen += len(page)
+                self._reconcile_order_page(run, page)
+
+            run.status = 'completed'
+        except Exception as e:
+            logger.exception("Payment reconciliation failed")
+            run.status = 'failed'
+            run.error = str(e)
+
+        run.finished_at = timezone.now()
+        run.save()
+        return run
+
+    def _load_payments(self, order_ids, gateway_payment_ids=()):
+        """Fetch local payments for a page of gateway IDs in one query."""
+        condition = Q(order_id__in=order_ids)
+        if gateway_payment_ids:
+            condition |= Q(gateway_payment_id__in=gateway_payment_ids)
+
+        by_order, by_payment_id = {}, {}
+        for payment in Payment.objects.filter(condition).only(*PAYMENT_FIELDS):
+            if payment.order_id:
+                by_order[payment.order_id] = payment
+            if payment.gateway_payment_id:
+                by_payment_id[payment.gateway_payment_id] = payment
+        return by_order, by_payment_id
+
+    def _reconcile_payment_page(self, run, page):
+        order_ids = [entity['order_id'] for entity in page if entity.get('order_id')]
+        payment_ids = [entity['id'] for entity in page]
+        by_order, by_payment_id = self._load_payments(order_ids, payment_ids)
+
+        mismatches = []
+        to_fix = {}
+
+        for entity in page:
+            payment = by_payment_id.get(entity['id']) or by_order.get(entity.get('order_id'))
+            gateway_status = entity.get('status', '')
+            gateway_amount = _paise_to_rupees(entity.get('amount'))
+
+            if not payment:
+                mismatches.append(self._mismatch(
+                    run, None, 'missing_locally', entity,
+                    gateway_status=gateway_status, gateway_amount=gateway_amount
+                ))
+                continue
+
+            if payment.amount != gateway_amount:
+                mismatches.append(self._mismatch(
+                    run, payment, 'amount_mismatch', entity,
+                    gateway_status=gateway_status, gateway_amount=gateway_amount
+                ))
+
+            expected_status = GATEWAY_PAYMENT_STATUS_MAPPING.get(gateway_status)
+            if not expected_status or expected_status == payment.status:
+                continue
+
+            if payment.status in OPEN_PAYMENT_STATUSES and gateway_status in ['captured', 'failed']:
+                # A later failed attempt must not mask an earlier capture on the same order
+                previous = to_fix.get(payment.pk)
+                if not previous or previous.get('status') != 'captured':
+                    to_fix[payment.pk] = entity
+            elif not (payment.status in SETTLED_PAYMENT_STATUSES and gateway_status == 'failed'):
+                # Failed retries on an already-settled order are normal noise
+                mismatches.append(self._mismatch(
+                    run, payment, 'status_mismatch', entity,
+                    gateway_status=gateway_status, gateway_amount=gateway_amount
+                ))
+
+        if to_fix:
+            mismatches.extend(self._fix_payments(run, to_fix))
+
+        self._record(run, mismatches)
+
+    def _reconcile_order_page(self, run, page):
+        order_ids = [entity['id'] for entity in page]
+        by_order, _ = self._load_payments(order_ids)
+
+        mismatches = []
+        for entity in page:
+            payment = by_order.get(entity['id'])
+            gateway_amount = _paise_to_rupees(entity.get('amount'))
+
+            if not payment:
+                mismatches.append(self._mismatch(
+                    run, None, 'missing_locally', entity, order_id=entity['id'],
+                    gateway_status=entity.get('status', ''), gateway_amount=gateway_amount
+                ))
+            elif entity.get('status') == 'paid' and payment.status not in SETTLED_PAYMENT_STATUSES:
+                # Paid order whose payment did not show up in the payments pass
+                mismatches.append(self._mismatch(
+                    run, payment, 'status_mismatch', entity, order_id=entity['id'],
+                    gateway_status='paid', gateway_amount=gateway_amount
+                ))
+
+        self._record(run, mismatches)
+
+    def _fix_payments(self, run, to_fix):
+        """
+        Move stuck payments to the gateway's state in one locked batch.
+
+        Returns:
+            list: Unsaved `status_fixed` mismatch rows for the report
+        """
+        mismatches = []
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Re-read under lock: a webhook may have settled some in the meantime
+            payments = list(
+                Payment.objects.select_for_update().filter(
+                    pk__in=list(to_fix), status__in=OPEN_PAYMENT_STATUSES
+                )
+            )
+
+            paid = []
+            for payment in payments:
+                entity = to_fix[payment.pk]
+                old_status = payment.status
+
+                payment.gateway_payment_id = entity['id']
+                payment.gateway_response = entity
+                if entity['status'] == 'captured':
+                    payment.status = 'completed'
+                    payment.paid_at = now
+                    payment.is_verified = True
+                    payment.payment_method_type = PAYMENT_METHOD_MAPPING.get(entity.get('method', ''), 'card')
+                    paid.append(payment)
+                else:
+                    payment.status = 'failed'
+                    payment.error_code = entity.get('error_code') or ''
+                    payment.error_description = entity.get('error_description') or ''
+                payment.updated_at = now
+
+                mismatches.append(self._mismatch(
+                    run, payment, 'status_fixed', entity,
+                    local_status=old_status,
+                    gateway_status=entity['status'],
+                    gateway_amount=_paise_to_rupees(entity.get('amount')),
+                    resolved=not self.dry_run
+                ))
+
+            if not self.dry_run and payments:
+                Payment.objects.bulk_update(payments, FIXED_PAYMENT_FIELDS)
+                # Same path as the webhook: packages confirm every component,
+                # and held inventory is converted
+                for payment in paid:
+                    confirm_paid_booking(
+                        payment.booking_id, package_id=payment.package_id,
+                        reason='Payment captured (reconciliation)', source='reconciliation'
+                    )
+                run.payments_fixed += len(payments)
+
+        return mismatches
+
+    def _mismatch(self, run, payment, mismatch_type, entity, order_id=None,
+                  local_status=None, gateway_status='', gateway_amount=None, resolved=False):
+        return PaymentReconciliationMismatch(
+            run=run,
+            payment=payment,
+            mismatch_type=mismatch_type,
+            order_id=order_id or entity.get('order_id') or '',
+            gateway_payment_id=entity['id'] if entity.get('entity') == 'payment' else '',
+            local_status=local_status or (payment.status if payment else ''),
+            gateway_status=gateway_status,
+            local_amount=payment.amount if payment else None,
+            gateway_amount=gateway_amount,
+            details=entity,
+            resolved=resolved
+        )
+
+    def _record(self, run, mismatches):
+        if mismatches:
+            PaymentReconciliationMismatch.objects.bulk_create(mismatches)
+            run.mismatches_found += len(mismatches)
@@ -0,0 +1,191 @@
+"""
+Booking analytics for WayanTrails.
+
+Reports read from BookingDailyRollup, which holds one row per
+(booking date, booking type, status, listing) with counts and money sums,
+instead of scanning the bookings table. A multi-year report therefore
+aggregates a few thousand small rows.
+
+Rollups are kept current incrementally: every booking save or delete
+re-aggregates the affected booking dates once the transaction commits (see
+bookings.signals). Bulk queryset updates call
+refresh_rollups_for_bookings() themselves. The rebuild_booking_rollups
+command recomputes everything from scratch.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth, TruncYear
+
+from .models import Booking, BookingDailyRollup
+
+# Booking statuses that count as revenue
+REVENUE_STATUSES = ['confirmed', 'completed']
+
+SUM_FIELDS = [
+    'total_guests', 'base_amount', 'tax_amount', 'discount_amount',
+    'commission_amount', 'total_amount'
+]
+ROLLUP_FIELDS = ['booking_count'] + SUM_FIELDS
+
+
+def _aggregate_bookings(queryset):
+    """Group bookings by rollup dimensions and sum them."""
+    return queryset.values(
+        'booking_date', 'booking_type', 'status', 'content_type', 'object_id'
+    ).annotate(
+        booking_count=Count('id'),
+        **{f'sum_{field}': Sum(field) for field in SUM_FIELDS}
+    ).order_by()
+
+
+def _build_rollups(rows):
+    return [
+        BookingDailyRollup(
+            date=row['booking_date'],
+            booking_type=row['booking_type'],
+            status=row['status'],
+            content_type=row['content_type'],
+            object_id=row['object_id'],
+            booking_count=row['booking_count'],
+            **{field: row[f'sum_{field}'] or 0 for field in SUM_FIELDS}
+        )
+        for row in rows
+    ]
+
+
+def refresh_daily_rollups(dates):
+    """
+    Recompute the rollup rows for the given booking dates.
+
+    Idempotent: two concurrent refreshes of the same date end with the same
+    rows (the loser of a unique-key race simply retries).
+    """
+    dates = sorted({day for day in dates if day})
+    if not dates:
+        return
+
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                BookingDailyRollup.objects.filter(date__in=dates).delete()
+                BookingDailyRollup.objects.bulk_create(
+                    _build_rollups(_aggregate_bookings(Booking.objects.filter(booking_date__in=dates)))
+                )
+            return
+        except IntegrityError:
+            if attempt == 2:
+                raise
+
+
+def refresh_rollups_for_bookings(booking_ids):
+    """
+    Refresh rollups after a queryset.update() that bypassed signals.
+    Deferred until the current transaction commits.
+    """
+    booking_ids = list(booking_ids)
+    if booking_ids:
+        transaction.on_commit(lambda: refresh_daily_rollups(
+            Booking.objects.filter(pk__in=booking_ids).values_list('booking_date', flat=True).distinct()
+        ))
+
+
+def rebuild_daily_rollups(start=None, end=None, chunk_days=31):
+    """
+    Rebuild rollups from the bookings table, one date chunk at a time.
+
+    Args:
+        start: First booking date (default: earliest booking)
+        end: Last booking date (default: latest booking)
+        chunk_days: Days aggregated per query/transaction
+
+    Returns:
+        int: Rollup rows written
+    """
+    bounds = Booking.objects.order_by('booking_date').values_list('booking_date', flat=True)
+    start = start or bounds.first()
+    end = end or bounds.last()
+    if not start or not end:
+        BookingDailyRollup.objects.all().delete()
+        return 0
+
+    written = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        with transaction.atomic():
+            BookingDailyRollup.objects.filter(date__range=(chunk_start, chunk_end)).delete()
+            rollups = _build_rollups(_aggregate_bookings(
+                Booking.objects.filter(booking_date__range=(chunk_start, chunk_end))
+            ))
+            BookingDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+        written += len(rollups)
+        chunk_start = chunk_end + timedelta(days=1)
+
+    return written
+
+
+def _zero(field):
+    return 0 if field in ['booking_count', 'total_guests'] else Decimal('0.00')
+
+
+def _totals(rows):
+    totals = {field: _zero(field) for field in ROLLUP_FIELDS}
+    for row in rows:
+        for field in ROLLUP_FIELDS:
+            totals[field] += row[field]
+    return totals
+
+
+def booking_report(start_date, end_date, booking_type=None, status=None, group_by='day'):
+    """
+    Build the booking analytics report from the rollup table.
+
+    Returns:
+        dict: Overall totals, revenue (confirmed + completed), breakdowns by
+        booking type and status, and a time series grouped by day/month/year
+    """
+    rollups = BookingDailyRollup.objects.filter(date__range=(start_date, end_date))
+    if booking_type:
+        rollups = rollups.filter(booking_type=booking_type)
+    if status:
+        rollups = rollups.filter(status=status)
+
+    def breakdown(queryset, *dimensions):
+        rows = queryset.values(*dimensions).annotate(
+            **{f'sum_{field}': Sum(field) for field in ROLLUP_FIELDS}
+        ).order_by(*dimensions)
+        return [
+            {
+                **{dimension: row[dimension] for dimension in dimensions},
+                **{field: row[f'sum_{field}'] or _zero(field) for field in ROLLUP_FIELDS}
+            }
+            for row in rows
+        ]
+
+    by_status = breakdown(rollups, 'status')
+    revenue = _totals([row for row in by_status if row['status'] in REVENUE_STATUSES])
+
+    if group_by == 'month':
+        series = breakdown(rollups.annotate(period=TruncMonth('date')), 'period')
+    elif group_by == 'year':
+        series = breakdown(rollups.annotate(period=TruncYear('date')), 'period')
+    else:
+        series = [{'period': row.pop('date'), **row} for row in breakdown(rollups, 'date')]
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'group_by': group_by,
+        'totals': _totals(by_status),
+        'revenue': {
+            'booking_count': revenue['booking_count'],
+            'total_amount': revenue['total_amount'],
+            'commission_amount': revenue['commission_amount'],
+        },
+        'by_booking_type': breakdown(rollups, 'booking_type'),
+        'by_status': by_status,
+        'series': series,
+    }
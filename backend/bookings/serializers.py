@@ -4,9 +4,11 @@ Booking serializers for WayanTrails platform.
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
+from homestays.serializers import AddonRequestSerializer
+
 from .models import (
-    Booking, BookingItem, Payment, BookingStatusHistory,
-    WhatsAppMessage, BookingAvailability
+    Booking, BookingItem, Payment,
+    WhatsAppMessage, BookingAvailability, BookingPackage
 )
 
 User = get_user_model()
@@ -70,7 +72,7 @@ class BookingDetailSerializer(serializers.ModelSerializer):
             'booking_method', 'booking_method_display', 'content_type', 'object_id',
             'check_in_date', 'check_out_date', 'booking_date', 'booking_time',
             'adults', 'children', 'total_guests', 'base_amount', 'tax_amount',
-            'discount_amount', 'commission_amount', 'total_amount',
+            'discount_amount', 'commission_amount', 'total_amount', 'promo_code',
             'status', 'status_display', 'special_requests', 'admin_notes',
             'whatsapp_message_sent', 'confirmed_at', 'cancelled_at',
             'cancellation_reason', 'duration_nights', 'items', 'payments',
@@ -82,6 +84,11 @@ class BookingCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating bookings."""
 
     items = BookingItemSerializer(many=True, required=False)
+    addons = AddonRequestSerializer(required=False, write_only=True)
+    tax_amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, default=0)
+    # Rental interval, for rentals booked by the hour
+    start_at = serializers.DateTimeField(required=False, write_only=True)
+    end_at = serializers.DateTimeField(required=False, write_only=True)
 
     class Meta:
         model = Booking
@@ -90,7 +97,8 @@ class BookingCreateSerializer(serializers.ModelSerializer):
             'booking_method', 'content_type', 'object_id', 'check_in_date',
             'check_out_date', 'booking_date', 'booking_time', 'adults',
             'children', 'total_guests', 'base_amount', 'tax_amount',
-            'discount_amount', 'total_amount', 'special_requests', 'items'
+            'discount_amount', 'total_amount', 'special_requests', 'items',
+            'addons', 'promo_code', 'start_at', 'end_at'
         ]
 
     def validate(self, data):
@@ -114,17 +122,181 @@ class BookingCreateSerializer(serializers.ModelSerializer):
                     "Booking date is required for activity/service bookings."
                 )
 
+        # Activity seats are held per time slot
+        if data.get('content_type') == 'activity':
+            if not data.get('booking_time'):
+                raise serializers.ValidationError(
+                    "Booking time is required for activity bookings."
+                )
+            self._validate_slot_time(data)
+
+        start_at, end_at = data.pop('start_at', None), data.pop('end_at', None)
+        if (data.get('content_type') or data['booking_type']) == 'rental':
+            self._check_rental_price(data, start_at, end_at)
+        else:
+            self._check_stay_price(data)
+
+        addons = data.pop('addons', None)
+        if addons and (addons['meal_plans'] or addons['experiences']):
+            self._price_addons(data, addons)
+
+        if data.get('promo_code'):
+            self._apply_promo(data)
+
         return data
 
-    def create(self, validated_data):
-        """Create booking with items."""
-        from django.contrib.contenttypes.models import ContentType
+    def _validate_slot_time(self, data):
+        """Only an activity's own departure times have seats."""
+        from destinations.slots import is_slot_time
+
+        if not str(data.get('object_id')).isdigit() or not is_slot_time(
+            data['object_id'], data['booking_date'], data['booking_time']
+        ):
+            raise serializers.ValidationError({
+                'booking_time': f"The activity has no departure at {data['booking_time']:%H:%M} on this date."
+            })
+
+    def _check_stay_price(self, data):
+        """
+        Hold the stay's amounts to the pricing engine (bookings.pricing) for
+        listings it prices. Homestays and resorts booked without room types
+        must match the quote; rooms booked by room type can't be
+        priced under the resort's quoted rate per room. Discounts only come
+        from promo codes, and the total is worked out here.
+        """
+        from datetime import timedelta
+        from .pricing import PRICED_TYPES, quote_stay
+
+        content_type = data.get('content_type') or data['booking_type']
+        if content_type not in PRICED_TYPES:
+            return
+        if not str(data.get('object_id')).isdigit():
+            raise serializers.ValidationError({'object_id': "Listing not found."})
+
+        check_in = data.get('check_in_date') or data['booking_date']
+        check_out = data.get('check_out_date') or check_in + timedelta(days=1)
+        quote = quote_stay(content_type, data['object_id'], check_in, check_out, nightly=False)
+        if 'error' in quote:
+            raise serializers.ValidationError({'object_id': quote['error']})
+
+        rooms = sum(
+            item.get('quantity', 1) for item in data.get('items', []) if (item.get('item_data') or {}).get('room_type_id')
+        )
+        stay_amount = quote['total_amount'] * (rooms or 1)
+        if rooms and content_type == 'resort':
+            if data['base_amount'] < stay_amount:
+                raise serializers.ValidationError({
+                    'base_amount': f"{rooms} rooms for these dates cost at least {stay_amount}."
+                })
+        elif data['base_amount'] != stay_amount:
+            raise serializers.ValidationError({
+                'base_amount': f"The stay is quoted at {stay_amount}; request a new quote."
+            })
+
+        data['discount_amount'] = 0
+        data['total_amount'] = data['base_amount'] + data.get('tax_amount', 0)
+
+    def _check_rental_price(self, data, start_at=None, end_at=None):
+        """
+        Hold a rental's amounts to rentals.availability.quote_rental for
+        [start_at, end_at). Without an interval the rental runs from check-in
+        (or the booking date) at the booking time, or midnight, to the same
+        time on check-out, or for one day.
+        """
+        from datetime import datetime, time, timedelta
         from django.utils import timezone
-        from datetime import datetime
-        import logging
+        from rentals.availability import quote_rental
+        from rentals.models import Vehicle
+
+        vehicle = None
+        if str(data.get('object_id')).isdigit():
+            vehicle = Vehicle.objects.filter(pk=data['object_id'], is_active=True).first()
+        if vehicle is None:
+            raise serializers.ValidationError({'object_id': "Vehicle not found."})
+
+        if start_at and end_at:
+            pickup = timezone.localtime(start_at)
+            data['booking_date'] = data['check_in_date'] = pickup.date()
+            data['booking_time'] = pickup.time()
+            data['check_out_date'] = timezone.localtime(end_at).date()
+        elif start_at or end_at:
+            raise serializers.ValidationError("Rentals need both start_at and end_at.")
+        else:
+            check_in = data.get('check_in_date') or data['booking_date']
+            check_out = data.get('check_out_date') or check_in + timedelta(days=1)
+            pickup = data.get('booking_time') or time(0)
+            start_at = timezone.make_aware(datetime.combine(check_in, pickup))
+            end_at = timezone.make_aware(datetime.combine(check_out, pickup))
+        if end_at <= start_at:
+            raise serializers.ValidationError("A rental must end after it starts.")
+
+        quote = quote_rental(vehicle, start_at, end_at)
+        if data['base_amount'] != quote['total_amount']:
+            raise serializers.ValidationError({
+                'base_amount': f"The rental is quoted at {quote['total_amount']}; request a new quote."
+            })
+
+        data['discount_amount'] = 0
+        data['total_amount'] = data['base_amount'] + data.get('tax_amount', 0)
+
+    def _apply_promo(self, data):
+        """Discount the booking by a valid promo code (see bookings.pricing)."""
+        from .pricing import PromoCodeError, get_promo, promo_discount
+
+        nights = 1
+        if data.get('check_in_date') and data.get('check_out_date'):
+            nights = (data['check_out_date'] - data['check_in_date']).days
+        try:
+            promo = get_promo(data['promo_code'], data.get('content_type') or data['booking_type'], data.get('object_id'), nights)
+        except PromoCodeError as e:
+            raise serializers.ValidationError({'promo_code': str(e)})
+
+        discount = promo_discount(promo, data['base_amount'] - data.get('discount_amount', 0))
+        data['promo_code'] = promo.code
+        data['discount_amount'] = data.get('discount_amount', 0) + discount
+        data['total_amount'] = data['total_amount'] - discount
+
+    def _price_addons(self, data, addons):
+        """
+        Add server-priced meal plan and experience lines to a homestay stay.
+        The client's amounts cover the stay itself; add-ons are added on top.
+        """
+        from homestays.addons import AddonError, price_addons
+        from homestays.models import Homestay
+
+        if data['booking_type'] != 'homestay':
+            raise serializers.ValidationError({'addons': "Add-ons are only available for homestay bookings."})
+        homestay = Homestay.objects.filter(pk=data.get('object_id'), is_active=True).first()
+        if homestay is None:
+            raise serializers.ValidationError({'object_id': "Homestay not found."})
+
+        try:
+            quote = price_addons(
+                homestay,
+                data['check_in_date'],
+                data['check_out_date'],
+                data.get('adults', 2),
+                data.get('children', 0),
+                meal_plans=addons['meal_plans'],
+                experiences=addons['experiences']
+            )
+        except AddonError as e:
+            raise serializers.ValidationError({'addons': e.errors})
 
-        logger = logging.getLogger(__name__)
-        logger.info(f"Creating booking with data: {validated_data}")
+        data['items'] = data.get('items', []) + quote['lines']
+        data['base_amount'] = data['base_amount'] + quote['total_amount']
+        data['total_amount'] = data['total_amount'] + quote['total_amount']
+
+    def create(self, validated_data):
+        """
+        Create booking with items in one transaction.
+
+        Items are bulk-inserted, and the listing is read once for both the
+        commission rate and the name used in WhatsApp links and emails, so
+        the query count doesn't grow with the number of items.
+        """
+        from datetime import datetime
+        from django.db import transaction
 
         items_data = validated_data.pop('items', [])
 
@@ -133,40 +305,110 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if request and request.user.is_authenticated:
             validated_data['user'] = request.user
 
-        # Auto-generate booking_number if not provided
-        if 'booking_number' not in validated_data or not validated_data['booking_number']:
-            # Format: WT-YYYY-NNNN (e.g., WT-2025-0001)
-            year = datetime.now().year
-            last_booking = Booking.objects.filter(
-                booking_number__startswith=f'WT-{year}-'
-            ).order_by('-booking_number').first()
-
-            if last_booking:
-                last_num = int(last_booking.booking_number.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-
-            validated_data['booking_number'] = f'WT-{year}-{new_num:04d}'
-
         # Auto-set content_type based on booking_type if not provided
         # Note: content_type field is a CharField, not a FK to ContentType
         if 'content_type' not in validated_data or validated_data['content_type'] is None:
-            booking_type = validated_data.get('booking_type')
             # Simply set content_type to match booking_type (both are strings)
-            validated_data['content_type'] = booking_type
+            validated_data['content_type'] = validated_data.get('booking_type')
+
+        # Commission at the partner's rate (settlement applies the same rate)
+        from .settlement import commission_for
+        listing_name, commission_rate = self._listing_terms(validated_data['content_type'], validated_data.get('object_id'))
+        validated_data['commission_amount'] = commission_for(
+            validated_data.get('base_amount', 0) - validated_data.get('discount_amount', 0),
+            commission_rate
+        )
+
+        with transaction.atomic():
+            # Auto-generate booking_number if not provided
+            if 'booking_number' not in validated_data or not validated_data['booking_number']:
+                # Format: WT-YYYY-NNNN (e.g., WT-2025-0001)
+                year = datetime.now().year
+                last_number = Booking.objects.filter(
+                    booking_number__startswith=f'WT-{year}-'
+                ).order_by('-booking_number').values_list('booking_number', flat=True).first()
+                new_num = int(last_number.split('-')[-1]) + 1 if last_number else 1
+                validated_data['booking_number'] = f'WT-{year}-{new_num:04d}'
+
+            if validated_data.get('promo_code'):
+                self._reserve_promo(validated_data['promo_code'])
+
+            booking = Booking.objects.create(**validated_data)
+
+            # One INSERT for all items; the booking's own post_save already
+            # invalidates occupancy for its stay
+            BookingItem.objects.bulk_create([
+                BookingItem(booking=booking, **item_data) for item_data in items_data
+            ])
+
+        if listing_name and booking.booking_type == booking.content_type:
+            booking.listing_name = listing_name
+        return booking
 
-        # Calculate commission (5% default)
-        commission_rate = 0.05
-        validated_data['commission_amount'] = validated_data.get('base_amount', 0) * commission_rate
+    def _reserve_promo(self, code):
+        """Take one use of the promo code for this booking (rolled back with it)."""
+        from .pricing import PromoCodeError, reserve_promo_use
 
-        booking = Booking.objects.create(**validated_data)
+        try:
+            reserve_promo_use(code)
+        except PromoCodeError as e:
+            raise serializers.ValidationError({'promo_code': str(e)})
 
-        # Create booking items
-        for item_data in items_data:
-            BookingItem.objects.create(booking=booking, **item_data)
+    def _listing_terms(self, content_type, object_id):
+        """Return (listing name or None, commission rate) with one lookup."""
+        from .settlement import get_listing_terms
+        return get_listing_terms([(content_type, object_id)])[(content_type, object_id)]
 
-        return booking
+
+class BookingBatchSerializer(serializers.Serializer):
+    """Serializer for batch booking creation."""
+
+    bookings = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+    mode = serializers.ChoiceField(choices=['all_or_nothing', 'per_item'], default='all_or_nothing')
+
+    def validate_bookings(self, value):
+        """Cap the batch size."""
+        from django.conf import settings
+        if len(value) > settings.BOOKING_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"A batch can contain at most {settings.BOOKING_BATCH_MAX_SIZE} bookings."
+            )
+        return value
+
+
+class BookingPackageSerializer(serializers.ModelSerializer):
+    """Serializer for itinerary packages and their components."""
+
+    bookings = BookingListSerializer(many=True, read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = BookingPackage
+        fields = [
+            'id', 'package_id', 'package_number', 'user', 'guest_name',
+            'guest_email', 'guest_phone', 'total_amount', 'status',
+            'status_display', 'confirmed_at', 'cancelled_at',
+            'cancellation_reason', 'bookings', 'created_at', 'updated_at'
+        ]
+
+
+class BookingPackageCreateSerializer(serializers.ModelSerializer):
+    """Serializer for creating an itinerary package."""
+
+    bookings = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    class Meta:
+        model = BookingPackage
+        fields = ['guest_name', 'guest_email', 'guest_phone', 'bookings']
+
+    def validate_bookings(self, value):
+        """Cap the number of components."""
+        from django.conf import settings
+        if len(value) > settings.BOOKING_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"A package can contain at most {settings.BOOKING_BATCH_MAX_SIZE} bookings."
+            )
+        return value
 
 
 class BookingUpdateSerializer(serializers.ModelSerializer):
@@ -177,21 +419,26 @@ class BookingUpdateSerializer(serializers.ModelSerializer):
         fields = ['status', 'admin_notes', 'cancellation_reason']
 
     def update(self, instance, validated_data):
-        """Update booking and track status changes."""
-        old_status = instance.status
-        new_status = validated_data.get('status', old_status)
-
-        # Track status change
-        if old_status != new_status:
-            BookingStatusHistory.objects.create(
-                booking=instance,
-                old_status=old_status,
-                new_status=new_status,
-                changed_by=self.context['request'].user,
-                reason=validated_data.get('admin_notes', '')
-            )
+        """Update booking; status changes go through the transition engine."""
+        from django.db import transaction
+        from .state_machine import InvalidTransitionError, transition
+
+        new_status = validated_data.pop('status', instance.status)
 
-        return super().update(instance, validated_data)
+        with transaction.atomic():
+            if new_status != instance.status:
+                try:
+                    instance, _ = transition(
+                        instance,
+                        new_status,
+                        changed_by=self.context['request'].user,
+                        reason=validated_data.get('admin_notes') or validated_data.get('cancellation_reason', ''),
+                        source='admin'
+                    )
+                except InvalidTransitionError as e:
+                    raise serializers.ValidationError({'status': str(e)})
+
+            return super().update(instance, validated_data)
 
 
 class AvailabilityCheckSerializer(serializers.Serializer):
@@ -219,7 +466,7 @@ class BookingAvailabilitySerializer(serializers.ModelSerializer):
         model = BookingAvailability
         fields = [
             'content_type', 'object_id', 'date', 'available_slots',
-            'booked_slots', 'remaining_slots', 'price_override',
+            'booked_slots', 'held_slots', 'remaining_slots', 'price_override',
             'is_blocked', 'block_reason'
         ]
 
@@ -246,9 +493,81 @@ class BookingReportSerializer(serializers.Serializer):
     end_date = serializers.DateField()
     booking_type = serializers.CharField(required=False)
     status = serializers.CharField(required=False)
+    group_by = serializers.ChoiceField(choices=['day', 'month', 'year'], default='day')
+
+    MAX_DAILY_RANGE_DAYS = 366
 
     def validate(self, data):
         """Validate date range."""
         if data['start_date'] > data['end_date']:
             raise serializers.ValidationError("Start date must be before end date.")
-        return data
\ No newline at end of file
+        if data['group_by'] == 'day' and (data['end_date'] - data['start_date']).days > self.MAX_DAILY_RANGE_DAYS:
+            raise serializers.ValidationError("Use group_by=month or year for ranges over a year.")
+        return data
+
+class OccupancySerializer(serializers.Serializer):
+    """Serializer for listing occupancy, ADR and RevPAR queries."""
+
+    listing_type = serializers.ChoiceField(choices=['resort', 'homestay'])
+    listing_id = serializers.IntegerField(min_value=1)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    group_by = serializers.ChoiceField(choices=['day', 'week', 'month'], default='day')
+
+    MAX_RANGE_DAYS = 731
+
+    def validate(self, data):
+        """Validate date range."""
+        if data['start_date'] > data['end_date']:
+            raise serializers.ValidationError("Start date must be before end date.")
+        if (data['end_date'] - data['start_date']).days > self.MAX_RANGE_DAYS:
+            raise serializers.ValidationError("Occupancy ranges are limited to two years.")
+        return data
+
+
+class ExportSerializer(serializers.Serializer):
+    """Serializer for streaming booking/payment export filters."""
+
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    status = serializers.CharField(required=False)
+    type = serializers.CharField(required=False)
+    output = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+
+    def validate(self, data):
+        """Validate date range."""
+        if data.get('start_date') and data.get('end_date') and data['start_date'] > data['end_date']:
+            raise serializers.ValidationError("Start date must be before end date.")
+        return data
+
+
+class StayQuoteSerializer(serializers.Serializer):
+    """A listing and dates to quote."""
+
+    content_type = serializers.ChoiceField(choices=['resort', 'homestay'])
+    object_id = serializers.IntegerField(min_value=1)
+    check_in_date = serializers.DateField()
+    check_out_date = serializers.DateField()
+
+    def validate(self, data):
+        """Validate the stay dates."""
+        if data['check_in_date'] >= data['check_out_date']:
+            raise serializers.ValidationError("Check-out date must be after check-in date.")
+        return data
+
+
+class PricingQuoteSerializer(serializers.Serializer):
+    """Serializer for dynamic price quotes of many stays."""
+
+    stays = StayQuoteSerializer(many=True, allow_empty=False)
+    promo_code = serializers.CharField(max_length=30, required=False, allow_blank=True)
+    nightly = serializers.BooleanField(default=False)
+
+    def validate_stays(self, value):
+        """Cap the number of stays per request."""
+        from django.conf import settings
+        if len(value) > settings.PRICING_QUOTE_MAX_STAYS:
+            raise serializers.ValidationError(
+                f"At most {settings.PRICING_QUOTE_MAX_STAYS} stays can be quoted at once."
+            )
+        return value
@@ -0,0 +1,278 @@
+"""
+Commission settlement for WayanTrails partners.
+
+A settlement batch settles every completed booking up to a cutoff date
+that has not been settled before. The work is three set-based statements,
+however many bookings and partners there are:
+
+1. INSERT ... SELECT one ledger row per booking. Each booking's partner and
+   commission rate come from correlated subqueries (Resort/Homestay
+   commission_rate, or the vehicle's RentalProvider for rentals).
+2. INSERT ... SELECT one payout statement per partner (GROUP BY).
+3. UPDATE the ledger rows to point at their statement.
+
+Money is computed in integer paise inside the database, with the rate in
+basis points and round-half-up integer division, so amounts are exact on
+every backend and match commission_for() to the paisa.
+"""
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (
+    BigIntegerField, Case, CharField, Count, DecimalField, ExpressionWrapper,
+    F, OuterRef, PositiveIntegerField, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+
+from .models import (
+    Booking, CommissionLedgerEntry, PartnerPayoutStatement, SettlementBatch
+)
+
+logger = logging.getLogger(__name__)
+
+TWO_PLACES = Decimal('0.01')
+
+# Booking content type -> model holding its commission_rate
+PARTNER_RATE_MODELS = {
+    'resort': ('resorts', 'Resort'),
+    'homestay': ('homestays', 'Homestay'),
+}
+
+
+def _model(app_label, model_name):
+    from django.apps import apps
+    return apps.get_model(app_label, model_name)
+
+
+def get_commission_rate(content_type, object_id):
+    """
+    Return the commission rate (percent) for a booked item.
+
+    Resorts and homestays carry their own rate, rentals use the vehicle's
+    provider rate, and anything else uses DEFAULT_COMMISSION_RATE.
+    """
+    rate = None
+    if content_type in PARTNER_RATE_MODELS:
+        rate = _model(*PARTNER_RATE_MODELS[content_type]).objects.filter(
+            pk=object_id
+        ).values_list('commission_rate', flat=True).first()
+    elif content_type == 'rental':
+        rate = _model('rentals', 'Vehicle').objects.filter(
+            pk=object_id
+        ).values_list('provider__commission_rate', flat=True).first()
+    return Decimal(str(settings.DEFAULT_COMMISSION_RATE)) if rate is None else rate
+
+
+def get_listing_terms(listings):
+    """
+    Return {(content_type, object_id): (name, commission rate)} for many
+    booked items, with one query per content type. Missing listings (and
+    content types without a partner) get (None, DEFAULT_COMMISSION_RATE).
+    """
+    default_rate = Decimal(str(settings.DEFAULT_COMMISSION_RATE))
+    by_type = {}
+    for content_type, object_id in listings:
+        by_type.setdefault(content_type, set()).add(object_id)
+
+    terms = {}
+    for content_type, object_ids in by_type.items():
+        found = {}
+        if content_type in PARTNER_RATE_MODELS:
+            found = {
+                pk: (name, rate) for pk, name, rate in _model(*PARTNER_RATE_MODELS[content_type]).objects.filter(
+                    pk__in=object_ids
+                ).values_list('pk', 'name', 'commission_rate')
+            }
+        elif content_type == 'rental':
+            found = {
+                pk: (name, rate) for pk, name, rate in _model('rentals', 'Vehicle').objects.filter(
+                    pk__in=object_ids
+                ).values_list('pk', 'name', 'provider__commission_rate')
+            }
+        for object_id in object_ids:
+            name, rate = found.get(object_id, (None, None))
+            terms[(content_type, object_id)] = (name, default_rate if rate is None else rate)
+    return terms
+
+
+def commission_for(amount, rate):
+    """Commission on `amount` at `rate` percent, rounded half-up to the paisa."""
+    return (Decimal(str(amount)) * Decimal(str(rate)) / 100).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def _paise(expression):
+    return Cast(Round(ExpressionWrapper(expression * 100, output_field=DecimalField())), BigIntegerField())
+
+
+def _rupees(paise):
+    return ExpressionWrapper(paise * Value(TWO_PLACES), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _partner_rate():
+    """Commission rate (percent) for each booking's partner, as a SQL expression."""
+    cases = [
+        When(content_type=content_type, then=Subquery(
+            _model(*model).objects.filter(pk=OuterRef('object_id')).values('commission_rate')[:1]
+        ))
+        for content_type, model in PARTNER_RATE_MODELS.items()
+    ]
+    cases.append(When(content_type='rental', then=Subquery(
+        _model('rentals', 'Vehicle').objects.filter(pk=OuterRef('object_id')).values('provider__commission_rate')[:1]
+    )))
+    return Coalesce(
+        Case(*cases, default=Value(None), output_field=DecimalField(max_digits=5, decimal_places=2)),
+        Value(Decimal(str(settings.DEFAULT_COMMISSION_RATE))),
+        output_field=DecimalField(max_digits=5, decimal_places=2)
+    )
+
+
+def _partner_id():
+    provider = Subquery(
+        _model('rentals', 'Vehicle').objects.filter(pk=OuterRef('object_id')).values('provider_id')[:1]
+    )
+    return Case(
+        When(content_type='rental', then=Coalesce(provider, F('object_id'))),
+        default=F('object_id'),
+        output_field=PositiveIntegerField()
+    )
+
+
+def settleable_bookings(cutoff_date):
+    """Completed bookings up to the cutoff that have no ledger entry yet."""
+    return Booking.objects.filter(
+        status='completed',
+        booking_date__lte=cutoff_date,
+        commission_ledger_entry__isnull=True
+    )
+
+
+def _insert_select(model, columns, queryset):
+    """INSERT INTO model (columns) <queryset SQL>; returns rows inserted."""
+    sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+    quote = connection.ops.quote_name
+    column_sql = ', '.join(quote(model._meta.get_field(column).column) for column in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {quote(model._meta.db_table)} ({column_sql}) {sql}", params)
+        return cursor.rowcount
+
+
+def _write_ledger(batch, now):
+    """Step 1: one ledger row per settleable booking."""
+    columns = [
+        'created_at', 'updated_at', 'batch', 'booking', 'partner_type', 'partner_id',
+        'commission_rate', 'gross_amount', 'commission_amount', 'payout_amount'
+    ]
+    # Every column is an annotation, in INSERT order, so the SELECT list lines up
+    rows = settleable_bookings(batch.cutoff_date).annotate(
+        rate=_partner_rate(),
+    ).annotate(
+        gross_paise=_paise(F('base_amount') - F('discount_amount')),
+        total_paise=_paise(F('total_amount')),
+        rate_basis_points=_paise(F('rate')),
+    ).annotate(
+        commission_paise=ExpressionWrapper(
+            (F('gross_paise') * F('rate_basis_points') + Value(5000)) / Value(10000),
+            output_field=BigIntegerField()
+        ),
+    ).annotate(
+        l_created_at=Value(now),
+        l_updated_at=Value(now),
+        l_batch=Value(batch.pk),
+        l_booking=F('pk'),
+        l_partner_type=Case(
+            When(content_type='rental', then=Value('rental_provider')),
+            default=F('content_type'),
+            output_field=CharField()
+        ),
+        l_partner_id=_partner_id(),
+        l_commission_rate=F('rate'),
+        l_gross_amount=_rupees(F('gross_paise')),
+        l_commission_amount=_rupees(F('commission_paise')),
+        l_payout_amount=_rupees(F('total_paise') - F('commission_paise')),
+    ).values_list(*[f'l_{column}' for column in columns]).order_by()
+
+    return _insert_select(CommissionLedgerEntry, columns, rows)
+
+
+def _write_statements(batch, now):
+    """Step 2: one statement per partner in the batch."""
+    columns = [
+        'partner_type', 'partner_id', 'created_at', 'updated_at', 'batch', 'status', 'payout_reference',
+        'booking_count', 'gross_amount', 'commission_amount', 'payout_amount'
+    ]
+    rows = CommissionLedgerEntry.objects.filter(batch=batch).values(
+        'partner_type', 'partner_id'
+    ).annotate(
+        s_created_at=Value(now),
+        s_updated_at=Value(now),
+        s_batch=Value(batch.pk),
+        s_status=Value('pending'),
+        s_payout_reference=Value(''),
+        s_booking_count=Count('id'),
+        s_gross_amount=Sum('gross_amount'),
+        s_commission_amount=Sum('commission_amount'),
+        s_payout_amount=Sum('payout_amount'),
+    ).values_list(
+        'partner_type', 'partner_id', *[f's_{column}' for column in columns[2:]]
+    ).order_by()
+
+    return _insert_select(PartnerPayoutStatement, columns, rows)
+
+
+def _link_statements(batch):
+    """Step 3: point ledger rows at their partner's statement."""
+    return CommissionLedgerEntry.objects.filter(batch=batch).update(statement=Subquery(
+        PartnerPayoutStatement.objects.filter(
+            batch=batch,
+            partner_type=OuterRef('partner_type'),
+            partner_id=OuterRef('partner_id')
+        ).values('pk')[:1]
+    ))
+
+
+def run_settlement(cutoff_date, created_by=None):
+    """
+    Settle all completed bookings up to `cutoff_date`.
+
+    Runs in one transaction: a failed batch leaves no ledger rows behind,
+    and its bookings are picked up by the next run.
+
+    Returns:
+        SettlementBatch: The completed (or failed) batch
+    """
+    batch = SettlementBatch.objects.create(
+        cutoff_date=cutoff_date,
+        created_by=created_by,
+        started_at=timezone.now()
+    )
+
+    try:
+        with transaction.atomic():
+            now = timezone.now()
+            _write_ledger(batch, now)
+            _write_statements(batch, now)
+            _link_statements(batch)
+
+            totals = batch.statements.aggregate(
+                statement_count=Count('id'),
+                booking_count=Sum('booking_count'),
+                gross_amount=Sum('gross_amount'),
+                commission_amount=Sum('commission_amount'),
+                payout_amount=Sum('payout_amount'),
+            )
+            for field, value in totals.items():
+                setattr(batch, field, value or 0)
+            batch.status = 'completed'
+            batch.finished_at = timezone.now()
+            batch.save()
+    except Exception as e:
+        logger.error(f"Settlement batch #{batch.pk} failed: {e}")
+        batch.status = 'failed'
+        batch.last_error = str(e)
+        batch.finished_at = timezone.now()
+        batch.save(update_fields=['status', 'last_error', 'finished_at', 'updated_at'])
+
+    return batch
@@ -0,0 +1,143 @@
+"""
+Booking signal handlers for WayanTrails platform.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Booking, BookingItem, PricingRule
+from .state_machine import booking_status_changed
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_date(sender, instance, **kwargs):
+    """Keep the loaded booking date so a changed date refreshes both days."""
+    instance._rollup_date = instance.__dict__.get('booking_date')
+    instance._occupancy_stay = (
+        instance.__dict__.get('check_in_date'), instance.__dict__.get('check_out_date')
+    )
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def refresh_booking_rollups(sender, instance, **kwargs):
+    """Re-aggregate the booking's rollup days once the change commits."""
+    from .reporting import refresh_daily_rollups
+
+    dates = {instance.booking_date, getattr(instance, '_rollup_date', None)}
+    instance._rollup_date = instance.booking_date
+    transaction.on_commit(lambda: refresh_daily_rollups(dates))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_occupancy(sender, instance, **kwargs):
+    """Drop cached occupancy months covered by the old and new stay."""
+    from .occupancy import invalidate_occupancy
+
+    stays = [(instance.check_in_date, instance.check_out_date), getattr(instance, '_occupancy_stay', (None, None))]
+    instance._occupancy_stay = stays[0]
+    transaction.on_commit(lambda: invalidate_occupancy(instance.content_type, instance.object_id, *stays))
+
+
+@receiver(post_save, sender=BookingItem)
+@receiver(post_delete, sender=BookingItem)
+def invalidate_booking_item_occupancy(sender, instance, **kwargs):
+    """Room items decide room type attribution, so they invalidate too."""
+    from .occupancy import invalidate_occupancy
+
+    booking = Booking.objects.filter(pk=instance.booking_id).only(
+        'content_type', 'object_id', 'check_in_date', 'check_out_date'
+    ).first()
+    if booking:
+        transaction.on_commit(lambda: invalidate_occupancy(
+            booking.content_type, booking.object_id, (booking.check_in_date, booking.check_out_date)
+        ))
+
+
+@receiver(booking_status_changed, sender=Booking)
+def sync_booking_inventory(sender, booking_ids, new_status, **kwargs):
+    """Book inventory for confirmed bookings; give it back when they fall through."""
+    from .inventory import convert_hold, release_holds
+
+    if new_status == 'confirmed':
+        for booking in Booking.objects.filter(pk__in=booking_ids).prefetch_related('items'):
+            convert_hold(booking)
+    elif new_status in ['cancelled', 'refunded', 'no_show']:
+        release_holds(booking_ids)
+
+
+@receiver(booking_status_changed, sender=Booking)
+def release_vehicle_rentals(sender, booking_ids, new_status, **kwargs):
+    """Vehicles reserved for a rental booking that fell through are free again."""
+    from rentals.availability import release_rentals
+
+    if new_status in ['cancelled', 'refunded', 'no_show']:
+        release_rentals(booking_ids)
+
+
+@receiver(booking_status_changed, sender=Booking)
+def release_service_appointments(sender, booking_ids, new_status, **kwargs):
+    """Providers booked for a service booking that fell through are free again."""
+    from services.scheduling import release_appointments
+
+    if new_status in ['cancelled', 'refunded', 'no_show']:
+        release_appointments(booking_ids)
+
+
+@receiver(booking_status_changed, sender=Booking)
+def close_cancelled_packages(sender, booking_ids, new_status, **kwargs):
+    """A package whose components have all fallen through is cancelled too."""
+    from .packages import close_dead_packages
+
+    if new_status in ['cancelled', 'refunded', 'no_show']:
+        close_dead_packages(booking_ids)
+
+
+@receiver(booking_status_changed, sender=Booking)
+def give_back_promo_uses(sender, booking_ids, new_status, **kwargs):
+    """Cancelled bookings (including lapsed checkouts) give their promo code use back."""
+    from .pricing import release_promo_uses
+
+    if new_status == 'cancelled':
+        release_promo_uses(booking_ids)
+
+
+@receiver(post_init, sender=PricingRule)
+def remember_pricing_scope(sender, instance, **kwargs):
+    """Keep the loaded scope so moving a rule recompiles its old listings too."""
+    instance._pricing_scope = (instance.__dict__.get('content_type'), instance.__dict__.get('object_id'))
+
+
+@receiver(post_save, sender=PricingRule)
+@receiver(post_delete, sender=PricingRule)
+def invalidate_rule_pricing(sender, instance, **kwargs):
+    """Recompile pricing for the listings a rule covers, once the change commits."""
+    from .pricing import invalidate_pricing
+
+    scopes = {(instance.content_type, instance.object_id), instance._pricing_scope}
+
+    def invalidate():
+        for content_type, object_id in scopes:
+            invalidate_pricing(content_type or '', object_id)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender='resorts.SeasonalPricing')
+@receiver(post_delete, sender='resorts.SeasonalPricing')
+def invalidate_season_pricing(sender, instance, **kwargs):
+    """Resort seasons are compiled into the resort's pricing."""
+    from .pricing import invalidate_pricing
+
+    transaction.on_commit(lambda: invalidate_pricing('resort', instance.resort_id))
+
+
+@receiver(post_save, sender='resorts.Resort')
+@receiver(post_save, sender='homestays.Homestay')
+def invalidate_listing_pricing(sender, instance, **kwargs):
+    """Base prices are compiled too."""
+    from .pricing import invalidate_pricing
+
+    content_type = {'Resort': 'resort', 'Homestay': 'homestay'}[sender.__name__]
+    transaction.on_commit(lambda: invalidate_pricing(content_type, instance.pk))
@@ -0,0 +1,192 @@
+"""
+Booking status transitions for WayanTrails.
+
+Every booking status change goes through transition() (one booking) or
+bulk_transition() (a queryset). Both:
+
+* reject edges that aren't in TRANSITIONS
+* lock the booking rows (select_for_update) for the change
+* write BookingStatusHistory in the same transaction
+* send booking_status_changed once the transaction commits, so listeners
+  (emails, notifications) never see a change that was rolled back
+
+bulk_transition() moves bookings a chunk at a time with one UPDATE per
+chunk, e.g. marking every past confirmed stay completed.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Booking, BookingStatusHistory
+
+logger = logging.getLogger(__name__)
+
+# Allowed edges: current status -> statuses it may move to
+TRANSITIONS = {
+    'pending': {'confirmed', 'cancelled'},
+    'confirmed': {'completed', 'cancelled', 'no_show', 'refunded'},
+    'cancelled': {'refunded'},
+    'completed': {'refunded'},
+    'no_show': {'refunded'},
+    'refunded': set(),
+}
+
+# Sent after commit with booking_ids, new_status, changed_by and source
+booking_status_changed = Signal()
+
+
+class InvalidTransitionError(ValueError):
+    """Raised when a booking can't move from its current status to the requested one."""
+
+
+def can_transition(old_status, new_status):
+    return new_status in TRANSITIONS.get(old_status, set())
+
+
+def check_transition(old_status, new_status):
+    if not can_transition(old_status, new_status):
+        raise InvalidTransitionError(f"Cannot change booking status from '{old_status}' to '{new_status}'")
+
+
+def sources_for(new_status):
+    """Statuses that may move to `new_status`."""
+    return [status for status, targets in TRANSITIONS.items() if new_status in targets]
+
+
+def _status_fields(new_status, changed_by, reason, now):
+    """Bookkeeping fields that go with entering a status."""
+    fields = {}
+    if new_status == 'confirmed':
+        fields['confirmed_at'] = now
+        if changed_by:
+            fields['confirmed_by'] = changed_by
+    elif new_status == 'cancelled':
+        fields['cancelled_at'] = now
+        fields['cancellation_reason'] = reason
+        if changed_by:
+            fields['cancelled_by'] = changed_by
+    return fields
+
+
+def _announce(booking_ids, new_status, changed_by, source):
+    transaction.on_commit(lambda: booking_status_changed.send(
+        sender=Booking,
+        booking_ids=booking_ids,
+        new_status=new_status,
+        changed_by=changed_by,
+        source=source
+    ))
+
+
+def transition(booking, new_status, changed_by=None, reason='', source='', if_status=None, **fields):
+    """
+    Move one booking to `new_status` under a row lock.
+
+    Args:
+        booking: Booking instance or primary key
+        new_status: Target status
+        changed_by: User making the change (recorded in history)
+        reason: Free-text reason (history; cancellation_reason for cancels)
+        source: What made the change, e.g. 'admin', 'payment', 'guest'
+        if_status: Only transition from these statuses; otherwise a no-op
+        **fields: Extra booking fields to save with the change
+
+    Returns:
+        tuple: (locked and updated booking, whether the status changed)
+
+    Raises:
+        InvalidTransitionError: The edge isn't allowed
+    """
+    booking_id = booking.pk if isinstance(booking, Booking) else booking
+
+    with transaction.atomic():
+        locked = Booking.objects.select_for_update().get(pk=booking_id)
+        old_status = locked.status
+        if old_status == new_status or (if_status is not None and old_status not in if_status):
+            return locked, False
+        check_transition(old_status, new_status)
+
+        updates = {**_status_fields(new_status, changed_by, reason, timezone.now()), **fields}
+        locked.status = new_status
+        for field, value in updates.items():
+            setattr(locked, field, value)
+        locked.save(update_fields=['status', 'updated_at', *updates])
+
+        BookingStatusHistory.objects.create(
+            booking=locked,
+            old_status=old_status,
+            new_status=new_status,
+            changed_by=changed_by,
+            reason=reason,
+            source=source
+        )
+        _announce([locked.pk], new_status, changed_by, source)
+
+    return locked, True
+
+
+def bulk_transition(queryset, new_status, changed_by=None, reason='', source='', chunk_size=None, **fields):
+    """
+    Move every booking in `queryset` that may reach `new_status`.
+
+    Bookings in statuses without an edge to `new_status` are left alone.
+    Works in primary-key order, one transaction per chunk, so locks are
+    held for one chunk at a time. Safe to call inside an outer transaction.
+
+    Returns:
+        list: IDs of bookings that changed status
+    """
+    from .occupancy import invalidate_occupancy_for_bookings
+    from .reporting import refresh_rollups_for_bookings
+
+    chunk_size = chunk_size or settings.BOOKING_TRANSITION_CHUNK_SIZE
+    candidates = Booking.objects.filter(
+        pk__in=queryset.values('pk'), status__in=sources_for(new_status)
+    ).order_by('pk')
+
+    changed = []
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                candidates.filter(pk__gt=last_pk).select_for_update().values_list('pk', 'status')[:chunk_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            booking_ids = [pk for pk, _ in rows]
+
+            now = timezone.now()
+            Booking.objects.filter(pk__in=booking_ids).update(
+                status=new_status,
+                updated_at=now,
+                **_status_fields(new_status, changed_by, reason, now),
+                **fields
+            )
+            BookingStatusHistory.objects.bulk_create([
+                BookingStatusHistory(
+                    booking_id=pk,
+                    old_status=old_status,
+                    new_status=new_status,
+                    changed_by=changed_by,
+                    reason=reason,
+                    source=source
+                )
+                for pk, old_status in rows
+            ])
+
+            # queryset.update() skips model signals
+            refresh_rollups_for_bookings(booking_ids)
+            invalidate_occupancy_for_bookings(booking_ids)
+            _announce(booking_ids, new_status, changed_by, source)
+
+        changed.extend(booking_ids)
+        if len(rows) < chunk_size:
+            break
+
+    if changed:
+        logger.info(f"Moved {len(changed)} bookings to '{new_status}' ({source or 'unspecified'})")
+    return changed
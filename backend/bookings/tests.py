@@ -1,3 +1,1104 @@
-from django.test import TestCase
+import csv
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from rentals.models import RentalProvider, Vehicle
+from resorts.models import Resort
+
+from .batch import create_booking_batch
+from .bulk_refunds import BulkRefundEngine, RateLimiter, plan_bulk_refund
+from .gateway_router import GatewayRouter, build_payment_router
+from .gateway_transport import CircuitBreaker, GatewayMetrics, GatewayTransport, GatewayUnavailableError
+from .inventory import InventoryUnavailableError, convert_hold, place_hold, release_expired_holds, release_holds
+from .mock_payment_gateway import MockGatewayError, MockGatewayProfile, MockPaymentGateway, mock_payment_gateway
+from .lifecycle import CompleteStaysJob, ExpirePendingJob, NoShowJob
+from .models import (
+    Booking, BookingAvailability, BookingDailyRollup, BookingPackage, BookingStatusHistory,
+    CommissionLedgerEntry, InventoryHold, PartnerPayoutStatement, Payment, PaymentWebhookEvent, PromoCode
+)
+from .occupancy import occupancy_report
+from .packages import checkout_package
+from .payment_lookup import payment_lookup
+from .payment_orders import get_or_create_order
+from .pricing import PromoCodeError, quote_stay, reserve_promo_use
+from .reconciliation import PaymentReconciler
+from .reporting import booking_report, rebuild_daily_rollups
+from .settlement import commission_for, run_settlement
+from .state_machine import InvalidTransitionError, bulk_transition, transition
+from .webhooks import claim_webhook_events, drain_webhook_events
+
+
+def create_resort(**kwargs):
+    fields = dict(
+        name='Vythiri Retreat', slug='vythiri-retreat', description='Resort', short_description='Resort',
+        resort_type='eco', phone='+919876543210', total_rooms=10, price_range_min=Decimal('4000'),
+        price_range_max=Decimal('8000'), cancellation_policy='Flexible', cover_image='resorts/cover.jpg',
+        address_line_1='Vythiri', city='Wayanad', postal_code='673576'
+    )
+    fields.update(kwargs)
+    return Resort.objects.create(**fields)
+
+
+def create_booking(**kwargs):
+    fields = dict(
+        guest_name='Guest', guest_email='guest@example.com', guest_phone='+919876543210',
+        booking_type='resort', content_type='resort', object_id='1',
+        check_in_date=date(2030, 1, 1), check_out_date=date(2030, 1, 3), booking_date=date(2030, 1, 1),
+        adults=2, total_guests=2, base_amount=Decimal('1000'), total_amount=Decimal('1000')
+    )
+    fields.update(kwargs)
+    return Booking.objects.create(**fields)
+
+
+def create_vehicle(**kwargs):
+    provider = RentalProvider.objects.create(
+        name='Wayanad Wheels', slug='wayanad-wheels', contact_person='Owner', phone='+919876543210',
+        license_number='KL12-0001', address_line_1='Kalpetta', city='Kalpetta', postal_code='673121'
+    )
+    fields = dict(
+        provider=provider, name='Activa', slug='activa', vehicle_type='bike', brand='Honda', model='Activa',
+        year=2024, color='Red', fuel_type='petrol', transmission='automatic', seating_capacity=2,
+        registration_number='KL12A0001', insurance_valid_till=date(2031, 1, 1),
+        pollution_certificate_valid_till=date(2031, 1, 1), price_per_day=Decimal('500'),
+        price_per_hour=Decimal('100'), weekly_discount=Decimal('10'), security_deposit=Decimal('1000'),
+        cover_image='vehicles/covers/activa.jpg'
+    )
+    fields.update(kwargs)
+    return Vehicle.objects.create(**fields)
+
+
+class InventoryHoldTests(TestCase):
+    def setUp(self):
+        self.resort = create_resort()
+        self.listing = {'content_type': 'resort', 'object_id': str(self.resort.pk)}
+
+    def night(self, day):
+        return BookingAvailability.objects.get(date=day, **self.listing)
+
+    def test_overlapping_holds_are_each_released(self):
+        first = create_booking(**self.listing)
+        second = create_booking(**self.listing, check_in_date=date(2030, 1, 2), check_out_date=date(2030, 1, 4))
+        place_hold(first)
+        place_hold(second)
+        self.assertEqual(self.night(date(2030, 1, 2)).held_slots, 2)
+
+        release_holds([first.pk, second.pk])
+
+        for day in [date(2030, 1, 1), date(2030, 1, 2), date(2030, 1, 3)]:
+            self.assertEqual(self.night(day).held_slots, 0)
+
+    def test_expired_overlapping_holds_are_each_released(self):
+        bookings = [create_booking(**self.listing) for _ in range(3)]
+        for booking in bookings:
+            place_hold(booking)
+        InventoryHold.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(release_expired_holds(chunk_size=2), 3)
+        self.assertEqual(self.night(date(2030, 1, 1)).held_slots, 0)
+        self.assertEqual(InventoryHold.objects.filter(status='expired').count(), 3)
+
+    def test_hold_is_converted_then_released(self):
+        booking = create_booking(**self.listing)
+        hold = place_hold(booking)
+        self.assertEqual(place_hold(booking).pk, hold.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(booking, 'confirmed', source='test')
+        night = self.night(date(2030, 1, 1))
+        self.assertEqual((night.held_slots, night.booked_slots), (0, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(booking, 'cancelled', source='test')
+        night.refresh_from_db()
+        self.assertEqual((night.held_slots, night.booked_slots), (0, 0))
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, 'released')
+
+    def test_last_room_is_held_once(self):
+        BookingAvailability.objects.create(date=date(2030, 1, 2), available_slots=1, **self.listing)
+        place_hold(create_booking(**self.listing))
+
+        with self.assertRaises(InventoryUnavailableError):
+            place_hold(create_booking(**self.listing))
+        # The failed hold leaves no units behind on the nights that had room
+        self.assertEqual(self.night(date(2030, 1, 1)).held_slots, 1)
+        self.assertEqual(self.night(date(2030, 1, 2)).held_slots, 1)
+
+    def test_confirming_without_room_is_flagged_oversold(self):
+        BookingAvailability.objects.create(date=date(2030, 1, 1), available_slots=1, **self.listing)
+        place_hold(create_booking(**self.listing))
+
+        hold = convert_hold(create_booking(**self.listing))
+
+        self.assertTrue(hold.oversold)
+        self.assertEqual(self.night(date(2030, 1, 1)).booked_slots, 1)
+
+
+class MockReconciliationTests(TestCase):
+    def setUp(self):
+        mock_payment_gateway._payments.clear()
+        self.window = (timezone.now() - timedelta(hours=1), timezone.now() + timedelta(hours=1))
+
+    def test_unpaid_orders_are_left_pending(self):
+        booking = create_booking()
+        mock_payment_gateway.create_order(booking)
+
+        run = PaymentReconciler(mock_payment_gateway).run(*self.window)
+
+        self.assertEqual(run.payments_fixed, 0)
+        self.assertEqual(booking.payments.get().status, 'created')
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'pending')
+
+    def test_captured_payment_with_lost_webhook_is_fixed(self):
+        paid, unpaid = create_booking(), create_booking()
+        mock_payment_gateway.create_order(paid)
+        mock_payment_gateway.create_order(unpaid)
+        # Captured on the gateway, but the webhook never arrives
+        mock_payment_gateway.build_webhook(paid.payments.get())
+
+        run = PaymentReconciler(mock_payment_gateway).run(*self.window)
+
+        self.assertEqual(run.payments_fixed, 1)
+        self.assertEqual(paid.payments.get().status, 'completed')
+        self.assertEqual(unpaid.payments.get().status, 'created')
+
+    def test_recovered_package_payment_confirms_every_component(self):
+        resort = create_resort()
+        package = BookingPackage.objects.create(
+            package_number='WP-2030-0001', guest_name='Guest', guest_email='guest@example.com',
+            guest_phone='+919876543210', total_amount=Decimal('2000')
+        )
+        bookings = [
+            create_booking(content_type='resort', object_id=str(resort.pk), package=package) for _ in range(2)
+        ]
+        checkout_package(mock_payment_gateway, package)
+        mock_payment_gateway.build_webhook(package.payments.get())
+
+        run = PaymentReconciler(mock_payment_gateway).run(*self.window)
+
+        self.assertEqual(run.payments_fixed, 1)
+        package.refresh_from_db()
+        self.assertEqual(package.status, 'confirmed')
+        for booking in bookings:
+            booking.refresh_from_db()
+            self.assertEqual(booking.status, 'confirmed')
+        self.assertEqual(InventoryHold.objects.filter(status='converted').count(), 2)
+        self.assertEqual(
+            BookingAvailability.objects.get(object_id=str(resort.pk), date=date(2030, 1, 1)).booked_slots, 2
+        )
+
+
+class BookingCreateQueryTests(TestCase):
+    """Creating a booking costs the same number of queries however many items it has."""
+
+    def setUp(self):
+        self.resort = create_resort()
+        self.client = APIClient()
+        # Compile the resort's pricing up front, as a running server would have
+        quote_stay('resort', self.resort.pk, date(2030, 1, 1), date(2030, 1, 3))
+
+    def payload(self, booking_method, item_count):
+        return {
+            'guest_name': 'Guest', 'guest_email': 'guest@example.com', 'guest_phone': '+919876543210',
+            'booking_type': 'resort', 'booking_method': booking_method, 'content_type': 'resort',
+            'object_id': str(self.resort.pk), 'check_in_date': '2030-01-01', 'check_out_date': '2030-01-03',
+            'booking_date': '2030-01-01', 'adults': 2, 'total_guests': 2,
+            'base_amount': '8000', 'tax_amount': '0', 'discount_amount': '0', 'total_amount': '8000',
+            'items': [
+                {'item_name': f'Room {index}', 'quantity': 1, 'unit_price': '100', 'total_price': '100'}
+                for index in range(item_count)
+            ],
+        }
+
+    def assertCreateQueries(self, count, booking_method, item_count):
+        with self.assertNumQueries(count):
+            response = self.client.post('/api/bookings/bookings/', self.payload(booking_method, item_count), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        booking = Booking.objects.get(booking_number=response.data['booking_number'])
+        self.assertEqual(booking.items.count(), item_count)
+
+    def test_hybrid_booking(self):
+        self.assertCreateQueries(13, 'hybrid', 1)
+        self.assertCreateQueries(13, 'hybrid', 10)
+
+    def test_online_booking(self):
+        self.assertCreateQueries(16, 'online', 1)
+        self.assertCreateQueries(16, 'online', 10)
+
+
+class GatewayRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.primary = MockPaymentGateway(name='primary', code='razorpay')
+        self.backup = MockPaymentGateway(name='backup', code='stripe')
+        self.router = GatewayRouter()
+        for gateway in [self.primary, self.backup]:
+            gateway.transport.max_retries = 0
+            self.router.register(gateway)
+        # The backup is slower, so the primary wins while it is healthy
+        self.backup.transport.latency_ewma = 10.0
+
+    def test_orders_fall_over_when_the_gateway_is_down(self):
+        for _ in range(self.primary.transport.breaker.failure_threshold):
+            self.primary.transport.breaker.record_failure()
+        booking = create_booking()
+
+        self.router.create_order(booking)
+
+        self.assertEqual(booking.payments.get().payment_gateway, 'stripe')
+
+    def test_ambiguous_failures_are_not_retried_elsewhere(self):
+        booking = create_booking()
+
+        self.primary.configure(timeout_rate=1.0, timeout_seconds=0)
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.router.create_order(booking)
+
+        self.primary.configure(timeout_rate=0.0, failure_rate=1.0)
+        with self.assertRaises(MockGatewayError):
+            self.router.create_order(booking)
+
+        self.assertFalse(booking.payments.filter(payment_gateway='stripe').exists())
+
+    def test_payments_go_back_to_the_gateway_that_made_them(self):
+        live = type('LiveGateway', (), {'name': 'razorpay', 'code': 'razorpay'})()
+        router = GatewayRouter()
+        router.register(live)
+        router.register(mock_payment_gateway)
+        booking = create_booking()
+        mock_payment_gateway.create_order(booking)
+
+        self.assertIs(router.for_payment(booking.payments.get()), mock_payment_gateway)
+        live_payment = Payment(payment_gateway='razorpay', payment_id='PAY_LIVE', order_id='order_live')
+        self.assertIs(router.for_payment(live_payment), live)
+
+    @override_settings(USE_MOCK_PAYMENT=True, RAZORPAY_KEY_ID='rzp_test_key_here', PAYMENT_GATEWAYS=['mock'])
+    def test_mock_mode_registers_only_the_mock(self):
+        router = build_payment_router()
+
+        self.assertEqual([health['gateway'] for health in router.health()], ['mock'])
+        with self.assertRaises(ImproperlyConfigured):
+            build_payment_router(['paypal'])
+
+
+class PromoCodeUseTests(TestCase):
+    def setUp(self):
+        self.resort = create_resort()
+        self.promo = PromoCode.objects.create(code='MONSOON', discount_percent=Decimal('10'), max_uses=1)
+        self.client = APIClient()
+
+    def payload(self):
+        return {
+            'guest_name': 'Guest', 'guest_email': 'guest@example.com', 'guest_phone': '+919876543210',
+            'booking_type': 'resort', 'booking_method': 'hybrid', 'content_type': 'resort',
+            'object_id': str(self.resort.pk), 'check_in_date': '2030-01-01', 'check_out_date': '2030-01-03',
+            'booking_date': '2030-01-01', 'adults': 2, 'total_guests': 2,
+            'base_amount': '8000', 'total_amount': '8000', 'promo_code': 'monsoon',
+        }
+
+    def test_last_use_is_taken_by_one_pending_booking(self):
+        first = self.client.post('/api/bookings/bookings/', self.payload(), format='json')
+        second = self.client.post('/api/bookings/bookings/', self.payload(), format='json')
+
+        self.assertEqual(first.status_code, 201, first.data)
+        self.assertEqual(second.status_code, 400)
+        self.assertIn('promo_code', second.data)
+        self.promo.refresh_from_db()
+        self.assertEqual(self.promo.times_used, 1)
+
+    def test_cancelling_gives_the_use_back(self):
+        response = self.client.post('/api/bookings/bookings/', self.payload(), format='json')
+        booking = Booking.objects.get(booking_number=response.data['booking_number'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(booking, 'cancelled', source='test')
+
+        self.promo.refresh_from_db()
+        self.assertEqual(self.promo.times_used, 0)
+        reserve_promo_use('MONSOON')
+        with self.assertRaises(PromoCodeError):
+            reserve_promo_use('MONSOON')
+
+    def test_batch_takes_only_the_uses_left(self):
+        bookings, results = create_booking_batch([self.payload(), self.payload()], mode='per_item')
+
+        self.assertEqual([result['status'] for result in results], ['created', 'failed'])
+        self.assertEqual(len(bookings), 1)
+
+        bookings, results = create_booking_batch([self.payload()])
+        self.assertEqual(bookings, [])
+        self.promo.refresh_from_db()
+        self.assertEqual(self.promo.times_used, 1)
+
+
+class StayPriceTests(TestCase):
+    def setUp(self):
+        self.resort = create_resort()
+        self.client = APIClient()
+
+    def post(self, **kwargs):
+        payload = {
+            'guest_name': 'Guest', 'guest_email': 'guest@example.com', 'guest_phone': '+919876543210',
+            'booking_type': 'resort', 'booking_method': 'hybrid', 'content_type': 'resort',
+            'object_id': str(self.resort.pk), 'check_in_date': '2030-01-01', 'check_out_date': '2030-01-03',
+            'booking_date': '2030-01-01', 'adults': 2, 'total_guests': 2,
+            'base_amount': '8000', 'total_amount': '8000',
+        }
+        payload.update(kwargs)
+        return self.client.post('/api/bookings/bookings/', payload, format='json')
+
+    def test_amounts_must_match_the_quote(self):
+        response = self.post(base_amount='800', total_amount='800')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('base_amount', response.data)
+
+    def test_total_and_discount_are_worked_out_server_side(self):
+        response = self.post(tax_amount='960', discount_amount='7000', total_amount='1')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        booking = Booking.objects.get(booking_number=response.data['booking_number'])
+        self.assertEqual((booking.discount_amount, booking.total_amount), (Decimal('0'), Decimal('8960')))
+
+    def test_negative_tax_is_rejected(self):
+        response = self.post(tax_amount='-7999', total_amount='1')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tax_amount', response.data)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_rooms_by_room_type_cost_at_least_the_quote(self):
+        items = [{
+            'item_name': 'Pool Villa', 'quantity': 2, 'unit_price': '5000', 'total_price': '20000',
+            'item_data': {'room_type_id': 1},
+        }]
+
+        self.assertEqual(self.post(items=items, base_amount='15000').status_code, 400)
+        self.assertEqual(self.post(items=items, base_amount='20000').status_code, 201)
+
+
+class RentalPriceTests(TestCase):
+    def setUp(self):
+        self.vehicle = create_vehicle()
+        self.client = APIClient()
+
+    def post(self, **kwargs):
+        payload = {
+            'guest_name': 'Guest', 'guest_email': 'guest@example.com', 'guest_phone': '+919876543210',
+            'booking_type': 'rental', 'booking_method': 'hybrid', 'content_type': 'rental',
+            'object_id': str(self.vehicle.pk), 'booking_date': '2030-01-01', 'adults': 1, 'total_guests': 1,
+        }
+        payload.update(kwargs)
+        return self.client.post('/api/bookings/bookings/', payload, format='json')
+
+    def test_days_are_priced_like_the_vehicle_quote(self):
+        dates = {'check_in_date': '2030-01-01', 'check_out_date': '2030-01-04'}
+
+        self.assertEqual(self.post(**dates, base_amount='500', total_amount='500').status_code, 400)
+        self.assertEqual(self.post(**dates, base_amount='1500', total_amount='1500').status_code, 201)
+        # A week earns the vehicle's weekly discount
+        week = {'check_in_date': '2030-01-01', 'check_out_date': '2030-01-08'}
+        self.assertEqual(self.post(**week, base_amount='3150', total_amount='3150').status_code, 201)
+
+    def test_hourly_rental(self):
+        response = self.post(
+            start_at='2030-01-01T09:00:00+05:30', end_at='2030-01-01T12:00:00+05:30',
+            base_amount='300', total_amount='300'
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        booking = Booking.objects.get(booking_number=response.data['booking_number'])
+        self.assertEqual((booking.booking_date, str(booking.booking_time)), (date(2030, 1, 1), '09:00:00'))
+        self.assertEqual(booking.total_amount, Decimal('300'))
+
+
+class WebhookDeliveryTests(TestCase):
+    def setUp(self):
+        self.booking = create_booking()
+        mock_payment_gateway.create_order(self.booking)
+        self.payment = self.booking.payments.get()
+        self.client = APIClient()
+
+    def deliver(self, body, event_id):
+        return self.client.post(
+            '/api/bookings/payments/webhook/', data=body, content_type='application/json',
+            HTTP_X_RAZORPAY_EVENT_ID=event_id
+        )
+
+    def test_duplicate_delivery_is_processed_once(self):
+        body, _ = mock_payment_gateway.build_webhook(self.payment)
+
+        first = self.deliver(body, 'evt_captured')
+        second = self.deliver(body, 'evt_captured')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse(first.data['duplicate'])
+        self.assertTrue(second.data['duplicate'])
+        self.assertEqual(PaymentWebhookEvent.objects.count(), 1)
+
+        self.assertEqual(drain_webhook_events(), {'processed': 1})
+        self.assertEqual(drain_webhook_events(), {})
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'completed')
+        self.assertEqual(
+            BookingStatusHistory.objects.filter(booking=self.booking, new_status='confirmed').count(), 1
+        )
+
+    def test_same_capture_under_two_event_ids_confirms_once(self):
+        body, _ = mock_payment_gateway.build_webhook(self.payment)
+        self.deliver(body, 'evt_first')
+        self.deliver(body, 'evt_retry')
+
+        self.assertEqual(drain_webhook_events(), {'processed': 2})
+        self.assertEqual(
+            BookingStatusHistory.objects.filter(booking=self.booking, new_status='confirmed').count(), 1
+        )
+
+
+class WebhookWorkerTests(TestCase):
+    def setUp(self):
+        self.booking = create_booking()
+        mock_payment_gateway.create_order(self.booking)
+        self.payment = self.booking.payments.get()
+        self.client = APIClient()
+
+    def test_webhook_is_acknowledged_before_processing(self):
+        body, _ = mock_payment_gateway.build_webhook(self.payment)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                '/api/bookings/payments/webhook/', data=body, content_type='application/json',
+                HTTP_X_RAZORPAY_EVENT_ID='evt_queued'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(PaymentWebhookEvent.objects.get().status, 'received')
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'created')
+
+    def test_claimed_events_are_not_claimed_again(self):
+        body, _ = mock_payment_gateway.build_webhook(self.payment)
+        self.client.post(
+            '/api/bookings/payments/webhook/', data=body, content_type='application/json',
+            HTTP_X_RAZORPAY_EVENT_ID='evt_claimed'
+        )
+
+        claimed = claim_webhook_events()
+
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(claim_webhook_events(), [])
+        # A worker that died mid-batch loses its claim after the timeout
+        PaymentWebhookEvent.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(claim_webhook_events(), claimed)
+
+
+class BookingTransitionTests(TestCase):
+    def test_illegal_transitions_are_rejected(self):
+        booking = create_booking()
+
+        for status in ['completed', 'no_show', 'refunded']:
+            with self.assertRaises(InvalidTransitionError):
+                transition(booking, status)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(booking, 'cancelled', source='test')
+        with self.assertRaises(InvalidTransitionError):
+            transition(booking, 'confirmed')
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'cancelled')
+
+    def test_guarded_transition_skips_bookings_that_moved_on(self):
+        booking = create_booking(status='confirmed')
+
+        booking, changed = transition(booking, 'cancelled', if_status=['pending'])
+
+        self.assertFalse(changed)
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertFalse(BookingStatusHistory.objects.exists())
+
+    def test_bulk_transition_moves_only_legal_bookings(self):
+        confirmed = [create_booking(status='confirmed') for _ in range(3)]
+        create_booking(status='pending')
+        create_booking(status='cancelled')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            changed = bulk_transition(Booking.objects.all(), 'completed', source='test', chunk_size=2)
+
+        self.assertEqual(sorted(changed), sorted(booking.pk for booking in confirmed))
+        self.assertEqual(Booking.objects.filter(status='completed').count(), 3)
+        self.assertEqual(BookingStatusHistory.objects.filter(new_status='completed').count(), 3)
+
+
+class BookingBatchTests(TestCase):
+    def setUp(self):
+        self.resort = create_resort()
+        BookingAvailability.objects.create(
+            content_type='resort', object_id=str(self.resort.pk), date=date(2030, 1, 2), available_slots=2
+        )
+
+    def entry(self, **kwargs):
+        fields = {
+            'guest_name': 'Guest', 'guest_email': 'guest@example.com', 'guest_phone': '+919876543210',
+            'booking_type': 'resort', 'booking_method': 'hybrid', 'content_type': 'resort',
+            'object_id': str(self.resort.pk), 'check_in_date': '2030-01-01', 'check_out_date': '2030-01-03',
+            'booking_date': '2030-01-01', 'adults': 2, 'total_guests': 2,
+            'base_amount': '8000', 'total_amount': '8000',
+        }
+        fields.update(kwargs)
+        return fields
+
+    def test_all_or_nothing_creates_nothing_when_rooms_run_out(self):
+        bookings, results = create_booking_batch([self.entry() for _ in range(3)])
+
+        self.assertEqual(bookings, [])
+        self.assertEqual([result['status'] for result in results], ['skipped', 'skipped', 'failed'])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_per_item_creates_the_bookings_that_fit(self):
+        bookings, results = create_booking_batch(
+            [self.entry(), self.entry(guest_email='not-an-email'), self.entry(), self.entry()], mode='per_item'
+        )
+
+        self.assertEqual(len(bookings), 2)
+        self.assertEqual([result['status'] for result in results], ['created', 'failed', 'created', 'failed'])
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(len(set(Booking.objects.values_list('booking_number', flat=True))), 2)
+
+
+class PaymentLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.booking = create_booking()
+        mock_payment_gateway.create_order(self.booking)
+        self.payment = self.booking.payments.get()
+
+    def test_new_orders_are_found_by_primary_key(self):
+        with self.assertNumQueries(1) as queries:
+            self.assertEqual(payment_lookup.get_by_order_id(self.payment.order_id), self.payment)
+        self.assertIn('"id" =', queries.captured_queries[0]['sql'])
+
+    def test_stale_cache_entry_never_returns_another_payment(self):
+        other = create_booking()
+        mock_payment_gateway.create_order(other)
+        cache.set(payment_lookup._cache_key(self.payment.order_id), other.payments.get().pk)
+
+        self.assertEqual(payment_lookup.get_by_order_id(self.payment.order_id), self.payment)
+
+        payment_lookup.forget_order(self.payment.order_id)
+        self.assertEqual(payment_lookup.get_by_order_id(self.payment.order_id), self.payment)
+        self.assertIsNone(payment_lookup.get_by_order_id('order_unknown'))
+
+    def test_lookup_by_gateway_payment_and_link_ids(self):
+        Payment.objects.filter(pk=self.payment.pk).update(gateway_payment_id='pay_123', payment_link_id='plink_123')
+
+        self.assertEqual(payment_lookup.get_by_gateway_payment_id('pay_123'), self.payment)
+        self.assertEqual(payment_lookup.get_by_payment_link_id('plink_123'), self.payment)
+        self.assertIsNone(payment_lookup.get_by_gateway_payment_id(''))
+
+
+class PaymentOrderReuseTests(TestCase):
+    def setUp(self):
+        self.booking = create_booking()
+
+    def test_open_order_is_reused(self):
+        first, created = get_or_create_order(mock_payment_gateway, self.booking)
+        self.assertTrue(created)
+
+        second, created = get_or_create_order(mock_payment_gateway, self.booking)
+
+        self.assertFalse(created)
+        self.assertEqual(second['order_id'], first['order_id'])
+        self.assertEqual(self.booking.payments.count(), 1)
+
+    def test_orders_near_expiry_or_for_another_amount_are_replaced(self):
+        first, _ = get_or_create_order(mock_payment_gateway, self.booking)
+        Payment.objects.update(expires_at=timezone.now() + timedelta(minutes=5))
+
+        second, created = get_or_create_order(mock_payment_gateway, self.booking)
+        self.assertTrue(created)
+        self.assertNotEqual(second['order_id'], first['order_id'])
+
+        Booking.objects.filter(pk=self.booking.pk).update(total_amount=Decimal('1200'))
+        third, created = get_or_create_order(mock_payment_gateway, self.booking)
+        self.assertTrue(created)
+        self.assertEqual(third['amount'], Decimal('1200'))
+        self.assertEqual(self.booking.payments.count(), 3)
+
+    def test_paid_orders_are_not_reused(self):
+        first, _ = get_or_create_order(mock_payment_gateway, self.booking)
+        Payment.objects.update(status='completed')
+
+        second, created = get_or_create_order(mock_payment_gateway, self.booking)
+
+        self.assertTrue(created)
+        self.assertNotEqual(second['order_id'], first['order_id'])
+
+
+class GatewayTransportTests(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('bookings.gateway_transport.time')
+        clock = patcher.start()
+        clock.monotonic.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+
+        self.breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=30)
+        self.transport = GatewayTransport(
+            'test', breaker=self.breaker, metrics=GatewayMetrics(), max_retries=2, backoff=0
+        )
+
+    def test_breaker_opens_probes_and_closes(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow())
+
+        # One probe after the reset timeout; a failed probe re-opens at once
+        self.now += 30
+        self.assertEqual(self.breaker.state, 'half_open')
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+
+        self.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertTrue(self.breaker.allow())
+
+    def test_open_circuit_fails_fast(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        func = mock.Mock()
+
+        with self.assertRaises(GatewayUnavailableError):
+            self.transport.call('order.create', func)
+        func.assert_not_called()
+
+    def test_calls_that_may_have_been_sent_are_not_retried(self):
+        self.breaker.failure_threshold = 5
+        func = mock.Mock(side_effect=requests.exceptions.ReadTimeout('read timed out'))
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.transport.call('order.create', func)
+        self.assertEqual(func.call_count, 1)
+
+        # Reads are idempotent, so they are retried whatever the failure
+        func.reset_mock()
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.transport.call('payment.fetch', func, idempotent=True)
+        self.assertEqual(func.call_count, 3)
+
+    def test_calls_that_never_left_are_retried(self):
+        func = mock.Mock(side_effect=[requests.exceptions.ConnectTimeout('connect timed out'), {'id': 'order_1'}])
+
+        self.assertEqual(self.transport.call('order.create', func), {'id': 'order_1'})
+        self.assertEqual(func.call_count, 2)
+        self.assertEqual(self.breaker.state, 'closed')
+
+
+class MockGatewayProfileTests(TestCase):
+    def test_seeded_faults_repeat_at_the_configured_rate(self):
+        first, second = MockGatewayProfile(seed=7), MockGatewayProfile(seed=7)
+        draws = [[profile.chance(0.2) for _ in range(2000)] for profile in [first, second]]
+
+        self.assertEqual(draws[0], draws[1])
+        self.assertAlmostEqual(sum(draws[0]) / 2000, 0.2, delta=0.03)
+        self.assertFalse(any(first.chance(0.0) for _ in range(100)))
+
+    def test_latency_distributions(self):
+        self.assertEqual(MockGatewayProfile(latency_ms=200).sample_latency(), 0.2)
+
+        uniform = MockGatewayProfile(latency_distribution='uniform', latency_ms=200, seed=1)
+        samples = [uniform.sample_latency() for _ in range(1000)]
+        self.assertTrue(all(0 <= sample <= 0.4 for sample in samples))
+        self.assertAlmostEqual(sum(samples) / len(samples), 0.2, delta=0.02)
+
+        lognormal = MockGatewayProfile(latency_distribution='lognormal', latency_ms=200, seed=1)
+        samples = sorted(lognormal.sample_latency() for _ in range(1001))
+        self.assertAlmostEqual(samples[500], 0.2, delta=0.02)
+
+        with self.assertRaises(ValueError):
+            MockGatewayProfile(latency_distribution='pareto')
+        with self.assertRaises(ValueError):
+            MockGatewayProfile(jitter=1)
+
+    def test_gateway_calls_fail_and_time_out_as_configured(self):
+        gateway = MockPaymentGateway(name='load')
+        gateway.transport.max_retries = 0
+        gateway.transport.breaker.failure_threshold = 100
+        booking = create_booking()
+
+        gateway.configure(failure_rate=1.0)
+        with self.assertRaises(MockGatewayError):
+            gateway.create_order(booking)
+
+        gateway.configure(failure_rate=0.0, timeout_rate=1.0, timeout_seconds=0)
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            gateway.create_order(booking)
+        self.assertFalse(booking.payments.exists())
+
+        gateway.configure(timeout_rate=0.0, authorized_rate=1.0)
+        self.assertEqual(gateway.fetch_payment('pay_1')['status'], 'authorized')
+
+
+class BulkRefundTests(TestCase):
+    def setUp(self):
+        self.gateway = MockPaymentGateway(name='refunds')
+        router = GatewayRouter()
+        router.register(self.gateway)
+        self.engine = BulkRefundEngine(router=router, concurrency=2, rate_per_second=1000, batch_size=2)
+
+        for index in range(3):
+            booking = create_booking(status='confirmed')
+            self.gateway.create_order(booking)
+            booking.payments.update(status='completed', gateway_payment_id=f'pay_bulk_{index}')
+        self.job = plan_bulk_refund(Booking.objects.all(), 'Monsoon closure', notify_guests=False)
+
+    def gateway_refunds(self):
+        return {payment_id: len(refunds) for payment_id, refunds in self.gateway._refunds.items()}
+
+    def test_every_payment_is_refunded_once(self):
+        self.assertEqual(self.job.total_items, 3)
+        self.assertEqual(Booking.objects.filter(status='cancelled').count(), 3)
+
+        self.engine.run(self.job)
+        self.engine.run(self.job)
+
+        self.assertEqual((self.job.status, self.job.refunded_items), ('completed', 3))
+        self.assertEqual(self.job.refunded_total, Decimal('3000.00'))
+        self.assertEqual(self.gateway_refunds(), {f'pay_bulk_{index}': 1 for index in range(3)})
+        self.assertEqual(Payment.objects.filter(status='refunded', refund_amount=Decimal('1000')).count(), 3)
+        self.assertEqual(Booking.objects.filter(status='refunded').count(), 3)
+
+    def test_crashed_run_resumes_without_refunding_twice(self):
+        # A run claimed a batch and reached the gateway for one item before dying
+        sent, unsent = self.engine._claim(self.job)
+        self.gateway.submit_refund(
+            sent.payment.gateway_payment_id, 100000, notes={'bulk_refund_item': str(sent.pk)}
+        )
+        self.job.items.filter(status='submitting').update(claimed_at=timezone.now() - timedelta(hours=1))
+
+        self.engine.run(self.job)
+
+        self.assertEqual((self.job.status, self.job.refunded_items), ('completed', 3))
+        self.assertEqual(self.gateway_refunds(), {f'pay_bulk_{index}': 1 for index in range(3)})
+        sent.refresh_from_db()
+        self.assertEqual(sent.attempts, 1)
+
+    def test_open_circuit_pauses_the_job(self):
+        for _ in range(self.gateway.transport.breaker.failure_threshold):
+            self.gateway.transport.breaker.record_failure()
+
+        self.engine.run(self.job)
+
+        self.assertEqual(self.job.status, 'failed')
+        self.assertEqual(self.job.items.filter(status='pending', attempts=0).count(), 3)
+
+        self.gateway.transport.breaker.record_success()
+        self.engine.run(self.job)
+        self.assertEqual((self.job.status, self.job.refunded_items), ('completed', 3))
+
+    def test_rate_limiter_spaces_calls(self):
+        with mock.patch('bookings.bulk_refunds.time') as clock:
+            clock.monotonic.return_value = 100.0
+            limiter = RateLimiter(5)
+            for _ in range(3):
+                limiter.acquire()
+
+            # A caller that comes back after its slot doesn't wait
+            clock.monotonic.return_value = 101.0
+            limiter.acquire()
+
+        self.assertEqual([round(call.args[0], 6) for call in clock.sleep.call_args_list], [0.2, 0.4])
+
+
+class BookingReportTests(TestCase):
+    def rollups(self):
+        return sorted(BookingDailyRollup.objects.values_list(
+            'date', 'booking_type', 'status', 'object_id', 'booking_count', 'total_amount'
+        ))
+
+    def test_rollups_follow_status_changes_and_match_a_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = create_booking()
+            create_booking(booking_date=date(2030, 1, 2), total_amount=Decimal('2500'))
+            create_booking(booking_type='rental', content_type='rental', total_amount=Decimal('500'))
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(first, 'confirmed', source='test')
+
+        report = booking_report(date(2030, 1, 1), date(2030, 1, 31))
+        self.assertEqual(report['totals']['booking_count'], 3)
+        self.assertEqual(report['totals']['total_amount'], Decimal('4000'))
+        self.assertEqual(report['revenue']['booking_count'], 1)
+        self.assertEqual(report['revenue']['total_amount'], Decimal('1000'))
+        self.assertEqual(
+            [(row['status'], row['booking_count']) for row in report['by_status']], [('confirmed', 1), ('pending', 2)]
+        )
+        self.assertEqual([row['booking_count'] for row in report['series']], [2, 1])
+        monthly = booking_report(date(2030, 1, 1), date(2030, 12, 31), booking_type='resort', group_by='month')
+        self.assertEqual([row['booking_count'] for row in monthly['series']], [2])
+
+        incremental = self.rollups()
+        BookingDailyRollup.objects.all().delete()
+        self.assertEqual(rebuild_daily_rollups(chunk_days=1), len(incremental))
+        self.assertEqual(self.rollups(), incremental)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        staff = get_user_model().objects.create_user(
+            username='staff', password='secret', phone='+919876543299', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+        self.bookings = [
+            create_booking(status='confirmed'),
+            create_booking(booking_date=date(2030, 2, 1), booking_type='homestay', content_type='homestay'),
+            create_booking(booking_date=date(2030, 3, 1), status='confirmed'),
+        ]
+
+    def download(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_bookings_csv_with_filters(self):
+        rows = list(csv.reader(self.download(
+            '/api/bookings/bookings/export/?start_date=2030-01-01&end_date=2030-02-28&status=confirmed'
+        ).splitlines()))
+
+        self.assertEqual(rows[0][:3], ['booking_number', 'booking_id', 'created_at'])
+        self.assertEqual([row[0] for row in rows[1:]], [self.bookings[0].booking_number])
+        record = dict(zip(rows[0], rows[1]))
+        self.assertEqual((record['status'], record['total_amount']), ('confirmed', '1000.00'))
+
+        rows = list(csv.reader(self.download('/api/bookings/bookings/export/?type=homestay').splitlines()))
+        self.assertEqual([row[0] for row in rows[1:]], [self.bookings[1].booking_number])
+
+    def test_payments_ndjson(self):
+        mock_payment_gateway.create_order(self.bookings[0])
+        mock_payment_gateway.create_order(self.bookings[2])
+        Payment.objects.filter(booking=self.bookings[2]).update(status='completed')
+
+        lines = self.download('/api/bookings/payments/export/?status=completed&output=ndjson').splitlines()
+
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record['booking_number'], self.bookings[2].booking_number)
+        self.assertEqual((record['status'], record['amount']), ('completed', '1000.00'))
+
+
+class OccupancyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.resort = create_resort()
+        self.listing = {'content_type': 'resort', 'object_id': str(self.resort.pk), 'status': 'confirmed'}
+        create_booking(
+            **self.listing, check_in_date=date(2030, 1, 30), check_out_date=date(2030, 2, 2),
+            base_amount=Decimal('3000')
+        )
+        self.second = create_booking(
+            **self.listing, check_in_date=date(2030, 2, 1), check_out_date=date(2030, 2, 3),
+            base_amount=Decimal('2000')
+        )
+        create_booking(
+            **{**self.listing, 'status': 'pending'}, check_in_date=date(2030, 1, 30), check_out_date=date(2030, 2, 3)
+        )
+
+    def report(self, group_by):
+        return occupancy_report('resort', self.resort.pk, date(2030, 1, 29), date(2030, 2, 3), group_by=group_by)
+
+    def test_stays_across_a_month_boundary(self):
+        daily = self.report('day')
+        self.assertEqual([night['rooms_sold'] for night in daily['series']], [0, 1, 1, 2, 1, 0])
+        self.assertEqual(daily['series'][3]['room_revenue'], Decimal('2000.00'))
+
+        monthly = self.report('month')
+        self.assertEqual(
+            [(month['period'], month['rooms_sold'], month['rooms_available'], month['room_revenue'])
+             for month in monthly['series']],
+            [(date(2030, 1, 1), 2, 30, Decimal('2000.00')), (date(2030, 2, 1), 3, 30, Decimal('3000.00'))]
+        )
+        totals = monthly['totals']
+        self.assertEqual(
+            (totals['rooms_sold'], totals['adr'], totals['revpar']), (5, Decimal('1000.00'), Decimal('83.33'))
+        )
+        self.assertEqual(totals['occupancy'], 0.0833)
+
+    def test_cancelled_stay_leaves_the_cached_months(self):
+        self.report('day')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition(self.second, 'cancelled', source='test')
+
+        self.assertEqual([night['rooms_sold'] for night in self.report('day')['series']], [0, 1, 1, 1, 0, 0])
+
+
+class SettlementTests(TestCase):
+    def setUp(self):
+        self.resort = create_resort(commission_rate=Decimal('12.50'))
+        self.vehicle = create_vehicle()
+        RentalProvider.objects.update(commission_rate=Decimal('7.50'))
+
+        def completed(content_type, object_id, amount, **kwargs):
+            return create_booking(
+                status='completed', booking_type=content_type, content_type=content_type, object_id=str(object_id),
+                base_amount=amount, total_amount=amount, **kwargs
+            )
+
+        self.stays = [
+            completed('resort', self.resort.pk, Decimal('1000.04')),
+            completed('resort', self.resort.pk, Decimal('2000.00'), discount_amount=Decimal('100.00')),
+        ]
+        self.rental = completed('rental', self.vehicle.pk, Decimal('500.00'))
+        self.service = completed('service', 99, Decimal('300.00'))
+        # Not settled: still pending, or after the cutoff
+        create_booking(content_type='resort', object_id=str(self.resort.pk))
+        completed('resort', self.resort.pk, Decimal('700.00'), booking_date=date(2030, 2, 1))
+
+    def test_rates_per_partner_type_and_rounding(self):
+        batch = run_settlement(date(2030, 1, 31))
+
+        self.assertEqual(batch.status, 'completed', batch.last_error)
+        entries = {entry.booking_id: entry for entry in CommissionLedgerEntry.objects.all()}
+        self.assertEqual(len(entries), 4)
+
+        # 12.5% of 1000.04 is 125.005: half-up to the paisa, as commission_for does
+        first = entries[self.stays[0].pk]
+        self.assertEqual((first.partner_type, first.partner_id), ('resort', self.resort.pk))
+        self.assertEqual((first.commission_rate, first.commission_amount), (Decimal('12.50'), Decimal('125.01')))
+        self.assertEqual(first.commission_amount, commission_for(Decimal('1000.04'), Decimal('12.50')))
+        self.assertEqual(first.payout_amount, Decimal('875.03'))
+
+        # Commission is on the amount after discount
+        second = entries[self.stays[1].pk]
+        self.assertEqual((second.gross_amount, second.commission_amount), (Decimal('1900.00'), Decimal('237.50')))
+
+        rental = entries[self.rental.pk]
+        self.assertEqual((rental.partner_type, rental.partner_id), ('rental_provider', self.vehicle.provider_id))
+        self.assertEqual((rental.commission_rate, rental.commission_amount), (Decimal('7.50'), Decimal('37.50')))
+
+        service = entries[self.service.pk]
+        self.assertEqual((service.commission_rate, service.commission_amount), (Decimal('10.00'), Decimal('30.00')))
+
+        statement = PartnerPayoutStatement.objects.get(partner_type='resort')
+        self.assertEqual((statement.booking_count, statement.commission_amount), (2, Decimal('362.51')))
+        self.assertEqual(statement.ledger_entries.count(), 2)
+        self.assertEqual((batch.statement_count, batch.booking_count), (3, 4))
+
+    def test_second_run_settles_nothing(self):
+        run_settlement(date(2030, 1, 31))
+
+        batch = run_settlement(date(2030, 1, 31))
+
+        self.assertEqual((batch.status, batch.booking_count, batch.statement_count), ('completed', 0, 0))
+        self.assertEqual(CommissionLedgerEntry.objects.count(), 4)
+
+    def test_failed_batch_leaves_no_ledger_rows(self):
+        with mock.patch('bookings.settlement._link_statements', side_effect=RuntimeError('link failed')):
+            batch = run_settlement(date(2030, 1, 31))
+
+        self.assertEqual((batch.status, batch.last_error), ('failed', 'link failed'))
+        self.assertFalse(CommissionLedgerEntry.objects.exists())
+        self.assertFalse(PartnerPayoutStatement.objects.exists())
+
+        self.assertEqual(run_settlement(date(2030, 1, 31)).booking_count, 4)
+
+
+class LifecycleJobTests(TestCase):
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2030, 1, 10, 12, 0))
+
+    def candidate_ids(self, job):
+        return set(job(now=self.now).candidates().values_list('pk', flat=True))
+
+    def test_expire_skips_paid_bookings_and_open_orders(self):
+        stale = create_booking()
+        paid = create_booking()
+        mock_payment_gateway.create_order(paid)
+        paid.payments.update(status='completed')
+        open_order = create_booking()
+        mock_payment_gateway.create_order(open_order)
+        open_order.payments.update(expires_at=self.now + timedelta(hours=1))
+        lapsed_order = create_booking()
+        mock_payment_gateway.create_order(lapsed_order)
+        create_booking(status='confirmed')
+
+        self.assertEqual(self.candidate_ids(ExpirePendingJob), {stale.pk, lapsed_order.pk})
+
+    def test_expire_skips_every_component_of_an_open_package_order(self):
+        resort = create_resort()
+        package = BookingPackage.objects.create(
+            package_number='WP-2030-0001', guest_name='Guest', guest_email='guest@example.com',
+            guest_phone='+919876543210', total_amount=Decimal('2000')
+        )
+        for _ in range(2):
+            create_booking(content_type='resort', object_id=str(resort.pk), package=package)
+        checkout_package(mock_payment_gateway, package)
+        package.payments.update(expires_at=self.now + timedelta(hours=1))
+
+        self.assertEqual(self.candidate_ids(ExpirePendingJob), set())
+
+        package.payments.update(expires_at=self.now - timedelta(hours=1))
+        self.assertEqual(len(self.candidate_ids(ExpirePendingJob)), 2)
+
+    def test_expire_run_cancels_bookings_and_lapsed_orders(self):
+        booking = create_booking()
+        mock_payment_gateway.create_order(booking)
+
+        run = ExpirePendingJob(now=self.now).run()
+
+        self.assertEqual((run.status, run.bookings_matched, run.bookings_changed), ('completed', 1, 1))
+        self.assertEqual(run.payments_expired, 1)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'cancelled')
+        self.assertEqual(booking.payments.get().status, 'cancelled')
+
+    def test_no_show_needs_an_unpaid_online_booking_past_the_grace_days(self):
+        no_show = create_booking(
+            status='confirmed', booking_method='online',
+            check_in_date=date(2030, 1, 8), check_out_date=date(2030, 1, 12)
+        )
+        # Started yesterday: still inside NO_SHOW_GRACE_DAYS
+        create_booking(
+            status='confirmed', booking_method='online',
+            check_in_date=date(2030, 1, 9), check_out_date=date(2030, 1, 12)
+        )
+        create_booking(
+            status='confirmed', booking_method='hybrid',
+            check_in_date=date(2030, 1, 8), check_out_date=date(2030, 1, 12)
+        )
+        paid = create_booking(
+            status='confirmed', booking_method='online',
+            check_in_date=date(2030, 1, 8), check_out_date=date(2030, 1, 12)
+        )
+        mock_payment_gateway.create_order(paid)
+        paid.payments.update(status='captured')
+
+        self.assertEqual(self.candidate_ids(NoShowJob), {no_show.pk})
+
+    def test_complete_uses_check_out_or_booking_date(self):
+        stay = create_booking(status='confirmed', check_out_date=date(2030, 1, 9))
+        activity = create_booking(
+            status='confirmed', booking_type='activity', check_in_date=None, check_out_date=None,
+            booking_date=date(2030, 1, 9)
+        )
+        create_booking(status='confirmed', check_out_date=date(2030, 1, 10))
+        create_booking(status='pending', check_out_date=date(2030, 1, 9))
+
+        self.assertEqual(self.candidate_ids(CompleteStaysJob), {stay.pk, activity.pk})
@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import BookingViewSet
+from .package_views import BookingPackageViewSet
+from .pricing_views import PricingViewSet
 from .payment_views import (
     PaymentViewSet,
     create_payment_order,
@@ -9,20 +11,24 @@ from .payment_views import (
     create_refund,
     get_payment_methods,
     get_payment_status,
+    get_gateway_metrics,
 )
 
 router = DefaultRouter()
 router.register(r'bookings', BookingViewSet, basename='booking')
 router.register(r'payments', PaymentViewSet, basename='payment')
+router.register(r'packages', BookingPackageViewSet, basename='booking-package')
+router.register(r'pricing', PricingViewSet, basename='pricing')
 
 urlpatterns = [
-    path('', include(router.urls)),
-
-    # Payment endpoints
+    # Payment endpoints (before the router so `payments/<pk>/` doesn't shadow them)
     path('payments/create-order/', create_payment_order, name='payment-create-order'),
     path('payments/verify/', verify_payment, name='payment-verify'),
     path('payments/webhook/', payment_webhook, name='payment-webhook'),
     path('payments/refund/', create_refund, name='payment-refund'),
     path('payments/methods/', get_payment_methods, name='payment-methods'),
     path('payments/status/<str:booking_number>/', get_payment_status, name='payment-status'),
+    path('payments/gateway-metrics/', get_gateway_metrics, name='payment-gateway-metrics'),
+
+    path('', include(router.urls)),
 ]
\ No newline at end of file
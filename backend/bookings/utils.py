@@ -237,18 +237,20 @@ def calculate_booking_price(base_amount, tax_rate=0.12, discount_amount=0):
     }
 
 
-def calculate_commission(total_amount, commission_rate=0.10):
+def calculate_commission(total_amount, commission_rate=None):
     """
     Calculate commission amount for partners.
 
     Args:
-        total_amount: Total booking amount
-        commission_rate: Commission rate as decimal (default 0.10 for 10%)
+        total_amount: Commissionable amount (base less discount)
+        commission_rate: Commission rate as decimal, e.g. 0.10 for 10%
+            (default: settings.DEFAULT_COMMISSION_RATE)
 
     Returns:
-        Decimal: Commission amount
+        Decimal: Commission amount, rounded half-up to the paisa
     """
-    total_amount = Decimal(str(total_amount))
-    commission_rate = Decimal(str(commission_rate))
+    from .settlement import commission_for
 
-    return total_amount * commission_rate
+    if commission_rate is None:
+        return commission_for(total_amount, settings.DEFAULT_COMMISSION_RATE)
+    return commission_for(total_amount, Decimal(str(commission_rate)) * 100)
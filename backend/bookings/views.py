@@ -5,6 +5,8 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.db.models import Q, Count, Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -18,8 +20,10 @@ from .serializers import (
     BookingListSerializer, BookingDetailSerializer, BookingCreateSerializer,
     BookingUpdateSerializer, AvailabilityCheckSerializer,
     BookingAvailabilitySerializer, WhatsAppMessageSerializer,
-    BookingReportSerializer
+    BookingReportSerializer, ExportSerializer, OccupancySerializer,
+    BookingBatchSerializer
 )
+from .state_machine import transition
 
 
 class BookingViewSet(viewsets.ModelViewSet):
@@ -61,24 +65,24 @@ class BookingViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        booking = serializer.save()
+        with transaction.atomic():
+            booking = serializer.save()
 
-        # Send WhatsApp message for hybrid bookings
-        if booking.booking_method == 'hybrid':
-            self._send_whatsapp_inquiry(booking)
+            # Send WhatsApp message for hybrid bookings
+            if booking.booking_method == 'hybrid':
+                self._send_whatsapp_inquiry(booking)
+
+            # For online bookings, mark as confirmed (in real implementation, after payment)
+            elif booking.booking_method == 'online':
+                booking, _ = transition(booking, 'confirmed', source='online')
 
-            # Send pending confirmation email
+        # Send pending confirmation email once the booking is committed
+        if booking.booking_method == 'hybrid':
             try:
                 send_booking_pending_email(booking)
             except Exception as e:
                 print(f"Error sending pending email: {e}")
 
-        # For online bookings, mark as confirmed (in real implementation, after payment)
-        elif booking.booking_method == 'online':
-            booking.status = 'confirmed'
-            booking.confirmed_at = timezone.now()
-            booking.save()
-
         response_serializer = BookingDetailSerializer(booking, context={'request': request})
 
         # Include WhatsApp link in response for hybrid bookings
@@ -101,7 +105,7 @@ class BookingViewSet(viewsets.ModelViewSet):
 
         booking.whatsapp_message_sent = True
         booking.whatsapp_message_text = message_text
-        booking.save()
+        booking.save(update_fields=['whatsapp_message_sent', 'whatsapp_message_text', 'updated_at'])
 
         # TODO: Integrate with actual WhatsApp API
         # For now, just mark as sent
@@ -142,6 +146,44 @@ Please confirm availability and send payment details.
 """
         return message.strip()
 
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def batch(self, request):
+        """
+        Create many bookings in one request (agents, group itineraries).
+
+        POST /api/bookings/bookings/batch/
+        {"mode": "all_or_nothing" | "per_item", "bookings": [<booking payload>, ...]}
+
+        Returns per-booking results in input order: 201 when every booking
+        was created, 207 when only some were (per_item), 400 when none were.
+        """
+        from .batch import create_booking_batch
+
+        serializer = BookingBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        mode = serializer.validated_data['mode']
+        bookings, results = create_booking_batch(
+            serializer.validated_data['bookings'],
+            context={'request': request},
+            mode=mode,
+            whatsapp_message=self._generate_whatsapp_message
+        )
+
+        if not bookings:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(bookings) < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+
+        return Response({
+            'mode': mode,
+            'created': len(bookings),
+            'failed': sum(1 for result in results if result['status'] == 'failed'),
+            'results': results
+        }, status=response_status)
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def confirm(self, request, pk=None):
         """Confirm a booking (staff only)."""
@@ -158,10 +200,14 @@ Please confirm availability and send payment details.
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        booking.status = 'confirmed'
-        booking.confirmed_by = request.user
-        booking.confirmed_at = timezone.now()
-        booking.save()
+        booking, changed = transition(
+            booking, 'confirmed', changed_by=request.user, source='admin', if_status=['pending']
+        )
+        if not changed:
+            return Response(
+                {'detail': 'Only pending bookings can be confirmed'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         serializer = BookingDetailSerializer(booking, context={'request': request})
         return Response(serializer.data)
@@ -200,11 +246,15 @@ Please confirm availability and send payment details.
 
         # Update booking
         reason = request.data.get('reason', '')
-        booking.status = 'cancelled'
-        booking.cancelled_by = request.user
-        booking.cancelled_at = timezone.now()
-        booking.cancellation_reason = reason
-        booking.save()
+        booking, changed = transition(
+            booking, 'cancelled', changed_by=request.user, reason=reason,
+            source='admin' if request.user.is_staff else 'guest', if_status=['pending', 'confirmed']
+        )
+        if not changed:
+            return Response(
+                {'detail': 'Only pending or confirmed bookings can be cancelled'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         # Send cancellation email
         try:
@@ -239,11 +289,9 @@ Please confirm availability and send payment details.
             payment_link = generate_payment_link(booking)
 
             # Update booking status to confirmed
-            if booking.status == 'pending':
-                booking.status = 'confirmed'
-                booking.confirmed_by = request.user
-                booking.confirmed_at = timezone.now()
-                booking.save()
+            booking, _ = transition(
+                booking, 'confirmed', changed_by=request.user, source='payment_link', if_status=['pending']
+            )
 
             # Send payment link email
             try:
@@ -281,6 +329,66 @@ Please confirm availability and send payment details.
             'booking_number': booking.booking_number
         })
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def report(self, request):
+        """
+        Revenue, commission and booking counts for a date range (staff only).
+        Served from daily rollups, so multi-year ranges stay fast.
+
+        GET /api/bookings/bookings/report/?start_date=2024-01-01&end_date=2025-12-31&group_by=month
+        """
+        from .reporting import booking_report
+
+        serializer = BookingReportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        data = serializer.validated_data
+        return Response(booking_report(
+            data['start_date'],
+            data['end_date'],
+            booking_type=data.get('booking_type'),
+            status=data.get('status'),
+            group_by=data['group_by']
+        ))
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def export(self, request):
+        """
+        Stream bookings as CSV or NDJSON (staff only).
+
+        GET /api/bookings/bookings/export/?start_date=2024-01-01&end_date=2024-12-31&status=confirmed&type=homestay&output=csv
+        """
+        from .exports import export_response
+
+        serializer = ExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return export_response('bookings', serializer.validated_data)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def occupancy(self, request):
+        """
+        Occupancy, ADR and RevPAR for a resort or homestay and its room types (staff only).
+
+        GET /api/bookings/bookings/occupancy/?listing_type=resort&listing_id=1&start_date=2024-01-01&end_date=2024-12-31&group_by=month
+        """
+        from .occupancy import occupancy_report
+
+        serializer = OccupancySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        data = serializer.validated_data
+        try:
+            report = occupancy_report(
+                data['listing_type'],
+                data['listing_id'],
+                data['start_date'],
+                data['end_date'],
+                group_by=data['group_by']
+            )
+        except ObjectDoesNotExist:
+            return Response({'error': 'Listing not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(report)
+
     @action(detail=False, methods=['post'])
     def check_availability(self, request):
         """Check availability for a specific item and date."""
@@ -319,9 +427,5 @@ Please confirm availability and send payment details.
 
     def _get_default_slots(self, content_type, object_id):
         """Get default available slots for an item."""
-        # TODO: Get actual capacity from the related model
-        if content_type in ['resort', 'homestay']:
-            return 10  # Default room capacity
-        elif content_type == 'destination':
-            return 20  # Default activity capacity
-        return 5  # Default for services/rentals
+        from .inventory import default_capacity
+        return default_capacity(content_type, object_id)
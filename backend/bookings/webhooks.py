@@ -0,0 +1,361 @@
+"""
+Webhook ingestion for WayanTrails payments.
+
+Deliveries are stored raw, once per gateway event ID, and acknowledged
+immediately. A pool of worker threads drains the event table in batches and
+applies state transitions under row locks, so retried or concurrent
+callbacks cannot confirm a booking twice.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Booking, PaymentWebhookEvent
+from .payment_lookup import payment_lookup
+
+logger = logging.getLogger(__name__)
+
+# Payment states that a late or duplicated webhook must never overwrite
+SETTLED_PAYMENT_STATUSES = ['completed', 'captured', 'refunded', 'partially_refunded']
+
+PAYMENT_METHOD_MAPPING = {
+    'upi': 'upi',
+    'card': 'card',
+    'netbanking': 'netbanking',
+    'wallet': 'wallet',
+    'emi': 'emi'
+}
+
+
+def verify_webhook_signature(body, signature, secret=None):
+    """
+    Verify Razorpay's X-Razorpay-Signature header.
+
+    Returns True when no webhook secret is configured (development mode).
+    """
+    secret = settings.RAZORPAY_WEBHOOK_SECRET if secret is None else secret
+    if not secret:
+        return True
+
+    expected_signature = hmac.new(
+        secret.encode('utf-8'),
+        body,
+        hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(signature or '', expected_signature)
+
+
+def get_event_id(body, header_event_id=None):
+    """Use the gateway event ID, falling back to a hash of the raw body."""
+    if header_event_id:
+        return header_event_id
+    return f"sha256_{hashlib.sha256(body).hexdigest()}"
+
+
+def record_webhook_event(body, event_id=None, gateway='razorpay'):
+    """
+    Persist a webhook delivery exactly once.
+
+    This is the only database work on the request path: a single INSERT of
+    the raw body. Parsing and state transitions happen in the worker pool.
+
+    Args:
+        body: Raw request body (bytes)
+        event_id: Gateway event ID header value, if present
+        gateway: Gateway that sent the event
+
+    Returns:
+        tuple: (PaymentWebhookEvent, created: bool)
+    """
+    event_id = get_event_id(body, event_id)
+    try:
+        with transaction.atomic():
+            event = PaymentWebhookEvent.objects.create(
+                event_id=event_id,
+                payment_gateway=gateway,
+                raw_body=body.decode('utf-8', errors='replace'),
+            )
+        return event, True
+    except IntegrityError:
+        # Gateway retry of an event we already have
+        return PaymentWebhookEvent.objects.only('pk', 'event_id', 'status').get(event_id=event_id), False
+
+
+def parse_webhook_event(event):
+    """Populate payload and gateway identifiers from the stored raw body."""
+    if event.payload or not event.raw_body:
+        return
+
+    data = json.loads(event.raw_body)
+    payment_entity = data.get('payload', {}).get('payment', {}).get('entity', {})
+
+    event.payload = data
+    event.event_type = data.get('event', '')
+    event.order_id = payment_entity.get('order_id') or ''
+    event.gateway_payment_id = payment_entity.get('id') or ''
+
+
+def dispatch_webhook_event():
+    """Wake the worker pool once the current transaction commits; workers claim due events themselves."""
+    transaction.on_commit(webhook_worker_pool.notify)
+
+
+def claim_webhook_events(batch_size=None):
+    """
+    Claim a batch of events that are due for processing.
+
+    Rows are selected with SKIP LOCKED so concurrent workers take disjoint
+    batches; events stuck in `processing` (worker died) are reclaimed once
+    their claim is older than WEBHOOK_CLAIM_TIMEOUT_SECONDS.
+
+    Returns:
+        list: Claimed event primary keys, oldest first
+    """
+    batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+    now = timezone.now()
+    stale_claim = now - timedelta(seconds=settings.WEBHOOK_CLAIM_TIMEOUT_SECONDS)
+
+    with transaction.atomic():
+        event_pks = list(
+            PaymentWebhookEvent.objects.select_for_update(skip_locked=True).filter(
+                Q(status__in=['received', 'failed'], available_at__lte=now,
+                  attempts__lt=settings.WEBHOOK_MAX_ATTEMPTS) |
+                Q(status='processing', claimed_at__lt=stale_claim)
+            ).order_by('available_at').values_list('pk', flat=True)[:batch_size]
+        )
+        if event_pks:
+            PaymentWebhookEvent.objects.filter(pk__in=event_pks).update(
+                status='processing', claimed_at=now, updated_at=now
+            )
+
+    return event_pks
+
+
+def drain_webhook_events(batch_size=None, max_batches=None):
+    """
+    Process claimed batches until nothing is due.
+
+    Returns:
+        dict: Count of events per final status
+    """
+    results = {}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        event_pks = claim_webhook_events(batch_size)
+        if not event_pks:
+            break
+
+        batches += 1
+        for event_pk in event_pks:
+            result = process_webhook_event(event_pk)
+            results[result] = results.get(result, 0) + 1
+
+    return results
+
+
+class WebhookWorkerPool:
+    """
+    Fixed-size pool of daemon threads that drain the webhook event table.
+
+    The endpoint only calls notify(); workers also poll on an interval so
+    events survive a missed wakeup or a restart between ack and processing.
+    Slow email or database work therefore delays the queue, never the
+    webhook response.
+    """
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """Start the worker threads on first use."""
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(settings.WEBHOOK_WORKERS):
+                thread = threading.Thread(
+                    target=self._run, name=f'webhook-worker-{index}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self):
+        """Signal that new events are waiting."""
+        self.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(timeout=settings.WEBHOOK_POLL_INTERVAL_SECONDS)
+            self._wakeup.clear()
+
+            close_old_connections()
+            try:
+                drain_webhook_events()
+            except Exception:
+                logger.exception("Webhook worker failed to drain events")
+            finally:
+                close_old_connections()
+
+
+webhook_worker_pool = WebhookWorkerPool()
+
+
+def process_webhook_event(event_pk):
+    """
+    Apply a stored webhook event.
+
+    The event, payment and booking rows are locked for the duration of the
+    transaction, so a concurrent verify_payment or a duplicate delivery
+    waits and then sees the settled state.
+
+    Returns:
+        str: Final event status
+    """
+    try:
+        with transaction.atomic():
+            event = PaymentWebhookEvent.objects.select_for_update().get(pk=event_pk)
+            if event.status in ['processed', 'ignored']:
+                return event.status
+
+            event.attempts += 1
+            event.last_error = ''
+            try:
+                parse_webhook_event(event)
+            except ValueError as e:
+                # Malformed bodies will never parse; don't retry them
+                event.last_error = f"Invalid payload: {e}"
+
+            handler = WEBHOOK_HANDLERS.get(event.event_type)
+            if handler and not event.last_error:
+                handler(event)
+                event.status = 'processed'
+            else:
+                event.status = 'ignored'
+
+            event.processed_at = timezone.now()
+            event.save(update_fields=[
+                'status', 'attempts', 'last_error', 'processed_at', 'payload',
+                'event_type', 'order_id', 'gateway_payment_id', 'updated_at'
+            ])
+            return event.status
+
+    except Exception as e:
+        logger.exception(f"Error processing webhook event {event_pk}")
+
+        # Exponential backoff: 30s, 60s, 120s, ...
+        attempts = PaymentWebhookEvent.objects.filter(pk=event_pk).values_list('attempts', flat=True).first() or 0
+        now = timezone.now()
+        PaymentWebhookEvent.objects.filter(pk=event_pk).update(
+            status='failed',
+            attempts=attempts + 1,
+            last_error=str(e),
+            available_at=now + timedelta(seconds=30 * 2 ** attempts),
+            updated_at=now
+        )
+        return 'failed'
+
+
+def _lock_payment(event):
+    """Lock the payment row referenced by an event."""
+    return (
+        payment_lookup.get_by_order_id(event.order_id, lock=True) or
+        payment_lookup.get_by_gateway_payment_id(event.gateway_payment_id, lock=True)
+    )
+
+
+def apply_payment_method_details(payment, payment_entity):
+    """Copy method-specific details from a gateway payment entity."""
+    method = payment_entity.get('method', '')
+    payment.payment_method_type = PAYMENT_METHOD_MAPPING.get(method, 'card')
+
+    if method == 'upi':
+        payment.upi_id = payment_entity.get('vpa', '')
+    elif method == 'card':
+        card = payment_entity.get('card', {})
+        payment.card_last_4 = card.get('last4', '')
+        payment.card_network = card.get('network', '')
+    elif method == 'wallet':
+        payment.wallet_name = payment_entity.get('wallet', '')
+
+
+def confirm_paid_booking(booking_id, package_id=None, reason='Payment captured', source='payment'):
+    """
+    Lock and confirm a booking after payment, if it is still pending.
+    A package order confirms every component of the package.
+    """
+    from .inventory import convert_hold
+    from .state_machine import transition
+
+    if package_id:
+        from .packages import confirm_package
+        changed = confirm_package(package_id, reason=reason, source=source)
+        return Booking.objects.get(pk=booking_id), changed
+
+    booking, changed = transition(booking_id, 'confirmed', reason=reason, source=source, if_status=['pending'])
+    if changed:
+        # Held inventory becomes booked in the same transaction
+        convert_hold(booking)
+    return booking, changed
+
+
+def handle_payment_captured(event):
+    """payment.captured: mark the payment completed and confirm the booking."""
+    payment = _lock_payment(event)
+    if not payment or payment.status in SETTLED_PAYMENT_STATUSES:
+        return
+
+    payment_entity = event.payload.get('payload', {}).get('payment', {}).get('entity', {})
+
+    payment.gateway_payment_id = event.gateway_payment_id
+    payment.status = 'completed'
+    payment.paid_at = timezone.now()
+    payment.gateway_response = payment_entity
+    payment.is_verified = True
+    apply_payment_method_details(payment, payment_entity)
+    payment.save()
+
+    booking, _ = confirm_paid_booking(payment.booking_id, package_id=payment.package_id)
+
+    # Runs in the worker after commit, off the webhook request path
+    transaction.on_commit(lambda: _send_payment_success_email(booking))
+
+
+def _send_payment_success_email(booking):
+    """Send payment success email without failing event processing."""
+    from .emails import send_payment_success_email
+
+    try:
+        send_payment_success_email(booking)
+    except Exception as e:
+        logger.error(f"Error sending payment success email: {e}")
+
+
+def handle_payment_failed(event):
+    """payment.failed: record the failure unless the payment already settled."""
+    payment = _lock_payment(event)
+    if not payment or payment.status in SETTLED_PAYMENT_STATUSES:
+        return
+
+    payment_entity = event.payload.get('payload', {}).get('payment', {}).get('entity', {})
+
+    payment.status = 'failed'
+    payment.error_code = payment_entity.get('error_code') or ''
+    payment.error_description = payment_entity.get('error_description') or ''
+    payment.gateway_response = payment_entity
+    payment.save()
+
+
+WEBHOOK_HANDLERS = {
+    'payment.captured': handle_payment_captured,
+    'payment.failed': handle_payment_failed,
+}
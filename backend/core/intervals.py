@@ -0,0 +1,49 @@
+"""
+Half-open [start, end) interval helpers shared by the rental and service
+schedulers. Inputs are (start, end) pairs sorted by start; they may overlap.
+"""
+
+
+def subtract(windows, busy, min_duration=None):
+    """
+    Parts of `windows` not covered by `busy`, in one merge pass over both
+    sorted lists.
+
+    Args:
+        windows: (start, end) pairs sorted by start, not overlapping
+        busy: (start, end) pairs sorted by start, possibly overlapping
+        min_duration: timedelta; shorter pieces are dropped
+
+    Returns:
+        list: (start, end) pairs
+    """
+    free = []
+    index = 0
+    for window_start, window_end in windows:
+        # Busy intervals ending before this window can't affect later ones either
+        while index < len(busy) and busy[index][1] <= window_start:
+            index += 1
+        cursor = window_start
+        position = index
+        while position < len(busy) and busy[position][0] < window_end:
+            busy_start, busy_end = busy[position]
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            position += 1
+        if cursor < window_end:
+            free.append((cursor, window_end))
+    return [
+        (start, end) for start, end in free
+        if end > start and (min_duration is None or end - start >= min_duration)
+    ]
+
+
+def free_windows(busy, start, end, min_duration=None):
+    """Gaps between sorted `busy` intervals within [start, end)."""
+    return subtract([(start, end)], busy, min_duration)
+
+
+def covers(windows, start, end):
+    """Whether one of `windows` contains the whole of [start, end)."""
+    return any(window_start <= start and end <= window_end for window_start, window_end in windows)
@@ -0,0 +1,30 @@
+from django.test import SimpleTestCase
+
+from .intervals import covers, free_windows, subtract
+
+
+class SubtractTests(SimpleTestCase):
+    def test_overlapping_busy_intervals_are_merged(self):
+        busy = [(2, 5), (3, 4), (4, 7), (9, 10)]
+
+        self.assertEqual(subtract([(0, 12)], busy), [(0, 2), (7, 9), (10, 12)])
+
+    def test_busy_interval_spanning_two_windows(self):
+        windows = [(0, 10), (20, 30)]
+
+        self.assertEqual(subtract(windows, [(8, 22), (25, 26)]), [(0, 8), (22, 25), (26, 30)])
+        self.assertEqual(subtract(windows, [(-5, 40)]), [])
+
+    def test_intervals_are_half_open(self):
+        # Busy time touching a window's edges leaves all of it free
+        self.assertEqual(subtract([(10, 20)], [(0, 10), (20, 30)]), [(10, 20)])
+        self.assertEqual(free_windows([(10, 12), (12, 15)], 10, 20), [(15, 20)])
+
+    def test_short_gaps_are_dropped(self):
+        self.assertEqual(subtract([(0, 10)], [(2, 3), (4, 8)], min_duration=2), [(0, 2), (8, 10)])
+
+    def test_covers_needs_one_window_for_the_whole_interval(self):
+        windows = [(0, 5), (5, 10)]
+
+        self.assertTrue(covers(windows, 1, 5))
+        self.assertFalse(covers(windows, 4, 6))
@@ -4,7 +4,7 @@ Admin configuration for Destinations app.
 from django.contrib import admin
 from django.contrib import messages
 from django.utils.html import format_html
-from .models import Destination, Activity
+from .models import Destination, Activity, ActivitySlot
 
 
 @admin.action(description='Sync with Google Places')
@@ -238,6 +238,7 @@ class ActivityAdmin(admin.ModelAdmin):
         ('Capacity & Booking', {
             'fields': (
                 'max_participants',
+                'slot_times',
                 'advance_booking_hours',
             )
         }),
@@ -256,3 +257,28 @@ class ActivityAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
         }),
     )
+
+
+@admin.register(ActivitySlot)
+class ActivitySlotAdmin(admin.ModelAdmin):
+    """Admin interface for ActivitySlot model."""
+
+    list_display = [
+        'activity',
+        'date',
+        'start_time',
+        'capacity',
+        'booked_seats',
+        'held_seats',
+        'remaining_seats',
+        'is_blocked',
+    ]
+    list_filter = [
+        'is_blocked',
+        'date',
+        'activity__destination',
+    ]
+    search_fields = ['activity__name']
+    list_select_related = ['activity']
+    readonly_fields = ['booked_seats', 'held_seats', 'created_at', 'updated_at']
+    date_hierarchy = 'date'
@@ -0,0 +1,47 @@
+"""
+Management command to generate activity time slots ahead of time.
+Run it daily from cron (e.g. `generate_activity_slots --days 60`); slots
+that already exist, and their bookings, are left alone.
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from destinations.models import Activity
+from destinations.slots import generate_slots, parse_slot_time
+
+
+class Command(BaseCommand):
+    help = 'Generate time slots for active activities over the coming days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Days ahead to generate, including the start day')
+        parser.add_argument('--start', help='First day to generate (YYYY-MM-DD, default today)')
+        parser.add_argument('--activity', help='Only this activity (slug)')
+        parser.add_argument('--times', help='Start times to use instead of each activity\'s own, e.g. 06:00,09:30')
+        parser.add_argument('--capacity', type=int, help='Seats per slot instead of max_participants')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else date.today()
+        except ValueError:
+            raise CommandError(f"Invalid date: {options['start']}")
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+
+        times = None
+        if options['times']:
+            try:
+                times = [parse_slot_time(value.strip()) for value in options['times'].split(',')]
+            except ValueError:
+                raise CommandError(f"Invalid times: {options['times']}")
+
+        activities = Activity.objects.filter(is_active=True)
+        if options['activity']:
+            activities = activities.filter(slug=options['activity'])
+            if not activities.exists():
+                raise CommandError(f"No active activity with slug {options['activity']}")
+
+        end = start + timedelta(days=options['days'] - 1)
+        created = generate_slots(activities, start, end, times=times, capacity=options['capacity'])
+        self.stdout.write(self.style.SUCCESS(f'Generated {created} activity slots from {start} to {end}'))
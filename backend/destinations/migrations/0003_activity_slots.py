@@ -0,0 +1,73 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("destinations", "0002_destination_google_data_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activity",
+            name="slot_times",
+            field=models.JSONField(
+                blank=True, default=list, verbose_name="daily slot start times"
+            ),
+        ),
+        migrations.CreateModel(
+            name="ActivitySlot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                ("date", models.DateField(verbose_name="date")),
+                ("start_time", models.TimeField(verbose_name="start time")),
+                ("capacity", models.PositiveIntegerField(verbose_name="capacity")),
+                (
+                    "booked_seats",
+                    models.PositiveIntegerField(default=0, verbose_name="booked seats"),
+                ),
+                (
+                    "held_seats",
+                    models.PositiveIntegerField(default=0, verbose_name="held seats"),
+                ),
+                (
+                    "is_blocked",
+                    models.BooleanField(default=False, verbose_name="is blocked"),
+                ),
+                (
+                    "activity",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="slots",
+                        to="destinations.activity",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Activity Slot",
+                "verbose_name_plural": "Activity Slots",
+                "db_table": "destination_activity_slots",
+                "ordering": ["date", "start_time"],
+                "unique_together": {("activity", "date", "start_time")},
+            },
+        ),
+    ]
@@ -128,6 +128,7 @@ class Activity(TimeStampedModel, SlugModel, PublishableModel):
 
     # Capacity
     max_participants = models.PositiveIntegerField(_('max participants per slot'), default=20)
+    slot_times = models.JSONField(_('daily slot start times'), default=list, blank=True)  # ['06:00', '09:30']
 
     # Booking
     advance_booking_hours = models.PositiveIntegerField(_('advance booking hours'), default=2)
@@ -139,3 +140,37 @@ class Activity(TimeStampedModel, SlugModel, PublishableModel):
 
     def __str__(self):
         return f"{self.destination.name} - {self.name}"
+
+
+class ActivitySlot(TimeStampedModel):
+    """
+    One bookable departure of an activity: a date and start time with its
+    own seat capacity. Seats are held during checkout and booked on
+    confirmation (see destinations.slots).
+    """
+
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='slots')
+    date = models.DateField(_('date'))
+    start_time = models.TimeField(_('start time'))
+
+    capacity = models.PositiveIntegerField(_('capacity'))
+    booked_seats = models.PositiveIntegerField(_('booked seats'), default=0)
+    held_seats = models.PositiveIntegerField(_('held seats'), default=0)
+    is_blocked = models.BooleanField(_('is blocked'), default=False)
+
+    class Meta:
+        db_table = 'destination_activity_slots'
+        verbose_name = _('Activity Slot')
+        verbose_name_plural = _('Activity Slots')
+        ordering = ['date', 'start_time']
+        unique_together = ['activity', 'date', 'start_time']
+
+    def __str__(self):
+        return f"{self.activity.name} - {self.date} {self.start_time:%H:%M}"
+
+    @property
+    def remaining_seats(self):
+        """Seats still free for new bookings."""
+        if self.is_blocked:
+            return 0
+        return max(0, self.capacity - self.booked_seats - self.held_seats)
@@ -121,6 +121,7 @@ class ActivitySerializer(serializers.ModelSerializer):
             'price_per_person',
             'child_price',
             'max_participants',
+            'slot_times',
             'advance_booking_hours',
             'is_featured',
             'is_active',
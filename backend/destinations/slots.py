@@ -0,0 +1,207 @@
+"""
+Time-slot capacity for destination activities.
+
+Every (activity, date, start time) is an ActivitySlot row with its own
+capacity, so a 06:00 Chembra trek and the 09:00 departure fill up
+independently. Seats are taken with a single conditional UPDATE
+(capacity >= booked + held + seats): concurrent bookings of the last seats
+serialise on the row and only one succeeds.
+
+Slots are generated in bulk from each activity's slot_times (or
+ACTIVITY_DEFAULT_SLOT_TIMES) by generate_slots(), and on demand at the
+activity's max_participants when a booking names one of those times before
+its slot exists. Any other time has no capacity: a full 06:00 departure
+can't be sidestepped by booking 06:01.
+Bookings use slots through bookings.inventory, like room nights.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Activity, ActivitySlot
+
+class SlotUnavailableError(Exception):
+    """Raised when an activity slot doesn't have enough free seats."""
+
+
+def parse_slot_time(value):
+    """Accept time objects or 'HH:MM' strings."""
+    if isinstance(value, time):
+        return value
+    return datetime.strptime(value, '%H:%M').time()
+
+
+def slot_times_for(activity):
+    """Daily start times for an activity."""
+    return [parse_slot_time(value) for value in (activity.slot_times or settings.ACTIVITY_DEFAULT_SLOT_TIMES)]
+
+
+def generate_slots(activities, start_date, end_date, times=None, capacity=None, batch_size=1000):
+    """
+    Create missing slots for activities over [start_date, end_date].
+
+    Existing slots (and their bookings) are left untouched.
+
+    Args:
+        activities: Activity queryset or iterable
+        start_date, end_date: Inclusive date range
+        times: Start times to use instead of each activity's own
+        capacity: Seats per slot instead of each activity's max_participants
+        batch_size: Rows per INSERT
+
+    Returns:
+        int: Slots created
+    """
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    created = 0
+
+    for activity in activities:
+        slot_times = [parse_slot_time(value) for value in times] if times else slot_times_for(activity)
+        existing = set(ActivitySlot.objects.filter(
+            activity=activity, date__gte=start_date, date__lte=end_date
+        ).values_list('date', 'start_time'))
+
+        slots = [
+            ActivitySlot(
+                activity=activity,
+                date=day,
+                start_time=start_time,
+                capacity=capacity or activity.max_participants
+            )
+            for day in days
+            for start_time in slot_times
+            if (day, start_time) not in existing
+        ]
+        ActivitySlot.objects.bulk_create(slots, batch_size=batch_size, ignore_conflicts=True)
+        created += len(slots)
+
+    return created
+
+
+def day_slots(activity, day):
+    """
+    Every slot of an activity on a day with its remaining seats, in one query.
+
+    Returns:
+        list: dicts with id, start_time, capacity, booked/held seats,
+        remaining_seats and is_blocked, ordered by start time
+    """
+    return [
+        {**slot, 'remaining_seats': 0 if slot['is_blocked'] else max(0, slot['remaining_seats'])}
+        for slot in ActivitySlot.objects.filter(activity=activity, date=day).annotate(
+            remaining_seats=F('capacity') - F('booked_seats') - F('held_seats')
+        ).values(
+            'id', 'start_time', 'capacity', 'booked_seats', 'held_seats', 'remaining_seats', 'is_blocked'
+        ).order_by('start_time')
+    ]
+
+
+def _ensure_slot(activity_id, day, start_time):
+    """
+    Create a slot at the activity's max_participants if none exists yet.
+    Returns False if the activity doesn't exist or doesn't depart at start_time.
+    """
+    if ActivitySlot.objects.filter(activity_id=activity_id, date=day, start_time=start_time).exists():
+        return True
+    activity = Activity.objects.filter(pk=activity_id).only('max_participants', 'slot_times').first()
+    if activity is None or start_time not in slot_times_for(activity):
+        return False
+    ActivitySlot.objects.bulk_create(
+        [ActivitySlot(activity_id=activity_id, date=day, start_time=start_time, capacity=activity.max_participants)],
+        ignore_conflicts=True
+    )
+    return True
+
+
+def is_slot_time(activity_id, day, start_time):
+    """Whether an activity departs at start_time on day (a slot exists, or it's one of its slot times)."""
+    start_time = parse_slot_time(start_time)
+    if ActivitySlot.objects.filter(activity_id=activity_id, date=day, start_time=start_time).exists():
+        return True
+    activity = Activity.objects.filter(pk=activity_id).only('slot_times').first()
+    return activity is not None and start_time in slot_times_for(activity)
+
+
+def reserve_seats(activity_id, day, start_time, seats, field='booked_seats'):
+    """
+    Atomically add `seats` to `field` if the slot has room.
+
+    Raises:
+        SlotUnavailableError: The slot is blocked or too full
+    """
+    if start_time is None:
+        raise SlotUnavailableError(f"Activity #{activity_id} bookings need a start time")
+    start_time = parse_slot_time(start_time)
+
+    with transaction.atomic():
+        if not _ensure_slot(activity_id, day, start_time):
+            raise SlotUnavailableError(f"Activity #{activity_id} has no departure on {day} at {start_time:%H:%M}")
+        updated = ActivitySlot.objects.filter(
+            activity_id=activity_id,
+            date=day,
+            start_time=start_time,
+            is_blocked=False,
+            capacity__gte=F('booked_seats') + F('held_seats') + seats
+        ).update(**{field: F(field) + seats}, updated_at=timezone.now())
+    if not updated:
+        raise SlotUnavailableError(
+            f"Not enough seats for activity #{activity_id} on {day} at {start_time:%H:%M}"
+        )
+
+
+def adjust_seats(activity_id, day, start_time, **deltas):
+    """
+    Apply signed seat deltas without capacity checks (never below zero).
+    Times that aren't departures of the activity are ignored.
+    """
+    if start_time is None:
+        return
+    start_time = parse_slot_time(start_time)
+    _ensure_slot(activity_id, day, start_time)
+    ActivitySlot.objects.filter(activity_id=activity_id, date=day, start_time=start_time).update(
+        **{
+            field: Greatest(F(field) + delta, Value(0)) if delta < 0 else F(field) + delta
+            for field, delta in deltas.items()
+        },
+        updated_at=timezone.now()
+    )
+
+
+def remaining_seats(keys):
+    """
+    Remaining seats for many (activity_id, date, start_time) keys in one
+    query. Keys without a slot report the activity's max_participants if
+    the time is one of its slot times, else 0. Activity IDs come back as ints.
+    """
+    keys = {
+        (int(activity_id), day, parse_slot_time(start_time))
+        for activity_id, day, start_time in keys
+        if start_time and str(activity_id).isdigit()
+    }
+    if not keys:
+        return {}
+
+    query = Q()
+    for activity_id, day, start_time in keys:
+        query |= Q(activity_id=activity_id, date=day, start_time=start_time)
+    remaining = {
+        (activity_id, day, start_time): 0 if is_blocked else capacity - booked - held
+        for activity_id, day, start_time, capacity, booked, held, is_blocked in ActivitySlot.objects.filter(
+            query
+        ).values_list('activity_id', 'date', 'start_time', 'capacity', 'booked_seats', 'held_seats', 'is_blocked')
+    }
+
+    missing = {activity_id for activity_id, day, start_time in keys if (activity_id, day, start_time) not in remaining}
+    if missing:
+        activities = Activity.objects.filter(pk__in=missing).only('max_participants', 'slot_times').in_bulk()
+        for activity_id, day, start_time in keys:
+            activity = activities.get(activity_id)
+            remaining.setdefault(
+                (activity_id, day, start_time),
+                activity.max_participants if activity and start_time in slot_times_for(activity) else 0
+            )
+    return remaining
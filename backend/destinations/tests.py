@@ -1,3 +1,85 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from bookings.inventory import InventoryUnavailableError, check_batch_availability, place_hold
+from bookings.models import Booking
+
+from .models import Activity, ActivitySlot, Destination
+from .slots import SlotUnavailableError, remaining_seats, reserve_seats
+
+DAY = date(2030, 1, 1)
+
+
+def create_activity(**kwargs):
+    destination = Destination.objects.create(
+        name='Chembra Peak', slug='chembra-peak', destination_type='hill_station', description='Peak',
+        short_description='Peak', city='Meppadi', state='Kerala', cover_image='destinations/cover.jpg'
+    )
+    fields = dict(
+        destination=destination, name='Chembra Trek', slug='chembra-trek', activity_type='trekking',
+        description='Trek', duration_hours=3, price_per_person=Decimal('500'), max_participants=5,
+        slot_times=['06:00', '09:00']
+    )
+    fields.update(kwargs)
+    return Activity.objects.create(**fields)
+
+
+def create_activity_booking(activity, guests, booking_time='06:00'):
+    return Booking.objects.create(
+        guest_name='Guest', guest_email='guest@example.com', guest_phone='+919876543210',
+        booking_type='destination', content_type='activity', object_id=str(activity.pk),
+        booking_date=DAY, booking_time=booking_time, total_guests=guests,
+        base_amount=Decimal('500'), total_amount=Decimal('500')
+    )
+
+
+class ActivitySlotCapacityTests(TestCase):
+    def setUp(self):
+        self.activity = create_activity()
+
+    def test_full_slot_rejects_more_seats(self):
+        reserve_seats(self.activity.pk, DAY, '06:00', 4)
+        with self.assertRaises(SlotUnavailableError):
+            reserve_seats(self.activity.pk, DAY, '06:00', 2)
+
+        reserve_seats(self.activity.pk, DAY, '06:00', 1)
+        reserve_seats(self.activity.pk, DAY, '09:00', 5)
+        slot = ActivitySlot.objects.get(activity=self.activity, date=DAY, start_time=time(6))
+        self.assertEqual(slot.booked_seats, 5)
+
+    def test_holds_exhaust_slot(self):
+        place_hold(create_activity_booking(self.activity, 3))
+        with self.assertRaises(InventoryUnavailableError):
+            place_hold(create_activity_booking(self.activity, 3))
+        place_hold(create_activity_booking(self.activity, 2))
+
+        slot = ActivitySlot.objects.get(activity=self.activity, date=DAY, start_time=time(6))
+        self.assertEqual(slot.held_seats, 5)
+
+    def test_times_off_the_schedule_have_no_seats(self):
+        reserve_seats(self.activity.pk, DAY, '06:00', 5)
+
+        with self.assertRaises(SlotUnavailableError):
+            reserve_seats(self.activity.pk, DAY, '06:01', 1)
+        self.assertFalse(ActivitySlot.objects.filter(start_time=time(6, 1)).exists())
+        self.assertEqual(remaining_seats([(self.activity.pk, DAY, '06:01')]), {(self.activity.pk, DAY, time(6, 1)): 0})
+        self.assertEqual(remaining_seats([(self.activity.pk, DAY, '09:00')]), {(self.activity.pk, DAY, time(9)): 5})
+
+        span = ('activity', str(self.activity.pk), DAY, DAY + timedelta(days=1), 1)
+        self.assertEqual(check_batch_availability([(*span, '06:01'), (*span, '09:00')]), [False, True])
+
+    def test_booking_api_rejects_times_off_the_schedule(self):
+        payload = {
+            'guest_name': 'Guest', 'guest_email': 'guest@example.com', 'guest_phone': '+919876543210',
+            'booking_type': 'destination', 'booking_method': 'online', 'content_type': 'activity',
+            'object_id': str(self.activity.pk), 'booking_date': DAY.isoformat(), 'booking_time': '06:01',
+            'adults': 1, 'total_guests': 1, 'base_amount': '500', 'total_amount': '500',
+        }
+
+        response = APIClient().post('/api/bookings/bookings/', payload, format='json')
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('booking_time', response.data)
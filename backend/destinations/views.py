@@ -1,6 +1,8 @@
 """
 Views for Destinations app.
 """
+from datetime import date
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -125,3 +127,25 @@ class ActivityViewSet(viewsets.ReadOnlyModelViewSet):
         activities = self.queryset.filter(destination__slug=destination_slug)
         serializer = self.get_serializer(activities, many=True)
         return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def slots(self, request, slug=None):
+        """
+        Get an activity's time slots for a day with remaining seats.
+        GET /api/activities/{slug}/slots/?date=2025-01-15
+        """
+        from .slots import day_slots
+
+        try:
+            day = date.fromisoformat(request.query_params.get('date', ''))
+        except ValueError:
+            return Response({
+                'error': 'date parameter is required (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        activity = self.get_object()
+        return Response({
+            'activity': activity.slug,
+            'date': day,
+            'slots': day_slots(activity, day)
+        })
@@ -0,0 +1,170 @@
+"""
+Server-side pricing of homestay add-ons: meal plans and experiences.
+
+price_addons() prices the add-ons a guest picks for a stay from the
+homestay's own rates, so booking totals no longer depend on what the client
+sends:
+
+* a meal plan is charged per person per night of the stay, children at the
+  plan's child price where it has one, and must be ordered
+  advance_notice_hours before check-in;
+* an experience is charged per participant, must fall within the stay,
+  respect its minimum/maximum participants and be booked
+  advance_booking_days ahead.
+
+The homestay's active plans and experiences are read together in one
+UNION query. Lines come back in BookingItem shape (item_name,
+item_description, quantity, unit_price, total_price, item_data).
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import CharField, DecimalField, F, IntegerField, Value
+from django.utils import timezone
+
+from .models import Experience, MealPlan
+
+
+class AddonError(ValueError):
+    """Raised with {field: [messages]} when requested add-ons can't be priced."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _catalogue(homestay_id, meal_plan_ids, experience_ids):
+    """
+    Requested active meal plans and experiences of a homestay, in one query.
+
+    Returns:
+        dict: {('meal_plan' | 'experience', id): row dict}
+    """
+    columns = ['kind', 'pk', 'title', 'price', 'child_rate', 'notice', 'minimum', 'maximum']
+    decimal = DecimalField(max_digits=6, decimal_places=2)
+
+    meal_plans = MealPlan.objects.filter(
+        homestay_id=homestay_id, is_active=True, pk__in=meal_plan_ids
+    ).annotate(
+        kind=Value('meal_plan', output_field=CharField()),
+        title=F('plan_name'),
+        price=F('price_per_person'),
+        child_rate=F('child_price'),
+        notice=F('advance_notice_hours'),
+        minimum=Value(0, output_field=IntegerField()),
+        maximum=Value(0, output_field=IntegerField())
+    ).values_list(*columns)
+    experiences = Experience.objects.filter(
+        homestay_id=homestay_id, is_active=True, pk__in=experience_ids
+    ).annotate(
+        kind=Value('experience', output_field=CharField()),
+        title=F('name'),
+        price=F('price_per_person'),
+        child_rate=Value(None, output_field=decimal),
+        notice=F('advance_booking_days'),
+        minimum=F('minimum_participants'),
+        maximum=F('maximum_participants')
+    ).values_list(*columns)
+
+    return {
+        (row[0], row[1]): dict(zip(columns, row))
+        for row in meal_plans.union(experiences, all=True)
+    }
+
+
+def price_addons(homestay, check_in, check_out, adults, children=0, meal_plans=(), experiences=(), now=None):
+    """
+    Price meal plans and experiences for a stay.
+
+    Args:
+        homestay: Homestay (check_in_time is used for meal notice)
+        check_in, check_out: Stay dates
+        adults, children: Guests on the stay
+        meal_plans: MealPlan IDs
+        experiences: dicts with experience_id, date and optional participants
+            (default: every guest)
+        now: Time to check notice windows against (default now)
+
+    Returns:
+        dict: nights, lines (BookingItem-shaped dicts) and total_amount
+
+    Raises:
+        AddonError: Unknown add-ons, missed notice windows or participant limits
+    """
+    now = now or timezone.now()
+    nights = (check_out - check_in).days
+    guests = adults + children
+    catalogue = _catalogue(
+        homestay.pk,
+        list(meal_plans),
+        [experience['experience_id'] for experience in experiences]
+    )
+
+    lines, errors = [], {}
+
+    arrival = timezone.make_aware(datetime.combine(check_in, homestay.check_in_time))
+    for meal_plan_id in meal_plans:
+        plan = catalogue.get(('meal_plan', meal_plan_id))
+        if plan is None:
+            errors.setdefault('meal_plans', []).append(f"Meal plan {meal_plan_id} is not offered by this homestay.")
+            continue
+        if now + timedelta(hours=plan['notice']) > arrival:
+            errors.setdefault('meal_plans', []).append(
+                f"{plan['title']} must be ordered at least {plan['notice']} hours before check-in."
+            )
+            continue
+
+        for label, count, unit_price in [
+            ('adults', adults, plan['price']),
+            ('children', children, plan['child_rate'] if plan['child_rate'] is not None else plan['price']),
+        ]:
+            if count:
+                lines.append({
+                    'item_name': f"{plan['title']} ({label})",
+                    'item_description': f"{count} {label} x {nights} nights",
+                    'quantity': count * nights,
+                    'unit_price': unit_price,
+                    'total_price': unit_price * count * nights,
+                    'item_data': {'addon': 'meal_plan', 'meal_plan_id': meal_plan_id, 'guests': label},
+                })
+
+    for experience in experiences:
+        row = catalogue.get(('experience', experience['experience_id']))
+        if row is None:
+            errors.setdefault('experiences', []).append(
+                f"Experience {experience['experience_id']} is not offered by this homestay."
+            )
+            continue
+
+        day = experience['date']
+        participants = experience.get('participants') or guests
+        problems = []
+        if not check_in <= day <= check_out:
+            problems.append(f"{row['title']} must be during the stay.")
+        if day < timezone.localdate(now) + timedelta(days=row['notice']):
+            problems.append(f"{row['title']} must be booked at least {row['notice']} days ahead.")
+        if participants > guests:
+            problems.append(f"{row['title']} can't have more participants than guests on the stay.")
+        if not row['minimum'] <= participants <= row['maximum']:
+            problems.append(f"{row['title']} takes {row['minimum']}-{row['maximum']} participants.")
+        if problems:
+            errors.setdefault('experiences', []).extend(problems)
+            continue
+
+        lines.append({
+            'item_name': row['title'],
+            'item_description': f"{participants} participants on {day:%Y-%m-%d}",
+            'quantity': participants,
+            'unit_price': row['price'],
+            'total_price': row['price'] * participants,
+            'item_data': {'addon': 'experience', 'experience_id': row['pk'], 'date': day.isoformat()},
+        })
+
+    if errors:
+        raise AddonError(errors)
+
+    return {
+        'nights': nights,
+        'lines': lines,
+        'total_amount': sum((line['total_price'] for line in lines), Decimal('0.00')),
+    }
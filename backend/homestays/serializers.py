@@ -172,4 +172,33 @@ class HomestayCreateUpdateSerializer(serializers.ModelSerializer):
             'latitude', 'longitude', 'cover_image', 'gallery_images',
             'is_active', 'is_featured', 'meta_title', 'meta_description',
             'meta_keywords'
-        ]
\ No newline at end of file
+        ]
+
+class ExperienceAddonSerializer(serializers.Serializer):
+    """An experience requested with a stay."""
+
+    experience_id = serializers.IntegerField()
+    date = serializers.DateField()
+    participants = serializers.IntegerField(min_value=1, required=False)
+
+
+class AddonRequestSerializer(serializers.Serializer):
+    """Meal plans and experiences requested with a stay."""
+
+    meal_plans = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    experiences = ExperienceAddonSerializer(many=True, required=False, default=list)
+
+
+class AddonQuoteSerializer(AddonRequestSerializer):
+    """Add-on quote request for a stay."""
+
+    check_in_date = serializers.DateField()
+    check_out_date = serializers.DateField()
+    adults = serializers.IntegerField(min_value=1)
+    children = serializers.IntegerField(min_value=0, default=0)
+
+    def validate(self, data):
+        """Validate the stay dates."""
+        if data['check_in_date'] >= data['check_out_date']:
+            raise serializers.ValidationError("Check-out date must be after check-in date.")
+        return data
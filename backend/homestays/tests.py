@@ -1,3 +1,182 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+
+from .addons import AddonError, _catalogue, price_addons
+from .models import Experience, Homestay, MealPlan
+
+
+def create_homestay(**kwargs):
+    fields = dict(
+        name='Pepper Tree Home', slug='pepper-tree-home', host_name='Host', host_phone='+919876543210',
+        description='Homestay', short_description='Homestay', homestay_type='farmstay', total_rooms=3,
+        price_per_night=Decimal('3000'), check_in_time=time(14), cancellation_policy='Flexible',
+        cover_image='homestays/cover.jpg', address_line_1='Meppadi', city='Wayanad', postal_code='673577'
+    )
+    fields.update(kwargs)
+    return Homestay.objects.create(**fields)
+
+
+def create_meal_plan(homestay, **kwargs):
+    fields = dict(
+        homestay=homestay, plan_name='Kerala Breakfast', meal_type='breakfast', description='Breakfast',
+        price_per_person=Decimal('200'), child_price=Decimal('100'), advance_notice_hours=24
+    )
+    fields.update(kwargs)
+    return MealPlan.objects.create(**fields)
+
+
+def create_experience(homestay, **kwargs):
+    fields = dict(
+        homestay=homestay, name='Coffee Walk', slug='coffee-walk', experience_type='farming',
+        description='Plantation walk', duration_hours=Decimal('2'), price_per_person=Decimal('500'),
+        minimum_participants=2, maximum_participants=4, advance_booking_days=2
+    )
+    fields.update(kwargs)
+    return Experience.objects.create(**fields)
+
+
+class AddonPricingTests(TestCase):
+    def setUp(self):
+        self.homestay = create_homestay()
+        self.meal_plan = create_meal_plan(self.homestay)
+        self.experience = create_experience(self.homestay)
+        self.check_in, self.check_out = date(2030, 1, 10), date(2030, 1, 12)
+        self.now = timezone.make_aware(datetime(2030, 1, 1, 12, 0))
+
+    def price(self, meal_plans=(), experiences=(), adults=2, children=1, now=None):
+        return price_addons(
+            self.homestay, self.check_in, self.check_out, adults, children,
+            meal_plans=meal_plans, experiences=experiences, now=now or self.now
+        )
+
+    def walk(self, **kwargs):
+        return dict({'experience_id': self.experience.pk, 'date': date(2030, 1, 11)}, **kwargs)
+
+    def test_catalogue_reads_plans_and_experiences_in_one_query(self):
+        other = create_homestay(slug='other-home')
+        inactive = create_meal_plan(self.homestay, plan_name='Dinner', is_active=False)
+        foreign = create_experience(other, slug='other-walk')
+
+        with self.assertNumQueries(1):
+            catalogue = _catalogue(
+                self.homestay.pk, [self.meal_plan.pk, inactive.pk], [self.experience.pk, foreign.pk]
+            )
+
+        self.assertEqual(set(catalogue), {('meal_plan', self.meal_plan.pk), ('experience', self.experience.pk)})
+        self.assertEqual(catalogue[('meal_plan', self.meal_plan.pk)]['child_rate'], Decimal('100'))
+        walk = catalogue[('experience', self.experience.pk)]
+        self.assertEqual((walk['child_rate'], walk['minimum'], walk['maximum']), (None, 2, 4))
+
+    def test_children_pay_the_child_price_per_night(self):
+        quote = self.price(meal_plans=[self.meal_plan.pk], experiences=[self.walk()])
+
+        self.assertEqual(
+            [(line['item_name'], line['quantity'], line['total_price']) for line in quote['lines']],
+            [
+                ('Kerala Breakfast (adults)', 4, Decimal('800')),
+                ('Kerala Breakfast (children)', 2, Decimal('200')),
+                ('Coffee Walk', 3, Decimal('1500')),
+            ]
+        )
+        self.assertEqual(quote['total_amount'], Decimal('2500'))
+
+        # Without a child price children pay the adult rate
+        MealPlan.objects.filter(pk=self.meal_plan.pk).update(child_price=None)
+        self.assertEqual(self.price(meal_plans=[self.meal_plan.pk])['total_amount'], Decimal('1200'))
+
+    def test_notice_windows(self):
+        # Check-in is 14:00 on the 10th: breakfast needs 24 hours, the walk two days
+        late = timezone.make_aware(datetime(2030, 1, 9, 15, 0))
+
+        with self.assertRaises(AddonError) as raised:
+            self.price(meal_plans=[self.meal_plan.pk], experiences=[self.walk(date=date(2030, 1, 10))], now=late)
+
+        self.assertEqual(
+            raised.exception.errors,
+            {
+                'meal_plans': ["Kerala Breakfast must be ordered at least 24 hours before check-in."],
+                'experiences': ["Coffee Walk must be booked at least 2 days ahead."],
+            }
+        )
+        self.assertEqual(
+            self.price(meal_plans=[self.meal_plan.pk], now=late - timedelta(hours=1))['total_amount'],
+            Decimal('1000')
+        )
+
+    def test_participant_limits(self):
+        for walk, adults, message in [
+            (self.walk(participants=1), 2, "Coffee Walk takes 2-4 participants."),
+            (self.walk(), 5, "Coffee Walk takes 2-4 participants."),
+            (self.walk(participants=4), 2, "Coffee Walk can't have more participants than guests on the stay."),
+        ]:
+            with self.assertRaises(AddonError) as raised:
+                self.price(experiences=[walk], adults=adults)
+            self.assertEqual(raised.exception.errors, {'experiences': [message]})
+
+        self.assertEqual(self.price(experiences=[self.walk(participants=2)])['total_amount'], Decimal('1000'))
+
+    def test_unknown_and_out_of_stay_addons(self):
+        with self.assertRaises(AddonError) as raised:
+            self.price(meal_plans=[0], experiences=[self.walk(date=date(2030, 1, 13))])
+
+        self.assertEqual(
+            raised.exception.errors,
+            {
+                'meal_plans': ["Meal plan 0 is not offered by this homestay."],
+                'experiences': ["Coffee Walk must be during the stay."],
+            }
+        )
+
+
+class HomestayBookingAddonTests(TestCase):
+    def setUp(self):
+        self.homestay = create_homestay()
+        self.meal_plan = create_meal_plan(self.homestay)
+        self.experience = create_experience(self.homestay)
+        self.client = APIClient()
+
+    def post(self, **kwargs):
+        payload = {
+            'guest_name': 'Guest', 'guest_email': 'guest@example.com', 'guest_phone': '+919876543210',
+            'booking_type': 'homestay', 'booking_method': 'hybrid', 'content_type': 'homestay',
+            'object_id': str(self.homestay.pk), 'check_in_date': '2030-01-10', 'check_out_date': '2030-01-12',
+            'booking_date': '2030-01-10',
+            'adults': 2, 'children': 1, 'total_guests': 3, 'base_amount': '6000', 'total_amount': '6000',
+            'addons': {
+                'meal_plans': [self.meal_plan.pk],
+                'experiences': [{'experience_id': self.experience.pk, 'date': '2030-01-11'}],
+            },
+        }
+        payload.update(kwargs)
+        return self.client.post('/api/bookings/bookings/', payload, format='json')
+
+    def test_addons_are_added_on_top_of_the_quoted_stay(self):
+        response = self.post(tax_amount='300')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        booking = Booking.objects.get(booking_number=response.data['booking_number'])
+        self.assertEqual((booking.base_amount, booking.total_amount), (Decimal('8500'), Decimal('8800')))
+        self.assertEqual(
+            sorted(item.item_data['addon'] for item in booking.items.all()), ['experience', 'meal_plan', 'meal_plan']
+        )
+
+    def test_stay_amount_excludes_addons(self):
+        # Sending the add-ons' cost in base_amount doesn't match the stay quote
+        response = self.post(base_amount='8500', total_amount='8500')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('base_amount', response.data)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_addon_errors_reject_the_booking(self):
+        response = self.post(addons={'experiences': [{'experience_id': self.experience.pk, 'date': '2030-01-15'}]})
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['addons']['experiences'], ["Coffee Walk must be during the stay."])
+        self.assertFalse(Booking.objects.exists())
@@ -1,17 +1,17 @@
 """
 Homestay API views for WayanTrails platform.
 """
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import Homestay, HomestayRoom, HomestayAmenity, MealPlan, Experience
 from .serializers import (
     HomestayListSerializer, HomestayDetailSerializer, HomestayCreateUpdateSerializer,
     HomestayRoomSerializer, HomestayAmenitySerializer, MealPlanSerializer,
-    ExperienceSerializer
+    ExperienceSerializer, AddonQuoteSerializer
 )
 
 
@@ -64,6 +64,34 @@ class HomestayViewSet(viewsets.ModelViewSet):
         serializer = HomestayListSerializer(featured_homestays, many=True, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'], permission_classes=[AllowAny])
+    def addon_quote(self, request, slug=None):
+        """
+        Price meal plans and experiences for a stay, line by line.
+        POST /api/homestays/homestays/{slug}/addon_quote/
+        """
+        from .addons import AddonError, price_addons
+
+        homestay = self.get_object()
+        serializer = AddonQuoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            quote = price_addons(
+                homestay,
+                data['check_in_date'],
+                data['check_out_date'],
+                data['adults'],
+                data['children'],
+                meal_plans=data['meal_plans'],
+                experiences=data['experiences']
+            )
+        except AddonError as e:
+            return Response(e.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'homestay': homestay.slug, **quote})
+
 
 class HomestayRoomViewSet(viewsets.ModelViewSet):
     """ViewSet for homestay room operations."""
@@ -1,3 +1,48 @@
+"""
+Admin configuration for Rentals app.
+"""
 from django.contrib import admin
+from .models import RentalProvider, Vehicle, VehicleRental
 
-# Register your models here.
+
+@admin.register(RentalProvider)
+class RentalProviderAdmin(admin.ModelAdmin):
+    """Admin interface for RentalProvider model."""
+
+    list_display = ['name', 'contact_person', 'phone', 'commission_rate', 'is_verified']
+    list_filter = ['is_verified']
+    search_fields = ['name', 'contact_person', 'phone', 'license_number']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(Vehicle)
+class VehicleAdmin(admin.ModelAdmin):
+    """Admin interface for Vehicle model."""
+
+    list_display = [
+        'name',
+        'provider',
+        'vehicle_type',
+        'registration_number',
+        'price_per_day',
+        'price_per_hour',
+        'is_available',
+        'is_active',
+    ]
+    list_filter = ['vehicle_type', 'fuel_type', 'is_available', 'is_active', 'provider']
+    search_fields = ['name', 'brand', 'model', 'registration_number']
+    list_select_related = ['provider']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(VehicleRental)
+class VehicleRentalAdmin(admin.ModelAdmin):
+    """Admin interface for VehicleRental model."""
+
+    list_display = ['vehicle', 'start_at', 'end_at', 'status', 'total_amount', 'booking', 'user']
+    list_filter = ['status', 'vehicle__vehicle_type']
+    search_fields = ['vehicle__name', 'vehicle__registration_number', 'booking__booking_number']
+    list_select_related = ['vehicle', 'booking', 'user']
+    raw_id_fields = ['vehicle', 'booking', 'user']
+    readonly_fields = ['created_at', 'updated_at']
+    date_hierarchy = 'start_at'
@@ -0,0 +1,163 @@
+"""
+Vehicle availability and pricing over datetime intervals.
+
+Every reservation is a VehicleRental interval [start_at, end_at). Two
+intervals overlap when one starts before the other ends and ends after it
+starts, so:
+
+* available_vehicles() finds the free vehicles of a fleet with one
+  anti-join (NOT EXISTS an overlapping reserved interval) served by the
+  (vehicle, status, start_at, end_at) index, however large the fleet.
+* busy_intervals() loads the reserved intervals of many vehicles over a
+  window in one query as sorted lists per vehicle, for the gap sweep in
+  core.intervals.
+* reserve_vehicle() locks the vehicle row before its overlap check, so two
+  concurrent requests for the same hours can't both succeed.
+
+quote_rental() prices an interval: hourly up to a day (capped at the day
+rate), whole days beyond that plus leftover hours, less the vehicle's
+weekly (7+ days) or monthly (30+ days) discount.
+"""
+import logging
+import math
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Vehicle, VehicleRental
+
+logger = logging.getLogger(__name__)
+
+TWO_PLACES = Decimal('0.01')
+
+# Rental days that earn each discount tier
+WEEKLY_DAYS = 7
+MONTHLY_DAYS = 30
+
+
+class VehicleUnavailableError(Exception):
+    """Raised when a vehicle is already rented for part of an interval."""
+
+
+def _overlapping(start_at, end_at):
+    return VehicleRental.objects.filter(status='reserved', start_at__lt=end_at, end_at__gt=start_at)
+
+
+def quote_rental(vehicle, start_at, end_at):
+    """
+    Price a rental of `vehicle` for [start_at, end_at).
+
+    Time is charged in whole hours. Without an hourly rate any part-day is
+    charged as a full day.
+
+    Returns:
+        dict: hours, days, extra_hours, base_amount, discount_percent,
+        discount_amount, total_amount and security_deposit
+    """
+    hours = max(1, math.ceil((end_at - start_at).total_seconds() / 3600))
+    days, extra_hours = divmod(hours, 24)
+    price_per_day = vehicle.price_per_day
+    price_per_hour = vehicle.price_per_hour
+
+    extra = Decimal('0')
+    if extra_hours:
+        extra = min(extra_hours * price_per_hour, price_per_day) if price_per_hour else price_per_day
+    base_amount = days * price_per_day + extra
+
+    # Tiers go by days charged, counting a leftover part-day as a day
+    charged_days = days + (1 if extra_hours else 0)
+    if charged_days >= MONTHLY_DAYS and vehicle.monthly_discount:
+        discount_percent = vehicle.monthly_discount
+    elif charged_days >= WEEKLY_DAYS and vehicle.weekly_discount:
+        discount_percent = vehicle.weekly_discount
+    else:
+        discount_percent = Decimal('0')
+    discount_amount = (base_amount * discount_percent / 100).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+    return {
+        'hours': hours,
+        'days': days,
+        'extra_hours': extra_hours,
+        'base_amount': base_amount.quantize(TWO_PLACES),
+        'discount_percent': discount_percent,
+        'discount_amount': discount_amount,
+        'total_amount': (base_amount - discount_amount).quantize(TWO_PLACES),
+        'security_deposit': vehicle.security_deposit,
+    }
+
+
+def available_vehicles(start_at, end_at, queryset=None):
+    """
+    Vehicles free for the whole of [start_at, end_at).
+
+    Args:
+        queryset: Vehicles to search (default: all active, available vehicles)
+
+    Returns:
+        QuerySet of Vehicle
+    """
+    if queryset is None:
+        queryset = Vehicle.objects.filter(is_active=True, is_available=True)
+    return queryset.exclude(Exists(_overlapping(start_at, end_at).filter(vehicle=OuterRef('pk'))))
+
+
+def is_vehicle_free(vehicle_id, start_at, end_at):
+    return not _overlapping(start_at, end_at).filter(vehicle_id=vehicle_id).exists()
+
+
+def busy_intervals(vehicle_ids, start_at, end_at):
+    """
+    Reserved intervals touching [start_at, end_at) for many vehicles, in one query.
+
+    Returns:
+        dict: {vehicle_id: [(start_at, end_at), ...]} sorted by start
+    """
+    intervals = defaultdict(list)
+    for vehicle_id, interval_start, interval_end in _overlapping(start_at, end_at).filter(
+        vehicle_id__in=vehicle_ids
+    ).order_by('vehicle_id', 'start_at').values_list('vehicle_id', 'start_at', 'end_at'):
+        intervals[vehicle_id].append((interval_start, interval_end))
+    return dict(intervals)
+
+
+def reserve_vehicle(vehicle, start_at, end_at, booking=None, user=None):
+    """
+    Reserve a vehicle for [start_at, end_at) at its quoted price.
+
+    Returns:
+        VehicleRental
+
+    Raises:
+        VehicleUnavailableError: The vehicle is off the fleet or already rented then
+    """
+    with transaction.atomic():
+        # The vehicle row lock serialises reservations of the same vehicle
+        vehicle = Vehicle.objects.select_for_update().get(pk=vehicle.pk)
+        if not (vehicle.is_active and vehicle.is_available):
+            raise VehicleUnavailableError(f"{vehicle} is not available for rent")
+        if not is_vehicle_free(vehicle.pk, start_at, end_at):
+            raise VehicleUnavailableError(
+                f"{vehicle} is already rented between {start_at:%Y-%m-%d %H:%M} and {end_at:%Y-%m-%d %H:%M}"
+            )
+
+        quote = quote_rental(vehicle, start_at, end_at)
+        rental = VehicleRental.objects.create(
+            vehicle=vehicle,
+            booking=booking,
+            user=user,
+            start_at=start_at,
+            end_at=end_at,
+            base_amount=quote['base_amount'],
+            discount_amount=quote['discount_amount'],
+            total_amount=quote['total_amount']
+        )
+
+    logger.info(f"Reserved {vehicle} from {start_at} to {end_at} (rental #{rental.pk})")
+    return rental
+
+
+def release_rentals(booking_ids):
+    """Free the vehicles reserved for bookings that fell through."""
+    return VehicleRental.objects.filter(booking_id__in=list(booking_ids), status='reserved').update(status='released')
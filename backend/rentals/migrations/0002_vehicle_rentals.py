@@ -0,0 +1,121 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0017_inventory_hold_start_time"),
+        ("rentals", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VehicleRental",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                ("start_at", models.DateTimeField(verbose_name="start")),
+                ("end_at", models.DateTimeField(verbose_name="end")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("reserved", "Reserved"), ("released", "Released")],
+                        default="reserved",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "base_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=10,
+                        verbose_name="base amount",
+                    ),
+                ),
+                (
+                    "discount_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=10,
+                        verbose_name="discount amount",
+                    ),
+                ),
+                (
+                    "total_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=10,
+                        verbose_name="total amount",
+                    ),
+                ),
+                (
+                    "booking",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="vehicle_rentals",
+                        to="bookings.booking",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="vehicle_rentals",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "vehicle",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rentals",
+                        to="rentals.vehicle",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Vehicle Rental",
+                "verbose_name_plural": "Vehicle Rentals",
+                "db_table": "rental_vehicle_rentals",
+                "ordering": ["vehicle", "start_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["vehicle", "status", "start_at", "end_at"],
+                        name="rental_vehi_vehicle_b38749_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "start_at", "end_at"],
+                        name="rental_vehi_status_ac4a9c_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
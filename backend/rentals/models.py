@@ -127,3 +127,46 @@ class Vehicle(TimeStampedModel, SlugModel, PublishableModel, SEOModel):
     def total_reviews(self):
         """Get total number of approved reviews."""
         return self.reviews.filter(is_approved=True).count()
+
+
+class VehicleRental(TimeStampedModel):
+    """
+    A vehicle taken for a datetime interval [start_at, end_at).
+
+    Reserved intervals of one vehicle never overlap (see rentals.availability).
+    """
+
+    STATUS_CHOICES = [
+        ('reserved', 'Reserved'),
+        ('released', 'Released'),
+    ]
+
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='rentals')
+    booking = models.ForeignKey(
+        'bookings.Booking', on_delete=models.CASCADE, related_name='vehicle_rentals', blank=True, null=True
+    )
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='vehicle_rentals', blank=True, null=True)
+
+    start_at = models.DateTimeField(_('start'))
+    end_at = models.DateTimeField(_('end'))
+    status = models.CharField(_('status'), max_length=20, choices=STATUS_CHOICES, default='reserved')
+
+    # Price quoted when reserved
+    base_amount = models.DecimalField(_('base amount'), max_digits=10, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(_('discount amount'), max_digits=10, decimal_places=2, default=0)
+    total_amount = models.DecimalField(_('total amount'), max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'rental_vehicle_rentals'
+        verbose_name = _('Vehicle Rental')
+        verbose_name_plural = _('Vehicle Rentals')
+        ordering = ['vehicle', 'start_at']
+        indexes = [
+            # Per-vehicle overlap checks: start_at < end AND end_at > start
+            models.Index(fields=['vehicle', 'status', 'start_at', 'end_at']),
+            # Fleet-wide interval scans
+            models.Index(fields=['status', 'start_at', 'end_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle} {self.start_at:%Y-%m-%d %H:%M}→{self.end_at:%Y-%m-%d %H:%M} ({self.status})"
@@ -0,0 +1,117 @@
+"""
+Rental serializers for WayanTrails API.
+"""
+from rest_framework import serializers
+from .models import Vehicle, VehicleRental
+
+
+class VehicleListSerializer(serializers.ModelSerializer):
+    """Serializer for vehicle list view (minimal data for performance)."""
+
+    cover_image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Vehicle
+        fields = [
+            'id', 'name', 'slug', 'vehicle_type', 'brand', 'model', 'year',
+            'fuel_type', 'transmission', 'seating_capacity',
+            'price_per_day', 'price_per_hour', 'cover_image',
+            'is_available', 'is_featured'
+        ]
+
+    def get_cover_image(self, obj):
+        """Return full URL for cover image."""
+        if obj.cover_image:
+            # If it's already a full URL (http/https), return as is
+            if str(obj.cover_image).startswith(('http://', 'https://')):
+                return str(obj.cover_image)
+            # Otherwise, build the full URL
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.cover_image.url)
+            return obj.cover_image.url
+        return None
+
+
+class VehicleDetailSerializer(VehicleListSerializer):
+    """Serializer for vehicle detail view."""
+
+    provider_name = serializers.CharField(source='provider.name', read_only=True)
+
+    class Meta(VehicleListSerializer.Meta):
+        fields = VehicleListSerializer.Meta.fields + [
+            'provider', 'provider_name', 'color', 'mileage',
+            'weekly_discount', 'monthly_discount', 'security_deposit',
+            'has_ac', 'has_music_system', 'has_gps', 'has_toolkit',
+            'minimum_age', 'license_required', 'advance_booking_hours', 'gallery_images'
+        ]
+
+
+class RentalIntervalSerializer(serializers.Serializer):
+    """A requested rental interval (query parameters or request body)."""
+
+    start_at = serializers.DateTimeField()
+    end_at = serializers.DateTimeField()
+
+    def validate(self, data):
+        """Validate the interval."""
+        from datetime import timedelta
+        from django.conf import settings
+
+        if data['end_at'] <= data['start_at']:
+            raise serializers.ValidationError("end_at must be after start_at.")
+        if data['end_at'] - data['start_at'] > timedelta(days=settings.RENTAL_MAX_DAYS):
+            raise serializers.ValidationError(f"Rentals can be at most {settings.RENTAL_MAX_DAYS} days.")
+        return data
+
+
+class VehicleSearchSerializer(RentalIntervalSerializer):
+    """Fleet availability search."""
+
+    vehicle_type = serializers.ChoiceField(choices=Vehicle.VEHICLE_TYPES, required=False)
+    min_seats = serializers.IntegerField(min_value=1, required=False)
+
+
+class VehicleReserveSerializer(RentalIntervalSerializer):
+    """Reserve a vehicle, optionally for an existing rental booking."""
+
+    booking_id = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        """Validate the interval and the booking."""
+        from datetime import timedelta
+        from django.utils import timezone
+
+        data = super().validate(data)
+        vehicle = self.context['vehicle']
+        if data['start_at'] < timezone.now() + timedelta(hours=vehicle.advance_booking_hours):
+            raise serializers.ValidationError(
+                f"This vehicle must be booked at least {vehicle.advance_booking_hours} hours ahead."
+            )
+
+        booking_id = data.pop('booking_id', None)
+        if booking_id is not None:
+            from bookings.models import Booking
+
+            request = self.context['request']
+            bookings = Booking.objects.filter(pk=booking_id, content_type='rental', object_id=str(vehicle.pk))
+            if not request.user.is_staff:
+                bookings = bookings.filter(user=request.user)
+            data['booking'] = bookings.exclude(status__in=['cancelled', 'refunded', 'no_show']).first()
+            if data['booking'] is None:
+                raise serializers.ValidationError({'booking_id': "No open rental booking for this vehicle."})
+        return data
+
+
+class VehicleRentalSerializer(serializers.ModelSerializer):
+    """Serializer for reserved rental intervals."""
+
+    vehicle_name = serializers.CharField(source='vehicle.name', read_only=True)
+
+    class Meta:
+        model = VehicleRental
+        fields = [
+            'id', 'vehicle', 'vehicle_name', 'booking', 'start_at', 'end_at', 'status',
+            'base_amount', 'discount_amount', 'total_amount', 'created_at'
+        ]
+        read_only_fields = fields
@@ -1,3 +1,149 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+
+from .availability import VehicleUnavailableError, available_vehicles, busy_intervals, quote_rental, reserve_vehicle
+from .models import RentalProvider, Vehicle, VehicleRental
+
+
+def create_vehicle(provider=None, **kwargs):
+    if provider is None:
+        provider = RentalProvider.objects.create(
+            name='Wayanad Wheels', slug='wayanad-wheels', contact_person='Owner', phone='+919876543210',
+            license_number='KL12-0001', address_line_1='Kalpetta', city='Kalpetta', postal_code='673121'
+        )
+    fields = dict(
+        provider=provider, name='Activa', slug='activa', vehicle_type='bike', brand='Honda', model='Activa',
+        year=2024, color='Red', fuel_type='petrol', transmission='automatic', seating_capacity=2,
+        registration_number='KL12A0001', insurance_valid_till=date(2031, 1, 1),
+        pollution_certificate_valid_till=date(2031, 1, 1), price_per_day=Decimal('500'),
+        price_per_hour=Decimal('100'), weekly_discount=Decimal('10'), monthly_discount=Decimal('20'),
+        security_deposit=Decimal('1000'), cover_image='vehicles/covers/activa.jpg'
+    )
+    fields.update(kwargs)
+    return Vehicle.objects.create(**fields)
+
+
+def at(day, hour=9, minute=0):
+    return timezone.make_aware(datetime(2030, 1, day, hour, minute))
+
+
+class QuoteRentalTests(TestCase):
+    def setUp(self):
+        self.vehicle = create_vehicle()
+
+    def quote(self, duration):
+        return quote_rental(self.vehicle, at(1), at(1) + duration)
+
+    def test_hours_round_up_and_cap_at_the_day_rate(self):
+        self.assertEqual(self.quote(timedelta(minutes=10))['hours'], 1)
+
+        quote = self.quote(timedelta(minutes=90))
+        self.assertEqual((quote['hours'], quote['total_amount']), (2, Decimal('200.00')))
+
+        # Six hours at 100 would be 600; a part-day never costs more than a day
+        self.assertEqual(self.quote(timedelta(hours=6))['total_amount'], Decimal('500.00'))
+
+        quote = self.quote(timedelta(hours=26))
+        self.assertEqual((quote['days'], quote['extra_hours']), (1, 2))
+        self.assertEqual(quote['total_amount'], Decimal('700.00'))
+
+    def test_without_an_hourly_rate_a_part_day_is_a_day(self):
+        self.vehicle.price_per_hour = None
+
+        self.assertEqual(self.quote(timedelta(hours=2))['total_amount'], Decimal('500.00'))
+        self.assertEqual(self.quote(timedelta(hours=26))['total_amount'], Decimal('1000.00'))
+
+    def test_weekly_tier_starts_at_seven_charged_days(self):
+        six_days = self.quote(timedelta(days=6))
+        self.assertEqual((six_days['discount_percent'], six_days['total_amount']), (Decimal('0'), Decimal('3000.00')))
+
+        seven_days = self.quote(timedelta(days=7))
+        self.assertEqual(seven_days['discount_percent'], Decimal('10'))
+        self.assertEqual(
+            (seven_days['discount_amount'], seven_days['total_amount']), (Decimal('350.00'), Decimal('3150.00'))
+        )
+
+        # A leftover hour on the sixth day counts as a seventh day
+        self.assertEqual(self.quote(timedelta(days=6, hours=1))['discount_percent'], Decimal('10'))
+
+    def test_monthly_tier_starts_at_thirty_charged_days(self):
+        self.assertEqual(self.quote(timedelta(days=29))['discount_percent'], Decimal('10'))
+        self.assertEqual(self.quote(timedelta(days=30))['discount_percent'], Decimal('20'))
+        self.assertEqual(self.quote(timedelta(days=29, hours=1))['discount_percent'], Decimal('20'))
+
+        # Without a monthly discount the weekly one still applies
+        self.vehicle.monthly_discount = Decimal('0')
+        self.assertEqual(self.quote(timedelta(days=30))['discount_percent'], Decimal('10'))
+
+
+class VehicleAvailabilityTests(TestCase):
+    def setUp(self):
+        self.rented = create_vehicle()
+        self.free = create_vehicle(
+            provider=self.rented.provider, name='Jupiter', slug='jupiter', registration_number='KL12A0002'
+        )
+        reserve_vehicle(self.rented, at(1, 10), at(1, 14))
+
+    def free_ids(self, start_at, end_at):
+        return set(available_vehicles(start_at, end_at).values_list('pk', flat=True))
+
+    def test_intervals_are_half_open(self):
+        both = {self.rented.pk, self.free.pk}
+
+        # Back-to-back rentals on either side don't overlap
+        self.assertEqual(self.free_ids(at(1, 8), at(1, 10)), both)
+        self.assertEqual(self.free_ids(at(1, 14), at(1, 16)), both)
+
+        self.assertEqual(self.free_ids(at(1, 13, 59), at(1, 16)), {self.free.pk})
+        self.assertEqual(self.free_ids(at(1, 9), at(1, 10, 1)), {self.free.pk})
+        self.assertEqual(self.free_ids(at(1, 11), at(1, 12)), {self.free.pk})
+        self.assertEqual(self.free_ids(at(1, 6), at(1, 18)), {self.free.pk})
+
+    def test_released_rentals_free_the_vehicle(self):
+        VehicleRental.objects.update(status='released')
+
+        self.assertEqual(self.free_ids(at(1, 11), at(1, 12)), {self.rented.pk, self.free.pk})
+        self.assertEqual(busy_intervals([self.rented.pk], at(1, 0), at(2, 0)), {})
+
+    def test_busy_intervals_per_vehicle(self):
+        reserve_vehicle(self.rented, at(1, 16), at(1, 18))
+
+        self.assertEqual(
+            busy_intervals([self.rented.pk, self.free.pk], at(1, 12), at(2, 0)),
+            {self.rented.pk: [(at(1, 10), at(1, 14)), (at(1, 16), at(1, 18))]}
+        )
+
+
+class ReserveVehicleTests(TestCase):
+    def setUp(self):
+        self.vehicle = create_vehicle()
+
+    def test_overlapping_reservation_is_refused(self):
+        reserve_vehicle(self.vehicle, at(1, 10), at(1, 14))
+
+        with self.assertRaises(VehicleUnavailableError):
+            reserve_vehicle(self.vehicle, at(1, 13), at(1, 15))
+        with self.assertRaises(VehicleUnavailableError):
+            reserve_vehicle(self.vehicle, at(1, 11), at(1, 12))
+
+        reserve_vehicle(self.vehicle, at(1, 14), at(1, 15))
+        self.assertEqual(VehicleRental.objects.filter(status='reserved').count(), 2)
+
+    def test_reservation_stores_the_quote(self):
+        rental = reserve_vehicle(self.vehicle, at(1), at(8))
+
+        quote = quote_rental(self.vehicle, at(1), at(8))
+        self.assertEqual(
+            (rental.base_amount, rental.discount_amount, rental.total_amount),
+            (quote['base_amount'], quote['discount_amount'], quote['total_amount'])
+        )
+
+    def test_vehicle_off_the_fleet_is_refused(self):
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(is_available=False)
 
-# Create your tests here.
+        with self.assertRaises(VehicleUnavailableError):
+            reserve_vehicle(self.vehicle, at(1, 10), at(1, 14))
+        self.assertFalse(VehicleRental.objects.exists())
@@ -1,6 +1,10 @@
-from django.urls import path
-from . import views
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import VehicleViewSet
+
+router = DefaultRouter()
+router.register(r'vehicles', VehicleViewSet, basename='vehicle')
 
 urlpatterns = [
-    # Rental URLs will be added here
-]
\ No newline at end of file
+    path('', include(router.urls)),
+]
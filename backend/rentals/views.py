@@ -1,3 +1,114 @@
-from django.shortcuts import render
+"""
+Rental API views for WayanTrails platform.
+"""
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from django_filters.rest_framework import DjangoFilterBackend
 
-# Create your views here.
+from core.intervals import free_windows
+
+from .availability import (
+    VehicleUnavailableError, available_vehicles, busy_intervals,
+    is_vehicle_free, quote_rental, reserve_vehicle
+)
+from .models import Vehicle
+from .serializers import (
+    VehicleListSerializer, VehicleDetailSerializer, RentalIntervalSerializer,
+    VehicleSearchSerializer, VehicleReserveSerializer, VehicleRentalSerializer
+)
+
+
+class VehicleViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for vehicle listings, availability and reservations."""
+
+    queryset = Vehicle.objects.filter(is_active=True).select_related('provider')
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['vehicle_type', 'fuel_type', 'transmission', 'provider', 'is_featured']
+    search_fields = ['name', 'brand', 'model']
+    ordering_fields = ['name', 'price_per_day', 'price_per_hour', 'seating_capacity', 'created_at']
+    ordering = ['-is_featured', 'vehicle_type', 'price_per_day']
+    lookup_field = 'slug'
+
+    def get_serializer_class(self):
+        """Return appropriate serializer based on action."""
+        if self.action == 'retrieve':
+            return VehicleDetailSerializer
+        return VehicleListSerializer
+
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """
+        Find vehicles free for a whole interval, with their price.
+        GET /api/rentals/vehicles/availability/?vehicle_type=bike&start_at=...&end_at=...
+        """
+        search = VehicleSearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        start_at, end_at = search.validated_data['start_at'], search.validated_data['end_at']
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(is_available=True)
+        if search.validated_data.get('vehicle_type'):
+            queryset = queryset.filter(vehicle_type=search.validated_data['vehicle_type'])
+        if search.validated_data.get('min_seats'):
+            queryset = queryset.filter(seating_capacity__gte=search.validated_data['min_seats'])
+
+        vehicles = list(available_vehicles(start_at, end_at, queryset))
+        data = VehicleListSerializer(vehicles, many=True, context={'request': request}).data
+        for vehicle, item in zip(vehicles, data):
+            item['quote'] = quote_rental(vehicle, start_at, end_at)
+
+        return Response({
+            'start_at': start_at,
+            'end_at': end_at,
+            'count': len(data),
+            'results': data
+        })
+
+    @action(detail=True, methods=['get'])
+    def quote(self, request, slug=None):
+        """Price a rental interval and say whether the vehicle is free for it."""
+        vehicle = self.get_object()
+        interval = RentalIntervalSerializer(data=request.query_params)
+        interval.is_valid(raise_exception=True)
+        start_at, end_at = interval.validated_data['start_at'], interval.validated_data['end_at']
+
+        return Response({
+            'vehicle': vehicle.slug,
+            'start_at': start_at,
+            'end_at': end_at,
+            'available': vehicle.is_available and is_vehicle_free(vehicle.pk, start_at, end_at),
+            **quote_rental(vehicle, start_at, end_at)
+        })
+
+    @action(detail=True, methods=['get'])
+    def schedule(self, request, slug=None):
+        """Reserved and free windows of a vehicle over an interval."""
+        vehicle = self.get_object()
+        interval = RentalIntervalSerializer(data=request.query_params)
+        interval.is_valid(raise_exception=True)
+        start_at, end_at = interval.validated_data['start_at'], interval.validated_data['end_at']
+
+        busy = busy_intervals([vehicle.pk], start_at, end_at).get(vehicle.pk, [])
+        return Response({
+            'vehicle': vehicle.slug,
+            'start_at': start_at,
+            'end_at': end_at,
+            'reserved': [{'start_at': start, 'end_at': end} for start, end in busy],
+            'free': [{'start_at': start, 'end_at': end} for start, end in free_windows(busy, start_at, end_at)]
+        })
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def reserve(self, request, slug=None):
+        """Reserve the vehicle for an interval at its quoted price."""
+        vehicle = self.get_object()
+        serializer = VehicleReserveSerializer(data=request.data, context={'request': request, 'vehicle': vehicle})
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            rental = reserve_vehicle(vehicle, user=request.user, **serializer.validated_data)
+        except VehicleUnavailableError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return Response(VehicleRentalSerializer(rental).data, status=status.HTTP_201_CREATED)
@@ -1,3 +1,34 @@
+"""
+Admin configuration for Services app.
+"""
 from django.contrib import admin
+from .models import Service, ServiceSchedule, ServiceAppointment
 
-# Register your models here.
+
+class ServiceScheduleInline(admin.TabularInline):
+    model = ServiceSchedule
+    extra = 0
+
+
+@admin.register(Service)
+class ServiceAdmin(admin.ModelAdmin):
+    """Admin interface for Service model."""
+
+    list_display = ['name', 'service_type', 'provider_name', 'city', 'price_per_hour', 'price_per_day', 'is_active']
+    list_filter = ['service_type', 'is_active', 'is_featured', 'city']
+    search_fields = ['name', 'provider_name', 'phone', 'city']
+    readonly_fields = ['created_at', 'updated_at']
+    inlines = [ServiceScheduleInline]
+
+
+@admin.register(ServiceAppointment)
+class ServiceAppointmentAdmin(admin.ModelAdmin):
+    """Admin interface for ServiceAppointment model."""
+
+    list_display = ['service', 'start_at', 'end_at', 'status', 'total_amount', 'booking', 'user']
+    list_filter = ['status', 'service__service_type']
+    search_fields = ['service__name', 'service__provider_name', 'booking__booking_number']
+    list_select_related = ['service', 'booking', 'user']
+    raw_id_fields = ['service', 'booking', 'user']
+    readonly_fields = ['created_at', 'updated_at']
+    date_hierarchy = 'start_at'
@@ -0,0 +1,154 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0017_inventory_hold_start_time"),
+        ("services", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServiceAppointment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                ("start_at", models.DateTimeField(verbose_name="start")),
+                ("end_at", models.DateTimeField(verbose_name="end")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("reserved", "Reserved"), ("released", "Released")],
+                        default="reserved",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "total_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=10,
+                        verbose_name="total amount",
+                    ),
+                ),
+                (
+                    "booking",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="service_appointments",
+                        to="bookings.booking",
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="appointments",
+                        to="services.service",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="service_appointments",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Service Appointment",
+                "verbose_name_plural": "Service Appointments",
+                "db_table": "service_appointments",
+                "ordering": ["service", "start_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["service", "status", "start_at", "end_at"],
+                        name="service_app_service_ea53d1_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "start_at", "end_at"],
+                        name="service_app_status_ffb236_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ServiceSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, "Monday"),
+                            (1, "Tuesday"),
+                            (2, "Wednesday"),
+                            (3, "Thursday"),
+                            (4, "Friday"),
+                            (5, "Saturday"),
+                            (6, "Sunday"),
+                        ],
+                        verbose_name="weekday",
+                    ),
+                ),
+                ("start_time", models.TimeField(verbose_name="start time")),
+                ("end_time", models.TimeField(verbose_name="end time")),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedules",
+                        to="services.service",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Service Schedule",
+                "verbose_name_plural": "Service Schedules",
+                "db_table": "service_schedules",
+                "ordering": ["service", "weekday", "start_time"],
+                "indexes": [
+                    models.Index(
+                        fields=["service", "weekday"],
+                        name="service_sch_service_fe4717_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -2,10 +2,13 @@
 Local service models for WayanTrails platform.
 Guides, taxi services, photographers, etc.
 """
+from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from core.models import TimeStampedModel, AddressModel, SlugModel, PublishableModel
 
+User = get_user_model()
+
 
 class Service(TimeStampedModel, AddressModel, SlugModel, PublishableModel):
     """Local services like guides, taxis, photographers."""
@@ -40,3 +43,75 @@ class Service(TimeStampedModel, AddressModel, SlugModel, PublishableModel):
 
     def __str__(self):
         return self.name
+
+
+class ServiceSchedule(models.Model):
+    """Weekly working hours of a service provider; a day may have several windows."""
+
+    WEEKDAYS = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='schedules')
+    weekday = models.PositiveSmallIntegerField(_('weekday'), choices=WEEKDAYS)
+    start_time = models.TimeField(_('start time'))
+    end_time = models.TimeField(_('end time'))
+
+    class Meta:
+        db_table = 'service_schedules'
+        verbose_name = _('Service Schedule')
+        verbose_name_plural = _('Service Schedules')
+        ordering = ['service', 'weekday', 'start_time']
+        indexes = [
+            models.Index(fields=['service', 'weekday']),
+        ]
+
+    def __str__(self):
+        return f"{self.service} {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class ServiceAppointment(TimeStampedModel):
+    """
+    A provider engaged for a datetime interval [start_at, end_at).
+
+    Reserved appointments of one service never overlap (see services.scheduling).
+    """
+
+    STATUS_CHOICES = [
+        ('reserved', 'Reserved'),
+        ('released', 'Released'),
+    ]
+
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='appointments')
+    booking = models.ForeignKey(
+        'bookings.Booking', on_delete=models.CASCADE, related_name='service_appointments', blank=True, null=True
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, related_name='service_appointments', blank=True, null=True
+    )
+
+    start_at = models.DateTimeField(_('start'))
+    end_at = models.DateTimeField(_('end'))
+    status = models.CharField(_('status'), max_length=20, choices=STATUS_CHOICES, default='reserved')
+    total_amount = models.DecimalField(_('total amount'), max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'service_appointments'
+        verbose_name = _('Service Appointment')
+        verbose_name_plural = _('Service Appointments')
+        ordering = ['service', 'start_at']
+        indexes = [
+            # Per-provider conflict checks: start_at < end AND end_at > start
+            models.Index(fields=['service', 'status', 'start_at', 'end_at']),
+            # Busy intervals of every provider in a search horizon
+            models.Index(fields=['status', 'start_at', 'end_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.service} {self.start_at:%Y-%m-%d %H:%M}→{self.end_at:%Y-%m-%d %H:%M} ({self.status})"
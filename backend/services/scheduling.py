@@ -0,0 +1,211 @@
+"""
+Provider schedules and appointment booking for local services.
+
+Each Service is one provider with weekly working hours (ServiceSchedule)
+and reserved ServiceAppointment intervals [start_at, end_at):
+
+* book_service() locks the provider row, then checks the interval lies in
+  working hours and overlaps no reserved appointment (served by the
+  (service, status, start_at, end_at) index).
+* next_available() finds the earliest free slots across every provider of
+  a service type with three queries in all (providers, their schedules and
+  their appointments in the horizon) and one merge pass over each
+  provider's sorted working windows and busy intervals (core.intervals),
+  however many providers there are.
+"""
+import heapq
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.intervals import covers, subtract
+
+from .models import Service, ServiceAppointment, ServiceSchedule
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceUnavailableError(Exception):
+    """Raised when a provider isn't working or is already booked for an interval."""
+
+
+def _overlapping(start_at, end_at):
+    return ServiceAppointment.objects.filter(status='reserved', start_at__lt=end_at, end_at__gt=start_at)
+
+
+def quote_service(service, start_at, end_at):
+    """
+    Price an appointment: whole hours at the hourly rate, or started days
+    at the day rate, whichever is cheaper (only the rates the provider sets).
+
+    Returns:
+        dict: hours, days and total_amount
+    """
+    hours = max(1, math.ceil((end_at - start_at).total_seconds() / 3600))
+    last_day = timezone.localtime(end_at - timedelta(microseconds=1)).date()
+    days = (last_day - timezone.localtime(start_at).date()).days + 1
+
+    prices = []
+    if service.price_per_hour:
+        prices.append(hours * service.price_per_hour)
+    if service.price_per_day:
+        prices.append(days * service.price_per_day)
+    return {
+        'hours': hours,
+        'days': days,
+        'total_amount': min(prices) if prices else Decimal('0.00'),
+    }
+
+
+def working_windows(service_ids, start_at, end_at):
+    """
+    Working hours of many providers within [start_at, end_at), in one query.
+
+    Returns:
+        dict: {service_id: [(start, end), ...]} sorted by start
+    """
+    weekly = defaultdict(list)
+    for service_id, weekday, start_time, end_time in ServiceSchedule.objects.filter(
+        service_id__in=service_ids
+    ).values_list('service_id', 'weekday', 'start_time', 'end_time'):
+        weekly[service_id].append((weekday, start_time, end_time))
+
+    first_day = timezone.localtime(start_at).date()
+    span = (timezone.localtime(end_at).date() - first_day).days + 1
+    days = [first_day + timedelta(days=offset) for offset in range(span)]
+
+    windows = {}
+    for service_id, hours in weekly.items():
+        service_windows = []
+        for day in days:
+            for weekday, start_time, end_time in hours:
+                if day.weekday() != weekday:
+                    continue
+                window_start = max(start_at, timezone.make_aware(datetime.combine(day, start_time)))
+                window_end = min(end_at, timezone.make_aware(datetime.combine(day, end_time)))
+                if window_start < window_end:
+                    service_windows.append((window_start, window_end))
+        windows[service_id] = sorted(service_windows)
+    return windows
+
+
+def busy_intervals(service_ids, start_at, end_at):
+    """
+    Reserved appointments touching [start_at, end_at) for many providers, in one query.
+
+    Returns:
+        dict: {service_id: [(start_at, end_at), ...]} sorted by start
+    """
+    intervals = defaultdict(list)
+    for service_id, interval_start, interval_end in _overlapping(start_at, end_at).filter(
+        service_id__in=service_ids
+    ).order_by('service_id', 'start_at').values_list('service_id', 'start_at', 'end_at'):
+        intervals[service_id].append((interval_start, interval_end))
+    return dict(intervals)
+
+
+def free_intervals(service_ids, start_at, end_at, min_duration=None):
+    """Working time not yet booked, per provider: {service_id: [(start, end), ...]}."""
+    windows = working_windows(service_ids, start_at, end_at)
+    busy = busy_intervals(list(windows), start_at, end_at)
+    return {
+        service_id: subtract(service_windows, busy.get(service_id, []), min_duration)
+        for service_id, service_windows in windows.items()
+    }
+
+
+def _align(moment, step):
+    """Round up to the next multiple of `step` from local midnight."""
+    local = timezone.localtime(moment)
+    midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + math.ceil((local - midnight) / step) * step
+
+
+def next_available(service_type=None, duration=timedelta(hours=1), after=None, horizon_days=None, limit=5,
+                   queryset=None):
+    """
+    Earliest free slot of each provider, earliest first.
+
+    Args:
+        service_type: Restrict to this service type
+        duration: timedelta the slot must last
+        after: Earliest start (default now)
+        horizon_days: How far ahead to look (default SERVICE_SEARCH_HORIZON_DAYS)
+        limit: Most providers to return
+        queryset: Providers to search (default all active services)
+
+    Returns:
+        list: (start_at, end_at, Service) tuples
+    """
+    step = timedelta(minutes=settings.SERVICE_SLOT_MINUTES)
+    after = _align(after or timezone.now(), step)
+    until = after + timedelta(days=horizon_days or settings.SERVICE_SEARCH_HORIZON_DAYS)
+
+    if queryset is None:
+        queryset = Service.objects.filter(is_active=True)
+    if service_type:
+        queryset = queryset.filter(service_type=service_type)
+    services = {service.pk: service for service in queryset}
+    if not services:
+        return []
+
+    earliest = []
+    for service_id, windows in free_intervals(list(services), after, until, min_duration=duration).items():
+        for window_start, window_end in windows:
+            start = _align(window_start, step)
+            if start + duration <= window_end:
+                earliest.append((start, service_id))
+                break
+
+    return [
+        (start, start + duration, services[service_id])
+        for start, service_id in heapq.nsmallest(limit, earliest)
+    ]
+
+
+def book_service(service, start_at, end_at, booking=None, user=None):
+    """
+    Reserve a provider for [start_at, end_at) at the quoted price.
+
+    Returns:
+        ServiceAppointment
+
+    Raises:
+        ServiceUnavailableError: Outside working hours, or overlapping another appointment
+    """
+    with transaction.atomic():
+        # The provider row lock serialises bookings of the same provider
+        service = Service.objects.select_for_update().get(pk=service.pk)
+        if not service.is_active:
+            raise ServiceUnavailableError(f"{service} is not taking bookings")
+        if not covers(working_windows([service.pk], start_at, end_at).get(service.pk, []), start_at, end_at):
+            raise ServiceUnavailableError(f"{service} is not working for all of the requested time")
+        if _overlapping(start_at, end_at).filter(service=service).exists():
+            raise ServiceUnavailableError(
+                f"{service} is already booked between {start_at:%Y-%m-%d %H:%M} and {end_at:%Y-%m-%d %H:%M}"
+            )
+
+        appointment = ServiceAppointment.objects.create(
+            service=service,
+            booking=booking,
+            user=user,
+            start_at=start_at,
+            end_at=end_at,
+            total_amount=quote_service(service, start_at, end_at)['total_amount']
+        )
+
+    logger.info(f"Booked {service} from {start_at} to {end_at} (appointment #{appointment.pk})")
+    return appointment
+
+
+def release_appointments(booking_ids):
+    """Free the providers booked for bookings that fell through."""
+    return ServiceAppointment.objects.filter(
+        booking_id__in=list(booking_ids), status='reserved'
+    ).update(status='released')
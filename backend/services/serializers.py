@@ -0,0 +1,107 @@
+"""
+Local service serializers for WayanTrails API.
+"""
+from rest_framework import serializers
+from .models import Service, ServiceAppointment, ServiceSchedule
+
+
+class ServiceListSerializer(serializers.ModelSerializer):
+    """Serializer for service list view (minimal data for performance)."""
+
+    cover_image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Service
+        fields = [
+            'id', 'name', 'slug', 'service_type', 'provider_name',
+            'city', 'state', 'price_per_hour', 'price_per_day',
+            'cover_image', 'is_featured'
+        ]
+
+    def get_cover_image(self, obj):
+        """Return full URL for cover image."""
+        if obj.cover_image:
+            # If it's already a full URL (http/https), return as is
+            if str(obj.cover_image).startswith(('http://', 'https://')):
+                return str(obj.cover_image)
+            # Otherwise, build the full URL
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.cover_image.url)
+            return obj.cover_image.url
+        return None
+
+
+class ServiceScheduleSerializer(serializers.ModelSerializer):
+    """Serializer for provider working hours."""
+
+    weekday_display = serializers.CharField(source='get_weekday_display', read_only=True)
+
+    class Meta:
+        model = ServiceSchedule
+        fields = ['weekday', 'weekday_display', 'start_time', 'end_time']
+
+
+class ServiceDetailSerializer(ServiceListSerializer):
+    """Serializer for service detail view."""
+
+    schedules = ServiceScheduleSerializer(many=True, read_only=True)
+
+    class Meta(ServiceListSerializer.Meta):
+        fields = ServiceListSerializer.Meta.fields + [
+            'description', 'phone', 'email', 'address_line_1', 'schedules'
+        ]
+
+
+class NextAvailableSerializer(serializers.Serializer):
+    """Next available slot search across providers."""
+
+    service_type = serializers.ChoiceField(choices=Service.SERVICE_TYPES, required=False)
+    duration_minutes = serializers.IntegerField(min_value=15, max_value=24 * 60, default=60)
+    after = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=5)
+
+
+class ServiceBookSerializer(serializers.Serializer):
+    """Book a provider, optionally for an existing service booking."""
+
+    start_at = serializers.DateTimeField()
+    end_at = serializers.DateTimeField()
+    booking_id = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        """Validate the interval and the booking."""
+        from django.utils import timezone
+
+        if data['end_at'] <= data['start_at']:
+            raise serializers.ValidationError("end_at must be after start_at.")
+        if data['start_at'] < timezone.now():
+            raise serializers.ValidationError("start_at must be in the future.")
+
+        booking_id = data.pop('booking_id', None)
+        if booking_id is not None:
+            from bookings.models import Booking
+
+            request = self.context['request']
+            service = self.context['service']
+            bookings = Booking.objects.filter(pk=booking_id, content_type='service', object_id=str(service.pk))
+            if not request.user.is_staff:
+                bookings = bookings.filter(user=request.user)
+            data['booking'] = bookings.exclude(status__in=['cancelled', 'refunded', 'no_show']).first()
+            if data['booking'] is None:
+                raise serializers.ValidationError({'booking_id': "No open service booking for this provider."})
+        return data
+
+
+class ServiceAppointmentSerializer(serializers.ModelSerializer):
+    """Serializer for booked appointments."""
+
+    service_name = serializers.CharField(source='service.name', read_only=True)
+
+    class Meta:
+        model = ServiceAppointment
+        fields = [
+            'id', 'service', 'service_name', 'booking', 'start_at', 'end_at',
+            'status', 'total_amount', 'created_at'
+        ]
+        read_only_fields = fields
@@ -1,3 +1,108 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Service, ServiceAppointment, ServiceSchedule
+from .scheduling import ServiceUnavailableError, book_service, next_available
+
+
+def create_service(slug='guide', **kwargs):
+    """A guide working 09:00-17:00, Monday to Friday."""
+    fields = dict(
+        name=slug.title(), slug=slug, service_type='guide', description='Guide', provider_name='Provider',
+        phone='+919876543210', address_line_1='Kalpetta', city='Wayanad', postal_code='673121',
+        price_per_hour=Decimal('300'), price_per_day=Decimal('2000'), cover_image='services/covers/guide.jpg'
+    )
+    fields.update(kwargs)
+    service = Service.objects.create(**fields)
+    ServiceSchedule.objects.bulk_create([
+        ServiceSchedule(service=service, weekday=weekday, start_time=time(9), end_time=time(17))
+        for weekday in range(5)
+    ])
+    return service
+
+
+def at(day, hour, minute=0):
+    # 2030-01-07 is a Monday
+    return timezone.make_aware(datetime(2030, 1, day, hour, minute))
+
+
+class NextAvailableTests(TestCase):
+    def setUp(self):
+        self.service = create_service()
+
+    def first_slot(self, after, duration=timedelta(hours=1)):
+        start, end, service = next_available(duration=duration, after=after)[0]
+        self.assertEqual(service, self.service)
+        self.assertEqual(end - start, duration)
+        return start
+
+    def test_slots_start_on_the_slot_grid(self):
+        self.assertEqual(self.first_slot(at(7, 9, 7)), at(7, 9, 30))
+
+        with override_settings(SERVICE_SLOT_MINUTES=15):
+            self.assertEqual(self.first_slot(at(7, 9, 7)), at(7, 9, 15))
+
+    def test_slot_after_an_appointment_is_aligned(self):
+        ServiceAppointment.objects.create(service=self.service, start_at=at(7, 9), end_at=at(7, 10, 10))
+
+        self.assertEqual(self.first_slot(at(7, 8)), at(7, 10, 30))
+
+    def test_slots_fall_in_working_hours(self):
+        self.assertEqual(self.first_slot(at(7, 6)), at(7, 9))
+        # Too late for a full hour on Monday
+        self.assertEqual(self.first_slot(at(7, 16, 30)), at(8, 9))
+        # Saturday and Sunday are off
+        self.assertEqual(self.first_slot(at(12, 10)), at(14, 9))
+
+    def test_providers_are_ordered_by_their_earliest_slot(self):
+        busy = self.service
+        free = create_service(slug='naturalist')
+        ServiceAppointment.objects.create(service=busy, start_at=at(7, 9), end_at=at(7, 12))
+
+        slots = next_available(service_type='guide', after=at(7, 9))
+
+        self.assertEqual(
+            [(start, service) for start, _, service in slots], [(at(7, 9), free), (at(7, 12), busy)]
+        )
+
+
+class BookServiceTests(TestCase):
+    def setUp(self):
+        self.service = create_service()
+
+    def test_booking_outside_working_hours_is_refused(self):
+        for start_at, end_at in [
+            (at(7, 16, 30), at(7, 17, 30)),
+            (at(7, 8, 30), at(7, 9, 30)),
+            (at(12, 10), at(12, 11)),
+            (at(7, 16), at(8, 10)),
+        ]:
+            with self.assertRaises(ServiceUnavailableError):
+                book_service(self.service, start_at, end_at)
+        self.assertFalse(ServiceAppointment.objects.exists())
+
+        appointment = book_service(self.service, at(7, 9), at(7, 17))
+        self.assertEqual(appointment.total_amount, Decimal('2000'))
+
+    def test_provider_cannot_be_double_booked(self):
+        book_service(self.service, at(7, 10), at(7, 11))
+
+        with self.assertRaises(ServiceUnavailableError):
+            book_service(self.service, at(7, 10, 30), at(7, 11, 30))
+        with self.assertRaises(ServiceUnavailableError):
+            book_service(self.service, at(7, 9), at(7, 12))
+
+        # Back to back is fine, as is another provider at the same time
+        book_service(self.service, at(7, 11), at(7, 12))
+        book_service(create_service(slug='naturalist'), at(7, 10, 30), at(7, 11, 30))
+        self.assertEqual(ServiceAppointment.objects.filter(status='reserved').count(), 3)
+
+    def test_released_appointments_free_the_provider(self):
+        book_service(self.service, at(7, 10), at(7, 11))
+        ServiceAppointment.objects.update(status='released')
+
+        book_service(self.service, at(7, 10), at(7, 11))
+        self.assertEqual(ServiceAppointment.objects.filter(status='reserved').count(), 1)
@@ -1,6 +1,10 @@
-from django.urls import path
-from . import views
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import ServiceViewSet
+
+router = DefaultRouter()
+router.register(r'services', ServiceViewSet, basename='service')
 
 urlpatterns = [
-    # Service URLs will be added here
-]
\ No newline at end of file
+    path('', include(router.urls)),
+]
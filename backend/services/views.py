@@ -1,3 +1,115 @@
-from django.shortcuts import render
+"""
+Local service API views for WayanTrails platform.
+"""
+from datetime import date, datetime, time, timedelta
 
-# Create your views here.
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from django_filters.rest_framework import DjangoFilterBackend
+from django.utils import timezone
+
+from .models import Service
+from .scheduling import (
+    ServiceUnavailableError, book_service, busy_intervals, free_intervals,
+    next_available, quote_service, working_windows
+)
+from .serializers import (
+    ServiceListSerializer, ServiceDetailSerializer, NextAvailableSerializer,
+    ServiceBookSerializer, ServiceAppointmentSerializer
+)
+
+
+class ServiceViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for the service catalogue, provider schedules and bookings."""
+
+    queryset = Service.objects.filter(is_active=True)
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['service_type', 'city', 'is_featured']
+    search_fields = ['name', 'description', 'provider_name', 'city']
+    ordering_fields = ['name', 'price_per_hour', 'price_per_day', 'created_at']
+    ordering = ['-is_featured', 'name']
+    lookup_field = 'slug'
+
+    def get_serializer_class(self):
+        """Return appropriate serializer based on action."""
+        if self.action == 'retrieve':
+            return ServiceDetailSerializer
+        return ServiceListSerializer
+
+    def get_queryset(self):
+        queryset = self.queryset
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('schedules')
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def next_available(self, request):
+        """
+        Earliest free slot of each provider, earliest first.
+        GET /api/services/services/next_available/?service_type=guide&duration_minutes=120
+        """
+        search = NextAvailableSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        duration = timedelta(minutes=search.validated_data['duration_minutes'])
+
+        slots = next_available(
+            service_type=search.validated_data.get('service_type'),
+            duration=duration,
+            after=search.validated_data.get('after'),
+            limit=search.validated_data['limit'],
+            queryset=self.filter_queryset(self.get_queryset())
+        )
+        return Response([
+            {
+                'start_at': start_at,
+                'end_at': end_at,
+                'service': ServiceListSerializer(service, context={'request': request}).data,
+                'quote': quote_service(service, start_at, end_at)
+            }
+            for start_at, end_at, service in slots
+        ])
+
+    @action(detail=True, methods=['get'])
+    def schedule(self, request, slug=None):
+        """
+        Working hours, booked and free time of a provider for a day.
+        GET /api/services/services/{slug}/schedule/?date=2025-01-15
+        """
+        try:
+            day = date.fromisoformat(request.query_params.get('date', ''))
+        except ValueError:
+            return Response({
+                'error': 'date parameter is required (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        service = self.get_object()
+        start_at = timezone.make_aware(datetime.combine(day, time.min))
+        end_at = start_at + timedelta(days=1)
+
+        def intervals(pairs):
+            return [{'start_at': start, 'end_at': end} for start, end in pairs]
+
+        return Response({
+            'service': service.slug,
+            'date': day,
+            'working': intervals(working_windows([service.pk], start_at, end_at).get(service.pk, [])),
+            'booked': intervals(busy_intervals([service.pk], start_at, end_at).get(service.pk, [])),
+            'free': intervals(free_intervals([service.pk], start_at, end_at).get(service.pk, []))
+        })
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def book(self, request, slug=None):
+        """Book the provider for an interval within their working hours."""
+        service = self.get_object()
+        serializer = ServiceBookSerializer(data=request.data, context={'request': request, 'service': service})
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            appointment = book_service(service, user=request.user, **serializer.validated_data)
+        except ServiceUnavailableError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return Response(ServiceAppointmentSerializer(appointment).data, status=status.HTTP_201_CREATED)
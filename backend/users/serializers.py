@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+from .models import Wishlist
+
 User = get_user_model()
 
 
@@ -34,3 +36,38 @@ class OTPVerifySerializer(serializers.Serializer):
     otp = serializers.CharField(max_length=6)
 
 
+
+
+class WishlistItemSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=Wishlist.CONTENT_TYPES)
+    object_id = serializers.IntegerField(min_value=1)
+
+
+class WishlistBulkSerializer(serializers.Serializer):
+    add = WishlistItemSerializer(many=True, required=False, default=list)
+    remove = WishlistItemSerializer(many=True, required=False, default=list)
+
+    MAX_ITEMS = 200
+
+    def validate(self, data):
+        if len(data['add']) + len(data['remove']) > self.MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_ITEMS} items can be changed per request."
+            )
+        return data
+
+
+class WishlistStatusSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=Wishlist.CONTENT_TYPES)
+    ids = serializers.CharField(help_text="Comma-separated listing IDs")
+
+    MAX_IDS = 100
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(part) for part in value.split(',') if part.strip()]
+        except ValueError:
+            raise serializers.ValidationError("IDs must be comma-separated integers.")
+        if len(ids) > self.MAX_IDS:
+            raise serializers.ValidationError(f"At most {self.MAX_IDS} IDs per request.")
+        return ids
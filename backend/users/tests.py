@@ -1,3 +1,39 @@
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from resorts.models import Resort
+
+from .models import User, Wishlist
+
+
+class WishlistBulkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='guest', password='secret', phone='+919876543210')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.resorts = [
+            Resort.objects.create(
+                name=f'Resort {index}', slug=f'resort-{index}', description='Resort', short_description='Resort',
+                resort_type='eco', phone='+919876543210', total_rooms=10, price_range_min=Decimal('4000'),
+                price_range_max=Decimal('8000'), cancellation_policy='Flexible', cover_image='resorts/cover.jpg',
+                address_line_1='Vythiri', city='Wayanad', postal_code='673576'
+            )
+            for index in range(3)
+        ]
+
+    def add(self, resorts):
+        return self.client.post('/api/users/wishlist/bulk/', {
+            'add': [{'content_type': 'resort', 'object_id': resort.pk} for resort in resorts],
+        }, format='json')
+
+    def test_added_counts_only_new_items(self):
+        self.assertEqual(self.add(self.resorts[:2]).data['added'], 2)
+
+        response = self.add(self.resorts)
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['added'], 1)
+        self.assertEqual(Wishlist.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.add(self.resorts).data['added'], 0)
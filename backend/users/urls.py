@@ -3,7 +3,15 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from .views import OTPRequestView, OTPVerifyView, MeView
+from .views import (
+    OTPRequestView,
+    OTPVerifyView,
+    MeView,
+    WishlistView,
+    WishlistItemView,
+    WishlistBulkView,
+    WishlistStatusView,
+)
 
 
 urlpatterns = [
@@ -17,6 +25,16 @@ urlpatterns = [
 
     # Me
     path('me/', MeView.as_view(), name='me'),
+
+    # Wishlist
+    path('wishlist/', WishlistView.as_view(), name='wishlist'),
+    path('wishlist/bulk/', WishlistBulkView.as_view(), name='wishlist-bulk'),
+    path('wishlist/status/', WishlistStatusView.as_view(), name='wishlist-status'),
+    path(
+        'wishlist/<str:content_type>/<int:object_id>/',
+        WishlistItemView.as_view(),
+        name='wishlist-item',
+    ),
 ]
 
 
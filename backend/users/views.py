@@ -2,18 +2,24 @@ from datetime import timedelta
 import random
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import OTPVerification
+from .models import OTPVerification, Wishlist
 from .serializers import (
     OTPRequestSerializer,
     OTPVerifySerializer,
     UserSerializer,
+    WishlistBulkSerializer,
+    WishlistItemSerializer,
+    WishlistStatusSerializer,
 )
+from .wishlist import get_existing_ids, hydrate_wishlist
 
 
 User = get_user_model()
@@ -92,3 +98,128 @@ class MeView(APIView):
         serializer.save()
         return Response(serializer.data)
 
+
+class WishlistView(APIView):
+    """List the current user's wishlist with card data, or save an item."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        items = Wishlist.objects.filter(user=request.user)
+
+        content_type = request.query_params.get('content_type')
+        if content_type:
+            items = items.filter(content_type=content_type)
+
+        return Response(hydrate_wishlist(items, context={'request': request}))
+
+    def post(self, request):
+        serializer = WishlistItemSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        content_type = serializer.validated_data['content_type']
+        object_id = serializer.validated_data['object_id']
+
+        if not get_existing_ids(content_type, [object_id]):
+            return Response({'detail': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        entry, created = Wishlist.objects.get_or_create(
+            user=request.user, content_type=content_type, object_id=object_id
+        )
+        data = hydrate_wishlist([entry], context={'request': request})[0]
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+class WishlistItemView(APIView):
+    """Remove a single item from the current user's wishlist."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def delete(self, request, content_type, object_id):
+        deleted, _ = Wishlist.objects.filter(
+            user=request.user, content_type=content_type, object_id=object_id
+        ).delete()
+        if not deleted:
+            return Response({'detail': 'Item not in wishlist'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class WishlistBulkView(APIView):
+    """Add and remove many wishlist items in a constant number of queries."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = WishlistBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        to_add = serializer.validated_data['add']
+        to_remove = serializer.validated_data['remove']
+
+        # Validate additions with one existence query per content type
+        requested = {}
+        for item in to_add:
+            requested.setdefault(item['content_type'], set()).add(item['object_id'])
+
+        new_entries = []
+        missing = []
+        for content_type, object_ids in requested.items():
+            existing = get_existing_ids(content_type, object_ids)
+            missing.extend(
+                {'content_type': content_type, 'object_id': object_id}
+                for object_id in sorted(object_ids - existing)
+            )
+            new_entries.extend(
+                Wishlist(user=request.user, content_type=content_type, object_id=object_id)
+                for object_id in existing
+            )
+
+        added = 0
+        if new_entries:
+            # ignore_conflicts skips items already wishlisted, so count what landed
+            with transaction.atomic():
+                user_wishlist = Wishlist.objects.filter(user=request.user)
+                before = user_wishlist.count()
+                Wishlist.objects.bulk_create(new_entries, ignore_conflicts=True)
+                added = user_wishlist.count() - before
+
+        removed = 0
+        if to_remove:
+            condition = Q()
+            for item in to_remove:
+                condition |= Q(content_type=item['content_type'], object_id=item['object_id'])
+            removed, _ = Wishlist.objects.filter(condition, user=request.user).delete()
+
+        return Response({
+            'added': added,
+            'removed': removed,
+            'not_found': missing,
+        })
+
+
+class WishlistStatusView(APIView):
+    """
+    Return which listings on a page are wishlisted.
+
+    GET /api/users/wishlist/status/?content_type=resort&ids=1,2,3
+    The `wishlisted` list is aligned with `ids`, so listing grids can render
+    hearts from a single indexed query.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        serializer = WishlistStatusSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        content_type = serializer.validated_data['content_type']
+        ids = serializer.validated_data['ids']
+
+        saved = set(
+            Wishlist.objects.filter(
+                user=request.user, content_type=content_type, object_id__in=ids
+            ).values_list('object_id', flat=True)
+        )
+
+        return Response({
+            'content_type': content_type,
+            'ids': ids,
+            'wishlisted': [object_id in saved for object_id in ids],
+        })
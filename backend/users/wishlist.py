@@ -0,0 +1,97 @@
+"""
+Wishlist hydration helpers for WayanTrails platform.
+
+A wishlist row only stores (content_type, object_id), so saved items are
+hydrated with card data from their own apps: one query per content type,
+projected down to the fields the list serializer actually renders.
+"""
+from collections import defaultdict
+
+
+def get_wishlist_sources():
+    """
+    Map wishlist content types to (model, list serializer) pairs.
+
+    Imported lazily so the users app never loads listing apps at import time.
+    """
+    from resorts.models import Resort
+    from resorts.serializers import ResortListSerializer
+    from homestays.models import Homestay
+    from homestays.serializers import HomestayListSerializer
+    from rentals.models import Vehicle
+    from rentals.serializers import VehicleListSerializer
+    from destinations.models import Destination
+    from destinations.serializers import DestinationListSerializer
+    from services.models import Service
+    from services.serializers import ServiceListSerializer
+
+    return {
+        'resort': (Resort, ResortListSerializer),
+        'homestay': (Homestay, HomestayListSerializer),
+        'rental': (Vehicle, VehicleListSerializer),
+        'destination': (Destination, DestinationListSerializer),
+        'service': (Service, ServiceListSerializer),
+    }
+
+
+def get_projection_fields(model, serializer_class):
+    """
+    Return the concrete model columns a list serializer reads.
+
+    Computed properties (ratings, display values) are skipped so `.only()`
+    never drops them into a deferred-field reload per row.
+    """
+    concrete = {field.name for field in model._meta.concrete_fields}
+    return [name for name in serializer_class.Meta.fields if name in concrete]
+
+
+def hydrate_wishlist(items, context=None):
+    """
+    Attach card data to wishlist rows.
+
+    Args:
+        items: Iterable of Wishlist instances
+        context: Serializer context (used for absolute image URLs)
+
+    Returns:
+        list: Dicts with wishlist metadata and an `item` card (None if the
+        listing no longer exists)
+    """
+    items = list(items)
+    sources = get_wishlist_sources()
+
+    ids_by_type = defaultdict(set)
+    for entry in items:
+        ids_by_type[entry.content_type].add(entry.object_id)
+
+    cards = {}
+    for content_type, object_ids in ids_by_type.items():
+        if content_type not in sources:
+            continue
+
+        model, serializer_class = sources[content_type]
+        objects = model.objects.filter(id__in=object_ids).only(
+            *get_projection_fields(model, serializer_class)
+        )
+        serialized = serializer_class(objects, many=True, context=context or {}).data
+        for card in serialized:
+            cards[(content_type, card['id'])] = card
+
+    return [
+        {
+            'id': entry.id,
+            'content_type': entry.content_type,
+            'object_id': entry.object_id,
+            'created_at': entry.created_at,
+            'item': cards.get((entry.content_type, entry.object_id)),
+        }
+        for entry in items
+    ]
+
+
+def get_existing_ids(content_type, object_ids):
+    """Return the subset of object_ids that exist for a content type."""
+    model, _ = get_wishlist_sources()[content_type]
+    return set(
+        model.objects.filter(id__in=object_ids).values_list('id', flat=True)
+    )
@@ -2,6 +2,7 @@
 Django settings for WayanTrails backend.
 """
 import os
+from decimal import Decimal
 from pathlib import Path
 from decouple import config
 # import dj_database_url  # Commented out for development
@@ -297,9 +298,94 @@ RAZORPAY_KEY_ID = config('RAZORPAY_KEY_ID', default='')
 RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default='')
 RAZORPAY_WEBHOOK_SECRET = config('RAZORPAY_WEBHOOK_SECRET', default='')
 
+# Gateway transport: pooled HTTP session, timeouts, retries and circuit breaker
+PAYMENT_GATEWAY_CONNECT_TIMEOUT_SECONDS = config('PAYMENT_GATEWAY_CONNECT_TIMEOUT_SECONDS', default=3.05, cast=float)
+PAYMENT_GATEWAY_READ_TIMEOUT_SECONDS = config('PAYMENT_GATEWAY_READ_TIMEOUT_SECONDS', default=10, cast=float)
+PAYMENT_GATEWAY_POOL_SIZE = config('PAYMENT_GATEWAY_POOL_SIZE', default=20, cast=int)
+PAYMENT_GATEWAY_MAX_RETRIES = config('PAYMENT_GATEWAY_MAX_RETRIES', default=2, cast=int)
+PAYMENT_GATEWAY_RETRY_BACKOFF_SECONDS = config('PAYMENT_GATEWAY_RETRY_BACKOFF_SECONDS', default=0.25, cast=float)
+PAYMENT_GATEWAY_BREAKER_FAILURE_THRESHOLD = config('PAYMENT_GATEWAY_BREAKER_FAILURE_THRESHOLD', default=5, cast=int)
+PAYMENT_GATEWAY_BREAKER_RESET_SECONDS = config('PAYMENT_GATEWAY_BREAKER_RESET_SECONDS', default=30, cast=int)
+
+# Gateway routing score weights (lower score wins): per second of recent
+# latency, per unit of recent error rate, per percentage point of fee
+PAYMENT_ROUTER_LATENCY_WEIGHT = config('PAYMENT_ROUTER_LATENCY_WEIGHT', default=1.0, cast=float)
+PAYMENT_ROUTER_ERROR_WEIGHT = config('PAYMENT_ROUTER_ERROR_WEIGHT', default=5.0, cast=float)
+PAYMENT_ROUTER_FEE_WEIGHT = config('PAYMENT_ROUTER_FEE_WEIGHT', default=0.5, cast=float)
+
+# Recently created gateway orders are cached (order_id -> payment) for callback lookups
+PAYMENT_ORDER_CACHE_TTL_SECONDS = config('PAYMENT_ORDER_CACHE_TTL_SECONDS', default=60 * 60 * 24, cast=int)
+
+# Checkout reuses a booking's unexpired order if it has at least this much time left
+PAYMENT_ORDER_REUSE_MIN_TTL_MINUTES = config('PAYMENT_ORDER_REUSE_MIN_TTL_MINUTES', default=30, cast=int)
+
+# Webhook processing (events are acknowledged first, then drained by a worker pool)
+WEBHOOK_WORKERS = config('WEBHOOK_WORKERS', default=2, cast=int)
+WEBHOOK_BATCH_SIZE = config('WEBHOOK_BATCH_SIZE', default=50, cast=int)
+WEBHOOK_POLL_INTERVAL_SECONDS = config('WEBHOOK_POLL_INTERVAL_SECONDS', default=30, cast=int)
+WEBHOOK_CLAIM_TIMEOUT_SECONDS = config('WEBHOOK_CLAIM_TIMEOUT_SECONDS', default=300, cast=int)
+WEBHOOK_MAX_ATTEMPTS = config('WEBHOOK_MAX_ATTEMPTS', default=8, cast=int)
+
+# Bulk status transitions (see bookings.state_machine): bookings locked and updated per chunk
+BOOKING_TRANSITION_CHUNK_SIZE = config('BOOKING_TRANSITION_CHUNK_SIZE', default=500, cast=int)
+
+# Batch booking creation (see bookings.batch): most bookings per request
+BOOKING_BATCH_MAX_SIZE = config('BOOKING_BATCH_MAX_SIZE', default=200, cast=int)
+
+# Checkout holds on per-night inventory (see bookings.inventory)
+INVENTORY_HOLD_TTL_MINUTES = config('INVENTORY_HOLD_TTL_MINUTES', default=20, cast=int)
+
+# Activity time slots (see destinations.slots): start times for activities without their own
+ACTIVITY_DEFAULT_SLOT_TIMES = config('ACTIVITY_DEFAULT_SLOT_TIMES', default='06:00,09:00,14:00').split(',')
+
+# Vehicle rentals (see rentals.availability): longest interval searched or reserved
+RENTAL_MAX_DAYS = config('RENTAL_MAX_DAYS', default=90, cast=int)
+
+# Local service appointments (see services.scheduling): slot start granularity and search horizon
+SERVICE_SLOT_MINUTES = config('SERVICE_SLOT_MINUTES', default=30, cast=int)
+SERVICE_SEARCH_HORIZON_DAYS = config('SERVICE_SEARCH_HORIZON_DAYS', default=14, cast=int)
+
+# Dynamic pricing (see bookings.pricing): most stays per quote request
+PRICING_QUOTE_MAX_STAYS = config('PRICING_QUOTE_MAX_STAYS', default=1000, cast=int)
+
+# Booking lifecycle jobs (see bookings.lifecycle; run run_lifecycle_jobs from cron)
+PENDING_BOOKING_TTL_HOURS = config('PENDING_BOOKING_TTL_HOURS', default=72, cast=int)
+PAYMENT_EXPIRY_GRACE_MINUTES = config('PAYMENT_EXPIRY_GRACE_MINUTES', default=30, cast=int)
+NO_SHOW_GRACE_DAYS = config('NO_SHOW_GRACE_DAYS', default=1, cast=int)
+LIFECYCLE_CHUNK_SIZE = config('LIFECYCLE_CHUNK_SIZE', default=500, cast=int)
+LIFECYCLE_CHUNK_PAUSE_SECONDS = config('LIFECYCLE_CHUNK_PAUSE_SECONDS', default=0.0, cast=float)
+
+# Bulk cancellation refunds (see bookings.bulk_refunds)
+BULK_REFUND_CONCURRENCY = config('BULK_REFUND_CONCURRENCY', default=4, cast=int)
+BULK_REFUND_RATE_PER_SECOND = config('BULK_REFUND_RATE_PER_SECOND', default=5, cast=float)
+BULK_REFUND_BATCH_SIZE = config('BULK_REFUND_BATCH_SIZE', default=50, cast=int)
+BULK_REFUND_MAX_ATTEMPTS = config('BULK_REFUND_MAX_ATTEMPTS', default=3, cast=int)
+BULK_REFUND_CLAIM_TIMEOUT_SECONDS = config('BULK_REFUND_CLAIM_TIMEOUT_SECONDS', default=300, cast=int)
+
+# Commission (percent) for listings without their own commission_rate (see bookings.settlement)
+DEFAULT_COMMISSION_RATE = config('DEFAULT_COMMISSION_RATE', default='10.00', cast=Decimal)
+
+# Occupancy metrics: nightly series are cached per listing and month (see bookings.occupancy)
+OCCUPANCY_CACHE_TTL_SECONDS = config('OCCUPANCY_CACHE_TTL_SECONDS', default=60 * 60 * 24, cast=int)
+
 # Mock Payment Mode (set to False in production with real Razorpay keys)
 USE_MOCK_PAYMENT = config('USE_MOCK_PAYMENT', default=True, cast=bool)
 
+# Gateways the payment router chooses between, e.g. 'razorpay,mock'. Mock
+# mode uses only the mock unless this is set, whatever keys are present.
+PAYMENT_GATEWAYS = config('PAYMENT_GATEWAYS', default='mock' if USE_MOCK_PAYMENT else 'razorpay').split(',')
+
+# Mock gateway behaviour for load tests (defaults: instant and always successful)
+MOCK_GATEWAY_LATENCY_DISTRIBUTION = config('MOCK_GATEWAY_LATENCY_DISTRIBUTION', default='fixed')  # fixed, uniform, lognormal
+MOCK_GATEWAY_LATENCY_MS = config('MOCK_GATEWAY_LATENCY_MS', default=0, cast=float)
+MOCK_GATEWAY_LATENCY_SIGMA = config('MOCK_GATEWAY_LATENCY_SIGMA', default=0.5, cast=float)
+MOCK_GATEWAY_FAILURE_RATE = config('MOCK_GATEWAY_FAILURE_RATE', default=0.0, cast=float)
+MOCK_GATEWAY_TIMEOUT_RATE = config('MOCK_GATEWAY_TIMEOUT_RATE', default=0.0, cast=float)
+MOCK_GATEWAY_AUTHORIZED_RATE = config('MOCK_GATEWAY_AUTHORIZED_RATE', default=0.0, cast=float)
+MOCK_GATEWAY_EMIT_WEBHOOKS = config('MOCK_GATEWAY_EMIT_WEBHOOKS', default=False, cast=bool)
+MOCK_GATEWAY_WEBHOOK_DELAY_MS = config('MOCK_GATEWAY_WEBHOOK_DELAY_MS', default=0, cast=float)
+MOCK_GATEWAY_WEBHOOK_DUPLICATE_RATE = config('MOCK_GATEWAY_WEBHOOK_DUPLICATE_RATE', default=0.0, cast=float)
+
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY', default='')
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 